@@ -0,0 +1,66 @@
+"""
+Cost of a cursor-only mouse move (event handling and the repaint
+it requests) with a few thousand items in the scene. Every move
+shifts the cursor by 1 px, which moves the crosshair on each of them
+when it is not snapped to the grid.
+
+Usage: python -m benchmarks.cursor_tracking
+"""
+import random
+
+from PySide6.QtCore import Qt, QPointF
+from PySide6.QtGui import QMouseEvent, QPen
+from PySide6.QtWidgets import QGraphicsRectItem
+
+from benchmarks.utils import create_window, get_application, measure
+
+
+def main(items_count: int = 5000):
+    app = get_application()
+    root_ui = create_window()
+    view = root_ui.work_area
+    scene = view.scene()
+    scene.setSceneRect(0, 0, 5000, 5000)
+    rng = random.Random(0)
+    pen = QPen(Qt.black, 2)
+    for _ in range(items_count):
+        item = QGraphicsRectItem(
+            rng.uniform(0, 4900), rng.uniform(0, 4900),
+            rng.uniform(5, 100), rng.uniform(5, 100)
+        )
+        item.setPen(pen)
+        scene.addItem(item)
+    view.fitInView(scene.sceneRect())
+    app.processEvents()
+
+    positions = iter(range(10**9))
+
+    def cursor_move():
+        pos = QPointF(200 + next(positions) % 800, 300)
+        # Moves are applied once per frame, this one at once
+        view.mouseMoveEvent(QMouseEvent(
+            QMouseEvent.MouseMove, pos, pos,
+            Qt.NoButton, Qt.NoButton, Qt.NoModifier
+        ))
+        view.flush_mouse_move()
+        app.processEvents()
+
+    print(f"viewport: {view.viewport().width()}x{view.viewport().height()}, "
+          f"items: {items_count}")
+    # With grid snapping most 1 px moves leave the cursor where it was
+    # and repaint nothing, so the snapped figures are for reference only
+    for fit_cursor_into_grid in (False, True):
+        view.fit_cursor_into_grid = fit_cursor_into_grid
+        for draw_grid, draw_ruler in (
+                (True, True), (True, False), (False, True)
+        ):
+            view.draw_grid, view.draw_ruler = draw_grid, draw_ruler
+            print(
+                f"snap {fit_cursor_into_grid!s:5} "
+                f"grid {draw_grid!s:5} ruler {draw_ruler!s:5}: "
+                f"{measure(cursor_move):7.3f} ms/move"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Progressive native document loading compared to the blocking one:
+time to the first paint of the viewport, total load time and the
+longest time the event loop was blocked while loading. Every run
+checks that the loaded scene matches the saved one, stacking order
+included.
+
+Usage: python -m benchmarks.document_loading [items count ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from PySide6.QtCore import Qt, QEventLoop, QTimer
+from PySide6.QtWidgets import QGraphicsItem, QGraphicsScene
+
+from benchmarks.native_format import populate, timed
+from benchmarks.utils import create_window, get_application
+from core.file_formats import native
+from core.graphics.graphics_items import (
+    VGEGraphicsLineItem,
+    VGEGraphicsPolygonItem,
+)
+
+ITEMS_COUNTS = (10_000, 100_000, 1_000_000)
+
+
+def get_item_key(item: QGraphicsItem) -> str:
+    if isinstance(item, VGEGraphicsLineItem):
+        geometry = item.line().toTuple()
+        brush = None
+    else:
+        geometry = (
+            tuple(point.toTuple() for point in item.polygon())
+            if isinstance(item, VGEGraphicsPolygonItem)
+            else item.rect().getRect()
+        )
+        brush = (item.brush().color().rgba(), item.brush().style())
+    pen = item.pen()
+    return repr((
+        type(item).__name__, geometry, item.pos().toTuple(), brush,
+        pen.color().rgba(), pen.widthF(), pen.style(),
+    ))
+
+
+def check_stacking(scene: QGraphicsScene, keys: list[str], first_count: int):
+    """
+    Checks that the scene holds the items of `keys` (in stacking order)
+    and that none of the first `first_count` items, which are inserted
+    out of order, is stacked above an item it collides with that used
+    to be stacked above it
+    """
+    items = scene.items(Qt.AscendingOrder)
+    assert sorted(map(get_item_key, items)) == sorted(keys)
+    expected_ranks = {key: rank for rank, key in enumerate(keys)}
+    ranks = {item: rank for rank, item in enumerate(items)}
+    for item in items[:first_count]:
+        expected_rank = expected_ranks[get_item_key(item)]
+        for other in scene.items(
+                item.sceneBoundingRect(), Qt.IntersectsItemBoundingRect
+        ):
+            if ranks[other] > ranks[item]:
+                assert expected_ranks[get_item_key(other)] > expected_rank
+
+
+def load_progressively(
+        root_ui, path: str
+) -> tuple[native.DocumentLoader, int, float]:
+    """
+    Returns the finished loader, the count of items inserted before
+    the first paint and the longest event loop stall
+    """
+    loader = native.DocumentLoader(
+        root_ui.graphics_scene, root_ui.work_area, native.read_document(path)
+    )
+    event_loop = QEventLoop()
+    loader.finished.connect(event_loop.quit)
+
+    # A zero interval timer fires on every event loop iteration
+    longest_stall = 0.0
+    last_tick = time.perf_counter()
+
+    def tick():
+        nonlocal longest_stall, last_tick
+        now = time.perf_counter()
+        longest_stall = max(longest_stall, now - last_tick)
+        last_tick = now
+
+    heartbeat = QTimer()
+    heartbeat.timeout.connect(tick)
+    heartbeat.start(0)
+    loader.start()
+    first_count = loader.loaded_count
+    last_tick = time.perf_counter()
+    event_loop.exec()
+    heartbeat.stop()
+    return loader, first_count, longest_stall
+
+
+def main(items_counts=ITEMS_COUNTS):
+    root_ui = create_window(1920, 1080)
+    scene = root_ui.graphics_scene
+    print(f"{'items':>9} {'blocking':>10} {'first items':>12} "
+          f"{'first paint':>12} {'total':>10} {'longest stall':>14}")
+    for items_count in items_counts:
+        scene.clear()
+        populate(scene, items_count)
+        get_application().processEvents()
+        keys = list(map(get_item_key, scene.items(Qt.AscendingOrder)))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "drawing" + native.FILE_EXTENSION)
+            native.save_scene(scene, path)
+            root_ui.work_area.centerOn(scene.sceneRect().center())
+            blocking_time, _ = timed(lambda: native.load_scene(scene, path))
+            # Let the scene index the items, as it would in the window
+            # before the next document is opened
+            get_application().processEvents()
+            loader, first_count, longest_stall = load_progressively(
+                root_ui, path
+            )
+
+        check_stacking(scene, keys, first_count)
+        print(f"{items_count:>9} {blocking_time:>8.0f}ms {first_count:>12} "
+              f"{loader.first_paint_time * 1000:>10.0f}ms "
+              f"{loader.load_time * 1000:>8.0f}ms "
+              f"{longest_stall * 1000:>12.0f}ms", flush=True)
+
+
+if __name__ == "__main__":
+    main(tuple(map(int, sys.argv[1:])) or ITEMS_COUNTS)
@@ -0,0 +1,109 @@
+"""
+Freehand strokes drawn through the view's mouse events, one sample per
+pixel of a noisy spiral, with the tolerances below: the cost of a
+sample, the retained/raw point ratio, and the paint time of the
+finished stroke compared to the same stroke with every sample kept.
+
+Usage: python -m benchmarks.freehand [samples count ...]
+"""
+import sys
+import time
+
+import numpy as np
+from PySide6.QtCore import Qt, QPointF
+from PySide6.QtGui import QMouseEvent, QPen, QPolygonF
+
+from benchmarks.utils import create_window, get_application, measure
+from core.graphics.graphics_items import VGEGraphicsFreehandItem
+from core.graphics.graphics_tools import GeometryTool
+
+SAMPLES_COUNTS = (10_000, 30_000)
+TOLERANCES = (0.5, 1.0, 2.0)
+
+
+def get_samples(count: int, size: float) -> np.ndarray:
+    """Pointer positions along a spiral, 1 px apart, with jitter"""
+    random = np.random.default_rng(count)
+    # The arc length of r = a * angle grows as a * angle ** 2 / 2
+    a = size / 2 / np.sqrt(2 * count / (size / 2))
+    angles = np.sqrt(2 * np.arange(1, count + 1) / a)
+    radii = a * angles
+    samples = np.column_stack((
+        size / 2 + radii * np.cos(angles), size / 2 + radii * np.sin(angles)
+    ))
+    return samples + random.normal(0, 0.35, samples.shape)
+
+
+def mouse_event(event_type, pos, button) -> QMouseEvent:
+    return QMouseEvent(event_type, pos, pos, button, button, Qt.NoModifier)
+
+
+def draw_stroke(view, samples: np.ndarray) -> VGEGraphicsFreehandItem:
+    app = get_application()
+    positions = [QPointF(x, y) for x, y in samples.tolist()]
+    view.mouseMoveEvent(
+        mouse_event(QMouseEvent.MouseMove, positions[0], Qt.NoButton)
+    )
+    view.mousePressEvent(
+        mouse_event(QMouseEvent.MouseButtonPress, positions[0], Qt.LeftButton)
+    )
+    stroke = view.active_graphic_tool.current_instance
+    for pos in positions[1:]:
+        view.mouseMoveEvent(
+            mouse_event(QMouseEvent.MouseMove, pos, Qt.LeftButton)
+        )
+    view.mouseReleaseEvent(mouse_event(
+        QMouseEvent.MouseButtonRelease, positions[-1], Qt.LeftButton
+    ))
+    app.processEvents()
+    return stroke
+
+
+def main(samples_counts=SAMPLES_COUNTS):
+    root_ui = create_window(1920, 1080)
+    view = root_ui.work_area
+    view.draw_grid = view.draw_ruler = False
+    scene = root_ui.graphics_scene
+    viewport = view.viewport()
+    size = min(viewport.width(), viewport.height()) - 20
+    scene.setSceneRect(0, 0, size, size)
+    view.resetTransform()
+    view.centerOn(size / 2, size / 2)
+    tool = GeometryTool()
+    tool.set_geometry_type("freehand")
+    view.setActiveGraphicTool(tool)
+    ratios = []
+    tool.on_stroke_finished = lambda retained, raw: ratios.append(
+        retained / raw
+    )
+
+    print(f"{'samples':>8} {'tolerance':>9} {'per sample':>11} "
+          f"{'kept':>7} {'paint':>9} {'raw paint':>10}")
+    for count in samples_counts:
+        samples = get_samples(count, size)
+        view_samples = np.array([
+            view.mapFromScene(QPointF(x, y)).toTuple()
+            for x, y in samples.tolist()
+        ], dtype=float)
+        for tolerance in TOLERANCES:
+            scene.clear()
+            tool.freehand_tolerance = tolerance
+            start = time.perf_counter()
+            stroke = draw_stroke(view, view_samples)
+            sample_time = (time.perf_counter() - start) / count * 1e6
+            paint_time = measure(viewport.repaint, 10)
+
+            # The same stroke with every sample
+            stroke.setPolygon(QPolygonF(
+                [QPointF(x, y) for x, y in samples.tolist()]
+            ))
+            stroke.setPen(QPen(Qt.black, 2))
+            raw_paint_time = measure(viewport.repaint, 10)
+            print(f"{count:>8} {tolerance:>7.1f}px {sample_time:>8.1f} us "
+                  f"{ratios[-1]:>7.2%} {paint_time:>7.2f}ms "
+                  f"{raw_paint_time:>8.2f}ms", flush=True)
+    scene.clear()
+
+
+if __name__ == "__main__":
+    main(tuple(map(int, sys.argv[1:])) or SAMPLES_COUNTS)
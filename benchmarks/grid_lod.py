@@ -0,0 +1,47 @@
+"""
+Grid and ruler paint time of a frame at a new zoom level (every tile
+cache misses) across a zoom sweep, with and without level-of-detail
+culling of densely packed line levels.
+
+Usage: python -m benchmarks.grid_lod
+"""
+from benchmarks.utils import create_window, measure
+
+
+def main():
+    root_ui = create_window()
+    view = root_ui.work_area
+    view.scene().setSceneRect(-10**7, -10**7, 2 * 10**7, 2 * 10**7)
+    view.grid_step_rate = view.GridStepRate.Binary
+    window = view.window()
+    viewport = view.viewport()
+    caches = (view.grid_render_cache, view.ruler_render_cache)
+    default_spacing = getattr(view, "grid_min_line_spacing", 0.0)
+
+    def zoom_frame():
+        for cache in caches:
+            cache.invalidate()
+        viewport.repaint()
+
+    for window_height in (2160, 160):
+        window.resize(window.width(), window_height)
+        print(f"viewport: {viewport.width()}x{viewport.height()}")
+        for scale in (0.003, 0.02, 0.15, 1.0, 7.0, 45.0):
+            view.resetTransform()
+            view.scale(scale, scale)
+            times = []
+            for spacing in (0.0, default_spacing):
+                for cache in caches:
+                    cache.min_line_spacing = spacing
+                times.append(measure(zoom_frame, 50))
+            _, small_step = view.get_grid_steps()
+            print(
+                f"  scale {scale:7.3f}: "
+                f"small step {small_step * scale:5.1f} px, "
+                f"no culling {times[0]:7.3f} ms, "
+                f"culling at {default_spacing} px {times[1]:7.3f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Grid paint time for panning and cursor-only updates.
+
+Usage: python -m benchmarks.grid_paint
+"""
+from PySide6.QtCore import Qt, QPointF
+from PySide6.QtGui import QMouseEvent
+
+from benchmarks.utils import create_window, measure
+
+
+def main():
+    root_ui = create_window()
+    view = root_ui.work_area
+    view.draw_ruler = False
+    view.scene().setSceneRect(-50000, -50000, 100000, 100000)
+    viewport = view.viewport()
+    horizontal_scrollbar = view.horizontalScrollBar()
+
+    def pan():
+        horizontal_scrollbar.setValue(horizontal_scrollbar.value() + 1)
+        viewport.repaint()
+
+    positions = iter(range(10**9))
+
+    def cursor_move():
+        pos = QPointF(200 + next(positions) % 400, 300)
+        # Moves are applied once per frame, this one at once
+        view.mouseMoveEvent(QMouseEvent(
+            QMouseEvent.MouseMove, pos, pos,
+            Qt.NoButton, Qt.NoButton, Qt.NoModifier
+        ))
+        view.flush_mouse_move()
+        viewport.repaint()
+
+    print(f"viewport: {viewport.width()}x{viewport.height()}")
+    for scale in (1.0, 1.1 ** 7, 0.25):
+        view.resetTransform()
+        view.scale(scale, scale)
+        print(
+            f"scale {scale:6.3f}: "
+            f"pan {measure(pan):7.3f} ms/frame, "
+            f"cursor {measure(cursor_move):7.3f} ms/frame"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Importing generated SVG and DXF drawings in the window: time to parse
+the whole file in the worker thread alone, total import time, the
+longest slice of items added on the event loop, which should stay well
+below a frame (16 ms), and the longest time the event loop was blocked
+while importing, which includes the repaints of the items added.
+
+Usage: python -m benchmarks.importer [entities count ...]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from PySide6.QtCore import QEventLoop, QTimer, Slot
+
+from benchmarks.utils import create_window, get_application
+from core.file_formats import dxf, importer, svg
+
+ENTITIES_COUNTS = (10_000, 100_000)
+SIZE = 10_000
+
+
+def write_svg(path: str, entities_count: int):
+    shapes = (
+        '<rect x="{0}" y="{1}" width="{5}" height="{6}" fill="#{4:06x}"/>',
+        '<circle cx="{0}" cy="{1}" r="{5}" stroke="#{4:06x}" fill="none"/>',
+        '<line x1="{0}" y1="{1}" x2="{2}" y2="{3}" stroke="#{4:06x}"/>',
+        '<polygon points="{0},{1} {2},{1} {2},{3}" fill="#{4:06x}"/>',
+    )
+    with open(path, "w") as file:
+        file.write(f'<svg xmlns="http://www.w3.org/2000/svg" '
+                   f'width="{SIZE}" height="{SIZE}">\n<g stroke-width="2">\n')
+        for index in range(entities_count):
+            x, y = random.uniform(0, SIZE), random.uniform(0, SIZE)
+            width, height = random.uniform(1, 50), random.uniform(1, 50)
+            file.write(shapes[index % len(shapes)].format(
+                round(x, 2), round(y, 2),
+                round(x + width, 2), round(y + height, 2),
+                random.randrange(0x1000000),
+                round(width, 2), round(height, 2),
+            ) + "\n")
+        file.write("</g>\n</svg>\n")
+
+
+def write_dxf(path: str, entities_count: int):
+    with open(path, "w") as file:
+        file.write("0\nSECTION\n2\nENTITIES\n")
+        for index in range(entities_count):
+            x, y = random.uniform(0, SIZE), random.uniform(0, SIZE)
+            color = random.randrange(1, 256)
+            if index % 3 == 0:
+                file.write(f"0\nLINE\n8\n0\n62\n{color}\n"
+                           f"10\n{x:.3f}\n20\n{y:.3f}\n"
+                           f"11\n{x + 20:.3f}\n21\n{y + 5:.3f}\n")
+            elif index % 3 == 1:
+                file.write(f"0\nCIRCLE\n8\n0\n62\n{color}\n10\n{x:.3f}\n"
+                           f"20\n{y:.3f}\n40\n{random.uniform(1, 25):.3f}\n")
+            else:
+                file.write(f"0\nLWPOLYLINE\n8\n0\n62\n{color}\n70\n1\n"
+                           f"10\n{x:.3f}\n20\n{y:.3f}\n"
+                           f"10\n{x + 30:.3f}\n20\n{y:.3f}\n"
+                           f"10\n{x + 15:.3f}\n20\n{y + 20:.3f}\n")
+        file.write("0\nENDSEC\n0\nEOF\n")
+
+
+def parse(path: str) -> tuple[int, float]:
+    """Returns the count of entities parsed and the time taken"""
+    parser = importer.PARSERS[os.path.splitext(path)[1]]
+    start = time.perf_counter()
+    with open(path, "rb") as file:
+        count = sum(1 for _ in parser(file, Counter()))
+    return count, time.perf_counter() - start
+
+
+class TimedImporter(importer.DocumentImporter):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.longest_slice = 0.0
+
+    @Slot()
+    def _import_batch(self):
+        start = time.perf_counter()
+        super()._import_batch()
+        self.longest_slice = max(
+            self.longest_slice, time.perf_counter() - start
+        )
+
+
+def import_file(root_ui, path: str) -> tuple[TimedImporter, float]:
+    """Returns the finished importer and the longest event loop stall"""
+    document_importer = TimedImporter(root_ui.graphics_scene, path)
+    event_loop = QEventLoop()
+    document_importer.finished.connect(event_loop.quit)
+
+    # A zero interval timer fires on every event loop iteration
+    longest_stall = 0.0
+    last_tick = time.perf_counter()
+
+    def tick():
+        nonlocal longest_stall, last_tick
+        now = time.perf_counter()
+        longest_stall = max(longest_stall, now - last_tick)
+        last_tick = now
+
+    heartbeat = QTimer()
+    heartbeat.timeout.connect(tick)
+    heartbeat.start(0)
+    document_importer.start()
+    last_tick = time.perf_counter()
+    event_loop.exec()
+    heartbeat.stop()
+    return document_importer, longest_stall
+
+
+def main(entities_counts=ENTITIES_COUNTS):
+    random.seed(0)
+    root_ui = create_window(1920, 1080)
+    scene = root_ui.graphics_scene
+    print(f"{'format':>6} {'entities':>9} {'size':>8} {'parse':>9} "
+          f"{'import':>9} {'longest slice':>14} {'longest stall':>14}")
+    for entities_count in entities_counts:
+        with tempfile.TemporaryDirectory() as directory:
+            for extension, write in (
+                    (svg.FILE_EXTENSION, write_svg),
+                    (dxf.FILE_EXTENSION, write_dxf),
+            ):
+                path = os.path.join(directory, "drawing" + extension)
+                write(path, entities_count)
+                parsed_count, parse_time = parse(path)
+                assert parsed_count == entities_count
+                scene.clear()
+                get_application().processEvents()
+                document_importer, longest_stall = import_file(root_ui, path)
+                assert len(document_importer.items) == entities_count
+                assert len(scene.items()) == entities_count
+                print(f"{extension[1:]:>6} {entities_count:>9} "
+                      f"{os.path.getsize(path) >> 10:>6}KB "
+                      f"{parse_time * 1000:>7.0f}ms "
+                      f"{document_importer.load_time * 1000:>7.0f}ms "
+                      f"{document_importer.longest_slice * 1000:>12.1f}ms "
+                      f"{longest_stall * 1000:>12.1f}ms", flush=True)
+
+
+if __name__ == "__main__":
+    main(tuple(map(int, sys.argv[1:])) or ENTITIES_COUNTS)
@@ -0,0 +1,118 @@
+"""
+Mouse moves at a mouse's polling rate while drawing a polygon, with
+the view coalescing them into one tool update per frame and with
+every move forwarded to the tool. The moves are sent in real time
+for a second, with the event loop running between them, over a scene
+of polygons the cursor snaps to. For each rate, the updates the
+tool got are counted, and the lag is the time from when the last move
+was due to its position reaching the tool: moves handled slower than
+they come in are sent late, and the lag grows over the second.
+
+Usage: python -m benchmarks.input_coalescing [vertices count]
+"""
+import sys
+import time
+
+import numpy as np
+from PySide6.QtCore import Qt, QPointF
+from PySide6.QtGui import QMouseEvent
+
+from benchmarks.object_snapping import SCENE_SIZE, create_polygons
+from benchmarks.utils import create_window, get_application
+from core.graphics.graphics_tools import GeometryTool
+
+RATES = (125, 1000, 8000)
+DURATION = 1.0
+POLYGON_VERTICES = 200
+
+
+class UncoalescedGeometryTool(GeometryTool):
+    def coalesces_moves(self) -> bool:
+        return False
+
+
+def mouse_event(event_type, pos: QPointF, button) -> QMouseEvent:
+    buttons = Qt.NoButton if event_type != QMouseEvent.MouseButtonPress \
+        else button
+    return QMouseEvent(event_type, pos, pos, button, buttons, Qt.NoModifier)
+
+
+def start_polygon(view, center: QPointF):
+    """Draws a polygon of POLYGON_VERTICES points around `center`"""
+    for angle in np.linspace(0, 2 * np.pi, POLYGON_VERTICES).tolist():
+        pos = center + 300 * QPointF(np.cos(angle), np.sin(angle))
+        view.mouseMoveEvent(
+            mouse_event(QMouseEvent.MouseMove, pos, Qt.NoButton)
+        )
+        view.mousePressEvent(
+            mouse_event(QMouseEvent.MouseButtonPress, pos, Qt.LeftButton)
+        )
+        view.mouseReleaseEvent(
+            mouse_event(QMouseEvent.MouseButtonRelease, pos, Qt.LeftButton)
+        )
+
+
+def send_moves(view, tool, rate: int, center: QPointF) -> tuple[int, float]:
+    """Returns the count of updates the tool got and the lag in ms"""
+    app = get_application()
+    updates = []
+    tool_move = tool.mouseMoveEvent
+    tool.mouseMoveEvent = lambda event: (
+        updates.append(event.position()), tool_move(event)
+    )
+    count = int(rate * DURATION)
+    angles = np.linspace(0, 4 * np.pi, count)
+    positions = [
+        center + QPointF(x, y) for x, y in
+        np.column_stack((np.cos(angles), np.sin(angles))).dot(200).tolist()
+    ]
+    start = time.perf_counter()
+    for index, pos in enumerate(positions):
+        while time.perf_counter() < start + index / rate:
+            app.processEvents()
+        view.mouseMoveEvent(
+            mouse_event(QMouseEvent.MouseMove, pos, Qt.NoButton)
+        )
+    while not updates or updates[-1] != positions[-1]:
+        app.processEvents()
+    lag = time.perf_counter() - (start + (count - 1) / rate)
+    del tool.mouseMoveEvent
+    return len(updates), lag * 1000
+
+
+def main(vertices_count: int = 100_000):
+    app = get_application()
+    root_ui = create_window(1920, 1080)
+    view = root_ui.work_area
+    scene = root_ui.graphics_scene
+    scene.setSceneRect(0, 0, SCENE_SIZE, SCENE_SIZE)
+    create_polygons(scene, vertices_count)
+    view.snap_to_objects = True
+    view.resetTransform()
+    view.centerOn(SCENE_SIZE / 2, SCENE_SIZE / 2)
+    app.processEvents()
+    viewport = view.viewport()
+    center = QPointF(viewport.width() / 2, viewport.height() / 2)
+
+    print(f"vertices: {vertices_count}, "
+          f"polygon vertices: {POLYGON_VERTICES}, "
+          f"refresh rate: {view.screen().refreshRate():.0f} Hz")
+    print(f"{'rate':>7} {'coalesced':>10} {'updates':>8} {'lag':>10}")
+    for rate in RATES:
+        for tool in (GeometryTool(), UncoalescedGeometryTool()):
+            tool.set_geometry_type("polygon")
+            view.setActiveGraphicTool(tool)
+            start_polygon(view, center)
+            polygon = tool.current_instance
+            updates, lag = send_moves(view, tool, rate, center)
+            print(f"{rate:>5}Hz {tool.coalesces_moves()!s:>10} "
+                  f"{updates:>8} {lag:>8.1f}ms", flush=True)
+            view.mouseReleaseEvent(mouse_event(
+                QMouseEvent.MouseButtonRelease, center, Qt.MiddleButton
+            ))
+            scene.removeItem(polygon)
+    scene.clear()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
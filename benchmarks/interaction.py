@@ -0,0 +1,98 @@
+"""
+Frame time while zooming with the wheel and panning by right-button
+drag, with the view painting its interaction snapshot and painting
+every item, in the synthetic scenes of the benchmark suite. Every step
+is applied at once and followed by a repaint of the viewport. The time
+of the snapshot, rendered at the first step, and of the full quality
+frame painted once idle are shown apart.
+
+Usage: python -m benchmarks.interaction [items count ...]
+"""
+import statistics
+import sys
+import time
+
+from PySide6.QtCore import Qt, QPointF
+from PySide6.QtGui import QMouseEvent
+
+from benchmarks.suite import create_scene, wheel_event
+from benchmarks.utils import create_window, get_application
+
+ITEMS_COUNTS = (10_000, 100_000)
+ZOOM_STEPS = 10
+PAN_MOVES = 40
+
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) * 1000
+
+
+def zoom_steps(view, center: QPointF) -> list[float]:
+    return [
+        timed(lambda: (
+            view.wheelEvent(wheel_event(center, delta)), view.finish_zoom(),
+            view.viewport().repaint()
+        ))
+        for delta in [120] * ZOOM_STEPS + [-120] * ZOOM_STEPS
+    ]
+
+
+def pan_moves(view, center: QPointF) -> list[float]:
+    def move(pos: QPointF, buttons):
+        view.mouseMoveEvent(QMouseEvent(
+            QMouseEvent.MouseMove, pos, pos, Qt.NoButton, buttons,
+            Qt.NoModifier
+        ))
+        view.flush_mouse_move()
+
+    view.mousePressEvent(QMouseEvent(
+        QMouseEvent.MouseButtonPress, center, center,
+        Qt.RightButton, Qt.RightButton, Qt.NoModifier
+    ))
+    pos = QPointF(center)
+    times = []
+    for index in range(PAN_MOVES):
+        pos += QPointF(9, 4) if index % 20 < 10 else QPointF(-9, -4)
+        times.append(timed(lambda: (
+            move(pos, Qt.RightButton), view.viewport().repaint()
+        )))
+    view.mouseReleaseEvent(QMouseEvent(
+        QMouseEvent.MouseButtonRelease, pos, pos,
+        Qt.RightButton, Qt.NoButton, Qt.NoModifier
+    ))
+    return times
+
+
+def main(*items_counts: int):
+    get_application()
+    root_ui = create_window(1920, 1080)
+    view = root_ui.work_area
+    scene = root_ui.graphics_scene
+    viewport = view.viewport()
+    center = QPointF(viewport.width() / 2, viewport.height() / 2)
+
+    print(f"{'items':>8} {'snapshot':>8} {'step':>5} {'first':>10} "
+          f"{'median':>10} {'idle frame':>11}")
+    for items_count in items_counts or ITEMS_COUNTS:
+        create_scene(scene, items_count)
+        for interaction_snapshot in (False, True):
+            view.interaction_snapshot = interaction_snapshot
+            for name, steps in (("zoom", zoom_steps), ("pan", pan_moves)):
+                view.fitInView(scene.sceneRect(), Qt.KeepAspectRatio)
+                view.scale(4, 4)
+                viewport.repaint()
+                times = steps(view, center)
+                idle = timed(lambda: (
+                    view.end_interaction(), viewport.repaint()
+                ))
+                print(f"{items_count:>8} {interaction_snapshot!s:>8} "
+                      f"{name:>5} {times[0]:>8.2f}ms "
+                      f"{statistics.median(times[1:]):>8.2f}ms "
+                      f"{idle:>9.2f}ms", flush=True)
+        scene.clear()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
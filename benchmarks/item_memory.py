@@ -0,0 +1,123 @@
+"""
+Memory used by drawn items: bytes per item (finished 4-vertex polygons
+and rectangles) and bytes per vertex (one polygon with many vertices,
+while it is drawn and once finished), with the point storage of the
+items compared to the former one (a __dict__ per item and a list of
+QPointF). Every measurement runs in a fresh process and counts the
+growth of its resident set size, so the memory allocated by Qt is
+included.
+
+Usage: python -m benchmarks.item_memory [items count] [vertices count]
+"""
+import gc
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from types import SimpleNamespace
+
+from PySide6.QtCore import Qt, QEvent, QPointF
+from PySide6.QtGui import QMouseEvent
+from PySide6.QtWidgets import QGraphicsPolygonItem, QGraphicsRectItem
+
+from benchmarks.utils import get_application
+from core.graphics.graphics_items import (
+    VGEGraphicsPolygonItem,
+    VGEGraphicsRectItem,
+)
+
+ITEMS_COUNT = 100_000
+VERTICES_COUNT = 200_000
+
+
+class FormerPolygonItem(QGraphicsPolygonItem):
+    """The polygon item with the former point storage"""
+    def __init__(self, start_point, scene=None):
+        super().__init__()
+        self.start_point = start_point
+        self.points: list = [start_point, ]
+        self.setPolygon([
+            *self.points,
+            QPointF(start_point.x(), start_point.y() - 1),
+        ])
+
+    def add_point(self, point):
+        self.points.append(point)
+
+    def mouse_release_action(self, event, tool):
+        if event.button() == Qt.MiddleButton:
+            self.setPolygon(self.points)
+            tool.current_instance = None
+
+
+class FormerRectItem(QGraphicsRectItem):
+    def __init__(self, start_point, scene=None):
+        super().__init__()
+        self.start_point = start_point
+        self.points: list = [start_point, ]
+        self.setRect(start_point.x(), start_point.y(), 1, 1)
+
+
+LAYOUTS = {
+    "former": (FormerPolygonItem, FormerRectItem),
+    "compact": (VGEGraphicsPolygonItem, VGEGraphicsRectItem),
+}
+
+
+def get_resident_size() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * 4096
+
+
+def draw_polygon(item_class, vertices_count: int, finish: bool = True):
+    item = item_class(QPointF(0, 0))
+    for n in range(1, vertices_count):
+        item.add_point(QPointF(n, n % 7))
+    if finish:
+        release = QMouseEvent(
+            QEvent.MouseButtonRelease, QPointF(), QPointF(),
+            Qt.MiddleButton, Qt.NoButton, Qt.NoModifier
+        )
+        item.mouse_release_action(release, SimpleNamespace())
+    return item
+
+
+def measure_memory(layout: str, case: str, count: int) -> float:
+    """Returns the bytes per item or per vertex of the case"""
+    get_application()
+    polygon_class, rect_class = LAYOUTS[layout]
+    gc.collect()
+    start_size = get_resident_size()
+    if case == "polygons":
+        items = [draw_polygon(polygon_class, 4) for _ in range(count)]
+    elif case == "rectangles":
+        items = [rect_class(QPointF(n, n)) for n in range(count)]
+    else:
+        items = [draw_polygon(polygon_class, count, case == "vertices")]
+    gc.collect()
+    used = get_resident_size() - start_size
+    del items
+    return used / count
+
+
+def main(items_count=ITEMS_COUNT, vertices_count=VERTICES_COUNT):
+    cases = (
+        ("polygons", "bytes per 4-vertex polygon", items_count),
+        ("rectangles", "bytes per rectangle", items_count),
+        ("drawing", "bytes per vertex while drawn", vertices_count),
+        ("vertices", "bytes per vertex when finished", vertices_count),
+    )
+    print(f"{'':>32} {'former':>9} {'compact':>9}")
+    context = get_context("spawn")
+    for case, title, count in cases:
+        sizes = []
+        for layout in LAYOUTS:
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                sizes.append(
+                    executor.submit(measure_memory, layout, case, count)
+                    .result()
+                )
+        print(f"{title:>32} {sizes[0]:>9.0f} {sizes[1]:>9.0f}", flush=True)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,133 @@
+"""
+The edit journal: the time an edit takes on the event loop, points
+added to a polygon being drawn and moves of an item, without and with
+a journal, and the time items added by create_items take more when
+they are recorded. In the worker thread: the time to write and sync
+the batch of records of the items, and to compact the journal of
+the drawing into a snapshot, with the longest time the event loop was
+blocked meanwhile, as the worker contends with it for the GIL.
+
+Usage: python -m benchmarks.journal [items count]
+"""
+import sys
+import tempfile
+import time
+
+from PySide6.QtCore import QEventLoop, QPointF, QRectF, QTimer
+
+from benchmarks.suite import PENS_AND_BRUSHES
+from benchmarks.utils import create_window, get_application
+from core.file_formats import journal, native
+from core.graphics.graphics_items import VGEGraphicsPolygonItem
+
+EDITS_COUNT = 10_000
+
+
+def time_points(scene) -> float:
+    """Microseconds per point added to a polygon being drawn"""
+    polygon = VGEGraphicsPolygonItem(QPointF(0, 0), scene)
+    start = time.perf_counter()
+    for index in range(EDITS_COUNT):
+        polygon.add_point(QPointF(index, index % 7))
+    return (time.perf_counter() - start) / EDITS_COUNT * 1e6
+
+
+def time_moves(scene) -> float:
+    """Microseconds per move of one item"""
+    ids = [0]
+    start = time.perf_counter()
+    for index in range(EDITS_COUNT):
+        scene.move_items(ids, 1, 0)
+        # The moves of other items aren't merged
+        ids = [index % 2]
+    return (time.perf_counter() - start) / EDITS_COUNT * 1e6
+
+
+def time_adding(scene, items_count: int) -> float:
+    """Microseconds per item added by create_items"""
+    decoded = [
+        (QRectF(index % 1000 * 10, index // 1000 * 10, 8, 8),
+         index % len(PENS_AND_BRUSHES), 0, 0)
+        for index in range(items_count)
+    ]
+    start = time.perf_counter()
+    native.create_items(
+        native.ItemKind.Rect, decoded, PENS_AND_BRUSHES, scene
+    )
+    return (time.perf_counter() - start) / items_count * 1e6
+
+
+def run_in_worker(edit_journal: journal.EditJournal, task) -> tuple:
+    """
+    Returns the time `task` of the journal's writer took in the worker
+    and the longest event loop stall meanwhile, in milliseconds
+    """
+    future = edit_journal._executor.submit(task)
+    event_loop = QEventLoop()
+    longest_stall = 0.0
+    last_tick = time.perf_counter()
+
+    # A zero interval timer fires on every event loop iteration
+    def tick():
+        nonlocal longest_stall, last_tick
+        now = time.perf_counter()
+        longest_stall = max(longest_stall, now - last_tick)
+        last_tick = now
+        if future.done():
+            event_loop.quit()
+
+    heartbeat = QTimer()
+    heartbeat.timeout.connect(tick)
+    heartbeat.start(0)
+    start = time.perf_counter()
+    event_loop.exec()
+    heartbeat.stop()
+    future.result()
+    return (time.perf_counter() - start) * 1000, longest_stall * 1000
+
+
+def main(items_count: int = 100_000):
+    root_ui = create_window(1920, 1080)
+    root_ui.window.hide()
+    scene = root_ui.graphics_scene
+    scene.setSceneRect(0, 0, 10_000, 10_000)
+    print(f"items: {items_count}, edits: {EDITS_COUNT}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for journaled in (False, True):
+            scene.clear()
+            edit_journal = None
+            if journaled:
+                edit_journal = journal.EditJournal(scene, directory)
+                edit_journal.start()
+                edit_journal.sync()
+            points_time = time_points(scene)
+            adding_time = time_adding(scene, items_count)
+            results[journaled] = (points_time, time_moves(scene), adding_time)
+            if edit_journal is not None:
+                # Written at once, the timer doesn't run
+                edit_journal._timer.stop()
+                records_size = sum(map(len, edit_journal._records))
+                records, edit_journal._records = edit_journal._records, []
+                write_time, write_stall = run_in_worker(
+                    edit_journal, lambda: edit_journal._writer.write(records)
+                )
+                compact_time, compact_stall = run_in_worker(
+                    edit_journal, edit_journal._writer.compact
+                )
+                edit_journal.close()
+        for index, name in enumerate(("add point", "move", "add item")):
+            plain, journaled = results[False][index], results[True][index]
+            print(f"{name:>10}: {plain:6.2f} us, journaled {journaled:6.2f} "
+                  f"us (+{journaled - plain:.2f} us)")
+    print(f"write {records_size / 2**20:.1f} MiB: {write_time:7.1f} ms, "
+          f"longest stall {write_stall:5.1f} ms")
+    print(f"compact: {compact_time:13.1f} ms, "
+          f"longest stall {compact_stall:5.1f} ms", flush=True)
+    scene.clear()
+    get_application().processEvents()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,92 @@
+"""
+Paint time of polygons painted by level of detail, as
+VGEGraphicsPolygonItem does, compared to plain QGraphicsPolygonItem,
+for drawings of the same total vertex count split into polygons of
+different sizes. Frames show the whole drawing, a quarter of it and
+a 1:1 view, with the grid and the ruler off.
+
+Usage: python -m benchmarks.level_of_detail [total vertices count]
+"""
+import sys
+
+import numpy as np
+from PySide6.QtCore import Qt, QPointF, QRectF
+from PySide6.QtGui import QPen
+from PySide6.QtWidgets import QGraphicsPolygonItem
+
+from benchmarks.utils import create_window, get_application, measure
+from core.graphics.graphics_items import VGEGraphicsPolygonItem
+from core.utils import points_to_polygon
+
+VERTICES_PER_POLYGON = (10, 1000, 10_000)
+SCENE_SIZE = 20_000
+
+
+def generate_polygons(vertices_count: int, vertices_per_polygon: int):
+    """Closed random walks around random centers"""
+    random = np.random.default_rng(vertices_per_polygon)
+    radius = 2 * np.sqrt(vertices_per_polygon)
+    for _ in range(vertices_count // vertices_per_polygon):
+        center = random.uniform(radius, SCENE_SIZE - radius, 2)
+        angles = np.linspace(0, 2 * np.pi, vertices_per_polygon)
+        radii = radius * (1 + 0.2 * np.sin(7 * angles)) + np.cumsum(
+            random.normal(0, 0.3, vertices_per_polygon)
+        )
+        yield points_to_polygon(center + np.column_stack(
+            (radii * np.cos(angles), radii * np.sin(angles))
+        ))
+
+
+def create_items(scene, item_class, polygons):
+    pen = QPen(Qt.black, 1)
+    for polygon in polygons:
+        if item_class is VGEGraphicsPolygonItem:
+            item = item_class(polygon.value(0))
+        else:
+            item = item_class()
+        item.setPolygon(polygon)
+        item.setPen(pen)
+        scene.addItem(item)
+
+
+def main(vertices_count: int = 1_000_000):
+    app = get_application()
+    root_ui = create_window(1920, 1080)
+    view = root_ui.work_area
+    view.draw_grid = view.draw_ruler = False
+    scene = root_ui.graphics_scene
+    scene.setSceneRect(0, 0, SCENE_SIZE, SCENE_SIZE)
+    viewport = view.viewport()
+    frames = {
+        "whole": QRectF(0, 0, SCENE_SIZE, SCENE_SIZE),
+        "quarter": QRectF(0, 0, SCENE_SIZE / 2, SCENE_SIZE / 2),
+        "1:1": None,
+    }
+
+    print(f"vertices: {vertices_count}")
+    print(f"{'per polygon':>11} {'items':>22} "
+          + " ".join(f"{name:>9}" for name in frames))
+    for vertices_per_polygon in VERTICES_PER_POLYGON:
+        polygons = list(
+            generate_polygons(vertices_count, vertices_per_polygon)
+        )
+        for item_class in (QGraphicsPolygonItem, VGEGraphicsPolygonItem):
+            scene.clear()
+            create_items(scene, item_class, polygons)
+            app.processEvents()
+            times = []
+            for rect in frames.values():
+                if rect is None:
+                    view.resetTransform()
+                    view.centerOn(QPointF(SCENE_SIZE / 2, SCENE_SIZE / 2))
+                else:
+                    view.fitInView(rect, Qt.KeepAspectRatio)
+                times.append(measure(viewport.repaint, 5))
+            print(f"{vertices_per_polygon:>11} {item_class.__name__:>22} "
+                  + " ".join(f"{time:>7.1f}ms" for time in times),
+                  flush=True)
+    scene.clear()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,93 @@
+"""
+Native document save and load times, split into the file format part
+(encoding the scene / decoding the memory-mapped chunks) and the
+whole operation including QGraphicsItem creation. Round trips are
+checked by tests/test_native_format.py.
+
+Usage: python -m benchmarks.native_format [items count ...]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from PySide6.QtCore import Qt, QPointF
+from PySide6.QtGui import QBrush, QColor, QPen
+from PySide6.QtWidgets import QGraphicsScene
+
+from benchmarks.utils import get_application
+from core.file_formats import native
+from core.graphics.graphics_items import (
+    VGEGraphicsLineItem,
+    VGEGraphicsRectItem,
+    VGEGraphicsPolygonItem,
+    VGEGraphicsEllipseItem
+)
+
+ITEMS_COUNTS = (10_000, 100_000, 1_000_000)
+
+
+def populate(scene: QGraphicsScene, items_count: int):
+    rng = random.Random(0)
+    pens = [QPen(Qt.black, 2), QPen(QColor(200, 0, 0), 1, Qt.DashLine)]
+    brushes = [QBrush(), QBrush(QColor(0, 0, 255, 128))]
+    item_classes = [
+        VGEGraphicsLineItem, VGEGraphicsRectItem,
+        VGEGraphicsEllipseItem, VGEGraphicsPolygonItem,
+    ]
+    size = max(1000.0, items_count ** 0.5 * 20)
+    scene.setSceneRect(0, 0, size, size)
+    for n in range(items_count):
+        item_class = item_classes[n // 100 % len(item_classes)]
+        point = QPointF(rng.uniform(0, size), rng.uniform(0, size))
+        item = item_class(point)
+        if item_class is VGEGraphicsPolygonItem:
+            for _ in range(rng.randint(2, 10)):
+                item.add_point(
+                    point + QPointF(rng.uniform(0, 50), rng.uniform(0, 50))
+                )
+            item.setPolygon(item.points)
+        else:
+            item.update_last_point(
+                point + QPointF(rng.uniform(1, 50), rng.uniform(1, 50))
+            )
+        item.setPen(pens[n % 2])
+        if item_class is not VGEGraphicsLineItem:
+            item.setBrush(brushes[n % 3 == 0])
+        scene.addItem(item)
+
+
+def timed(func) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main(items_counts=ITEMS_COUNTS):
+    get_application()
+    print(f"{'items':>9} {'size':>9} {'encode':>10} {'save':>10} "
+          f"{'decode':>10} {'load':>10}")
+    for items_count in items_counts:
+        scene = QGraphicsScene()
+        populate(scene, items_count)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "drawing" + native.FILE_EXTENSION)
+            encode_time, _ = timed(lambda: native.encode_scene(scene))
+            save_time, _ = timed(lambda: native.save_scene(scene, path))
+            scene.clear()
+
+            def decode():
+                with native.NativeDocument(path) as document:
+                    for chunk in document.chunks():
+                        chunk.records.tolist()
+
+            decode_time, _ = timed(decode)
+            load_time, _ = timed(lambda: native.load_scene(scene, path))
+            size = os.path.getsize(path)
+        print(f"{items_count:>9} {size / 2**20:>7.1f}MB "
+              f"{encode_time:>8.0f}ms {save_time:>8.0f}ms "
+              f"{decode_time:>8.0f}ms {load_time:>8.0f}ms", flush=True)
+
+if __name__ == "__main__":
+    main(tuple(map(int, sys.argv[1:])) or ITEMS_COUNTS)
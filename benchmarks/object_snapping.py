@@ -0,0 +1,82 @@
+"""
+Cost of a cursor move with object snapping on and off, in a scene of
+polygons holding 100k vertices in total, at 1:1 zoom and zoomed out
+to the whole drawing. Every move shifts the cursor by a few pixels
+along a line crossing many polygons. The first moves over an area
+add its items to the snap grid, so both the first pass and a second
+pass over the same positions are measured.
+
+Usage: python -m benchmarks.object_snapping [vertices count]
+"""
+import sys
+
+import numpy as np
+from PySide6.QtCore import Qt, QPointF
+from PySide6.QtGui import QMouseEvent, QPen
+
+from benchmarks.utils import create_window, get_application, measure
+from core.graphics.graphics_items import VGEGraphicsPolygonItem
+
+VERTICES_PER_POLYGON = 10
+SCENE_SIZE = 10_000
+
+
+def create_polygons(scene, vertices_count: int):
+    random = np.random.default_rng(0)
+    pen = QPen(Qt.black, 1)
+    for _ in range(vertices_count // VERTICES_PER_POLYGON):
+        x, y = random.uniform(0, SCENE_SIZE - 100, 2)
+        points = random.uniform(0, 100, (VERTICES_PER_POLYGON, 2))
+        polygon = VGEGraphicsPolygonItem(QPointF(x, y), scene)
+        for px, py in points.tolist()[1:]:
+            polygon.add_point(QPointF(x + px, y + py))
+        polygon.setPolygon(polygon.points)
+        polygon.setPen(pen)
+        polygon.geometry_changed()
+
+
+def main(vertices_count: int = 100_000):
+    app = get_application()
+    root_ui = create_window(1920, 1080)
+    view = root_ui.work_area
+    scene = view.scene()
+    scene.setSceneRect(0, 0, SCENE_SIZE, SCENE_SIZE)
+    create_polygons(scene, vertices_count)
+    app.processEvents()
+    print(f"viewport: {view.viewport().width()}x{view.viewport().height()}, "
+          f"vertices: {vertices_count}")
+
+    for zoom in ("1:1", "fit"):
+        if zoom == "fit":
+            view.fitInView(scene.sceneRect(), Qt.KeepAspectRatio)
+        else:
+            view.resetTransform()
+            view.centerOn(SCENE_SIZE / 2, SCENE_SIZE / 2)
+        app.processEvents()
+        for snap_to_objects in (False, True):
+            view.snap_to_objects = snap_to_objects
+            scene.snap_engine.clear()
+            for pass_ in ("first", "second"):
+                positions = iter(range(10**9))
+
+                def cursor_move():
+                    pos = QPointF(200 + next(positions) * 3 % 1500, 500)
+                    # Moves are applied once per frame, this one at once
+                    view.mouseMoveEvent(QMouseEvent(
+                        QMouseEvent.MouseMove, pos, pos,
+                        Qt.NoButton, Qt.NoButton, Qt.NoModifier
+                    ))
+                    view.flush_mouse_move()
+                    app.processEvents()
+
+                print(f"zoom {zoom:>3} snapping {snap_to_objects!s:5} "
+                      f"{pass_:>6} pass: "
+                      f"{measure(cursor_move, 499):7.3f} ms/move",
+                      flush=True)
+                if not snap_to_objects:
+                    break
+    scene.clear()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
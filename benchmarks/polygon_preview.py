@@ -0,0 +1,86 @@
+"""
+Cost of a mouse move while drawing a polygon, against the count of
+points added so far: the move alone, and the move with a repaint of
+the viewport at 1:1 zoom. VGEGraphicsPolygonItem draws the edges to
+the pointer by a child path, compared to setting the item's whole
+polygon with the pointer appended on every move, as it used to.
+
+Usage: python -m benchmarks.polygon_preview [vertices count ...]
+"""
+import sys
+from functools import partial
+
+import numpy as np
+from PySide6.QtCore import Qt, QPointF
+from PySide6.QtGui import QPen, QPolygonF
+
+from benchmarks.utils import create_window, get_application, measure
+from core.graphics.graphics_items import VGEGraphicsPolygonItem
+
+VERTICES_COUNTS = (100, 1_000, 10_000, 100_000)
+SCENE_SIZE = 4_000
+
+
+def rebuild_polygon(item: VGEGraphicsPolygonItem, point: QPointF):
+    """Shows the pointer as the last point of the item's polygon"""
+    if point in item.points:
+        point.setY(point.y() - 1)
+    polygon = QPolygonF(item.points)
+    polygon.append(QPointF(point.x(), point.y()))
+    item.setPolygon(polygon)
+    item.geometry_changed()
+
+
+def draw_polygon(scene, vertices_count: int) -> VGEGraphicsPolygonItem:
+    """A star of `vertices_count` points around the scene's center"""
+    angles = np.linspace(0, 2 * np.pi, vertices_count, endpoint=False)
+    radii = SCENE_SIZE / 4 * (1 + 0.5 * (np.arange(vertices_count) % 2))
+    points = SCENE_SIZE / 2 + np.column_stack(
+        (radii * np.cos(angles), radii * np.sin(angles))
+    )
+    item = VGEGraphicsPolygonItem(QPointF(*points[0]), scene)
+    item.setPen(QPen(Qt.black, 2))
+    for x, y in points[1:].tolist():
+        item.add_point(QPointF(x, y))
+    return item
+
+
+def main(*vertices_counts: int):
+    app = get_application()
+    root_ui = create_window(1920, 1080)
+    view = root_ui.work_area
+    view.draw_grid = view.draw_ruler = False
+    scene = root_ui.graphics_scene
+    scene.setSceneRect(0, 0, SCENE_SIZE, SCENE_SIZE)
+    view.resetTransform()
+    view.centerOn(SCENE_SIZE / 2, SCENE_SIZE / 2)
+    viewport = view.viewport()
+
+    print(f"{'vertices':>8} {'preview':>8} {'move':>10} {'+repaint':>10}")
+    for vertices_count in vertices_counts or VERTICES_COUNTS:
+        for preview in ("polygon", "path"):
+            item = draw_polygon(scene, vertices_count)
+            if preview == "polygon":
+                update_last_point = partial(rebuild_polygon, item)
+            else:
+                update_last_point = item.update_last_point
+            app.processEvents()
+            positions = iter(range(10**9))
+
+            def move():
+                step = next(positions) % 200
+                update_last_point(QPointF(
+                    SCENE_SIZE / 2 + step, SCENE_SIZE / 2 + step / 2
+                ))
+
+            repeat = max(10, min(1000, 1_000_000 // vertices_count))
+            move_time = measure(move, repeat)
+            repaint_time = measure(lambda: (move(), viewport.repaint()), 20)
+            print(f"{vertices_count:>8} {preview:>8} "
+                  f"{move_time:>8.3f}ms {repaint_time:>8.2f}ms", flush=True)
+            scene.removeItem(item)
+    scene.clear()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,45 @@
+"""
+Tiled PNG/TIFF export time with 1, 2, 4 and 8 worker threads.
+
+Usage: python -m benchmarks.raster_export [items count]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from PySide6.QtWidgets import QGraphicsScene
+
+from benchmarks.native_format import populate
+from benchmarks.utils import get_application
+from core.file_formats import raster
+
+WORKERS_COUNTS = (1, 2, 4, 8)
+
+
+def main(items_count: int = 100_000):
+    get_application()
+    scene = QGraphicsScene()
+    populate(scene, items_count)
+    rect = scene.sceneRect()
+    print(f"items: {items_count}, "
+          f"image: {rect.width():.0f}x{rect.height():.0f}")
+    with tempfile.TemporaryDirectory() as directory:
+        for extension in (raster.PNG_FILE_EXTENSION,
+                          raster.TIFF_FILE_EXTENSION):
+            path = os.path.join(directory, "drawing" + extension)
+            single_worker_time = None
+            for workers in WORKERS_COUNTS:
+                start = time.perf_counter()
+                for _ in raster.export_raster(scene, path, workers=workers):
+                    pass
+                export_time = time.perf_counter() - start
+                single_worker_time = single_worker_time or export_time
+                print(f"{extension:>5} workers {workers}: "
+                      f"{export_time:6.2f}s "
+                      f"(x{single_worker_time / export_time:.2f}), "
+                      f"{os.path.getsize(path) / 2**20:.1f}MB", flush=True)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
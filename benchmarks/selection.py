@@ -0,0 +1,127 @@
+"""
+Selection queries of the selection tool answered by the spatial index
+of VGEGraphicsScene compared to the BSP tree index of QGraphicsScene:
+the cost of adding items, picking the item under a point, rubber band
+queries of a tenth and of the whole drawing, and the paint time of
+a frame showing the whole drawing with every item selected.
+
+Usage: python -m benchmarks.selection [items count ...]
+"""
+import sys
+
+import numpy as np
+from PySide6.QtCore import Qt, QPointF, QRectF
+from PySide6.QtGui import QPen
+from PySide6.QtWidgets import QGraphicsRectItem, QGraphicsScene
+
+from benchmarks.native_format import timed
+from benchmarks.utils import create_window, get_application, measure
+from core.generics import VGEGraphicsScene
+
+ITEMS_COUNTS = (10_000, 100_000, 1_000_000)
+SCENE_SIZE = 20_000
+PICK_TOLERANCE = 3
+# Items are selected one by one in the BSP scene up to this count
+MAX_BSP_SELECT_COUNT = 100_000
+
+
+def create_items(count: int) -> list[QGraphicsRectItem]:
+    random = np.random.default_rng(count)
+    geometry = np.concatenate([
+        random.uniform(0, SCENE_SIZE, (count, 2)),
+        random.uniform(1, 40, (count, 2)),
+    ], axis=1)
+    pen = QPen(Qt.black, 1)
+    items = []
+    for row in geometry.tolist():
+        item = QGraphicsRectItem(*row)
+        item.setPen(pen)
+        items.append(item)
+    return items
+
+
+def select_all_bsp(items: list[QGraphicsRectItem]):
+    for item in items:
+        item.setFlag(QGraphicsRectItem.ItemIsSelectable)
+        item.setSelected(True)
+
+
+def bsp_pick(scene: QGraphicsScene, point: QPointF):
+    pick_rect = QRectF(
+        point.x() - PICK_TOLERANCE, point.y() - PICK_TOLERANCE,
+        2 * PICK_TOLERANCE, 2 * PICK_TOLERANCE
+    )
+    for item in scene.items(pick_rect, Qt.IntersectsItemBoundingRect):
+        if item.shape().intersects(item.mapRectFromScene(pick_rect)):
+            return item
+    return None
+
+
+def main(items_counts=ITEMS_COUNTS):
+    root_ui = create_window(1920, 1080)
+    view = root_ui.work_area
+    view.draw_grid = view.draw_ruler = False
+    viewport = view.viewport()
+    points = [
+        QPointF(x, y) for x, y in np.random.default_rng(0).uniform(
+            0, SCENE_SIZE, (100, 2)
+        ).tolist()
+    ]
+    tenth = QRectF(0, 0, SCENE_SIZE / 10**0.5, SCENE_SIZE / 10**0.5)
+    whole = QRectF(0, 0, SCENE_SIZE, SCENE_SIZE)
+
+    print(f"{'items':>9} {'index':>6} {'add':>9} {'first query':>12} "
+          f"{'pick':>8} {'tenth':>9} {'whole':>9} {'frame':>9} "
+          f"{'select all':>11} {'frame':>9}")
+    for count in items_counts:
+        for name, scene in (
+                ("bsp", QGraphicsScene(whole)),
+                ("grid", VGEGraphicsScene(whole)),
+        ):
+            items = create_items(count)
+            add_time, _ = timed(
+                lambda: [scene.addItem(item) for item in items]
+            )
+            if name == "bsp":
+                first_time, _ = timed(lambda: scene.items(tenth))
+                pick = lambda: [bsp_pick(scene, point) for point in points]
+                query = lambda rect: scene.items(
+                    rect, Qt.IntersectsItemBoundingRect
+                )
+                select_all = lambda: select_all_bsp(items)
+            else:
+                index = scene.spatial_index
+                first_time, _ = timed(lambda: index.ids_in_rect(tenth))
+                pick = lambda: [
+                    scene.item_id_at(point, PICK_TOLERANCE)
+                    for point in points
+                ]
+                query = index.ids_in_rect
+                select_all = lambda: scene.set_selection(np.arange(count))
+            pick_time = measure(pick, 3) / len(points)
+            tenth_time = measure(lambda: query(tenth), 3)
+            whole_time = measure(lambda: query(whole), 1)
+
+            view.setScene(scene)
+            view.fitInView(whole, Qt.KeepAspectRatio)
+            get_application().processEvents()
+            frame_time = measure(viewport.repaint, 3)
+            if name == "bsp" and count > MAX_BSP_SELECT_COUNT:
+                selection = f"{'-':>11} {'-':>9}"
+            else:
+                select_time, _ = timed(select_all)
+                get_application().processEvents()
+                selection = (
+                    f"{select_time:>9.0f}ms "
+                    f"{measure(viewport.repaint, 3):>7.0f}ms"
+                )
+            print(f"{count:>9} {name:>6} {add_time:>7.0f}ms "
+                  f"{first_time:>10.0f}ms {pick_time:>6.2f}ms "
+                  f"{tenth_time:>7.1f}ms {whole_time:>7.0f}ms "
+                  f"{frame_time:>7.0f}ms {selection}", flush=True)
+            view.setScene(root_ui.graphics_scene)
+            scene.clear()
+
+
+if __name__ == "__main__":
+    main(tuple(map(int, sys.argv[1:])) or ITEMS_COUNTS)
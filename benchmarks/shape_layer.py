@@ -0,0 +1,111 @@
+"""
+Lines and rectangles drawn as one QGraphicsItem each compared to one
+VGEGraphicsShapeLayer holding all of them: creation time, the paint
+time of a frame showing the whole drawing and of a zoomed in frame,
+and the time to pick the element under a point.
+
+Usage: python -m benchmarks.shape_layer [elements count ...]
+"""
+import sys
+
+import numpy as np
+from PySide6.QtCore import Qt, QPointF, QRectF
+from PySide6.QtGui import QBrush, QColor, QPen
+from PySide6.QtWidgets import QGraphicsLineItem, QGraphicsRectItem
+
+from benchmarks.native_format import timed
+from benchmarks.utils import create_window, get_application, measure
+from core.graphics.shape_layer import VGEGraphicsShapeLayer
+
+ELEMENTS_COUNTS = (10_000, 100_000, 1_000_000)
+# Individual items are only created up to this count
+MAX_ITEMS_COUNT = 100_000
+SCENE_SIZE = 20_000
+
+PENS = [QPen(QColor(0, 0, 0), 1), QPen(QColor(40, 90, 200), 2)]
+BRUSH = QBrush(Qt.NoBrush)
+
+
+def generate_geometry(kind: int, count: int) -> np.ndarray:
+    random = np.random.default_rng(count)
+    geometry = np.empty((count, 4))
+    geometry[:, :2] = random.uniform(0, SCENE_SIZE, (count, 2))
+    geometry[:, 2:] = random.uniform(-40, 40, (count, 2))
+    if kind == VGEGraphicsShapeLayer.Line:
+        geometry[:, 2:] += geometry[:, :2]
+    return geometry
+
+
+def create_items(scene, kind: int, geometry: np.ndarray, styles: np.ndarray):
+    for row, style in zip(geometry.tolist(), styles.tolist()):
+        if kind == VGEGraphicsShapeLayer.Line:
+            item = QGraphicsLineItem(*row)
+        else:
+            item = QGraphicsRectItem(*row)
+            item.setBrush(BRUSH)
+        item.setPen(PENS[style])
+        scene.addItem(item)
+
+
+def create_layer(scene, kind: int, geometry: np.ndarray, styles: np.ndarray):
+    layer = VGEGraphicsShapeLayer(kind)
+    for pen in PENS:
+        layer.add_style(pen, BRUSH)
+    layer.add_elements(geometry, styles)
+    scene.addItem(layer)
+    return layer
+
+
+def main(elements_counts=ELEMENTS_COUNTS):
+    root_ui = create_window(1920, 1080)
+    view = root_ui.work_area
+    view.draw_grid = view.draw_ruler = False
+    scene = root_ui.graphics_scene
+    scene.setSceneRect(0, 0, SCENE_SIZE, SCENE_SIZE)
+    viewport = view.viewport()
+    center = QPointF(SCENE_SIZE / 2, SCENE_SIZE / 2)
+
+    print(f"{'':>6} {'elements':>9} {'':>6} {'create':>10} "
+          f"{'full frame':>11} {'zoomed in':>10} {'pick':>9}")
+    for kind, name in (
+            (VGEGraphicsShapeLayer.Line, "lines"),
+            (VGEGraphicsShapeLayer.Rect, "rects"),
+    ):
+        for count in elements_counts:
+            geometry = generate_geometry(kind, count)
+            # Styles come in runs, as in imported drawings
+            styles = (np.arange(count) // 1000 % 2).astype(np.int32)
+            for layout in ("items", "layer"):
+                if layout == "items" and count > MAX_ITEMS_COUNT:
+                    continue
+                scene.clear()
+                get_application().processEvents()
+                if layout == "items":
+                    create_time, _ = timed(
+                        lambda: create_items(scene, kind, geometry, styles)
+                    )
+                    pick = lambda: scene.items(
+                        QRectF(center.x() - 2, center.y() - 2, 4, 4)
+                    )
+                else:
+                    create_time, layer = timed(
+                        lambda: create_layer(scene, kind, geometry, styles)
+                    )
+                    pick = lambda: layer.element_at(center, 2)
+                get_application().processEvents()
+
+                view.fitInView(scene.sceneRect(), Qt.KeepAspectRatio)
+                full_time = measure(viewport.repaint, 3)
+                view.resetTransform()
+                view.centerOn(center)
+                zoomed_time = measure(viewport.repaint, 10)
+                pick_time = measure(pick, 10)
+                print(f"{name:>6} {count:>9} {layout:>6} "
+                      f"{create_time:>8.0f}ms {full_time:>9.1f}ms "
+                      f"{zoomed_time:>8.1f}ms {pick_time:>7.2f}ms",
+                      flush=True)
+    scene.clear()
+
+
+if __name__ == "__main__":
+    main(tuple(map(int, sys.argv[1:])) or ELEMENTS_COUNTS)
@@ -0,0 +1,98 @@
+"""
+Startup time of the editor, by phase, as printed by
+`main.py --profile-startup`: the imports, the QApplication, the
+translator, the construction of the UI, showing the window and its
+first paint. Every run is a new process on the offscreen platform, so
+the imports are timed as on a real start, with the bytecode cached.
+
+Every phase keeps the mean, median, 95th percentile and maximum of
+its runs in milliseconds. As in the benchmark suite, the results can
+be saved to JSON and compared with a saved baseline: phases whose
+median is slower by more than the threshold are reported and the exit
+status is 1.
+
+Usage: python -m benchmarks.startup [--runs N] [--output PATH]
+                                    [--baseline PATH] [--threshold RATIO]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from pathlib import Path
+
+import PySide6
+
+from benchmarks.suite import THRESHOLD, compare, summarize
+
+RUNS = 20
+MAIN_PATH = Path(__file__).resolve().parent.parent / "main.py"
+
+
+def profile_startup() -> dict[str, float]:
+    """Returns the milliseconds taken by each phase of a start"""
+    output = subprocess.run(
+        [sys.executable, str(MAIN_PATH), "--profile-startup"],
+        capture_output=True, check=True, text=True, timeout=60,
+        env={**os.environ, "QT_QPA_PLATFORM": "offscreen"},
+    ).stdout
+    phases = {}
+    for line in output.splitlines():
+        name, duration, unit = line.rsplit(maxsplit=2)
+        phases[name] = float(duration)
+    return phases
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the startup of the editor."
+    )
+    parser.add_argument(
+        "--runs", type=int, default=RUNS, help="starts of the editor"
+    )
+    parser.add_argument("--output", help="JSON file to save the results to")
+    parser.add_argument("--baseline", help="JSON results to compare with")
+    parser.add_argument(
+        "--threshold", type=float, default=THRESHOLD,
+        help="slowdown of a median reported as a regression"
+    )
+    args = parser.parse_args(argv)
+
+    # The first start compiles the bytecode, it isn't counted
+    profile_startup()
+    samples: dict[str, list[float]] = {}
+    for _ in range(args.runs):
+        for name, duration in profile_startup().items():
+            samples.setdefault(name, []).append(duration)
+    metrics = {name: summarize(values) for name, values in samples.items()}
+    results = {
+        "environment": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "pyside": PySide6.__version__,
+            "cpus": os.cpu_count(),
+        },
+        "results": {"startup": metrics},
+    }
+    print(f"{'phase':>15} {'median':>10} {'p95':>10} {'max':>10}")
+    for name, summary in metrics.items():
+        print(f"{name:>15} {summary['median']:>8.2f}ms "
+              f"{summary['p95']:>8.2f}ms {summary['max']:>8.2f}ms")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): "
+                  + ", ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,341 @@
+"""
+Benchmark suite of the view, the tools and the rendering paths, run
+headless on the offscreen platform. For each item count a synthetic
+scene of lines, rectangles, ellipses and polygons is created in
+a RootWindow of 1920x1080, shown whole, and the suite times:
+
+- drawBackground (the grid) and drawForeground (the ruler and the
+  selection), as called by the repaints below,
+- a wheelEvent zoom sweep, in and back out, with the zoom animation
+  finished and a repaint per step,
+- panning by right-button drag, with a repaint per move,
+- drawing a polygon with GeometryTool, moves and clicks, with
+  a repaint per event.
+
+Mouse moves are applied once per frame by the view, so the suite
+applies each one at once, as if every move came in its own frame.
+Zoom steps and pan moves paint the view's interaction snapshot, which
+is dropped after each sweep, so the other frames are full quality.
+
+Every metric keeps the mean, median, 95th percentile and maximum of
+its samples in milliseconds. The results can be saved to JSON, and
+compared with a saved baseline: metrics whose median is slower by
+more than the threshold are reported and the exit status is 1.
+
+The default counts take a few minutes; a million items take about
+half an hour, so they are only run when asked for with --items.
+
+Usage: python -m benchmarks.suite [--items N ...] [--output PATH]
+                                  [--baseline PATH] [--threshold RATIO]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+import PySide6
+from PySide6.QtCore import Qt, QLineF, QPoint, QPointF, QRectF, qVersion
+from PySide6.QtGui import (
+    QBrush,
+    QColor,
+    QMouseEvent,
+    QPen,
+    QWheelEvent,
+)
+
+from benchmarks.utils import create_window, get_application
+from core.file_formats.native import ItemKind, create_items
+from core.utils import points_to_polygon
+
+ITEMS_COUNTS = (1_000, 10_000, 100_000)
+# Scene area per item, in square scene units
+ITEM_AREA = 100 ** 2
+ZOOM_STEPS = 20
+PAN_MOVES = 60
+POLYGON_VERTICES = 50
+MOVES_PER_VERTEX = 4
+# Slowdown of a median counted as a regression
+THRESHOLD = 0.2
+# Differences of medians below this, in milliseconds, are noise
+MIN_DIFFERENCE = 0.05
+
+PENS_AND_BRUSHES = [
+    (QPen(Qt.black, 1), QBrush(Qt.NoBrush)),
+    (QPen(QColor(40, 90, 200), 2), QBrush(QColor(200, 220, 250))),
+]
+
+
+def create_scene(scene, items_count: int):
+    """Adds `items_count` items, a quarter of each kind, to the scene"""
+    random = np.random.default_rng(items_count)
+    size = float(np.sqrt(items_count * ITEM_AREA))
+    scene.setSceneRect(0, 0, size, size)
+    kinds_count = items_count // 4
+    corners = random.uniform(0, size - 60, (4, kinds_count, 2))
+    sizes = random.uniform(5, 60, (4, kinds_count, 2))
+    styles = random.integers(0, len(PENS_AND_BRUSHES), (4, kinds_count))
+    kinds = (ItemKind.Line, ItemKind.Rect, ItemKind.Ellipse, ItemKind.Polygon)
+    for kind, corners, sizes, styles in zip(kinds, corners, sizes, styles):
+        if kind == ItemKind.Line:
+            geometries = [
+                QLineF(x, y, x + width, y + height)
+                for (x, y), (width, height)
+                in zip(corners.tolist(), sizes.tolist())
+            ]
+        elif kind == ItemKind.Polygon:
+            angles = np.linspace(0, 2 * np.pi, 8, endpoint=False)
+            outline = np.column_stack((np.cos(angles), np.sin(angles)))
+            geometries = [
+                points_to_polygon(
+                    corner + size_ / 2 * (1 + outline)
+                )
+                for corner, size_ in zip(corners, sizes)
+            ]
+        else:
+            geometries = [
+                QRectF(x, y, width, height)
+                for (x, y), (width, height)
+                in zip(corners.tolist(), sizes.tolist())
+            ]
+        create_items(
+            kind,
+            [
+                (geometry, style, 0, 0)
+                for geometry, style in zip(geometries, styles.tolist())
+            ],
+            PENS_AND_BRUSHES,
+            scene,
+        )
+
+
+def summarize(samples: list[float]) -> dict:
+    return {
+        "mean": statistics.fmean(samples),
+        "median": statistics.median(samples),
+        "p95": float(np.percentile(samples, 95)),
+        "max": max(samples),
+        "samples": len(samples),
+    }
+
+
+def timed(samples: list[float], function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    samples.append((time.perf_counter() - start) * 1000)
+    return result
+
+
+def mouse_event(event_type, pos: QPointF, button, buttons) -> QMouseEvent:
+    return QMouseEvent(event_type, pos, pos, button, buttons, Qt.NoModifier)
+
+
+def wheel_event(pos: QPointF, delta: int) -> QWheelEvent:
+    return QWheelEvent(
+        pos, pos, QPoint(), QPoint(0, delta), Qt.NoButton, Qt.NoModifier,
+        Qt.NoScrollPhase, False
+    )
+
+
+def run(root_ui, items_count: int) -> dict:
+    app = get_application()
+    view = root_ui.work_area
+    scene = root_ui.graphics_scene
+    viewport = view.viewport()
+    center = QPointF(viewport.width() / 2, viewport.height() / 2)
+    metrics = {}
+
+    start = time.perf_counter()
+    create_scene(scene, items_count)
+    metrics["create"] = summarize([(time.perf_counter() - start) * 1000])
+    view.fitInView(scene.sceneRect(), Qt.KeepAspectRatio)
+    view.mouseMoveEvent(
+        mouse_event(QMouseEvent.MouseMove, center, Qt.NoButton, Qt.NoButton)
+    )
+    view.flush_mouse_move()
+    app.processEvents()
+
+    # The paint hooks are set on the instance, which Qt calls instead
+    # of the methods of the class
+    paint_samples = {"drawBackground": [], "drawForeground": []}
+    for name, samples in paint_samples.items():
+        method = getattr(view, name)
+        setattr(view, name, lambda painter, rect, method=method,
+                samples=samples: timed(samples, method, painter, rect))
+
+    frame_samples = []
+    for _ in range(20):
+        timed(frame_samples, viewport.repaint)
+    metrics["frame"] = summarize(frame_samples)
+
+    zoom_samples = []
+    for delta in [120] * ZOOM_STEPS + [-120] * ZOOM_STEPS:
+        timed(zoom_samples, lambda: (
+            view.wheelEvent(wheel_event(center, delta)), view.finish_zoom(),
+            viewport.repaint()
+        ))
+    view.end_interaction()
+    metrics["zoom_step"] = summarize(zoom_samples)
+
+    view.fitInView(scene.sceneRect(), Qt.KeepAspectRatio)
+    pan_samples = []
+    view.mousePressEvent(mouse_event(
+        QMouseEvent.MouseButtonPress, center, Qt.RightButton, Qt.RightButton
+    ))
+    pos = QPointF(center)
+    for move in range(PAN_MOVES):
+        pos += QPointF(7, 3) if move % 20 < 10 else QPointF(-7, -3)
+        timed(pan_samples, lambda: (
+            view.mouseMoveEvent(mouse_event(
+                QMouseEvent.MouseMove, pos, Qt.NoButton, Qt.RightButton
+            )),
+            view.flush_mouse_move(),
+            viewport.repaint()
+        ))
+    view.mouseReleaseEvent(mouse_event(
+        QMouseEvent.MouseButtonRelease, pos, Qt.RightButton, Qt.NoButton
+    ))
+    view.end_interaction()
+    metrics["pan_move"] = summarize(pan_samples)
+
+    for name, samples in paint_samples.items():
+        delattr(view, name)
+        metrics[name] = summarize(samples)
+
+    metrics.update(draw_polygon(root_ui, center))
+    scene.clear()
+    app.processEvents()
+    return metrics
+
+
+def draw_polygon(root_ui, center: QPointF) -> dict:
+    view = root_ui.work_area
+    viewport = view.viewport()
+    tool = root_ui.toolbar__tool_instances["Geometry tool"]
+    tool.set_geometry_type("polygon")
+    view.setActiveGraphicTool(tool)
+    angles = np.linspace(0, 2 * np.pi, POLYGON_VERTICES * MOVES_PER_VERTEX)
+    positions = [
+        center + QPointF(x, y) for x, y in (
+            np.column_stack((np.cos(angles), np.sin(angles))) * 300
+        ).tolist()
+    ]
+
+    move_samples, click_samples = [], []
+    for index, pos in enumerate(positions):
+        timed(move_samples, lambda: (
+            view.mouseMoveEvent(mouse_event(
+                QMouseEvent.MouseMove, pos, Qt.NoButton, Qt.NoButton
+            )),
+            view.flush_mouse_move(),
+            viewport.repaint()
+        ))
+        if index % MOVES_PER_VERTEX == 0:
+            timed(click_samples, lambda: (
+                view.mousePressEvent(mouse_event(
+                    QMouseEvent.MouseButtonPress, pos,
+                    Qt.LeftButton, Qt.LeftButton
+                )),
+                view.mouseReleaseEvent(mouse_event(
+                    QMouseEvent.MouseButtonRelease, pos,
+                    Qt.LeftButton, Qt.NoButton
+                )),
+                viewport.repaint()
+            ))
+    view.mouseReleaseEvent(mouse_event(
+        QMouseEvent.MouseButtonRelease, positions[-1],
+        Qt.MiddleButton, Qt.NoButton
+    ))
+    view.setActiveGraphicTool(
+        root_ui.toolbar__tool_instances["Selection tool"]
+    )
+    return {
+        "polygon_move": summarize(move_samples),
+        "polygon_click": summarize(click_samples),
+    }
+
+
+def get_environment(root_ui) -> dict:
+    viewport = root_ui.work_area.viewport()
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "pyside": PySide6.__version__,
+        "qt": qVersion(),
+        "numpy": np.__version__,
+        "cpus": os.cpu_count(),
+        "viewport": [viewport.width(), viewport.height()],
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Prints the changes of the medians, returns the regressions"""
+    regressions = []
+    print(f"\n{'items':>8} {'metric':>15} {'baseline':>10} "
+          f"{'current':>10} {'change':>8}")
+    for items_count, metrics in results["results"].items():
+        baseline_metrics = baseline["results"].get(items_count, {})
+        for name, summary in metrics.items():
+            if name not in baseline_metrics:
+                continue
+            before = baseline_metrics[name]["median"]
+            after = summary["median"]
+            change = after / before - 1 if before else 0.0
+            regression = (
+                change > threshold and after - before > MIN_DIFFERENCE
+            )
+            print(f"{items_count:>8} {name:>15} {before:>8.2f}ms "
+                  f"{after:>8.2f}ms {change:>+7.1%}"
+                  + (" REGRESSION" if regression else ""))
+            if regression:
+                regressions.append(f"{items_count} {name}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the view, the tools and the rendering."
+    )
+    parser.add_argument(
+        "--items", type=int, nargs="+", default=ITEMS_COUNTS,
+        help="item counts of the synthetic scenes"
+    )
+    parser.add_argument("--output", help="JSON file to save the results to")
+    parser.add_argument("--baseline", help="JSON results to compare with")
+    parser.add_argument(
+        "--threshold", type=float, default=THRESHOLD,
+        help="slowdown of a median reported as a regression"
+    )
+    args = parser.parse_args(argv)
+
+    root_ui = create_window(1920, 1080)
+    results = {"environment": get_environment(root_ui), "results": {}}
+    print(f"{'items':>8} {'metric':>15} {'median':>10} {'p95':>10} "
+          f"{'max':>10}")
+    for items_count in args.items:
+        metrics = run(root_ui, items_count)
+        results["results"][str(items_count)] = metrics
+        for name, summary in metrics.items():
+            print(f"{items_count:>8} {name:>15} {summary['median']:>8.2f}ms "
+                  f"{summary['p95']:>8.2f}ms {summary['max']:>8.2f}ms",
+                  flush=True)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): "
+                  + ", ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
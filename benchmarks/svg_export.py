@@ -0,0 +1,49 @@
+"""
+SVG export time and peak Python memory (measured in a separate run,
+as tracing slows the export down) for growing scenes.
+
+Usage: python -m benchmarks.svg_export [items count ...]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from PySide6.QtWidgets import QGraphicsScene
+
+from benchmarks.native_format import populate
+from benchmarks.utils import get_application
+from core.file_formats import svg
+
+ITEMS_COUNTS = (10_000, 100_000, 1_000_000)
+
+
+def export(scene: QGraphicsScene, path: str):
+    for _ in svg.export_svg(scene, path):
+        pass
+
+
+def main(items_counts=ITEMS_COUNTS):
+    get_application()
+    print(f"{'items':>9} {'size':>9} {'time':>9} {'peak memory':>12}")
+    for items_count in items_counts:
+        scene = QGraphicsScene()
+        populate(scene, items_count)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "drawing" + svg.FILE_EXTENSION)
+            start = time.perf_counter()
+            export(scene, path)
+            export_time = time.perf_counter() - start
+            size = os.path.getsize(path)
+
+            tracemalloc.start()
+            export(scene, path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        print(f"{items_count:>9} {size / 2**20:>7.1f}MB "
+              f"{export_time:>8.2f}s {peak / 2**20:>10.2f}MB", flush=True)
+
+
+if __name__ == "__main__":
+    main(tuple(map(int, sys.argv[1:])) or ITEMS_COUNTS)
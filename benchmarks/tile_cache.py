@@ -0,0 +1,68 @@
+"""
+Frame time while panning by right-button drag over the synthetic
+scenes of the benchmark suite, with the view painting every item and
+drawing the tiles of its SceneTileCache. Each pan move is applied at
+once and followed by a repaint of the viewport. The tiles are rendered
+on a first sweep, the cold one, after which the warm sweep only blits
+them. The time to render the tiles of the viewport in the background
+and the memory they take are shown apart.
+
+Usage: python -m benchmarks.tile_cache [items count ...]
+"""
+import statistics
+import sys
+import time
+
+from PySide6.QtCore import Qt, QPointF
+
+from benchmarks.interaction import pan_moves
+from benchmarks.suite import create_scene
+from benchmarks.utils import create_window, get_application
+
+ITEMS_COUNTS = (10_000, 100_000)
+
+
+def wait_for_tiles(app, tile_cache) -> float:
+    """Returns the time in ms until the requested tiles are rendered"""
+    start = time.perf_counter()
+    while tile_cache._requested or tile_cache._rendering:
+        app.processEvents()
+    return (time.perf_counter() - start) * 1000
+
+
+def main(*items_counts: int):
+    app = get_application()
+    root_ui = create_window(1920, 1080)
+    view = root_ui.work_area
+    view.interaction_snapshot = False
+    scene = root_ui.graphics_scene
+    tile_cache = view.tile_cache
+    viewport = view.viewport()
+    center = QPointF(viewport.width() / 2, viewport.height() / 2)
+
+    print(f"{'items':>8} {'tiles':>5} {'sweep':>5} {'median':>10} "
+          f"{'max':>10} {'render':>10} {'memory':>8}")
+    for items_count in items_counts or ITEMS_COUNTS:
+        create_scene(scene, items_count)
+        for cache in (None, tile_cache):
+            view.set_tile_cache(cache)
+            view.fitInView(scene.sceneRect(), Qt.KeepAspectRatio)
+            view.scale(4, 4)
+            viewport.repaint()
+            for sweep in ("cold", "warm"):
+                times = pan_moves(view, center)
+                render = memory = 0
+                if cache is not None:
+                    render = wait_for_tiles(app, cache)
+                    memory = cache.memory_usage() / 2**20
+                print(f"{items_count:>8} {cache is not None!s:>5} "
+                      f"{sweep:>5} {statistics.median(times):>8.2f}ms "
+                      f"{max(times):>8.2f}ms {render:>8.1f}ms "
+                      f"{memory:>6.1f}MB", flush=True)
+            if cache is not None:
+                cache.clear()
+        scene.clear()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
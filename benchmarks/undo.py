@@ -0,0 +1,86 @@
+"""
+Undo and redo of commands changing 100k items: moving all of them,
+as one drag merged from many moves, and adding them. Commands are
+applied in batches on the event loop, so the time of the longest
+event loop iteration is what a frame waits for, while the total is
+the time until every item has changed. The window is hidden, so the
+times are the ones of the commands alone, not of repainting the view.
+The memory the undo stack counts for the commands is printed as well.
+
+Usage: python -m benchmarks.undo [items count]
+"""
+import sys
+import time
+
+from PySide6.QtCore import QPointF
+
+from benchmarks.utils import create_window, get_application
+from core.graphics.graphics_items import VGEGraphicsRectItem
+from core.graphics.undo import AddItemsCommand, MoveItemsCommand
+
+DRAG_MOVES = 100
+
+
+def apply(action) -> tuple[float, float, int]:
+    """
+    Returns the total and the longest event loop iteration times
+    in milliseconds, and the count of iterations
+    """
+    app = get_application()
+    undo_stack = action.__self__
+    start = time.perf_counter()
+    action()
+    longest = time.perf_counter() - start
+    iterations = 1
+    while undo_stack.is_applying():
+        iteration_start = time.perf_counter()
+        app.processEvents()
+        longest = max(longest, time.perf_counter() - iteration_start)
+        iterations += 1
+    return (time.perf_counter() - start) * 1000, longest * 1000, iterations
+
+
+def main(items_count: int = 100_000):
+    root_ui = create_window(1920, 1080)
+    root_ui.window.hide()
+    scene = root_ui.graphics_scene
+    scene.setSceneRect(0, 0, 10_000, 10_000)
+    undo_stack = scene.undo_stack
+    items = [
+        VGEGraphicsRectItem(QPointF(i % 1000 * 10, i // 1000 * 10), scene)
+        for i in range(items_count)
+    ]
+    for item in items:
+        item.update_last_point(item.start_point + QPointF(8, 8))
+    get_application().processEvents()
+    print(f"items: {items_count}")
+
+    start = time.perf_counter()
+    undo_stack.push(AddItemsCommand(scene, items))
+    print(f"record adding: {(time.perf_counter() - start) * 1000:.1f} ms, "
+          f"stack size {undo_stack.memory_size / 2**20:.1f} MiB")
+
+    ids = scene.spatial_index.ids_in_rect(scene.sceneRect())
+    scene.set_selection(ids)
+    start = time.perf_counter()
+    for move in range(DRAG_MOVES):
+        undo_stack.push(MoveItemsCommand(ids, 1, 1), merge=move > 0)
+    print(f"record {DRAG_MOVES} merged moves: "
+          f"{(time.perf_counter() - start) * 1000 / DRAG_MOVES:.2f} ms/move, "
+          f"stack size {undo_stack.memory_size / 2**20:.1f} MiB")
+
+    for name, action in (
+            ("undo move", undo_stack.undo),
+            ("redo move", undo_stack.redo),
+            ("undo move", undo_stack.undo),
+            ("undo adding", undo_stack.undo),
+            ("redo adding", undo_stack.redo),
+    ):
+        total, longest, iterations = apply(action)
+        print(f"{name:>12}: {total:8.1f} ms total, longest iteration "
+              f"{longest:5.1f} ms, {iterations} iterations", flush=True)
+    scene.clear()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,32 @@
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication, QMainWindow
+
+from core import ui
+
+
+def get_application() -> QApplication:
+    return QApplication.instance() or QApplication(sys.argv)
+
+
+def create_window(width: int = 3840, height: int = 2160) -> ui.RootWindow:
+    app = get_application()
+    window = QMainWindow()
+    root_ui = ui.RootWindow(window)
+    window.show()
+    window.resize(width, height)
+    app.processEvents()
+    return root_ui
+
+
+def measure(func, repeat: int = 100) -> float:
+    """Returns average call time in milliseconds"""
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
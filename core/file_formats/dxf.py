@@ -0,0 +1,263 @@
+from collections import Counter
+from typing import BinaryIO, Iterator
+
+import numpy as np
+from PySide6.QtCore import Qt, QLineF, QRectF
+from PySide6.QtGui import QColor
+
+from core.file_formats.native import ItemKind
+from core.utils import ellipse_points, points_to_polygon
+
+FILE_EXTENSION = ".dxf"
+FILE_FILTER = "DXF drawing (*.dxf)"
+
+BINARY_SENTINEL = b"AutoCAD Binary DXF\r\n\x1a\x00"
+
+# Colors of the first AutoCAD Color Indices, 7 is drawn black on the
+# white scene as CAD applications do on white paper
+ACI_COLORS = {
+    1: 0xFF0000,
+    2: 0xFFFF00,
+    3: 0x00FF00,
+    4: 0x00FFFF,
+    5: 0x0000FF,
+    6: 0xFF00FF,
+    7: 0x000000,
+    8: 0x808080,
+    9: 0xC0C0C0,
+}
+# Gray levels of the indices 250 to 255
+ACI_GRAYS = (0x33, 0x50, 0x69, 0x82, 0xBE, 0xFF)
+# Value of the shades of a hue of the indices 10 to 249, by index % 10
+ACI_VALUES = (1.0, 1.0, 0.8, 0.8, 0.6, 0.6, 0.5, 0.5, 0.3, 0.3)
+BY_BLOCK = 0
+BY_LAYER = 256
+DEFAULT_COLOR = 7
+
+# Polyline flags
+CLOSED = 1
+POLYFACE_MESH = 16 | 64
+# Vertex flag
+POLYFACE_FACE = 128
+
+
+class DxfFormatError(ValueError):
+    pass
+
+
+def aci_color(index: int) -> int:
+    """
+    RGB of an AutoCAD Color Index. The hues of the indices 10 to 249
+    are approximated by their hue, saturation and value.
+    """
+    if index in ACI_COLORS:
+        return ACI_COLORS[index]
+    if 250 <= index <= 255:
+        return ACI_GRAYS[index - 250] * 0x010101
+    if 10 <= index <= 249:
+        return QColor.fromHsvF(
+            (index // 10 - 1) * 15 / 360,
+            0.5 if index % 2 else 1.0,
+            ACI_VALUES[index % 10],
+        ).rgb() & 0xFFFFFF
+    return ACI_COLORS[DEFAULT_COLOR]
+
+
+def read_group_codes(file: BinaryIO) -> Iterator[tuple[int, str]]:
+    """Yields the (group code, value) pairs of an ASCII DXF file"""
+    lines = iter(file)
+    for code in lines:
+        value = next(lines, None)
+        if value is None:
+            raise DxfFormatError("Unexpected end of file")
+        try:
+            code = int(code)
+        except ValueError:
+            raise DxfFormatError(f"Invalid group code: {code!r}") from None
+        yield code, value.strip().decode("utf-8", "replace")
+
+
+def read_records(file: BinaryIO) -> Iterator[tuple[str, str, list]]:
+    """
+    Yields the (section, record type, group codes) of the records of
+    the sections, such as the entities or the layers of the tables,
+    each starting at a group code 0
+    """
+    section = record_type = None
+    groups = []
+    for code, value in read_group_codes(file):
+        if code != 0:
+            if record_type == "SECTION" and code == 2:
+                section = value
+            groups.append((code, value))
+            continue
+        if section is not None and record_type != "SECTION":
+            yield section, record_type, groups
+        if value == "ENDSEC":
+            section = None
+        record_type, groups = value, []
+
+
+def get_color(values: dict, layer_colors: dict[str, int]) -> int:
+    """RGB of an entity or a layer, from its group codes"""
+    if 420 in values:
+        return int(values[420]) & 0xFFFFFF
+    # Layers that are off have a negative color
+    index = abs(int(values.get(62, BY_LAYER)))
+    if index == BY_LAYER:
+        return layer_colors.get(values.get(8), aci_color(DEFAULT_COLOR))
+    if index == BY_BLOCK:
+        return aci_color(DEFAULT_COLOR)
+    return aci_color(index)
+
+
+def get_points(groups: list[tuple[int, str]]) -> np.ndarray:
+    """Points of the 10 and 20 group codes of a lightweight polyline"""
+    xs = [float(value) for code, value in groups if code == 10]
+    ys = [float(value) for code, value in groups if code == 20]
+    if len(xs) != len(ys):
+        raise DxfFormatError("Unpaired polyline coordinates")
+    return np.column_stack((xs, ys)).reshape(-1, 2)
+
+
+def to_scene(points: np.ndarray, mirrored: bool = False) -> np.ndarray:
+    """
+    Maps DXF points to the scene, whose y axis points down. Points of
+    objects seen from below, with a negative extrusion direction, are
+    mirrored.
+    """
+    return points * (-1 if mirrored else 1, -1)
+
+
+def polyline_entity(
+        points: np.ndarray, closed: bool, style: tuple, mirrored: bool = False
+) -> tuple | None:
+    if len(points) < 2:
+        return None
+    return (
+        ItemKind.Polygon if closed else ItemKind.Polyline,
+        points_to_polygon(to_scene(points, mirrored)), style
+    )
+
+
+def get_entity(
+        record_type: str, values: dict, groups: list, style: tuple
+) -> tuple | None:
+    """
+    Converts a LINE, CIRCLE, ARC, ELLIPSE or LWPOLYLINE entity.
+    Arcs and the ellipses that aren't whole or aligned to the axes
+    are drawn as polygons, the bulges of polylines as straight segments.
+    """
+    mirrored = float(values.get(230, 1)) < 0
+    if record_type == "LINE":
+        (x1, y1), (x2, y2) = to_scene(np.array((
+            (float(values[10]), float(values[20])),
+            (float(values[11]), float(values[21])),
+        ))).tolist()
+        return ItemKind.Line, QLineF(x1, y1, x2, y2), style
+    if record_type == "LWPOLYLINE":
+        closed = int(values.get(70, 0)) & CLOSED
+        return polyline_entity(get_points(groups), closed, style, mirrored)
+
+    center_x, center_y = float(values[10]), float(values[20])
+    if record_type == "CIRCLE":
+        radius = float(values[40])
+        (center_x, center_y), = to_scene(
+            np.array(((center_x, center_y), )), mirrored
+        ).tolist()
+        return ItemKind.Ellipse, QRectF(
+            center_x - radius, center_y - radius, radius * 2, radius * 2
+        ), style
+    if record_type == "ARC":
+        start, end = np.radians(
+            (float(values[50]), float(values[51]))
+        ).tolist()
+        if end <= start:
+            end += 2 * np.pi
+        radius = float(values[40])
+        return polyline_entity(ellipse_points(
+            center_x, center_y, radius, 0, 1, start, end
+        ), False, style, mirrored)
+
+    # An ellipse, in world coordinates
+    major_x, major_y = float(values[11]), float(values[21])
+    ratio = float(values[40])
+    start = float(values.get(41, 0))
+    end = float(values.get(42, 2 * np.pi))
+    if end <= start:
+        end += 2 * np.pi
+    whole = abs(end - start - 2 * np.pi) < 1e-9
+    if whole and (major_x == 0 or major_y == 0):
+        half_width = abs(major_x or major_y * ratio)
+        half_height = abs(major_y or major_x * ratio)
+        return ItemKind.Ellipse, QRectF(
+            center_x - half_width, -center_y - half_height,
+            half_width * 2, half_height * 2
+        ), style
+    points = ellipse_points(
+        center_x, center_y, major_x, major_y, ratio, start, end
+    )
+    return polyline_entity(points[:-1] if whole else points, whole, style)
+
+
+def parse_dxf(file: BinaryIO, skipped: Counter) -> Iterator[tuple]:
+    """
+    Reads the entities of an ASCII DXF file, as its records are read,
+    and yields the ones that can be drawn as (kind, geometry, style)
+    entities of the importer. Lines are hairlines of the entity's
+    color. Other entities, such as texts, hatches, splines and block
+    references, are counted by type in `skipped`.
+    """
+    if file.read(len(BINARY_SENTINEL)) == BINARY_SENTINEL:
+        raise DxfFormatError("Binary DXF files are not supported")
+    file.seek(0)
+    layer_colors: dict[str, int] = {}
+    styles: dict[int, tuple] = {}
+    # Style, flags and points of the POLYLINE whose vertices are read
+    polyline: tuple[tuple, int, list] | None = None
+    for section, record_type, groups in read_records(file):
+        values = dict(groups)
+        try:
+            if section == "TABLES" and record_type == "LAYER":
+                layer_colors[values.get(2)] = get_color(values, {})
+            if section != "ENTITIES":
+                continue
+            if polyline is not None:
+                style, flags, points = polyline
+                if record_type == "VERTEX":
+                    if not int(values.get(70, 0)) & POLYFACE_FACE:
+                        points.append((float(values[10]), float(values[20])))
+                    continue
+                polyline = None
+                entity = polyline_entity(
+                    np.array(points).reshape(-1, 2), flags & CLOSED, style
+                )
+                if entity is not None:
+                    yield entity
+                if record_type == "SEQEND":
+                    continue
+
+            color = get_color(values, layer_colors)
+            style = styles.get(color)
+            if style is None:
+                style = styles[color] = (
+                    0xFF000000 | color, 0.0, Qt.RoundCap, Qt.RoundJoin, None
+                )
+            if record_type == "POLYLINE":
+                flags = int(values.get(70, 0))
+                if flags & POLYFACE_MESH:
+                    skipped[record_type] += 1
+                else:
+                    polyline = style, flags, []
+            elif record_type in (
+                    "LINE", "LWPOLYLINE", "CIRCLE", "ARC", "ELLIPSE"
+            ):
+                entity = get_entity(record_type, values, groups, style)
+                if entity is not None:
+                    yield entity
+            else:
+                skipped[record_type] += 1
+        except DxfFormatError:
+            raise
+        except (KeyError, ValueError) as error:
+            raise DxfFormatError(f"Invalid {record_type}: {error}") from None
@@ -0,0 +1,274 @@
+import gc
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import groupby, islice
+from typing import BinaryIO, Iterator
+from xml.etree import ElementTree
+
+from PySide6.QtCore import Qt, QLineF, QObject, QRectF, QTimer, Signal, Slot
+from PySide6.QtGui import QBrush, QColor, QPen
+from PySide6.QtWidgets import QGraphicsItem, QGraphicsScene
+
+from core.file_formats import dxf, svg
+from core.file_formats.native import (
+    DECODE_WAIT_INTERVAL,
+    MAX_PENDING_DECODES,
+    create_items,
+)
+from core.graphics.undo import AddItemsCommand
+
+FILE_FILTER = "Drawings (*.svg *.dxf)"
+
+PARSERS = {
+    svg.FILE_EXTENSION: svg.parse_svg,
+    dxf.FILE_EXTENSION: dxf.parse_dxf,
+}
+
+# Entities parsed by the worker thread at a time
+READ_BATCH_SIZE = 1024
+# Seconds items are added for at a time on the event loop, and items
+# added between checks of the time. Both are below the ones of native
+# documents, as the parser contends with the event loop for the GIL.
+IMPORT_BATCH_TIME = 0.005
+CREATE_BATCH_SIZE = 32
+
+
+class ImportStyles:
+    """
+    Pens and brushes of the imported items, one pair per distinct
+    style of the entities, indexed in the order they are met
+    """
+    def __init__(self):
+        self.pens_and_brushes: list[tuple[QPen, QBrush]] = []
+        self._indices: dict[tuple, int] = {}
+
+    def index(self, style: tuple) -> int:
+        index = self._indices.get(style)
+        if index is not None:
+            return index
+        stroke, width, cap_style, join_style, fill = style
+        if stroke is None:
+            pen = QPen(Qt.NoPen)
+        else:
+            pen = QPen(QColor.fromRgba(stroke))
+            pen.setWidthF(width)
+            pen.setCapStyle(cap_style)
+            pen.setJoinStyle(join_style)
+        brush = QBrush() if fill is None else QBrush(QColor.fromRgba(fill))
+        # Appended last, for the GUI thread to read the list meanwhile
+        index = self._indices[style] = len(self.pens_and_brushes)
+        self.pens_and_brushes.append((pen, brush))
+        return index
+
+
+def read_batch(
+        entities: Iterator[tuple], file: BinaryIO, styles: ImportStyles
+) -> tuple[list[tuple], QRectF, int]:
+    """
+    Parses the next READ_BATCH_SIZE entities in the worker thread.
+    Returns them as (kind, (geometry, style, 0, 0)) tuples for
+    create_items, their bounds and the count of bytes read so far.
+    """
+    batch = []
+    bounds = QRectF()
+    for kind, geometry, style in islice(entities, READ_BATCH_SIZE):
+        batch.append((kind, (geometry, styles.index(style), 0, 0)))
+        if isinstance(geometry, QLineF):
+            bounds |= QRectF(geometry.p1(), geometry.p2()).normalized()
+        elif isinstance(geometry, QRectF):
+            bounds |= geometry.normalized()
+        else:
+            bounds |= geometry.boundingRect()
+    return batch, bounds, file.tell()
+
+
+class DocumentImporter(QObject):
+    """
+    Imports an SVG or DXF file into the scene without blocking the
+    window, on top of its items.
+
+    The file is parsed incrementally by a worker thread, in batches
+    of READ_BATCH_SIZE entities converted to the geometry and style
+    of items. They are added to the scene on the event loop in slices
+    of IMPORT_BATCH_TIME, as native documents are loaded, and the scene
+    rect grows to hold them. Unlike when loading documents, the scene
+    index is kept, as the items land all over the view and are painted
+    while the file is imported. The garbage collector is disabled
+    meanwhile, as its full collections of the items and entities, in
+    either thread, would stall the event loop for up to a few frames.
+
+    `progress` is emitted with the bytes parsed and the file size.
+    Once the file is imported or the import is cancelled, the items
+    added so far are pushed to the undo stack as one command, then
+    `finished` is emitted, or `failed` with a message if the file
+    turns out to be invalid. `skipped` counts the elements that
+    couldn't be imported, by type.
+    """
+    progress = Signal(int, int)
+    finished = Signal()
+    failed = Signal(str)
+
+    def __init__(
+            self,
+            scene: QGraphicsScene,
+            path: str | os.PathLike,
+            parent: QObject | None = None,
+    ):
+        super().__init__(parent)
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in PARSERS:
+            raise ValueError(f"Unsupported file type: {extension}")
+        self.scene = scene
+        self.file = open(path, "rb")
+        self.file_size = os.fstat(self.file.fileno()).st_size
+        self.skipped = Counter()
+        self.items: list[QGraphicsItem] = []
+        self.load_time: float | None = None
+
+        self._entities = PARSERS[extension](self.file, self.skipped)
+        self._styles = ImportStyles()
+        # Ids of the items in the scene's spatial index, for the command
+        self._ids: list[int] = []
+        self._read_size = 0
+        self._start_time = 0.0
+        self._gc_enabled = gc.isenabled()
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending: deque[Future] = deque()
+        self._parsed = False
+        self._batch: list[tuple] = []
+        self._batch_position = 0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._import_batch)
+
+    def is_importing(self) -> bool:
+        return self._executor is not None
+
+    def start(self):
+        self._start_time = time.perf_counter()
+        self._gc_enabled = gc.isenabled()
+        gc.disable()
+        self._executor = ThreadPoolExecutor(1)
+        self._submit_reads()
+        self.progress.emit(0, self.file_size)
+        self._timer.start(DECODE_WAIT_INTERVAL)
+
+    def _submit_reads(self):
+        # Batches are read in order by the only worker
+        while (
+                not self._parsed
+                and len(self._pending) < MAX_PENDING_DECODES
+        ):
+            self._pending.append(self._executor.submit(
+                read_batch, self._entities, self.file, self._styles
+            ))
+
+    def _create_items(self, deadline: float | None) -> bool:
+        """
+        Adds parsed items to the scene until `deadline`, or until there
+        are none left if it is None, waiting for the worker. Returns
+        whether the whole file has been imported.
+        """
+        while deadline is None or time.perf_counter() < deadline:
+            if self._batch_position == len(self._batch):
+                if not self._pending:
+                    return True
+                if deadline is not None and not self._pending[0].done():
+                    return False
+                batch, bounds, self._read_size = (
+                    self._pending.popleft().result()
+                )
+                if not batch:
+                    self._parsed = True
+                    self._pending.clear()
+                    continue
+                self._batch = batch
+                self._batch_position = 0
+                self.scene.setSceneRect(
+                    self.scene.sceneRect().united(bounds)
+                )
+                self._submit_reads()
+            end = self._batch_position + CREATE_BATCH_SIZE
+            for kind, entities in groupby(
+                    self._batch[self._batch_position:end],
+                    key=lambda entity: entity[0]
+            ):
+                items = create_items(
+                    kind, [decoded for _, decoded in entities],
+                    self._styles.pens_and_brushes, self.scene
+                )
+                self.items += items
+                self._ids += map(self.scene.spatial_index.id, items)
+            self._batch_position = min(end, len(self._batch))
+        return False
+
+    @Slot()
+    def _import_batch(self):
+        try:
+            imported = self._create_items(
+                time.perf_counter() + IMPORT_BATCH_TIME
+            )
+        except (OSError, ValueError, ElementTree.ParseError) as error:
+            self._fail(error)
+            return
+        if imported:
+            self._finish()
+            return
+        self.progress.emit(self._read_size, self.file_size)
+        ready = self._batch_position < len(self._batch) or (
+            self._pending and self._pending[0].done()
+        )
+        self._timer.start(0 if ready else DECODE_WAIT_INTERVAL)
+
+    def finish(self):
+        """Imports the rest of the file right away"""
+        if self.is_importing():
+            self._timer.stop()
+            try:
+                self._create_items(None)
+            except (OSError, ValueError, ElementTree.ParseError) as error:
+                self._fail(error)
+                return
+            self._finish()
+
+    def cancel(self):
+        """Stops importing, keeping the items added so far"""
+        if self.is_importing():
+            self._timer.stop()
+            for future in self._pending:
+                future.cancel()
+            self._pending.clear()
+            self._batch = []
+            self._batch_position = 0
+            self._stop()
+
+    def _stop(self):
+        self._executor.shutdown()
+        self._executor = None
+        self._entities.close()
+        self.file.close()
+        if self._gc_enabled:
+            # The objects allocated meanwhile, mostly items that are
+            # there to stay, are moved to the oldest generation as they
+            # are, instead of being traversed by the next collection
+            if not gc.get_freeze_count():
+                gc.freeze()
+                gc.unfreeze()
+            gc.enable()
+        if self.items:
+            self.scene.undo_stack.push(
+                AddItemsCommand(self.scene, self.items, self._ids)
+            )
+
+    def _fail(self, error: Exception):
+        self._pending.clear()
+        self._stop()
+        self.failed.emit(str(error))
+
+    def _finish(self):
+        self._stop()
+        self.load_time = time.perf_counter() - self._start_time
+        self.progress.emit(self.file_size, self.file_size)
+        self.finished.emit()
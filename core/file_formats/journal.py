@@ -0,0 +1,635 @@
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import groupby, islice
+
+import numpy as np
+from PySide6.QtCore import (
+    QLockFile,
+    QObject,
+    QPointF,
+    QRectF,
+    QTimer,
+    Signal,
+    Slot,
+)
+from PySide6.QtGui import QBrush
+from PySide6.QtWidgets import QGraphicsItem, QGraphicsScene
+
+from core.file_formats.native import (
+    MAX_CHUNK_RECORDS,
+    POINT_KINDS,
+    RECORD_DTYPES,
+    Chunk,
+    DocumentContents,
+    ItemKind,
+    StyleTable,
+    get_item_kind,
+    get_record,
+    style_to_pen_and_brush,
+)
+from core.utils import polygon_to_points
+
+JOURNAL_NAME = "journal.bin"
+SNAPSHOT_NAME = "snapshot.bin"
+LOCK_NAME = "journal.lock"
+
+MAGIC = b"SVGJ"
+VERSION = 1
+
+# magic, version, reserved, generation
+HEADER = struct.Struct("<4sHHI")
+# size and CRC-32 of the records of a batch
+FRAME_HEADER = struct.Struct("<II")
+
+
+class Op:
+    Style = 1
+    SceneRect = 2
+    Item = 3
+    Create = 4
+    AddPoint = 5
+    RemovePoint = 6
+    Move = 7
+    Remove = 8
+    Restore = 9
+    Clear = 10
+
+
+# op, index, then the fields of native.STYLE_DTYPE
+STYLE_RECORD = struct.Struct("<BIIdHHHIH")
+# op, x, y, width, height
+SCENE_RECT_RECORD = struct.Struct("<Bdddd")
+# op, id, kind, followed by the record of the kind, laid out as in
+# native.RECORD_DTYPES, and the points of POINT_KINDS items
+ITEM_RECORD = struct.Struct("<BIB")
+ITEM_STRUCTS = {
+    kind: struct.Struct("<IddI" if kind in POINT_KINDS else "<Idddddd")
+    for kind in RECORD_DTYPES
+}
+# op, id, kind, style, start point
+CREATE_RECORD = struct.Struct("<BIBIdd")
+# op, id, point
+POINT_RECORD = struct.Struct("<BIdd")
+# op, id (RemovePoint, Remove and Restore)
+ID_RECORD = struct.Struct("<BI")
+# op, dx, dy, id count, followed by the ids as uint32
+MOVE_RECORD = struct.Struct("<BddI")
+CLEAR_RECORD = struct.pack("<B", Op.Clear)
+POINT = struct.Struct("<dd")
+COUNT = struct.Struct("<I")
+# Offsets in an Item record of the item's kind, position and point count
+KIND_OFFSET = ITEM_RECORD.size - 1
+POSITION_OFFSET = ITEM_RECORD.size + 4
+COUNT_OFFSET = ITEM_RECORD.size + 20
+
+# Milliseconds edits are gathered for before they are written and
+# synced to disk at once
+FLUSH_INTERVAL = 200
+# The journal is compacted into a snapshot once this many bytes of
+# records were written since the last one, or this many seconds passed
+COMPACT_SIZE = 16 * 2**20
+COMPACT_INTERVAL = 60.0
+
+
+class JournalFormatError(ValueError):
+    pass
+
+
+class JournalModel:
+    """
+    The drawing described by journal records: the styles by index, the
+    scene rect and every item by id, in stacking order, kept as its
+    Item record. Items removed by undoing their creation are kept
+    aside, as redoing it restores them.
+    """
+    def __init__(self):
+        self.styles: dict[int, bytes] = {}
+        self.scene_rect: bytes | None = None
+        self.items: dict[int, bytearray] = {}
+        self.removed: set[int] = set()
+
+    def apply(self, data: bytes | memoryview):
+        """Applies the records of a frame"""
+        try:
+            self._apply(memoryview(data))
+        except (struct.error, KeyError, IndexError) as error:
+            raise JournalFormatError(f"Invalid record: {error}") from None
+
+    def _apply(self, data: memoryview):
+        items = self.items
+        offset = 0
+        while offset < len(data):
+            op = data[offset]
+            if op == Op.AddPoint:
+                _, id_, x, y = POINT_RECORD.unpack_from(data, offset)
+                offset += POINT_RECORD.size
+                item = items.get(id_)
+                if item is not None and item[KIND_OFFSET] in POINT_KINDS:
+                    item += POINT.pack(x, y)
+                    count, = COUNT.unpack_from(item, COUNT_OFFSET)
+                    COUNT.pack_into(item, COUNT_OFFSET, count + 1)
+            elif op == Op.Item:
+                _, id_, kind = ITEM_RECORD.unpack_from(data, offset)
+                end = offset + ITEM_RECORD.size + ITEM_STRUCTS[kind].size
+                if kind in POINT_KINDS:
+                    count, = COUNT.unpack_from(data, offset + COUNT_OFFSET)
+                    end += count * POINT.size
+                if end > len(data):
+                    raise IndexError("truncated item")
+                items[id_] = bytearray(data[offset:end])
+                self.removed.discard(id_)
+                offset = end
+            elif op == Op.Create:
+                _, id_, kind, style, x, y = CREATE_RECORD.unpack_from(
+                    data, offset
+                )
+                offset += CREATE_RECORD.size
+                if kind in POINT_KINDS:
+                    record = (style, 0, 0, 1)
+                elif kind == ItemKind.Line:
+                    record = (style, 0, 0, x, y, x, y)
+                else:
+                    record = (style, 0, 0, x, y, 0, 0)
+                items[id_] = bytearray(
+                    ITEM_RECORD.pack(Op.Item, id_, kind)
+                    + ITEM_STRUCTS[kind].pack(*record)
+                    + (POINT.pack(x, y) if kind in POINT_KINDS else b"")
+                )
+                self.removed.discard(id_)
+            elif op == Op.Move:
+                _, dx, dy, count = MOVE_RECORD.unpack_from(data, offset)
+                offset += MOVE_RECORD.size
+                ids = np.frombuffer(data, "<u4", count, offset).tolist()
+                offset += count * 4
+                for id_ in ids:
+                    item = items.get(id_)
+                    if item is not None:
+                        x, y = POINT.unpack_from(item, POSITION_OFFSET)
+                        POINT.pack_into(item, POSITION_OFFSET, x + dx, y + dy)
+            elif op in (Op.RemovePoint, Op.Remove, Op.Restore):
+                _, id_ = ID_RECORD.unpack_from(data, offset)
+                offset += ID_RECORD.size
+                item = items.get(id_)
+                if item is None:
+                    continue
+                if op == Op.Remove:
+                    self.removed.add(id_)
+                elif op == Op.Restore:
+                    # A restored item is added on top of the others
+                    self.removed.discard(id_)
+                    items[id_] = items.pop(id_)
+                elif item[KIND_OFFSET] in POINT_KINDS:
+                    count, = COUNT.unpack_from(item, COUNT_OFFSET)
+                    if count > 1:
+                        del item[-POINT.size:]
+                        COUNT.pack_into(item, COUNT_OFFSET, count - 1)
+            elif op == Op.Style:
+                index = STYLE_RECORD.unpack_from(data, offset)[1]
+                end = offset + STYLE_RECORD.size
+                self.styles[index] = bytes(data[offset:end])
+                offset = end
+            elif op == Op.SceneRect:
+                SCENE_RECT_RECORD.unpack_from(data, offset)
+                end = offset + SCENE_RECT_RECORD.size
+                self.scene_rect = bytes(data[offset:end])
+                offset = end
+            elif op == Op.Clear:
+                offset += len(CLEAR_RECORD)
+                items.clear()
+                self.removed.clear()
+            else:
+                raise JournalFormatError(f"Unknown record type: {op}")
+
+    def encode(self) -> bytes:
+        """Returns the records rebuilding the model from scratch"""
+        records = list(self.styles.values())
+        if self.scene_rect is not None:
+            records.append(self.scene_rect)
+        records += self.items.values()
+        records += [
+            ID_RECORD.pack(Op.Remove, id_) for id_ in self.removed
+        ]
+        return b"".join(records)
+
+    def contents(self) -> DocumentContents:
+        """
+        Returns the drawing as the contents of a native document, without
+        the removed items
+        """
+        pens_and_brushes = [
+            style_to_pen_and_brush(STYLE_RECORD.unpack(
+                self.styles[index]
+            )[2:])
+            for index in range(len(self.styles))
+        ]
+        scene_rect = QRectF()
+        if self.scene_rect is not None:
+            scene_rect = QRectF(*SCENE_RECT_RECORD.unpack(self.scene_rect)[1:])
+        chunks = []
+        items = (
+            item for id_, item in self.items.items()
+            if id_ not in self.removed
+        )
+        for kind, run in groupby(
+                items, key=lambda item: item[KIND_OFFSET]
+        ):
+            record_end = ITEM_RECORD.size + ITEM_STRUCTS[kind].size
+            while batch := list(islice(run, MAX_CHUNK_RECORDS)):
+                records = np.frombuffer(b"".join(
+                    item[ITEM_RECORD.size:record_end] for item in batch
+                ), RECORD_DTYPES[kind])
+                points = np.frombuffer(b"".join(
+                    item[record_end:] for item in batch
+                ), "<f8").reshape(-1, 2) if kind in POINT_KINDS else None
+                chunks.append(Chunk(kind, records, points))
+        return DocumentContents(scene_rect, pens_and_brushes, chunks)
+
+
+def encode_frame(data: bytes) -> bytes:
+    return FRAME_HEADER.pack(len(data), zlib.crc32(data)) + data
+
+
+def read_frames(path: str | os.PathLike) -> tuple[int, list] | None:
+    """
+    Returns the generation and the frames of a journal file, or None if
+    there is no file. The frames stop at the first one that is torn or
+    corrupt, as a crash while writing leaves it.
+    """
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except FileNotFoundError:
+        return None
+    if len(data) < HEADER.size:
+        raise JournalFormatError("Not an edit journal")
+    magic, version, _, generation = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise JournalFormatError("Not an edit journal")
+    if version > VERSION:
+        raise JournalFormatError(f"Unsupported journal version: {version}")
+    frames = []
+    view = memoryview(data)
+    offset = HEADER.size
+    while offset + FRAME_HEADER.size <= len(data):
+        size, checksum = FRAME_HEADER.unpack_from(data, offset)
+        offset += FRAME_HEADER.size
+        frame = view[offset:offset + size]
+        if len(frame) < size or zlib.crc32(frame) != checksum:
+            break
+        frames.append(frame)
+        offset += size
+    return generation, frames
+
+
+def read_journal(directory: str | os.PathLike) -> DocumentContents | None:
+    """
+    Reads the drawing a journal directory holds: its snapshot, and
+    the journal written since if it is of the same generation. A newer
+    journal starts from scratch and an older one is already in the
+    snapshot. Returns None if there are no files.
+    """
+    snapshot = read_frames(os.path.join(directory, SNAPSHOT_NAME))
+    journal = read_frames(os.path.join(directory, JOURNAL_NAME))
+    if snapshot is None and journal is None:
+        return None
+    frames = []
+    if snapshot is not None and (journal is None or journal[0] <= snapshot[0]):
+        frames += snapshot[1]
+    if journal is not None and (snapshot is None or journal[0] >= snapshot[0]):
+        frames += journal[1]
+    model = JournalModel()
+    for frame in frames:
+        model.apply(frame)
+    return model.contents()
+
+
+def sync_directory(path: str | os.PathLike):
+    """Syncs a rename in `path` to disk, where directories can be opened"""
+    try:
+        descriptor = os.open(path, os.O_RDONLY)
+    except OSError:  # Windows
+        return
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def write_journal_file(path: str, generation: int, data: bytes):
+    """
+    Writes a journal file holding `data` as its one frame into
+    a temporary file, synced to disk, which then replaces `path`
+    """
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, 0, generation))
+        if data:
+            file.write(encode_frame(data))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+    sync_directory(os.path.dirname(path))
+
+
+class JournalWriter:
+    """
+    Writes the journal in the worker thread: every batch of records is
+    appended as a frame and synced to disk, then applied to a model
+    of the drawing, which compact() writes as the next snapshot.
+
+    Snapshots and journals carry a generation. A compaction writes the
+    snapshot of the next generation before starting an empty journal
+    of it, so a crash in between leaves a journal already in the
+    snapshot, which read_journal() tells by its older generation.
+    """
+    def __init__(self, directory: str | os.PathLike):
+        self.journal_path = os.path.join(directory, JOURNAL_NAME)
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_NAME)
+        self.model = JournalModel()
+        self.generation = 0
+        self.file = None
+        # Bytes of records written since the last snapshot
+        self.size = 0
+        self.compact_time = 0.0
+
+    def start(self, records: list[bytes]):
+        """
+        Replaces the files of a former session with a journal starting
+        with `records`, of a newer generation than both of them
+        """
+        data = b"".join(records)
+        self.model.apply(data)
+        for path in (self.journal_path, self.snapshot_path):
+            try:
+                with open(path, "rb") as file:
+                    header = file.read(HEADER.size)
+            except FileNotFoundError:
+                continue
+            if len(header) == HEADER.size:
+                self.generation = max(
+                    self.generation, HEADER.unpack(header)[3]
+                )
+        self.generation += 1
+        write_journal_file(self.journal_path, self.generation, data)
+        if os.path.exists(self.snapshot_path):
+            os.remove(self.snapshot_path)
+        self.file = open(self.journal_path, "ab")
+        self.size = len(data)
+        self.compact_time = time.perf_counter()
+
+    def write(self, records: list[bytes]):
+        data = b"".join(records)
+        self.file.write(encode_frame(data))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.model.apply(data)
+        self.size += len(data)
+        if self.size >= COMPACT_SIZE or (
+                time.perf_counter() - self.compact_time >= COMPACT_INTERVAL
+        ):
+            self.compact()
+
+    def compact(self):
+        """Writes the model as a snapshot and starts an empty journal"""
+        self.generation += 1
+        write_journal_file(
+            self.snapshot_path, self.generation, self.model.encode()
+        )
+        self.file.close()
+        write_journal_file(self.journal_path, self.generation, b"")
+        self.file = open(self.journal_path, "ab")
+        self.size = 0
+        self.compact_time = time.perf_counter()
+
+    def close(self, discard: bool):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if discard:
+            for path in (self.journal_path, self.snapshot_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+class EditJournal(QObject):
+    """
+    Records every change of the scene's items into a journal file, so
+    the drawing can be recovered after a crash without saving it.
+
+    The scene reports its changes as it makes them: items added by
+    create_items, created and finished by GeometryTool, points added
+    and removed, items moved, removed and restored, and the scene
+    cleared. Recording one packs it into a record of a few bytes on
+    the event loop; the records gathered for FLUSH_INTERVAL are written
+    as one frame and synced to disk by a worker thread, so an edit
+    costs microseconds and a crash loses at most that long of them.
+    The worker applies the records to a JournalModel of the drawing,
+    which it writes as a snapshot, starting an empty journal, once
+    the journal grows past COMPACT_SIZE or COMPACT_INTERVAL passes.
+
+    A lock file keeps other windows from using the same directory.
+    The files are removed when the journal is closed, so the ones found
+    by a new journal were left by a session that crashed, which
+    read_recovery() returns as the contents of a document. start()
+    replaces them with the journal of the new session, starting with
+    the changes recorded so far.
+
+    `failed` is emitted with a message if the journal can't be written,
+    after which it stops recording.
+    """
+    failed = Signal(str)
+
+    def __init__(
+            self,
+            scene: QGraphicsScene,
+            directory: str | os.PathLike,
+            parent: QObject | None = None,
+    ):
+        super().__init__(parent)
+        os.makedirs(directory, exist_ok=True)
+        self._lock = QLockFile(os.path.join(directory, LOCK_NAME))
+        if not self._lock.tryLock(0):
+            raise OSError(f"The edit journal is in use: {directory}")
+        self.scene = scene
+        self.directory = directory
+        self._records: list[bytes] = []
+        self._styles = StyleTable()
+        self._no_brush = QBrush()
+        self._scene_rect: QRectF | None = None
+        self._writer: JournalWriter | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending: deque[Future] = deque()
+        self._timer = QTimer(self)
+        self._timer.setInterval(FLUSH_INTERVAL)
+        self._timer.timeout.connect(self.flush)
+        scene.journal = self
+
+    def has_recovery(self) -> bool:
+        return any(
+            os.path.exists(os.path.join(self.directory, name))
+            for name in (JOURNAL_NAME, SNAPSHOT_NAME)
+        )
+
+    def read_recovery(self) -> DocumentContents | None:
+        return read_journal(self.directory)
+
+    def start(self):
+        self._writer = JournalWriter(self.directory)
+        self._executor = ThreadPoolExecutor(1)
+        self._record_scene_rect()
+        records, self._records = self._records, []
+        self._pending.append(
+            self._executor.submit(self._writer.start, records)
+        )
+        self._timer.start()
+
+    @Slot()
+    def flush(self):
+        """Hands the records gathered so far to the worker"""
+        while self._pending and self._pending[0].done():
+            error = self._pending.popleft().exception()
+            if error is not None:
+                self._fail(error)
+                return
+        self._record_scene_rect()
+        if self._records and self._executor is not None:
+            records, self._records = self._records, []
+            self._pending.append(
+                self._executor.submit(self._writer.write, records)
+            )
+
+    def sync(self):
+        """Writes the records gathered so far and waits for the worker"""
+        self.flush()
+        while self._pending:
+            self._pending[0].exception()
+            self.flush()
+
+    def compact(self):
+        """Writes a snapshot right away"""
+        if self._executor is not None:
+            self.flush()
+            self._pending.append(self._executor.submit(self._writer.compact))
+            self.sync()
+
+    def close(self, discard: bool = True):
+        """
+        Stops recording and writes the records left. The files are
+        removed if `discard`, otherwise they are left as a crash would.
+        """
+        if self.scene.journal is self:
+            self.scene.journal = None
+        self._timer.stop()
+        if self._executor is not None:
+            self.sync()
+            if self._executor is not None:
+                self._executor.submit(self._writer.close, discard).result()
+                self._executor.shutdown()
+                self._executor = None
+        self._lock.unlock()
+
+    def _fail(self, error: Exception):
+        self._pending.clear()
+        self._records = []
+        self._executor.submit(self._writer.close, False)
+        self._executor.shutdown()
+        self._executor = None
+        self.close(discard=False)
+        self.failed.emit(str(error))
+
+    def _record_scene_rect(self):
+        scene_rect = self.scene.sceneRect()
+        if scene_rect != self._scene_rect:
+            self._scene_rect = scene_rect
+            self._records.append(SCENE_RECT_RECORD.pack(
+                Op.SceneRect, *scene_rect.getRect()
+            ))
+
+    def _style(self, item: QGraphicsItem, kind: int) -> int:
+        styles = self._styles
+        count = len(styles.styles)
+        index = styles.index(
+            item.pen(),
+            self._no_brush if kind == ItemKind.Line else item.brush()
+        )
+        if len(styles.styles) > count:
+            self._records.append(
+                STYLE_RECORD.pack(Op.Style, index, *styles.styles[index])
+            )
+        return index
+
+    def _id(self, item: QGraphicsItem) -> int | None:
+        index = self.scene.spatial_index
+        return index.id(item) if item in index else None
+
+    def record_items(self, items: list[QGraphicsItem]):
+        """Records items added to the scene as they are"""
+        records = self._records
+        for item in items:
+            kind = get_item_kind(item)
+            id_ = self._id(item)
+            if kind is None or id_ is None:
+                continue
+            record = ITEM_RECORD.pack(Op.Item, id_, kind) + ITEM_STRUCTS[
+                kind
+            ].pack(*get_record(kind, self._style(item, kind), item))
+            if kind in POINT_KINDS:
+                record += polygon_to_points(
+                    item.polygon()
+                ).astype("<f8", copy=False).tobytes()
+            records.append(record)
+
+    def record_created(self, item: QGraphicsItem):
+        """Records an item created at its start point, to be drawn"""
+        kind = get_item_kind(item)
+        id_ = self._id(item)
+        if kind is not None and id_ is not None:
+            start_point = item.start_point
+            self._records.append(CREATE_RECORD.pack(
+                Op.Create, id_, kind, self._style(item, kind),
+                start_point.x(), start_point.y()
+            ))
+
+    def record_finished(self, item: QGraphicsItem):
+        """Records an item whose drawing is over"""
+        self.record_items([item])
+
+    def record_point_added(self, item: QGraphicsItem, point: QPointF):
+        id_ = self._id(item)
+        if id_ is not None:
+            self._records.append(POINT_RECORD.pack(
+                Op.AddPoint, id_, point.x(), point.y()
+            ))
+
+    def record_point_removed(self, item: QGraphicsItem):
+        id_ = self._id(item)
+        if id_ is not None:
+            self._records.append(ID_RECORD.pack(Op.RemovePoint, id_))
+
+    def record_moved(self, ids: np.ndarray, dx: float, dy: float):
+        ids = np.asarray(ids, dtype="<u4").tobytes()
+        records = self._records
+        # The moves of a drag are merged until they are written
+        if records and records[-1][0] == Op.Move and (
+                records[-1][MOVE_RECORD.size:] == ids
+        ):
+            _, last_dx, last_dy, _ = MOVE_RECORD.unpack_from(records[-1])
+            dx += last_dx
+            dy += last_dy
+            records.pop()
+        records.append(
+            MOVE_RECORD.pack(Op.Move, dx, dy, len(ids) // 4) + ids
+        )
+
+    def record_removed(self, id_: int):
+        self._records.append(ID_RECORD.pack(Op.Remove, id_))
+
+    def record_restored(self, id_: int):
+        self._records.append(ID_RECORD.pack(Op.Restore, id_))
+
+    def record_cleared(self):
+        self._records.append(CLEAR_RECORD)
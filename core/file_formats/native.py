@@ -0,0 +1,738 @@
+import mmap
+import os
+import struct
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator, NamedTuple
+
+import numpy as np
+from PySide6.QtCore import (
+    Qt,
+    QEvent,
+    QLineF,
+    QObject,
+    QPointF,
+    QRectF,
+    QTimer,
+    Signal,
+    Slot,
+)
+from PySide6.QtGui import QBrush, QColor, QPen
+from PySide6.QtWidgets import QGraphicsItem, QGraphicsScene, QGraphicsView
+
+from core.generics import VGEGraphicsScene
+from core.graphics.graphics_items import (
+    VGEGraphicsLineItem,
+    VGEGraphicsRectItem,
+    VGEGraphicsPolygonItem,
+    VGEGraphicsEllipseItem,
+    VGEGraphicsFreehandItem,
+)
+from core.utils import points_to_polygon, polygon_to_points
+
+FILE_EXTENSION = ".vge"
+FILE_FILTER = "Simple VGE drawing (*.vge)"
+
+MAGIC = b"SVGE"
+VERSION = 1
+
+# magic, version, reserved, scene rect (x, y, width, height),
+# style count, chunk count
+HEADER = struct.Struct("<4sHHddddII")
+# kind, reserved, record count, point count
+CHUNK_HEADER = struct.Struct("<HHII")
+
+STYLE_DTYPE = np.dtype([
+    ("pen_color", "<u4"),
+    ("pen_width", "<f8"),
+    ("pen_style", "<u2"),
+    ("cap_style", "<u2"),
+    ("join_style", "<u2"),
+    ("brush_color", "<u4"),
+    ("brush_style", "<u2"),
+])
+
+
+class ItemKind:
+    Line = 1
+    Rect = 2
+    Ellipse = 3
+    Polygon = 4
+    Polyline = 5
+
+
+# Kinds whose items store their points after the records
+POINT_KINDS = (ItemKind.Polygon, ItemKind.Polyline)
+
+RECORD_DTYPES = {
+    ItemKind.Line: np.dtype([
+        ("style", "<u4"), ("x", "<f8"), ("y", "<f8"),
+        ("x1", "<f8"), ("y1", "<f8"), ("x2", "<f8"), ("y2", "<f8"),
+    ]),
+    ItemKind.Rect: np.dtype([
+        ("style", "<u4"), ("x", "<f8"), ("y", "<f8"),
+        ("left", "<f8"), ("top", "<f8"), ("width", "<f8"), ("height", "<f8"),
+    ]),
+    ItemKind.Polygon: np.dtype([
+        ("style", "<u4"), ("x", "<f8"), ("y", "<f8"), ("count", "<u4"),
+    ]),
+}
+RECORD_DTYPES[ItemKind.Ellipse] = RECORD_DTYPES[ItemKind.Rect]
+RECORD_DTYPES[ItemKind.Polyline] = RECORD_DTYPES[ItemKind.Polygon]
+
+ITEM_CLASSES = {
+    ItemKind.Line: VGEGraphicsLineItem,
+    ItemKind.Rect: VGEGraphicsRectItem,
+    ItemKind.Ellipse: VGEGraphicsEllipseItem,
+    ItemKind.Polygon: VGEGraphicsPolygonItem,
+    ItemKind.Polyline: VGEGraphicsFreehandItem,
+}
+
+ITEM_KINDS = {item_class: kind for kind, item_class in ITEM_CLASSES.items()}
+
+MAX_CHUNK_RECORDS = 65536
+
+# DocumentLoader adds items on the event loop for this long (seconds)
+# at a time, checking the time every CREATE_BATCH_SIZE items
+LOAD_BATCH_TIME = 0.01
+CREATE_BATCH_SIZE = 128
+# Items decoded by the loader's worker per task, and tasks decoded
+# ahead of the event loop
+DECODE_BATCH_SIZE = 4096
+MAX_PENDING_DECODES = 2
+# Milliseconds to wait for the worker when it falls behind
+DECODE_WAIT_INTERVAL = 2
+
+
+class NativeFormatError(ValueError):
+    pass
+
+
+class Chunk(NamedTuple):
+    kind: int
+    records: np.ndarray
+    points: np.ndarray | None
+
+
+def get_item_kind(item: QGraphicsItem) -> int | None:
+    kind = ITEM_KINDS.get(type(item))
+    if kind is not None:
+        return kind
+    for kind, item_class in ITEM_CLASSES.items():
+        if isinstance(item, item_class):
+            return kind
+    return None
+
+
+class StyleTable:
+    """
+    Assigns indices to distinct (pen, brush) pairs. Pens and brushes
+    are bucketed by their colors and width and then compared as is,
+    so their enum properties are only read once per distinct style.
+    """
+    def __init__(self):
+        self.styles: list[tuple] = []
+        self._buckets: dict[tuple, list[tuple[QPen, QBrush, int]]] = {}
+
+    def index(self, pen: QPen, brush: QBrush) -> int:
+        bucket = self._buckets.setdefault(
+            (pen.color().rgba(), pen.widthF(), brush.color().rgba()), []
+        )
+        for bucket_pen, bucket_brush, index in bucket:
+            if pen == bucket_pen and brush == bucket_brush:
+                return index
+        index = len(self.styles)
+        self.styles.append((
+            pen.color().rgba(), pen.widthF(), pen.style().value,
+            pen.capStyle().value, pen.joinStyle().value,
+            brush.color().rgba(), brush.style().value,
+        ))
+        bucket.append((pen, brush, index))
+        return index
+
+    def to_array(self) -> np.ndarray:
+        return np.array(self.styles, dtype=STYLE_DTYPE)
+
+
+def style_to_pen_and_brush(style) -> tuple[QPen, QBrush]:
+    (pen_color, pen_width, pen_style, cap_style, join_style,
+     brush_color, brush_style) = style
+    pen = QPen(QColor.fromRgba(pen_color))
+    pen.setWidthF(pen_width)
+    pen.setStyle(Qt.PenStyle(pen_style))
+    pen.setCapStyle(Qt.PenCapStyle(cap_style))
+    pen.setJoinStyle(Qt.PenJoinStyle(join_style))
+    brush = QBrush(QColor.fromRgba(brush_color), Qt.BrushStyle(brush_style))
+    return pen, brush
+
+
+def get_record(kind: int, style: int, item: QGraphicsItem) -> tuple:
+    pos = item.pos()
+    if kind == ItemKind.Line:
+        line = item.line()
+        return (
+            style, pos.x(), pos.y(),
+            line.x1(), line.y1(), line.x2(), line.y2()
+        )
+    if kind in POINT_KINDS:
+        return style, pos.x(), pos.y(), item.polygon().size()
+    rect = item.rect()
+    return (
+        style, pos.x(), pos.y(),
+        rect.x(), rect.y(), rect.width(), rect.height()
+    )
+
+
+def encode_scene(
+        scene: QGraphicsScene
+) -> tuple[QRectF, np.ndarray, list[Chunk]]:
+    """
+    Returns (scene rect, style table, chunks) of the scene items,
+    in stacking order. Every chunk is a run of items of the same kind.
+    """
+    styles = StyleTable()
+    no_brush = QBrush()
+    chunks: list[Chunk] = []
+    kind = None
+    records: list[tuple] = []
+    points: list[np.ndarray] = []
+
+    def flush():
+        if records:
+            chunks.append(Chunk(
+                kind,
+                np.array(records, dtype=RECORD_DTYPES[kind]),
+                np.concatenate(points) if kind in POINT_KINDS else None
+            ))
+            records.clear()
+            points.clear()
+
+    for item in scene.items(Qt.AscendingOrder):
+        item_kind = get_item_kind(item)
+        if item_kind is None:
+            continue
+        if item_kind != kind or len(records) == MAX_CHUNK_RECORDS:
+            flush()
+            kind = item_kind
+        style = styles.index(
+            item.pen(),
+            no_brush if kind == ItemKind.Line else item.brush()
+        )
+        records.append(get_record(kind, style, item))
+        if kind in POINT_KINDS:
+            points.append(polygon_to_points(item.polygon()))
+    flush()
+
+    return scene.sceneRect(), styles.to_array(), chunks
+
+
+def write_document(
+        path: str | os.PathLike,
+        scene_rect: QRectF,
+        styles: np.ndarray,
+        chunks: list[Chunk],
+):
+    """
+    Writes the document into a temporary file first and then replaces
+    `path` with it, so a failed save does not destroy the previous one
+    """
+    temporary_path = f"{os.fspath(path)}.tmp"
+    completed = False
+    try:
+        with open(temporary_path, "wb") as file:
+            file.write(HEADER.pack(
+                MAGIC, VERSION, 0,
+                scene_rect.x(), scene_rect.y(),
+                scene_rect.width(), scene_rect.height(),
+                len(styles), len(chunks)
+            ))
+            file.write(styles.astype(STYLE_DTYPE, copy=False).tobytes())
+            for chunk in chunks:
+                points = (
+                    np.ascontiguousarray(chunk.points, dtype="<f8")
+                    if chunk.points is not None else np.empty((0, 2))
+                )
+                file.write(CHUNK_HEADER.pack(
+                    chunk.kind, 0, len(chunk.records), len(points)
+                ))
+                file.write(
+                    chunk.records.astype(
+                        RECORD_DTYPES[chunk.kind], copy=False
+                    ).tobytes()
+                )
+                file.write(points.tobytes())
+        os.replace(temporary_path, path)
+        completed = True
+    finally:
+        if not completed and os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+
+def save_scene(scene: QGraphicsScene, path: str | os.PathLike):
+    write_document(path, *encode_scene(scene))
+
+
+class NativeDocument:
+    """
+    A memory-mapped native document.
+
+    File layout (little-endian):
+        HEADER
+        style table: style count * STYLE_DTYPE
+        chunks: CHUNK_HEADER, record count * RECORD_DTYPES[kind],
+                point count * 2 float64 (POINT_KINDS chunks only)
+
+    Records and points are numpy views into the mapped file, so they are
+    only decoded when accessed. Views stay valid after `close`, keeping
+    the mapping alive until the last of them is released.
+    """
+    def __init__(self, path: str | os.PathLike):
+        with open(path, "rb") as file:
+            try:
+                self._mmap = mmap.mmap(
+                    file.fileno(), 0, access=mmap.ACCESS_READ
+                )
+            except ValueError:  # empty file
+                raise NativeFormatError("Not a Simple VGE drawing") from None
+
+        if len(self._mmap) < HEADER.size:
+            raise NativeFormatError("Not a Simple VGE drawing")
+        (magic, version, _, x, y, width, height,
+         style_count, self.chunk_count) = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise NativeFormatError("Not a Simple VGE drawing")
+        if version > VERSION:
+            raise NativeFormatError(
+                f"Unsupported file format version: {version}"
+            )
+        self.scene_rect = QRectF(x, y, width, height)
+        self.styles = self._read_array(STYLE_DTYPE, style_count, HEADER.size)
+        self._chunks_offset = HEADER.size + self.styles.nbytes
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._mmap = None
+
+    def _read_array(self, dtype, count: int, offset: int) -> np.ndarray:
+        if offset + count * dtype.itemsize > len(self._mmap):
+            raise NativeFormatError("The file is truncated")
+        return np.frombuffer(self._mmap, dtype, count, offset)
+
+    def chunks(self) -> Iterator[Chunk]:
+        offset = self._chunks_offset
+        for _ in range(self.chunk_count):
+            if offset + CHUNK_HEADER.size > len(self._mmap):
+                raise NativeFormatError("The file is truncated")
+            kind, _, record_count, point_count = CHUNK_HEADER.unpack_from(
+                self._mmap, offset
+            )
+            if kind not in RECORD_DTYPES:
+                raise NativeFormatError(f"Unknown item kind: {kind}")
+            offset += CHUNK_HEADER.size
+            records = self._read_array(
+                RECORD_DTYPES[kind], record_count, offset
+            )
+            offset += records.nbytes
+            points = self._read_array(
+                np.dtype("<f8"), point_count * 2, offset
+            ).reshape(-1, 2) if kind in POINT_KINDS else None
+            offset += point_count * 16
+            if len(records) and records["style"].max() >= len(self.styles):
+                raise NativeFormatError("Unknown item style")
+            if points is not None and records["count"].sum() != len(points):
+                raise NativeFormatError("Polygon points count mismatch")
+            yield Chunk(kind, records, points)
+
+
+def get_point_offsets(chunk: Chunk) -> np.ndarray:
+    """Returns the offsets of every polygon's first point and of the end"""
+    offsets = np.zeros(len(chunk.records) + 1, dtype=np.int64)
+    np.cumsum(chunk.records["count"], out=offsets[1:])
+    return offsets
+
+
+def get_bounds(chunk: Chunk, pen_widths: np.ndarray) -> np.ndarray:
+    """
+    Returns (left, top, right, bottom) scene bounds of the chunk items
+    as an (n, 4) array, widened by their pen width to cover caps and
+    joins, which reach past half of it.
+    Polygons without points get NaN bounds, which intersect nothing.
+    """
+    records = chunk.records
+    if chunk.kind in POINT_KINDS:
+        bounds = np.full((len(records), 4), np.nan)
+        not_empty = records["count"] > 0
+        if not_empty.any():
+            starts = get_point_offsets(chunk)[:-1][not_empty]
+            bounds[not_empty, :2] = np.minimum.reduceat(chunk.points, starts)
+            bounds[not_empty, 2:] = np.maximum.reduceat(chunk.points, starts)
+    else:
+        if chunk.kind == ItemKind.Line:
+            xs = records["x1"], records["x2"]
+            ys = records["y1"], records["y2"]
+        else:
+            xs = records["left"], records["left"] + records["width"]
+            ys = records["top"], records["top"] + records["height"]
+        bounds = np.column_stack((
+            np.minimum(*xs), np.minimum(*ys), np.maximum(*xs), np.maximum(*ys)
+        ))
+    positions = np.column_stack((records["x"], records["y"]))
+    margins = np.maximum(pen_widths[records["style"]], 1)[:, np.newaxis]
+    bounds[:, :2] += positions - margins
+    bounds[:, 2:] += positions + margins
+    return bounds
+
+
+def intersects(bounds: np.ndarray, rect: tuple) -> np.ndarray:
+    """Returns which of the bounds intersect (left, top, right, bottom)"""
+    left, top, right, bottom = rect
+    return (
+        (bounds[:, 0] <= right) & (bounds[:, 2] >= left)
+        & (bounds[:, 1] <= bottom) & (bounds[:, 3] >= top)
+    )
+
+
+def decode_items(
+        chunk: Chunk,
+        indices: np.ndarray | None = None,
+        offsets: np.ndarray | None = None,
+) -> list[tuple]:
+    """
+    Decodes the chunk records (all of them or the ones at `indices`)
+    into (geometry, style, x, y) tuples, where geometry is a QLineF,
+    QRectF or QPolygonF. Only value types are created, so chunks can
+    be decoded outside of the GUI thread.
+    """
+    records = chunk.records if indices is None else chunk.records[indices]
+    if chunk.kind in POINT_KINDS:
+        if offsets is None:
+            offsets = get_point_offsets(chunk)
+        starts = offsets[:-1] if indices is None else offsets[indices]
+        ends = offsets[1:] if indices is None else offsets[indices + 1]
+        return [
+            (points_to_polygon(chunk.points[start:end]), style, x, y)
+            for (style, x, y, _), start, end in zip(
+                records.tolist(), starts.tolist(), ends.tolist()
+            )
+        ]
+    geometry_class = QLineF if chunk.kind == ItemKind.Line else QRectF
+    return [
+        (geometry_class(a, b, c, d), style, x, y)
+        for style, x, y, a, b, c, d in records.tolist()
+    ]
+
+
+def create_items(
+        kind: int,
+        decoded: list[tuple],
+        pens_and_brushes: list[tuple[QPen, QBrush]],
+        scene: QGraphicsScene,
+) -> list[QGraphicsItem]:
+    """
+    Adds items of decode_items() output to the scene, recorded in its
+    edit journal if it has one
+    """
+    item_class = ITEM_CLASSES[kind]
+    items = []
+    for geometry, style, x, y in decoded:
+        if kind == ItemKind.Line:
+            item = item_class(geometry.p1())
+            item.setLine(geometry)
+        elif kind in POINT_KINDS:
+            item = item_class(
+                QPointF() if geometry.isEmpty() else geometry.value(0)
+            )
+            item.setPolygon(geometry)
+        else:
+            item = item_class(geometry.topLeft())
+            item.setRect(geometry)
+        pen, brush = pens_and_brushes[style]
+        item.setPen(pen)
+        if kind != ItemKind.Line:
+            item.setBrush(brush)
+        if x or y:
+            item.setPos(x, y)
+        scene.addItem(item)
+        items.append(item)
+    if isinstance(scene, VGEGraphicsScene) and scene.journal is not None:
+        scene.journal.record_items(items)
+    return items
+
+
+class DocumentContents(NamedTuple):
+    scene_rect: QRectF
+    pens_and_brushes: list[tuple[QPen, QBrush]]
+    chunks: list[Chunk]
+
+
+def read_document(path: str | os.PathLike) -> DocumentContents:
+    """
+    Reads every chunk header of the document at `path`, validating
+    the whole file, without touching any scene. Chunk records and
+    points are decoded only when the contents are set to a scene.
+    """
+    with NativeDocument(path) as document:
+        return DocumentContents(
+            document.scene_rect,
+            [
+                style_to_pen_and_brush(style)
+                for style in document.styles.tolist()
+            ],
+            list(document.chunks()),
+        )
+
+
+def set_scene_contents(scene: QGraphicsScene, contents: DocumentContents):
+    """Replaces the scene contents with the read document ones"""
+    scene.clear()
+    scene.setSceneRect(contents.scene_rect)
+    for chunk in contents.chunks:
+        create_items(
+            chunk.kind, decode_items(chunk), contents.pens_and_brushes, scene
+        )
+
+
+def load_scene(scene: QGraphicsScene, path: str | os.PathLike):
+    """
+    Replaces the scene contents with the document at `path`.
+    The file is validated before the current contents are dropped.
+    """
+    set_scene_contents(scene, read_document(path))
+
+
+class DocumentLoader(QObject):
+    """
+    Loads a native document into the scene without blocking the window.
+
+    The contents are the ones of read_document, so the file has been
+    validated already; `start` replaces the scene contents. Items
+    intersecting the view's viewport are inserted and painted first,
+    along with the items stacked below them that they overlap, so the
+    stacking order is preserved.
+    The rest are decoded in a worker thread and added to the scene on
+    the event loop in batches of LOAD_BATCH_TIME. The scene index is
+    disabled meanwhile and only rebuilt once loading is over.
+
+    `first_paint_time` (until the first items are painted, or added
+    if the view is hidden) and `load_time` are measured in seconds
+    from `start`.
+    """
+    progress = Signal(int, int)
+    finished = Signal()
+
+    def __init__(
+            self,
+            scene: QGraphicsScene,
+            view: QGraphicsView,
+            contents: DocumentContents,
+            parent: QObject | None = None,
+    ):
+        super().__init__(parent)
+        self.scene = scene
+        self.view = view
+        self.scene_rect = contents.scene_rect
+        self.pens_and_brushes = contents.pens_and_brushes
+        self.pen_widths = np.array(
+            [pen.widthF() for pen, _ in self.pens_and_brushes]
+        )
+        self.chunks = contents.chunks
+        self.total_count = sum(len(chunk.records) for chunk in self.chunks)
+        self.loaded_count = 0
+        self.first_paint_time: float | None = None
+        self.load_time: float | None = None
+
+        self._start_time = 0.0
+        self._index_method = scene.itemIndexMethod()
+        self._executor: ThreadPoolExecutor | None = None
+        self._tasks: deque[tuple] = deque()
+        self._pending: deque[tuple[int, Future]] = deque()
+        self._decoded_kind = 0
+        self._decoded: list[tuple] = []
+        self._decoded_position = 0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._load_batch)
+
+    def is_loading(self) -> bool:
+        return self._executor is not None
+
+    def start(self):
+        self._start_time = time.perf_counter()
+        self.scene.clear()
+        self.scene.setSceneRect(self.scene_rect)
+        self._index_method = self.scene.itemIndexMethod()
+        self.scene.setItemIndexMethod(QGraphicsScene.NoIndex)
+
+        bounds = [get_bounds(chunk, self.pen_widths) for chunk in self.chunks]
+        first = self._get_first_items(
+            np.concatenate(bounds) if bounds else np.empty((0, 4))
+        )
+        chunk_start = 0
+        for chunk in self.chunks:
+            chunk_end = chunk_start + len(chunk.records)
+            offsets = (
+                get_point_offsets(chunk)
+                if chunk.kind in POINT_KINDS else None
+            )
+            indices = np.flatnonzero(first[chunk_start:chunk_end])
+            if len(indices):
+                create_items(
+                    chunk.kind, decode_items(chunk, indices, offsets),
+                    self.pens_and_brushes, self.scene
+                )
+            indices = np.flatnonzero(~first[chunk_start:chunk_end])
+            for start in range(0, len(indices), DECODE_BATCH_SIZE):
+                self._tasks.append(
+                    (chunk, indices[start:start + DECODE_BATCH_SIZE], offsets)
+                )
+            chunk_start = chunk_end
+        self.loaded_count = int(first.sum())
+        self.chunks = []
+
+        self._executor = ThreadPoolExecutor(1)
+        self._submit_tasks()
+        self.progress.emit(self.loaded_count, self.total_count)
+        # Batches start after the first items have been painted,
+        # which is when the first one fires
+        viewport = self.view.viewport()
+        if viewport.isVisible():
+            viewport.installEventFilter(self)
+            viewport.update()
+        else:
+            self._timer.start(0)
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        if event.type() == QEvent.Paint:
+            watched.removeEventFilter(self)
+            self._timer.start(0)
+        return False
+
+    def _get_first_items(self, bounds: np.ndarray) -> np.ndarray:
+        """
+        Returns a mask of the items to insert before the first paint:
+        the ones intersecting the viewport, and the ones stacked below
+        any of those that intersect it, which would otherwise be
+        inserted on top of it.
+        """
+        viewport_rect = self.view.mapToScene(
+            self.view.viewport().rect()
+        ).boundingRect().getCoords()
+        first = intersects(bounds, viewport_rect)
+        left, top, right, bottom = viewport_rect
+        # Items lying inside of the viewport only overlap items
+        # that intersect it, which are already inserted first
+        frontier = np.flatnonzero(first & ~(
+            (bounds[:, 0] >= left) & (bounds[:, 2] <= right)
+            & (bounds[:, 1] >= top) & (bounds[:, 3] <= bottom)
+        ))
+        while len(frontier):
+            below = frontier[-1]
+            frontier_bounds = bounds[frontier]
+            candidates = np.flatnonzero(~first[:below] & intersects(
+                bounds[:below], (
+                    *frontier_bounds[:, :2].min(axis=0),
+                    *frontier_bounds[:, 2:].max(axis=0),
+                )
+            ))
+            overlapping = np.zeros(len(candidates), dtype=bool)
+            block_size = max(1, 2**20 // len(frontier))
+            for start in range(0, len(candidates), block_size):
+                block = candidates[start:start + block_size]
+                block_bounds = bounds[block][:, np.newaxis]
+                overlapping[start:start + block_size] = (
+                    (block_bounds[..., 0] <= frontier_bounds[:, 2])
+                    & (block_bounds[..., 2] >= frontier_bounds[:, 0])
+                    & (block_bounds[..., 1] <= frontier_bounds[:, 3])
+                    & (block_bounds[..., 3] >= frontier_bounds[:, 1])
+                    & (block[:, np.newaxis] < frontier)
+                ).any(axis=1)
+            frontier = candidates[overlapping]
+            first[frontier] = True
+        return first
+
+    def _submit_tasks(self):
+        while self._tasks and len(self._pending) < MAX_PENDING_DECODES:
+            chunk, indices, offsets = self._tasks.popleft()
+            self._pending.append((chunk.kind, self._executor.submit(
+                decode_items, chunk, indices, offsets
+            )))
+
+    def _create_items(self, deadline: float | None) -> bool:
+        """
+        Adds decoded items to the scene until `deadline`, or until
+        there are none left if it is None, waiting for the worker.
+        Returns whether all items have been added.
+        """
+        while deadline is None or time.perf_counter() < deadline:
+            if self._decoded_position == len(self._decoded):
+                if not self._pending:
+                    return True
+                kind, future = self._pending[0]
+                if deadline is not None and not future.done():
+                    return False
+                self._pending.popleft()
+                self._decoded_kind = kind
+                self._decoded = future.result()
+                self._decoded_position = 0
+                self._submit_tasks()
+            end = self._decoded_position + CREATE_BATCH_SIZE
+            create_items(
+                self._decoded_kind, self._decoded[self._decoded_position:end],
+                self.pens_and_brushes, self.scene
+            )
+            self.loaded_count += (
+                len(self._decoded[self._decoded_position:end])
+            )
+            self._decoded_position = min(end, len(self._decoded))
+        return False
+
+    @Slot()
+    def _load_batch(self):
+        if self.first_paint_time is None:
+            self.first_paint_time = time.perf_counter() - self._start_time
+        if self._create_items(time.perf_counter() + LOAD_BATCH_TIME):
+            self._finish()
+            return
+        self.progress.emit(self.loaded_count, self.total_count)
+        ready = self._decoded_position < len(self._decoded) or (
+            self._pending and self._pending[0][1].done()
+        )
+        self._timer.start(0 if ready else DECODE_WAIT_INTERVAL)
+
+    def finish(self):
+        """Adds all the remaining items right away"""
+        if self.is_loading():
+            self.view.viewport().removeEventFilter(self)
+            self._timer.stop()
+            self._create_items(None)
+            self._finish()
+
+    def cancel(self):
+        """Stops loading, keeping the items added so far"""
+        if self.is_loading():
+            self.view.viewport().removeEventFilter(self)
+            self._timer.stop()
+            self._tasks.clear()
+            for _, future in self._pending:
+                future.cancel()
+            self._pending.clear()
+            self._decoded = []
+            self._decoded_position = 0
+            self._stop()
+
+    def _stop(self):
+        self._executor.shutdown()
+        self._executor = None
+        self.scene.setItemIndexMethod(self._index_method)
+
+    def _finish(self):
+        self._stop()
+        self.load_time = time.perf_counter() - self._start_time
+        self.progress.emit(self.loaded_count, self.total_count)
+        self.finished.emit()
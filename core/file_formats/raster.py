@@ -0,0 +1,387 @@
+import os
+import struct
+import zlib
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from math import ceil
+from typing import BinaryIO, Iterator
+
+import numpy as np
+from PySide6.QtCore import Qt, QRectF
+from PySide6.QtGui import QColor, QImage, QPainter
+from PySide6.QtWidgets import QGraphicsItem, QGraphicsScene
+
+from core.file_formats.native import ItemKind, get_item_kind
+
+PNG_FILE_EXTENSION = ".png"
+PNG_FILE_FILTER = "PNG image (*.png)"
+TIFF_FILE_EXTENSION = ".tif"
+TIFF_FILE_FILTER = "TIFF image (*.tif *.tiff)"
+
+TILE_SIZE = 512
+# Strokes are clipped at the image edges in a slightly different way
+# than they are rasterized inside it, so every tile is painted with
+# this many extra pixels around it to keep the seams invisible
+TILE_OVERLAP = 32
+
+
+def adler32_combine(adler1: int, adler2: int, length2: int) -> int:
+    """Returns the Adler-32 of two concatenated byte strings"""
+    base = 65521
+    a1, b1 = adler1 & 0xffff, adler1 >> 16
+    a2, b2 = adler2 & 0xffff, adler2 >> 16
+    a = (a1 + a2 - 1) % base
+    b = (b1 + b2 + length2 * (a1 - 1)) % base
+    return b << 16 | a
+
+
+class BandWriter(ABC):
+    """
+    Collects tiles (in row-major order) into bands of full-width rows,
+    as both PNG and TIFF store images in rows.
+
+    A band goes through `add_tile` (collecting), `encode_band`
+    (compressing, called from worker threads) and `write_band`
+    (writing, in band order).
+    """
+    def __init__(self, file: BinaryIO, width: int, height: int,
+                 tile_size: int):
+        self.file = file
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.columns = ceil(width / tile_size)
+        self._band: list[np.ndarray] = []
+
+    def add_tile(
+            self, column: int, row: int, pixels: np.ndarray
+    ) -> np.ndarray | None:
+        """Returns the band of RGBA rows once its last tile is added"""
+        self._band.append(pixels[
+            :self.height - row * self.tile_size,
+            :self.width - column * self.tile_size
+        ])
+        if len(self._band) < self.columns:
+            return None
+        band = np.concatenate(self._band, axis=1)
+        self._band.clear()
+        return band.reshape(band.shape[0], -1)
+
+    @abstractmethod
+    def encode_band(self, rows: np.ndarray):
+        pass
+
+    @abstractmethod
+    def write_band(self, data):
+        pass
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def get_differences(rows: np.ndarray) -> np.ndarray:
+        """
+        Returns rows of differences between every RGBA sample
+        and the same sample of the pixel to the left
+        """
+        differences = np.empty_like(rows)
+        differences[:, :4] = rows[:, :4]
+        np.subtract(rows[:, 4:], rows[:, :-4], out=differences[:, 4:])
+        return differences
+
+
+class PNGWriter(BandWriter):
+    """
+    Every band is deflated on its own into a raw deflate segment ending
+    on a byte boundary, so the segments join into a single zlib stream
+    (the way pigz compresses in parallel), with the Adler-32 checksums
+    of the segments combined.
+    """
+    def __init__(self, file: BinaryIO, width: int, height: int,
+                 tile_size: int):
+        super().__init__(file, width, height, tile_size)
+        self._adler32 = zlib.adler32(b"")
+        file.write(b"\x89PNG\r\n\x1a\n")
+        self._write_chunk(
+            b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+        )
+        self._write_chunk(b"IDAT", b"\x78\x9c")  # zlib header
+
+    def _write_chunk(self, chunk_type: bytes, data: bytes):
+        self.file.write(struct.pack(">I", len(data)))
+        self.file.write(chunk_type)
+        self.file.write(data)
+        self.file.write(struct.pack(
+            ">I", zlib.crc32(data, zlib.crc32(chunk_type))
+        ))
+
+    def encode_band(self, rows: np.ndarray) -> tuple[bytes, int, int]:
+        # Every row starts with its filter type, 1 (Sub)
+        filtered = np.empty((rows.shape[0], rows.shape[1] + 1), np.uint8)
+        filtered[:, 0] = 1
+        filtered[:, 1:] = self.get_differences(rows)
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        data = compressor.compress(filtered)
+        data += compressor.flush(zlib.Z_SYNC_FLUSH)
+        return data, zlib.adler32(filtered), filtered.nbytes
+
+    def write_band(self, data: tuple[bytes, int, int]):
+        data, adler32, length = data
+        self._adler32 = adler32_combine(self._adler32, adler32, length)
+        self._write_chunk(b"IDAT", data)
+
+    def close(self):
+        final_block = zlib.compressobj(6, zlib.DEFLATED, -15).flush()
+        self._write_chunk(
+            b"IDAT", final_block + struct.pack(">I", self._adler32)
+        )
+        self._write_chunk(b"IEND", b"")
+
+
+class TIFFWriter(BandWriter):
+    """
+    Writes every band as a deflate compressed strip with the horizontal
+    differencing predictor. The image file directory with the strip
+    offsets is written at the end.
+    """
+    def __init__(self, file: BinaryIO, width: int, height: int,
+                 tile_size: int):
+        super().__init__(file, width, height, tile_size)
+        self._offsets: list[int] = []
+        self._byte_counts: list[int] = []
+        # The IFD offset is filled in by `close`
+        file.write(b"II*\x00\x00\x00\x00\x00")
+
+    def encode_band(self, rows: np.ndarray) -> bytes:
+        return zlib.compress(self.get_differences(rows), 6)
+
+    def write_band(self, data: bytes):
+        self._offsets.append(self.file.tell())
+        self._byte_counts.append(len(data))
+        self.file.write(data)
+
+    def close(self):
+        SHORT, LONG = 3, 4
+
+        def array(values: list[int], value_type: int):
+            data = struct.pack(
+                f"<{len(values)}{'H' if value_type == SHORT else 'I'}",
+                *values
+            )
+            if len(data) <= 4:
+                return value_type, len(values), data.ljust(4, b"\x00")
+            if self.file.tell() % 2:
+                self.file.write(b"\x00")
+            offset = self.file.tell()
+            self.file.write(data)
+            return value_type, len(values), struct.pack("<I", offset)
+
+        if self.file.tell() >= 2**32:
+            raise OSError("The image is too large for a TIFF file")
+        entries = {
+            256: array([self.width], LONG),
+            257: array([self.height], LONG),
+            258: array([8, 8, 8, 8], SHORT),
+            259: array([8], SHORT),  # Adobe deflate
+            262: array([2], SHORT),  # RGB
+            273: array(self._offsets, LONG),
+            277: array([4], SHORT),
+            278: array([self.tile_size], LONG),  # rows per strip
+            279: array(self._byte_counts, LONG),
+            284: array([1], SHORT),
+            317: array([2], SHORT),  # horizontal differencing
+            338: array([2], SHORT),  # unassociated alpha
+        }
+        if self.file.tell() % 2:
+            self.file.write(b"\x00")
+        ifd_offset = self.file.tell()
+        self.file.write(struct.pack("<H", len(entries)))
+        for tag, (value_type, count, value) in entries.items():
+            self.file.write(struct.pack("<HHI", tag, value_type, count))
+            self.file.write(value)
+        self.file.write(struct.pack("<I", 0))
+        self.file.seek(4)
+        self.file.write(struct.pack("<I", ifd_offset))
+
+
+WRITERS = {
+    ".png": PNGWriter,
+    ".tif": TIFFWriter,
+    ".tiff": TIFFWriter,
+}
+
+
+def get_draw_operation(item: QGraphicsItem, kind: int) -> tuple:
+    """Returns value copies of everything needed to paint `item`"""
+    if kind == ItemKind.Line:
+        geometry, brush = item.line(), None
+    elif kind == ItemKind.Polygon:
+        geometry, brush = item.polygon(), item.brush()
+    elif kind == ItemKind.Polyline:
+        geometry, brush = item.polygon(), None
+    else:
+        geometry, brush = item.rect(), item.brush()
+    return (
+        kind, geometry, item.pen(), brush, item.pos(),
+        item.fillRule() if kind == ItemKind.Polygon else None
+    )
+
+
+def get_draw_operations(scene: QGraphicsScene, rect: QRectF) -> list[tuple]:
+    """
+    Returns value copies of everything needed to paint the items in
+    `rect`, as the scene and its items must not be touched by workers
+    """
+    operations = []
+    for item in scene.items(
+            rect, Qt.IntersectsItemBoundingRect, Qt.AscendingOrder
+    ):
+        kind = get_item_kind(item)
+        if kind is None or not item.isVisible():
+            continue
+        operations.append(get_draw_operation(item, kind))
+    return operations
+
+
+def paint_operations(painter: QPainter, operations: list[tuple]):
+    """Paints the operations of get_draw_operations, in any thread"""
+    for kind, geometry, pen, brush, pos, fill_rule in operations:
+        painter.save()
+        painter.translate(pos)
+        painter.setPen(pen)
+        if kind == ItemKind.Line:
+            painter.drawLine(geometry)
+        elif kind == ItemKind.Polyline:
+            painter.drawPolyline(geometry)
+        else:
+            painter.setBrush(brush)
+            if kind == ItemKind.Polygon:
+                painter.drawPolygon(geometry, fill_rule)
+            elif kind == ItemKind.Ellipse:
+                painter.drawEllipse(geometry)
+            else:
+                painter.drawRect(geometry)
+        painter.restore()
+
+
+def render_tile(
+        operations: list[tuple],
+        rect: QRectF,
+        scale: float,
+        tile_size: int,
+        background: QColor | None,
+) -> np.ndarray:
+    """Paints a tile in a worker thread, returns its RGBA pixels"""
+    image_size = tile_size + 2 * TILE_OVERLAP
+    image = QImage(image_size, image_size, QImage.Format_RGBA8888)
+    image.fill(background if background is not None else Qt.transparent)
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.translate(TILE_OVERLAP, TILE_OVERLAP)
+    painter.scale(scale, scale)
+    painter.translate(-rect.x(), -rect.y())
+    paint_operations(painter, operations)
+    painter.end()
+    inner = slice(TILE_OVERLAP, TILE_OVERLAP + tile_size)
+    return np.frombuffer(
+        image.constBits(), np.uint8
+    ).reshape(image_size, image_size, 4)[inner, inner].copy()
+
+
+def export_raster(
+        scene: QGraphicsScene,
+        path: str | os.PathLike,
+        scale: float = 1.0,
+        background: QColor | None = QColor(Qt.white),
+        workers: int | None = None,
+        tile_size: int = TILE_SIZE,
+) -> Iterator[tuple[int, int]]:
+    """
+    Renders the scene rect into a PNG or TIFF file (picked by the
+    extension of `path`) tile by tile on a pool of `workers` threads.
+
+    Memory use is about four bands of `width` x `tile_size` x 4 bytes
+    (the band being collected and up to three being encoded), plus
+    two tiles per worker in flight. It grows with the image width,
+    not with its height.
+
+    Yields (tiles written, tiles total); closing the generator early
+    cancels the export, like `svg.export_svg`.
+    """
+    extension = os.path.splitext(os.fspath(path))[1].lower()
+    if extension not in WRITERS:
+        raise ValueError(f"Unsupported raster format: {extension}")
+    scene_rect = scene.sceneRect()
+    width = max(1, ceil(scene_rect.width() * scale))
+    height = max(1, ceil(scene_rect.height() * scale))
+    columns, rows = ceil(width / tile_size), ceil(height / tile_size)
+    total = columns * rows
+    scene_tile_size = tile_size / scale
+    # Antialiasing may touch pixels just outside the bounding rects
+    margin = (TILE_OVERLAP + 1) / scale
+
+    workers = workers or os.cpu_count() or 1
+    temporary_path = f"{os.fspath(path)}.tmp"
+    completed = False
+    try:
+        with open(temporary_path, "wb") as file, \
+                ThreadPoolExecutor(workers) as executor:
+            writer = WRITERS[extension](file, width, height, tile_size)
+
+            # (column, row, future of the tile pixels)
+            pending_tiles = deque()
+            # futures of the encoded bands
+            pending_bands = deque()
+
+            def write_tile():
+                column, row, future = pending_tiles.popleft()
+                band = writer.add_tile(column, row, future.result())
+                if band is not None:
+                    pending_bands.append(
+                        executor.submit(writer.encode_band, band)
+                    )
+                while pending_bands and (
+                        pending_bands[0].done() or len(pending_bands) > 2
+                ):
+                    writer.write_band(pending_bands.popleft().result())
+
+            yield 0, total
+            written = 0
+            try:
+                for row in range(rows):
+                    for column in range(columns):
+                        rect = QRectF(
+                            scene_rect.x() + column * scene_tile_size,
+                            scene_rect.y() + row * scene_tile_size,
+                            scene_tile_size, scene_tile_size
+                        )
+                        operations = get_draw_operations(
+                            scene, rect.adjusted(-margin, -margin,
+                                                 margin, margin)
+                        )
+                        pending_tiles.append((column, row, executor.submit(
+                            render_tile, operations, rect,
+                            scale, tile_size, background
+                        )))
+                        if len(pending_tiles) >= 2 * workers:
+                            write_tile()
+                            written += 1
+                            yield written, total
+                while pending_tiles:
+                    write_tile()
+                    written += 1
+                    yield written, total
+                while pending_bands:
+                    writer.write_band(pending_bands.popleft().result())
+            finally:
+                for *_, future in pending_tiles:
+                    future.cancel()
+                for future in pending_bands:
+                    future.cancel()
+            writer.close()
+        os.replace(temporary_path, path)
+        completed = True
+    finally:
+        if not completed and os.path.exists(temporary_path):
+            os.remove(temporary_path)
@@ -0,0 +1,492 @@
+import os
+import re
+from collections import Counter
+from math import sqrt, tan, radians
+from typing import BinaryIO, Iterator
+from xml.etree import ElementTree
+
+import numpy as np
+from PySide6.QtCore import Qt, QLineF, QRectF
+from PySide6.QtGui import QBrush, QColor, QPen, QPolygonF, QTransform
+from PySide6.QtWidgets import QGraphicsItem, QGraphicsScene
+
+from core.file_formats.native import ItemKind, StyleTable, get_item_kind
+from core.utils import ellipse_points, points_to_polygon, polygon_to_points
+
+FILE_EXTENSION = ".svg"
+FILE_FILTER = "SVG image (*.svg)"
+
+# Items written between two progress reports
+PROGRESS_STEP = 1000
+
+CAP_STYLES = {
+    Qt.FlatCap: "butt",
+    Qt.SquareCap: "square",
+    Qt.RoundCap: "round",
+}
+JOIN_STYLES = {
+    Qt.MiterJoin: "miter",
+    Qt.BevelJoin: "bevel",
+    Qt.RoundJoin: "round",
+    Qt.SvgMiterJoin: "miter",
+}
+# The last of the styles of a name, SvgMiterJoin for "miter"
+CAP_STYLE_NAMES = {name: style for style, name in CAP_STYLES.items()}
+JOIN_STYLE_NAMES = {name: style for style, name in JOIN_STYLES.items()}
+
+NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+PATH_TOKEN = re.compile(
+    r"[A-Za-z]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+)
+TRANSFORM = re.compile(r"(matrix|translate|scale|rotate|skewX|skewY)"
+                       r"\s*\(([^)]*)\)")
+RGB_COLOR = re.compile(r"rgba?\(([^)]*)\)")
+
+# Elements whose children are drawn
+CONTAINER_ELEMENTS = {"svg", "g", "a", "switch"}
+# Elements whose contents are never drawn as they are
+HIDDEN_ELEMENTS = {
+    "defs", "symbol", "clipPath", "mask", "pattern", "marker", "style",
+    "linearGradient", "radialGradient", "filter", "title", "desc",
+    "metadata", "script",
+}
+SHAPE_ELEMENTS = {
+    "line", "rect", "circle", "ellipse", "polyline", "polygon", "path",
+}
+# Presentation attributes inherited by the children of an element
+INHERITED_PROPERTIES = (
+    "fill", "fill-opacity", "stroke", "stroke-opacity", "stroke-width",
+    "stroke-linecap", "stroke-linejoin", "color", "visibility",
+)
+DEFAULT_PROPERTIES = {
+    "fill": "black",
+    "stroke": "none",
+    "stroke-width": "1",
+    "stroke-linecap": "butt",
+    "stroke-linejoin": "miter",
+    "color": "black",
+    "visibility": "visible",
+}
+
+
+def number(value: float) -> str:
+    return f"{value:.10g}"
+
+
+def color_attributes(name: str, color: QColor) -> str:
+    attributes = f' {name}="{color.name()}"'
+    if color.alpha() != 255:
+        attributes += f' {name}-opacity="{number(color.alphaF())}"'
+    return attributes
+
+
+def style_attributes(pen: QPen, brush: QBrush) -> str:
+    """
+    Returns SVG presentation attributes of a pen and brush pair.
+    Brush patterns and gradients are written as a solid fill.
+    """
+    if brush.style() == Qt.NoBrush:
+        attributes = ' fill="none"'
+    else:
+        attributes = color_attributes("fill", brush.color())
+
+    if pen.style() == Qt.NoPen:
+        return attributes + ' stroke="none"'
+    attributes += color_attributes("stroke", pen.color())
+    width = pen.widthF()
+    if pen.isCosmetic():
+        attributes += ' vector-effect="non-scaling-stroke"'
+        width = width or 1
+    attributes += (
+        f' stroke-width="{number(width)}"'
+        f' stroke-linecap="{CAP_STYLES.get(pen.capStyle(), "square")}"'
+        f' stroke-linejoin="{JOIN_STYLES.get(pen.joinStyle(), "bevel")}"'
+    )
+    if pen.style() != Qt.SolidLine:
+        dash_unit = max(width, 1)
+        attributes += ' stroke-dasharray="{}"'.format(" ".join(
+            number(dash * dash_unit) for dash in pen.dashPattern()
+        ))
+    return attributes
+
+
+def item_element(kind: int, item: QGraphicsItem, style: str) -> str:
+    dx, dy = item.pos().toTuple()
+    if dx or dy:
+        style += f' transform="translate({number(dx)} {number(dy)})"'
+
+    if kind == ItemKind.Line:
+        line = item.line()
+        return (
+            f'<line x1="{number(line.x1())}" y1="{number(line.y1())}"'
+            f' x2="{number(line.x2())}" y2="{number(line.y2())}"{style}/>\n'
+        )
+    if kind in (ItemKind.Polygon, ItemKind.Polyline):
+        points = " ".join(
+            f"{number(x)},{number(y)}"
+            for x, y in polygon_to_points(item.polygon()).tolist()
+        )
+        element = "polygon" if kind == ItemKind.Polygon else "polyline"
+        return f'<{element} points="{points}"{style}/>\n'
+
+    rect = item.rect().normalized()
+    if kind == ItemKind.Ellipse:
+        return (
+            f'<ellipse cx="{number(rect.center().x())}"'
+            f' cy="{number(rect.center().y())}"'
+            f' rx="{number(rect.width() / 2)}"'
+            f' ry="{number(rect.height() / 2)}"{style}/>\n'
+        )
+    return (
+        f'<rect x="{number(rect.x())}" y="{number(rect.y())}"'
+        f' width="{number(rect.width())}"'
+        f' height="{number(rect.height())}"{style}/>\n'
+    )
+
+
+def export_svg(
+        scene: QGraphicsScene,
+        path: str | os.PathLike,
+) -> Iterator[tuple[int, int]]:
+    """
+    Writes the scene items into an SVG file one element at a time.
+
+    Yields (items written, items total) every PROGRESS_STEP items.
+    Closing the generator before it is exhausted cancels the export
+    and removes the partially written file; `path` itself is only
+    replaced once the export is complete.
+    """
+    rect = scene.sceneRect()
+    items = scene.items(Qt.AscendingOrder)
+    total = len(items)
+    styles = StyleTable()
+    style_attributes_cache: list[str] = []
+    no_brush = QBrush()
+
+    temporary_path = f"{os.fspath(path)}.tmp"
+    completed = False
+    try:
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            file.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<svg xmlns="http://www.w3.org/2000/svg" version="1.1"'
+                f' width="{number(rect.width())}"'
+                f' height="{number(rect.height())}"'
+                f' viewBox="{number(rect.x())} {number(rect.y())}'
+                f' {number(rect.width())} {number(rect.height())}">\n'
+            )
+            yield 0, total
+            for written, item in enumerate(items, 1):
+                kind = get_item_kind(item)
+                if kind is not None and item.isVisible():
+                    pen = item.pen()
+                    brush = (
+                        no_brush if kind == ItemKind.Line else item.brush()
+                    )
+                    style = styles.index(pen, brush)
+                    if style == len(style_attributes_cache):
+                        style_attributes_cache.append(
+                            style_attributes(pen, brush)
+                        )
+                    file.write(item_element(
+                        kind, item, style_attributes_cache[style]
+                    ))
+                if written % PROGRESS_STEP == 0:
+                    yield written, total
+            file.write("</svg>\n")
+        os.replace(temporary_path, path)
+        completed = True
+        yield total, total
+    finally:
+        if not completed and os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+
+def parse_number(value: str | None, default: float = 0.0) -> float:
+    """The number a length or coordinate starts with, its unit dropped"""
+    match = NUMBER.match(value.strip()) if value else None
+    return float(match.group()) if match else default
+
+
+def parse_numbers(value: str | None) -> list[float]:
+    return [float(number) for number in NUMBER.findall(value or "")]
+
+
+def parse_transform(value: str | None) -> QTransform:
+    transform = QTransform()
+    for name, arguments in TRANSFORM.findall(value or ""):
+        values = parse_numbers(arguments)
+        if name == "matrix" and len(values) == 6:
+            step = QTransform(*values)
+        elif name == "translate" and values:
+            step = QTransform.fromTranslate(
+                values[0], values[1] if len(values) > 1 else 0
+            )
+        elif name == "scale" and values:
+            step = QTransform.fromScale(values[0], values[-1])
+        elif name == "rotate" and values:
+            step = QTransform()
+            if len(values) == 3:
+                step.translate(values[1], values[2])
+            step.rotate(values[0])
+            if len(values) == 3:
+                step.translate(-values[1], -values[2])
+        elif name == "skewX" and values:
+            step = QTransform(1, 0, tan(radians(values[0])), 1, 0, 0)
+        elif name == "skewY" and values:
+            step = QTransform(1, tan(radians(values[0])), 0, 1, 0, 0)
+        else:
+            continue
+        # The rightmost transform of the list is applied first
+        transform = step * transform
+    return transform
+
+
+def parse_color(
+        value: str, opacity: str | None, properties: dict
+) -> int | None:
+    """
+    The ARGB of a paint, or None if it isn't painted. Paint servers,
+    such as gradients, are painted with their fallback color if given,
+    else in black.
+    """
+    value = value.strip()
+    if value.startswith("url("):
+        value = value.partition(")")[2].strip() or "black"
+    if value in ("none", "transparent"):
+        return None
+    if value == "currentColor":
+        value = properties.get("color", "black")
+    match = RGB_COLOR.fullmatch(value)
+    if match:
+        components = match.group(1).split(",")
+        color = QColor(*(
+            round(parse_number(component) * 2.55)
+            if component.strip().endswith("%")
+            else round(parse_number(component))
+            for component in components[:3]
+        ))
+        if len(components) > 3:
+            color.setAlphaF(min(max(parse_number(components[3]), 0), 1))
+    else:
+        color = QColor.fromString(value)
+    if not color.isValid():
+        return None
+    if opacity is not None:
+        color.setAlphaF(
+            color.alphaF() * min(max(parse_number(opacity, 1), 0), 1)
+        )
+    return color.rgba()
+
+
+def get_properties(element: ElementTree.Element, inherited: dict) -> dict:
+    """The presentation properties of an element, and its own style"""
+    properties = dict(inherited)
+    attributes = element.attrib
+    for name in INHERITED_PROPERTIES:
+        if name in attributes:
+            properties[name] = attributes[name]
+    if "display" in attributes:
+        properties["display"] = attributes["display"]
+    for declaration in attributes.get("style", "").split(";"):
+        name, _, value = declaration.partition(":")
+        if value:
+            properties[name.strip()] = value.strip()
+    return properties
+
+
+def get_style(properties: dict, transform: QTransform) -> tuple:
+    """
+    The (stroke, stroke width, cap style, join style, fill) of the
+    properties, the stroke width scaled as the element is
+    """
+    stroke = parse_color(
+        properties["stroke"], properties.get("stroke-opacity"), properties
+    )
+    fill = parse_color(
+        properties["fill"], properties.get("fill-opacity"), properties
+    )
+    width = parse_number(properties["stroke-width"], 1) * sqrt(
+        abs(transform.determinant())
+    )
+    return (
+        stroke, width,
+        CAP_STYLE_NAMES.get(properties["stroke-linecap"], Qt.FlatCap),
+        JOIN_STYLE_NAMES.get(properties["stroke-linejoin"], Qt.SvgMiterJoin),
+        fill,
+    )
+
+
+def parse_path(
+        data: str
+) -> list[tuple[list[tuple[float, float]], bool]] | None:
+    """
+    Returns the (points, closed) subpaths of path data, or None if
+    it has curves or arcs
+    """
+    subpaths = []
+    points = []
+    x = y = 0.0
+    command = None
+    tokens = PATH_TOKEN.findall(data)
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        if token.isalpha():
+            command = token
+            index += 1
+            if command in "Zz":
+                if points:
+                    subpaths.append((points, True))
+                    x, y = points[0]
+                    points = []
+                continue
+            if command not in "MmLlHhVv":
+                return None
+        if command is None or command in "Zz":
+            return None
+        count = 1 if command in "HhVv" else 2
+        arguments = tokens[index:index + count]
+        if len(arguments) < count or any(map(str.isalpha, arguments)):
+            return None
+        values = [float(argument) for argument in arguments]
+        index += count
+        relative = command.islower()
+        if command in "Mm":
+            if len(points) > 1:
+                subpaths.append((points, False))
+            x, y = values[0] + x * relative, values[1] + y * relative
+            points = [(x, y)]
+            # The following pairs are lines
+            command = "l" if relative else "L"
+            continue
+        if not points:
+            points = [(x, y)]
+        if command in "Ll":
+            x, y = values[0] + x * relative, values[1] + y * relative
+        elif command in "Hh":
+            x = values[0] + x * relative
+        else:
+            y = values[0] + y * relative
+        points.append((x, y))
+    if len(points) > 1:
+        subpaths.append((points, False))
+    return subpaths
+
+
+def get_shapes(
+        tag: str, attributes: dict, transform: QTransform
+) -> list[tuple[int, QLineF | QRectF | QPolygonF]] | None:
+    """
+    The (kind, geometry) shapes of a shape element in the scene, or
+    None if it can't be imported. Rectangles and ellipses that are
+    rotated or skewed are drawn as polygons.
+    """
+    aligned = transform.type() in (
+        QTransform.TxNone, QTransform.TxTranslate, QTransform.TxScale
+    )
+    if tag == "line":
+        return [(ItemKind.Line, transform.map(QLineF(*(
+            parse_number(attributes.get(name))
+            for name in ("x1", "y1", "x2", "y2")
+        ))))]
+    if tag == "rect":
+        rect = QRectF(*(
+            parse_number(attributes.get(name))
+            for name in ("x", "y", "width", "height")
+        ))
+        if rect.width() <= 0 or rect.height() <= 0:
+            return []
+        if aligned:
+            return [(ItemKind.Rect, transform.mapRect(rect))]
+        return [(ItemKind.Polygon, transform.map(QPolygonF(rect)))]
+    if tag in ("circle", "ellipse"):
+        center_x = parse_number(attributes.get("cx"))
+        center_y = parse_number(attributes.get("cy"))
+        if tag == "circle":
+            radius_x = radius_y = parse_number(attributes.get("r"))
+        else:
+            radius_x = parse_number(attributes.get("rx"))
+            radius_y = parse_number(attributes.get("ry"))
+        if radius_x <= 0 or radius_y <= 0:
+            return []
+        if aligned:
+            return [(ItemKind.Ellipse, transform.mapRect(QRectF(
+                center_x - radius_x, center_y - radius_y,
+                radius_x * 2, radius_y * 2
+            )))]
+        return [(ItemKind.Polygon, transform.map(points_to_polygon(
+            ellipse_points(
+                center_x, center_y, radius_x, 0, radius_y / radius_x
+            )[:-1]
+        )))]
+    if tag in ("polyline", "polygon"):
+        points = np.array(parse_numbers(attributes.get("points")))
+        points = points[:len(points) // 2 * 2].reshape(-1, 2)
+        if len(points) < 2:
+            return []
+        kind = ItemKind.Polygon if tag == "polygon" else ItemKind.Polyline
+        return [(kind, transform.map(points_to_polygon(points)))]
+    subpaths = parse_path(attributes.get("d", ""))
+    if subpaths is None:
+        return None
+    return [
+        (
+            ItemKind.Polygon if closed else ItemKind.Polyline,
+            transform.map(points_to_polygon(np.array(points))),
+        )
+        for points, closed in subpaths
+    ]
+
+
+def parse_svg(file: BinaryIO, skipped: Counter) -> Iterator[tuple]:
+    """
+    Reads the shapes of an SVG file, as it is parsed, and yields them
+    as (kind, geometry, style) entities of the importer, in the order
+    they are drawn. Coordinates are taken in user units, the viewBox
+    of the document is ignored. Shapes are transformed and styled by
+    their ancestors, while elements that are never drawn as they are,
+    such as definitions, are left out. Texts, images, references and
+    paths with curves are counted by tag in `skipped`.
+    """
+    # (element, transform, properties, drawn) of the open elements
+    open_elements = [(None, QTransform(), DEFAULT_PROPERTIES, True)]
+    for event, element in ElementTree.iterparse(file, ("start", "end")):
+        if event == "end":
+            open_elements.pop()
+            element.clear()
+            parent = open_elements[-1][0]
+            # The element is the last one parsed among its parent's
+            # children, which are kept otherwise
+            if parent is not None:
+                del parent[-1]
+            continue
+        _, inherited_transform, inherited, drawn = open_elements[-1]
+        tag = element.tag.rpartition("}")[2]
+        if not drawn:
+            open_elements.append(
+                (element, inherited_transform, inherited, False)
+            )
+            continue
+        properties = get_properties(element, inherited)
+        transform = (
+            parse_transform(element.get("transform")) * inherited_transform
+        )
+        drawn = (
+            properties.get("display") != "none"
+            and tag not in HIDDEN_ELEMENTS
+        )
+        if drawn and tag in SHAPE_ELEMENTS:
+            drawn = False
+            shapes = get_shapes(tag, element.attrib, transform)
+            if shapes is None:
+                skipped[tag] += 1
+            elif properties["visibility"] == "visible":
+                style = get_style(properties, transform)
+                for kind, geometry in shapes:
+                    yield kind, geometry, style
+        elif drawn and tag not in CONTAINER_ELEMENTS:
+            drawn = False
+            skipped[tag] += 1
+        properties.pop("display", None)
+        open_elements.append((element, transform, properties, drawn))
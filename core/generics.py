@@ -1,13 +1,58 @@
 from abc import ABC
 from enum import Enum
-from math import log2, log10
+from math import floor, log2, log10
+from time import perf_counter, perf_counter_ns
 
-from PySide6.QtCore import Qt, QLine, QPoint, QLineF, QPointF
-from PySide6.QtGui import QPen, QPainter, QColor, QFont, QMouseEvent
-from PySide6.QtWidgets import QMainWindow, QGraphicsView
+import numpy as np
+from PySide6.QtCore import (
+    Qt,
+    QLineF,
+    QPoint,
+    QPointF,
+    QRect,
+    QRectF,
+    QTimer,
+    Slot,
+)
+from PySide6.QtGui import (
+    QPen,
+    QPainter,
+    QPixmap,
+    QColor,
+    QMouseEvent,
+    QRegion,
+)
+from PySide6.QtWidgets import (
+    QMainWindow,
+    QGraphicsItem,
+    QGraphicsScene,
+    QGraphicsView,
+)
 
+from core.graphics.render_cache import GridRenderCache, RulerRenderCache
+from core.graphics.snapping import SnapEngine, SnapKind
+from core.graphics.spatial_index import SpatialIndex
+from core.graphics.undo import UndoStack
+from core.profiling import FrameProfiler
 from core.settings import config, DefaultSettings
-from core.utils import frange
+from core.utils import LRUCache, points_to_polygon, subtract_rect
+
+
+# Milliseconds after a frame at which the profiler HUD is refreshed
+PROFILER_HUD_REFRESH_INTERVAL = 500
+# Milliseconds without panning or zooming after which the view paints
+# a full quality frame
+INTERACTION_IDLE_INTERVAL = 150
+# Milliseconds a wheel zoom takes to reach its scale
+ZOOM_ANIMATION_DURATION = 120
+# Scale change after which the snapshot painted while interacting is
+# rendered again
+SNAPSHOT_MAX_ZOOM = 4.0
+# Refresh rate assumed when the screen of the view is unknown
+DEFAULT_REFRESH_RATE = 60.0
+# QGraphicsItem.type() of VGEGraphicsShapeLayer, whose elements the scene
+# picks and selects one by one
+SHAPE_LAYER_TYPE = QGraphicsItem.UserType + 1
 
 
 class WindowUI:
@@ -32,25 +77,257 @@ class VGEGraphicsTool(ABC):
     def mouseReleaseEvent(self, event: QMouseEvent):
         pass
 
+    def snaps_cursor(self) -> bool:
+        """Whether the cursor is snapped to objects for the tool"""
+        return True
 
-class VGEGraphicsView(QGraphicsView):
-    class GridStepRateData:
-        last_visible_range = None
-        last_steps: tuple[int, int] = None
+    def coalesces_moves(self) -> bool:
+        """Whether the tool only gets the latest mouse move of a frame"""
+        return True
+
+
+class VGEGraphicsScene(QGraphicsScene):
+    """
+    Keeps the bounds of its items in a SpatialIndex, which answers the
+    selection tool's queries, and the selection as a mask over the ids
+    of the index. Items aren't flagged as selected one by one, so
+    selecting a million of them is a single array operation and the
+    view paints the selection in a few batched calls.
+
+    Items changing their geometry report it with item_geometry_changed(),
+    and points added or removed with item_point_added() and
+    item_point_removed(). The snap engine of the scene finds the points
+    the view's cursor snaps to, and changes made by the tools are
+    recorded as commands of its undo stack. If the scene has an edit
+    journal, every change of its items is recorded into it as well.
+
+    Shape layers are picked by their elements, and the elements selected
+    are kept by each layer, apart from the selection of the items.
+    """
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.spatial_index = SpatialIndex()
+        self.snap_engine = SnapEngine(self.spatial_index)
+        self.undo_stack = UndoStack(self, config.value(
+            "undo_memory_budget", DefaultSettings.UNDO_MEMORY_BUDGET,
+            type=int
+        ))
+        self._selected = np.zeros(0, dtype=bool)
+        self._selected_count = 0
+        self._layer_ids: set[int] = set()
+        # The EditJournal recording the changes, set by the journal
+        self.journal = None
+
+    def addItem(self, item: QGraphicsItem):
+        super().addItem(item)
+        if item in self.spatial_index:
+            self.item_geometry_changed(item)
+        else:
+            id_ = self.spatial_index.insert(item, item.sceneBoundingRect())
+            if item.type() == SHAPE_LAYER_TYPE:
+                self._layer_ids.add(id_)
+
+    def restore_item(self, item: QGraphicsItem, id_: int):
+        """Adds a removed item again, under its former id"""
+        super().addItem(item)
+        self.spatial_index.restore(item, id_, item.sceneBoundingRect())
+        if item.type() == SHAPE_LAYER_TYPE:
+            self._layer_ids.add(id_)
+        if self.journal is not None:
+            self.journal.record_restored(id_)
+
+    def removeItem(self, item: QGraphicsItem):
+        if item in self.spatial_index:
+            id_ = self.spatial_index.remove(item)
+            self.snap_engine.end_item(id_)
+            self.snap_engine.invalidate(id_)
+            if id_ < len(self._selected) and self._selected[id_]:
+                self._selected[id_] = False
+                self._selected_count -= 1
+            self._layer_ids.discard(id_)
+            if self.journal is not None:
+                self.journal.record_removed(id_)
+        super().removeItem(item)
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.spatial_index.clear()
+        self.snap_engine.clear()
+        self._selected = np.zeros(0, dtype=bool)
+        self._selected_count = 0
+        self._layer_ids.clear()
+        super().clear()
+        if self.journal is not None:
+            self.journal.record_cleared()
+
+    def item_geometry_changed(self, item: QGraphicsItem):
+        if item in self.spatial_index:
+            self.spatial_index.update(item, item.sceneBoundingRect())
+            self.snap_engine.invalidate(self.spatial_index.id(item))
+
+    def item_point_added(self, item: QGraphicsItem, point: QPointF):
+        if self.journal is not None:
+            self.journal.record_point_added(item, point)
+
+    def item_point_removed(self, item: QGraphicsItem):
+        if self.journal is not None:
+            self.journal.record_point_removed(item)
+
+    def item_id_at(self, point: QPointF, tolerance: float = 0.0) -> int:
+        """
+        Returns the id of the topmost visible item whose shape is within
+        `tolerance` of `point` or -1
+        """
+        pick_rect = QRectF(
+            point.x() - tolerance, point.y() - tolerance,
+            2 * tolerance, 2 * tolerance
+        )
+        index = self.spatial_index
+        for id_ in index.ids_in_rect(pick_rect)[::-1].tolist():
+            item = index.object(id_)
+            if not item.isVisible():
+                continue
+            if id_ in self._layer_ids:
+                if self.element_at(id_, point, tolerance) >= 0:
+                    return id_
+            elif item.shape().intersects(item.mapRectFromScene(pick_rect)):
+                return id_
+        return -1
+
+    def is_layer(self, id_: int) -> bool:
+        """Whether the item of `id_` is a shape layer"""
+        return id_ in self._layer_ids
+
+    def element_at(
+            self, id_: int, point: QPointF, tolerance: float = 0.0
+    ) -> int:
+        """
+        Returns the index of the topmost element of the shape layer
+        of `id_` within `tolerance` of `point` or -1
+        """
+        layer = self.spatial_index.object(id_)
+        return layer.element_at(layer.mapFromScene(point), tolerance)
+
+    def has_selection(self) -> bool:
+        return self._selected_count > 0
+
+    def is_selected(self, id_: int) -> bool:
+        return id_ < len(self._selected) and bool(self._selected[id_])
+
+    def selected_ids(self, rect: QRectF | None = None) -> np.ndarray:
+        """Returns the ids of selected items, or of the ones in `rect`"""
+        if not self._selected_count:
+            return np.empty(0, dtype=np.intp)
+        if rect is None:
+            return np.flatnonzero(self._selected)
+        ids = self.spatial_index.ids_in_rect(rect)
+        return ids[self._selected[ids]]
 
+    def selected_items(self) -> list[QGraphicsItem]:
+        return self.spatial_index.objects(self.selected_ids())
+
+    def set_selection(self, ids, add: bool = False):
+        """Selects the items of `ids`, in addition to the others if `add`"""
+        selected = np.zeros(self.spatial_index.id_count, dtype=bool)
+        if add:
+            selected[:len(self._selected)] = self._selected
+        else:
+            self._clear_element_selections()
+        selected[np.asarray(ids, dtype=np.intp)] = True
+        self._set_selected(selected)
+
+    def select_in_rect(self, rect: QRectF):
+        """
+        Adds the items, and the elements of shape layers, whose bounds
+        touch `rect` to the selection
+        """
+        ids = self.spatial_index.ids_in_rect(rect)
+        layers = np.isin(ids, list(self._layer_ids))
+        self.set_selection(ids[~layers], add=True)
+        for id_ in ids[layers].tolist():
+            layer = self.spatial_index.object(id_)
+            self.set_element_selection(
+                id_, layer.elements_in_rect(layer.mapRectFromScene(rect)),
+                add=True
+            )
+
+    def selected_elements(self, id_: int) -> np.ndarray:
+        """Returns the indices of the selected elements of a shape layer"""
+        return self.spatial_index.object(id_).selected_elements
+
+    def set_element_selection(self, id_: int, indices, add: bool = False):
+        layer = self.spatial_index.object(id_)
+        if add:
+            indices = np.union1d(layer.selected_elements, indices)
+        layer.set_selected_elements(indices)
+
+    def toggle_element_selection(self, id_: int, indices):
+        layer = self.spatial_index.object(id_)
+        layer.set_selected_elements(
+            np.setxor1d(layer.selected_elements, indices)
+        )
+
+    def toggle_selection(self, ids):
+        selected = np.zeros(self.spatial_index.id_count, dtype=bool)
+        selected[:len(self._selected)] = self._selected
+        selected[np.asarray(ids, dtype=np.intp)] ^= True
+        self._set_selected(selected)
+
+    def clear_selection(self):
+        self._clear_element_selections()
+        self._set_selected(np.zeros(0, dtype=bool))
+
+    def move_selection(self, dx: float, dy: float):
+        self.move_items(self.selected_ids(), dx, dy)
+
+    def move_items(self, ids, dx: float, dy: float):
+        ids = np.asarray(ids, dtype=np.intp)
+        if not len(ids):
+            return
+        for item in self.spatial_index.objects(ids):
+            item.moveBy(dx, dy)
+        self.spatial_index.translate(ids, dx, dy)
+        self.snap_engine.invalidate_items(ids.tolist())
+        self._update_ids(ids, margin=max(abs(dx), abs(dy)))
+        if self.journal is not None:
+            self.journal.record_moved(ids, dx, dy)
+
+    def move_elements(self, id_: int, indices, dx: float, dy: float):
+        """Moves elements of the shape layer of `id_` by dx, dy"""
+        self.spatial_index.object(id_).move_elements(indices, dx, dy)
+
+    def _clear_element_selections(self):
+        for id_ in self._layer_ids:
+            self.spatial_index.object(id_).set_selected_elements([])
+
+    def _set_selected(self, selected: np.ndarray):
+        size = max(len(selected), len(self._selected))
+        changed = np.flatnonzero(
+            np.pad(selected, (0, size - len(selected)))
+            != np.pad(self._selected, (0, size - len(self._selected)))
+        )
+        self._selected = selected
+        self._selected_count = int(np.count_nonzero(selected))
+        self._update_ids(changed)
+
+    def _update_ids(self, ids: np.ndarray, margin: float = 0.0):
+        """Repaints the area of the items, where the selection is drawn"""
+        if not len(ids):
+            return
+        bounds = self.spatial_index.bounds(ids)
+        left, top = bounds[:, :2].min(axis=0) - margin
+        right, bottom = bounds[:, 2:].max(axis=0) + margin
+        self.update(QRectF(left, top, right - left, bottom - top))
+
+
+class VGEGraphicsView(QGraphicsView):
     class GridStepRate(Enum):
         Binary = 2
         Decimal = 10
 
         def get_steps(self, visible_range: int | float) -> tuple[int, int]:
             """Returns (big_step, small_step)"""
-            data = VGEGraphicsView.GridStepRateData
-            if visible_range == data.last_visible_range:
-                return data.last_steps
-            steps = self._get_steps(visible_range, self)
-            data.last_visible_range = visible_range
-            data.last_steps = steps
-            return steps
+            return self._get_steps(visible_range, self)
 
         @classmethod
         def _get_steps(cls, visible_range, rate):
@@ -80,16 +357,16 @@ class VGEGraphicsView(QGraphicsView):
             small_step = big_step // step_divider
             return big_step, small_step
 
-        @staticmethod
-        def get_last_steps():
-            return VGEGraphicsView.GridStepRateData.last_steps
-
     class Colors:
         Background: QColor = QColor(230, 230, 230)
         SceneRect: QColor = Qt.white
         Grid: QColor = QColor(230, 230, 230)
         Cursor: QColor = QColor(0, 0, 225)
         Ruler: QColor = QColor(220, 220, 220)
+        Selection: QColor = QColor(0, 120, 215)
+        Snap: QColor = QColor(0, 160, 0)
+        ProfilerHud: QColor = QColor(0, 0, 0, 170)
+        ProfilerHudText: QColor = Qt.white
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -105,6 +382,8 @@ class VGEGraphicsView(QGraphicsView):
         )
 
         self.ruler_width: int = 18
+        # Selected items smaller than this (pixels) are drawn as a dot
+        self.selection_dot_size: float = 3.0
         self.draw_ruler: bool = config.value(
             "draw_ruler", DefaultSettings.DRAW_RULER
         )
@@ -115,59 +394,135 @@ class VGEGraphicsView(QGraphicsView):
         self.fit_cursor_into_grid: bool = config.value(
             "fit_cursor_into_grid", DefaultSettings.FIT_CURSOR_INTO_GRID
         )
+        self.snap_to_objects: bool = config.value(
+            "snap_to_objects", DefaultSettings.SNAP_TO_OBJECTS
+        )
+        # Distance in pixels at which the cursor snaps to an object
+        self.snap_radius: float = config.value(
+            "snap_radius", DefaultSettings.SNAP_RADIUS, type=float
+        )
+        # SnapKind of the point the cursor is snapped to, or None
+        self.cursor_snap_kind: int | None = None
+        # Exact scene position of the snapped cursor
+        self._cursor_scene_pos: QPointF | None = None
 
         self.active_graphic_tool: VGEGraphicsTool = VGEGraphicsTool()
 
-    def _draw_grid(self, painter):
-        viewport_rect = self.viewport().rect()
+        # Times the painting and the tools' event handlers when enabled
+        self.profiler = FrameProfiler(config.value(
+            "profile_frames", DefaultSettings.PROFILE_FRAMES, type=bool
+        ))
+        # Shows the frame time percentiles over the view while profiling
+        self.show_profiler_hud: bool = config.value(
+            "show_profiler_hud", DefaultSettings.SHOW_PROFILER_HUD, type=bool
+        )
+        # perf_counter_ns() at the end of drawBackground while profiling
+        self._items_paint_start: int | None = None
+        # Frames mostly repaint a part of the viewport, so the HUD is
+        # refreshed a while after a frame, which isn't profiled
+        self._profiler_hud_rect = QRect()
+        self._profiler_hud_timer = QTimer(self)
+        self._profiler_hud_timer.setSingleShot(True)
+        self._profiler_hud_timer.setInterval(PROFILER_HUD_REFRESH_INTERVAL)
+        self._profiler_hud_timer.timeout.connect(
+            lambda: self.viewport().update(self._profiler_hud_rect)
+        )
+
+        # Mouse moves are applied once per display frame: the first
+        # one after an idle frame at once and then the latest one of
+        # each frame, so a high polling rate doesn't add work
+        self._pending_mouse_move: QMouseEvent | None = None
+        self._mouse_move_timer = QTimer(self)
+        self._mouse_move_timer.setTimerType(Qt.PreciseTimer)
+        self._mouse_move_timer.timeout.connect(self._apply_frame_mouse_move)
+
+        # While panning or zooming, a snapshot of the items is painted
+        # over a grid without its small step lines, until the view is
+        # idle for INTERACTION_IDLE_INTERVAL
+        self.interaction_snapshot: bool = config.value(
+            "interaction_snapshot", DefaultSettings.INTERACTION_SNAPSHOT,
+            type=bool
+        )
+        self._snapshot: QPixmap | None = None
+        self._snapshot_transform = None
+        self._interaction_timer = QTimer(self)
+        self._interaction_timer.setSingleShot(True)
+        self._interaction_timer.setInterval(INTERACTION_IDLE_INTERVAL)
+        self._interaction_timer.timeout.connect(self.end_interaction)
+
+        # SceneTileCache the items are drawn from, see set_tile_cache()
+        self.tile_cache = None
 
+        # Wheel ticks set the scale the zoom animation heads to, which
+        # is applied once per display frame around _zoom_anchor
+        self._zoom_target: float | None = None
+        self._zoom_from = 1.0
+        self._zoom_start = 0.0
+        self._zoom_anchor = QPointF()
+        self._zoom_timer = QTimer(self)
+        self._zoom_timer.setTimerType(Qt.PreciseTimer)
+        self._zoom_timer.timeout.connect(self._apply_frame_zoom)
+
+        self.grid_min_line_spacing: float = config.value(
+            "grid_min_line_spacing",
+            DefaultSettings.GRID_MIN_LINE_SPACING,
+            type=float
+        )
+
+        self.grid_steps_cache = LRUCache(32)
+        self.grid_render_cache = GridRenderCache(
+            self.Colors.Grid, self.Colors.SceneRect,
+            self.grid_min_line_spacing
+        )
+        self.ruler_render_cache = RulerRenderCache(
+            self.Colors.Ruler, self.ruler_width, self.grid_min_line_spacing
+        )
+
+    def get_grid_steps(self) -> tuple[int, int]:
+        """
+        Returns (big_step, small_step) of the grid for the visible area.
+
+        Results are memoized per view, keyed by the step rate and
+        the visible range rounded to 6 significant digits.
+        """
+        viewport_rect = self.viewport().rect()
         top_left = self.mapToScene(viewport_rect.topLeft())
         bottom_right = self.mapToScene(viewport_rect.bottomRight())
-        scale = self.transform().m11()
-        visible_range = min(
+        visible_range = max(1.0, min(
             bottom_right.x() - top_left.x(), bottom_right.y() - top_left.y()
-        )
+        ))
+        visible_range = round(visible_range, 5 - floor(log10(visible_range)))
+
+        key = (self.grid_step_rate, visible_range)
+        steps = self.grid_steps_cache.get(key)
+        if steps is None:
+            steps = self.grid_step_rate.get_steps(visible_range)
+            self.grid_steps_cache.put(key, steps)
+        return steps
 
-        big_step, small_step = self.grid_step_rate.get_steps(visible_range)
+    def _draw_grid(self, painter, rect):
+        big_step, small_step = self.get_grid_steps()
+        if self._snapshot is not None:
+            small_step = big_step
 
         if big_step > 10**8:
+            painter.fillRect(self.sceneRect(), self.Colors.SceneRect)
             return
 
-        pen = QPen(self.Colors.Grid)
-        pen.setWidth(0.1)
-        painter.setPen(pen)
-
-        range_start = (
-            (top_left / big_step).toPoint() + QPoint(-1, -1)
-        ) * big_step
-        range_end = (
-            (bottom_right / big_step).toPoint() + QPoint(1, 1)
-        ) * big_step
-        painter.drawLines([
-            QLine(x, int(top_left.y()), x, int(bottom_right.y()) + 1)
-            for x in range(int(range_start.x()), int(range_end.x()), small_step)
-        ]+[
-            QLine(int(top_left.x()), y, int(bottom_right.x()) + 1, y)
-            for y in range(int(range_start.y()), int(range_end.y()), small_step)
-        ])
-
-        if scale <= 6:
-            pen.setWidth(
-                1 if scale > 3
-                else 2 if scale > 1
-                else 3 // scale
-            )
-            painter.setPen(pen)
-            painter.drawLines([
-                QLine(x, int(top_left.y()), x, int(bottom_right.y()) + 1)
-                for x in range(int(range_start.x()), int(range_end.x()), big_step)
-            ]+[
-                QLine(int(top_left.x()), y, int(bottom_right.x()) + 1, y)
-                for y in range(int(range_start.y()), int(range_end.y()), big_step)
-            ])
+        self.grid_render_cache.draw(
+            painter,
+            self.viewportTransform(),
+            self.viewportTransform().mapRect(
+                self.sceneRect().intersected(rect)
+            ),
+            self.grid_step_rate,
+            big_step,
+            small_step,
+        )
 
         if self.cursor_pos:
-            painter = QPainter(self.viewport())
+            painter.save()
+            painter.resetTransform()
             pen = QPen(self.Colors.Cursor)
             pen.setWidth(0.1)
             painter.setPen(pen)
@@ -179,76 +534,51 @@ class VGEGraphicsView(QGraphicsView):
                 QLineF(cursor_pos.x(), cursor_pos.y() - 5,
                        cursor_pos.x(), cursor_pos.y() + 5)
             ])
+            if self.cursor_snap_kind is not None:
+                self._draw_snap_marker(painter, QPointF(cursor_pos))
+            painter.restore()
 
-    def _draw_ruler(self):
-        viewport_rect = self.viewport().rect()
-        painter = QPainter(self.viewport())
-        pen = QPen(Qt.black)
-        pen.setWidth(0.1)
+    def _draw_snap_marker(self, painter, center: QPointF):
+        """
+        Marks the point the cursor snapped to: a square for a vertex,
+        a triangle for a midpoint, a circle for a center and a cross
+        for an intersection
+        """
+        pen = QPen(self.Colors.Snap, 1.5)
         painter.setPen(pen)
+        painter.setBrush(Qt.NoBrush)
+        x, y = center.x(), center.y()
+        kind = self.cursor_snap_kind
+        if kind == SnapKind.Vertex:
+            painter.drawRect(QRectF(x - 4, y - 4, 8, 8))
+        elif kind == SnapKind.Midpoint:
+            painter.drawPolygon(points_to_polygon(np.array(
+                [(x, y - 4), (x + 4, y + 4), (x - 4, y + 4)]
+            )))
+        elif kind == SnapKind.Center:
+            painter.drawEllipse(center, 4, 4)
+        else:
+            painter.drawLines([
+                QLineF(x - 4, y - 4, x + 4, y + 4),
+                QLineF(x - 4, y + 4, x + 4, y - 4),
+            ])
 
+    def _draw_ruler(self, painter):
+        viewport_rect = self.viewport().rect()
+        painter.save()
+        painter.resetTransform()
         top_left = viewport_rect.topLeft()
-        bottom_right = viewport_rect.bottomRight()
 
-        size = bottom_right - top_left
+        big_step, small_step = self.get_grid_steps()
 
-        painter.fillRect(
-            top_left.x(), self.ruler_width,
-            self.ruler_width, size.y(),
-            self.Colors.Ruler
-        )
-        painter.fillRect(
-            self.ruler_width, top_left.y(),
-            size.x(), self.ruler_width,
-            self.Colors.Ruler
-        )
-        painter.drawLine(
-            self.ruler_width, self.ruler_width,
-            self.ruler_width, bottom_right.y()
-        )
-        painter.drawLine(
-            self.ruler_width, self.ruler_width,
-            bottom_right.x(), self.ruler_width
-        )
-
-        scene_top_left = self.mapToScene(top_left)
-        scene_bottom_right = self.mapToScene(bottom_right)
-        scale = self.transform().m11()
-        visible_range = min(
-            scene_bottom_right.x() - scene_top_left.x(),
-            scene_bottom_right.y() - scene_top_left.y()
-        )
-        big_step, small_step = self.grid_step_rate.get_steps(visible_range)
-
-        if big_step > 10**8:
-            return
-
-        scene_range_start = (
-            (scene_top_left / big_step).toPoint() + QPoint(-1, -1)
-        ) * big_step
-        scene_range_end = (
-            (scene_bottom_right / big_step).toPoint() + QPoint(1, 1)
-        ) * big_step
-
-        range_start = self.mapFromScene(scene_range_start)
-        range_end = self.mapFromScene(scene_range_end)
-        big_step, small_step = big_step * scale, small_step * scale
-
-        painter.drawLines(
-            [
-                QLineF(x, self.ruler_width * 0.75, x, self.ruler_width)
-                for x in frange(range_start.x(), range_end.x(), small_step)
-            ]+[
-                QLineF(self.ruler_width * 0.75, y, self.ruler_width, y)
-                for y in frange(range_start.y(), range_end.y(), small_step)
-            ]+[
-                QLineF(x, self.ruler_width / 4, x, self.ruler_width)
-                for x in frange(range_start.x(), range_end.x(), big_step)
-            ]+[
-                QLineF(self.ruler_width / 4, y, self.ruler_width, y)
-                for y in frange(range_start.y(), range_end.y(), big_step)
-            ]
-        )
+        if big_step <= 10**8:
+            self.ruler_render_cache.draw(
+                painter,
+                self.viewportTransform(),
+                QRectF(viewport_rect),
+                big_step,
+                small_step,
+            )
 
         if self.cursor_pos:
             cursor_pen = QPen(self.Colors.Cursor)
@@ -260,82 +590,388 @@ class VGEGraphicsView(QGraphicsView):
                 QLineF(self.cursor_pos.x(), self.ruler_width / 2,
                        self.cursor_pos.x(), self.ruler_width)
             ])
-            painter.setPen(pen)
-
-        painter.setFont(QFont("Arial", self.ruler_width // 2))
-        for x, scene_x in zip(
-            frange(range_start.x(), range_end.x(), big_step),
-            range(
-                scene_range_start.x(),
-                scene_range_end.x(),
-                int(big_step / scale)
-            )
-        ):
-            painter.drawText(
-                QPointF(x + 2, self.ruler_width * 0.65),
-                str(scene_x)
-            )
-
-        painter.rotate(-90)
-        for y, scene_y in zip(
-            frange(range_start.y(), range_end.y(), big_step),
-            range(
-                scene_range_start.y(),
-                scene_range_end.y(),
-                int(big_step / scale)
-            )
-        ):
-            painter.drawText(
-                QPointF(-y + 2, self.ruler_width * 0.65),
-                str(scene_y)
-            )
-        painter.rotate(90)
 
         painter.eraseRect(
             top_left.x(), top_left.y(),
             self.ruler_width + 1, self.ruler_width + 1
         )
 
+        painter.setPen(Qt.black)
+        painter.setFont(self.ruler_render_cache.font)
         painter.drawText(
             QPointF(self.ruler_width * 0.2, self.ruler_width * 0.7),
             "px"
         )
+        painter.restore()
+
+    def paintEvent(self, event):
+        profiler = self.profiler
+        if not profiler.enabled:
+            self._paint(event)
+        elif self._profiler_hud_rect.contains(event.rect()):
+            # A refresh of the HUD isn't counted as a frame
+            self._paint(event)
+            profiler.discard_frame()
+        else:
+            with profiler.span(FrameProfiler.FRAME):
+                self._paint(event)
+            if (
+                    self.show_profiler_hud
+                    and not self._profiler_hud_timer.isActive()
+            ):
+                self._profiler_hud_timer.start()
+
+    def _paint(self, event):
+        if self._snapshot is not None:
+            self._paint_frame(event, self._draw_snapshot)
+        elif (
+                self.tile_cache is not None
+                and self.tile_cache.scene is self.scene()
+        ):
+            self._paint_frame(event, self._draw_tiles)
+        else:
+            super().paintEvent(event)
+
+    def _paint_frame(self, event, draw_items):
+        """Paints a frame as QGraphicsView does, the items by draw_items"""
+        transform = self.viewportTransform()
+        rect = transform.inverted()[0].mapRect(QRectF(event.rect()))
+        painter = QPainter(self.viewport())
+        painter.setTransform(transform)
+        self.drawBackground(painter, rect)
+        painter.save()
+        draw_items(painter, event)
+        painter.restore()
+        self.drawForeground(painter, rect)
+        painter.end()
+
+    def _draw_snapshot(self, painter, event):
+        # The snapshot is mapped from the view's transform at the time
+        # it was taken to the current one
+        painter.setTransform(
+            self._snapshot_transform.inverted()[0]
+            * self.viewportTransform()
+        )
+        painter.drawPixmap(0, 0, self._snapshot)
+
+    def _draw_tiles(self, painter, event):
+        transform = self.viewportTransform()
+        missing = self.tile_cache.draw(
+            painter, transform, QRectF(event.rect())
+        ).intersected(event.region())
+        if missing.isEmpty():
+            return
+        # The items of the tiles not rendered yet are painted at once
+        bounds = QRectF(missing.boundingRect())
+        painter.resetTransform()
+        painter.setClipRegion(missing)
+        self.scene().render(
+            painter, bounds, transform.inverted()[0].mapRect(bounds),
+            Qt.IgnoreAspectRatio
+        )
+
+    def set_tile_cache(self, tile_cache):
+        """
+        Draws the items of the scene of `tile_cache`, a SceneTileCache,
+        from its tiles, or paints them as QGraphicsView does if None
+        """
+        if self.tile_cache is not None:
+            self.tile_cache.rendered.disconnect(self._tile_rendered)
+        self.tile_cache = tile_cache
+        if tile_cache is not None:
+            tile_cache.rendered.connect(self._tile_rendered)
+        self.viewport().update()
+
+    @Slot(QRegion)
+    def _tile_rendered(self, region: QRegion):
+        if self._snapshot is None:
+            self.viewport().update(region)
+
+    def _take_snapshot(self):
+        viewport = self.viewport()
+        ratio = viewport.devicePixelRatioF()
+        snapshot = QPixmap(viewport.size() * ratio)
+        snapshot.setDevicePixelRatio(ratio)
+        snapshot.fill(Qt.transparent)
+        transform = self.viewportTransform()
+        painter = QPainter(snapshot)
+        self.scene().render(
+            painter, QRectF(viewport.rect()),
+            transform.inverted()[0].mapRect(QRectF(viewport.rect())),
+            Qt.IgnoreAspectRatio
+        )
+        painter.end()
+        self._snapshot = snapshot
+        self._snapshot_transform = transform
+
+    def begin_interaction(self):
+        """
+        Paints the items as a snapshot until the view is idle, called
+        on every pan and zoom step
+        """
+        if not self.interaction_snapshot or self.scene() is None:
+            return
+        if self._snapshot is None or abs(log2(
+                self.transform().m11() / self._snapshot_transform.m11()
+        )) > log2(SNAPSHOT_MAX_ZOOM):
+            self._take_snapshot()
+        self._interaction_timer.start()
+
+    @Slot()
+    def end_interaction(self):
+        """Drops the snapshot and paints a full quality frame"""
+        self._interaction_timer.stop()
+        if self._snapshot is not None:
+            self._snapshot = self._snapshot_transform = None
+            self.viewport().update()
 
     def drawBackground(self, painter, rect) -> None:
-        super().drawBackground(painter, rect)
-        painter.fillRect(rect, self.Colors.Background)
-        scene_rect = self.sceneRect()
-        painter.fillRect(scene_rect, self.Colors.SceneRect)
+        profiler = self.profiler
+        with profiler.span("drawBackground"):
+            super().drawBackground(painter, rect)
+            for band in subtract_rect(rect, self.sceneRect()):
+                painter.fillRect(band, self.Colors.Background)
 
-        if self.draw_grid:
-            self._draw_grid(painter)
+            if self.draw_grid:
+                with profiler.span("_draw_grid"):
+                    self._draw_grid(painter, rect)
+            else:
+                painter.fillRect(self.sceneRect(), self.Colors.SceneRect)
+        # The scene's items are painted between the background and
+        # the foreground
+        if profiler.enabled:
+            self._items_paint_start = perf_counter_ns()
+
+    def _draw_selection(self, painter, rect):
+        """
+        Outlines the bounds of selected items. Items smaller than
+        a few pixels are marked with a dot per pixel instead, so
+        a zoomed out selection of a million items stays cheap.
+        """
+        scene = self.scene()
+        if (
+                not isinstance(scene, VGEGraphicsScene)
+                or not scene.has_selection()
+        ):
+            return
+        ids = scene.selected_ids(rect)
+        if not len(ids):
+            return
+        transform = self.viewportTransform()
+        scale = np.array([transform.m11(), transform.m22()] * 2)
+        offset = np.array([transform.dx(), transform.dy()] * 2)
+        bounds = scene.spatial_index.bounds(ids) * scale + offset
+        small = (
+            (bounds[:, 2] - bounds[:, 0] < self.selection_dot_size)
+            & (bounds[:, 3] - bounds[:, 1] < self.selection_dot_size)
+        )
+
+        painter.save()
+        painter.resetTransform()
+        pen = QPen(self.Colors.Selection, 0)
+        painter.setPen(pen)
+        if small.any():
+            # A pixel mask drops the dots of items sharing a pixel
+            width, height = self.viewport().width(), self.viewport().height()
+            centers = (
+                (bounds[small, :2] + bounds[small, 2:]) // 2
+            ).astype(int)
+            centers = centers[
+                (centers[:, 0] >= 0) & (centers[:, 0] < width)
+                & (centers[:, 1] >= 0) & (centers[:, 1] < height)
+            ]
+            mask = np.zeros(width * height, dtype=bool)
+            mask[centers[:, 1] * width + centers[:, 0]] = True
+            pixels = np.flatnonzero(mask)
+            painter.drawPoints(points_to_polygon(np.stack(
+                [pixels % width + 0.5, pixels // width + 0.5], axis=1
+            )))
+        pen.setStyle(Qt.DashLine)
+        painter.setPen(pen)
+        painter.setBrush(Qt.NoBrush)
+        painter.drawRects([
+            QRectF(left, top, right - left, bottom - top)
+            for left, top, right, bottom in bounds[~small].tolist()
+        ])
+        painter.restore()
 
     def drawForeground(self, painter, rect) -> None:
-        super().drawForeground(painter, rect)
+        profiler = self.profiler
+        if profiler.enabled and self._items_paint_start is not None:
+            profiler.record(
+                "drawItems", "paint",
+                self._items_paint_start, perf_counter_ns()
+            )
+        self._items_paint_start = None
+        with profiler.span("drawForeground"):
+            super().drawForeground(painter, rect)
+            self._draw_selection(painter, rect)
+            if self.draw_ruler:
+                with profiler.span("_draw_ruler"):
+                    self._draw_ruler(painter)
+        if profiler.enabled and self.show_profiler_hud:
+            self._draw_profiler_hud(painter)
+
+    def _draw_profiler_hud(self, painter):
+        """
+        Shows the percentiles of the last frame times and the time
+        spent per span in the last frame
+        """
+        profiler = self.profiler
+        p50, p95, p99 = profiler.frame_percentiles()
+        lines = [
+            f"frame p50 {p50:.1f} ms  p95 {p95:.1f} ms  p99 {p99:.1f} ms"
+            f"  ({profiler.frame_count()} frames)"
+        ] + [
+            f"{name} {duration:.2f} ms"
+            for name, duration in profiler.last_frame().items()
+        ]
+        painter.save()
+        painter.resetTransform()
+        metrics = painter.fontMetrics()
+        line_height = metrics.height()
+        width = max(metrics.horizontalAdvance(line) for line in lines) + 8
+        height = line_height * len(lines) + 8
+        left = self.viewport().width() - width - 4
+        top = self.ruler_width + 4 if self.draw_ruler else 4
+        self._profiler_hud_rect = QRect(left, top, width, height)
+        painter.fillRect(self._profiler_hud_rect, self.Colors.ProfilerHud)
+        painter.setPen(self.Colors.ProfilerHudText)
+        for index, line in enumerate(lines):
+            painter.drawText(
+                left + 4, top + 4 + metrics.ascent() + index * line_height,
+                line
+            )
+        painter.restore()
+
+    def _cursor_region(self, pos: QPoint) -> QRegion:
+        """Viewport area covered by the crosshair and the ruler markers"""
+        region = QRegion()
+        if self.draw_grid:
+            region += QRect(pos.x() - 6, pos.y() - 6, 13, 13)
         if self.draw_ruler:
-            self._draw_ruler()
+            region += QRect(pos.x() - 2, 0, 5, self.ruler_width + 2)
+            region += QRect(0, pos.y() - 2, self.ruler_width + 2, 5)
+        return region
+
+    def scrollContentsBy(self, dx: int, dy: int):
+        super().scrollContentsBy(dx, dy)
+        # Scrolling moves the viewport pixels, including the ones
+        # of the rulers and the crosshair, which are fixed to the viewport
+        viewport = self.viewport()
+        if self.draw_ruler:
+            viewport.update(
+                0, 0, viewport.width(), self.ruler_width + 2 + abs(dy)
+            )
+            viewport.update(
+                0, 0, self.ruler_width + 2 + abs(dx), viewport.height()
+            )
+        if self.cursor_pos:
+            viewport.update(
+                self._cursor_region(self.cursor_pos)
+                + self._cursor_region(self.cursor_pos + QPoint(dx, dy))
+            )
+
+    def frame_interval(self) -> int:
+        """Returns the milliseconds between frames of the view's screen"""
+        screen = self.screen()
+        refresh_rate = screen.refreshRate() if screen is not None else 0
+        if refresh_rate <= 0:
+            refresh_rate = DEFAULT_REFRESH_RATE
+        return max(1, round(1000 / refresh_rate))
+
+    def cursor_scene_pos(self) -> QPointF:
+        """
+        Returns the scene position of the cursor, exactly the snapped
+        point when the cursor is snapped to an object or the grid
+        """
+        scene_pos = self._cursor_scene_pos
+        if scene_pos is not None and self.mapFromScene(scene_pos) == (
+                self.cursor_pos
+        ):
+            return QPointF(scene_pos)
+        return self.mapToScene(self.cursor_pos)
+
+    def _snap_cursor(self, pos: QPoint) -> QPoint:
+        """
+        Snaps the cursor to the nearest object point within snap_radius,
+        or else to the grid, and returns its viewport position
+        """
+        self.cursor_snap_kind = self._cursor_scene_pos = None
+        scene = self.scene()
+        if (
+                self.snap_to_objects and isinstance(scene, VGEGraphicsScene)
+                and self.active_graphic_tool.snaps_cursor()
+        ):
+            snap = scene.snap_engine.snap(
+                self.mapToScene(pos),
+                self.snap_radius / self.transform().m11()
+            )
+            if snap is not None:
+                self._cursor_scene_pos, self.cursor_snap_kind = snap
+                return self.mapFromScene(self._cursor_scene_pos)
+        if self.draw_grid and self.fit_cursor_into_grid:
+            scene_cords = self.mapToScene(pos)
+            _, small_step = self.get_grid_steps()
+            self._cursor_scene_pos = QPointF(
+                (scene_cords.x() + small_step/2) // small_step * small_step,
+                (scene_cords.y() + small_step/2) // small_step * small_step
+            )
+            return self.mapFromScene(self._cursor_scene_pos)
+        return pos
 
     def setDragButton(self, button: Qt.MouseButton):
         self.drag_button = button
 
     def setActiveGraphicTool(self, tool: VGEGraphicsTool):
+        self.flush_mouse_move()
         if self.active_graphic_tool:
             self.active_graphic_tool.setParentView(None)
         self.active_graphic_tool = tool
         tool.setParentView(self)
 
     def mousePressEvent(self, event: QMouseEvent):
+        self.flush_mouse_move()
         if (
                 self.dragMode() == self.DragMode.RubberBandDrag
                 and event.button() == self.drag_button
         ):
-            self._drag_start_pos = event.pos()
+            self._drag_start_pos = event.position().toPoint()
 
-        self.active_graphic_tool.mousePressEvent(event)
+        tool = self.active_graphic_tool
+        with self.profiler.span("mousePressEvent", "tool", tool):
+            tool.mousePressEvent(event)
 
     def mouseMoveEvent(self, event: QMouseEvent):
+        if not self.active_graphic_tool.coalesces_moves():
+            self.flush_mouse_move()
+            self._apply_mouse_move(event)
+            return
+        # The event is reused by Qt once handled
+        self._pending_mouse_move = QMouseEvent(event)
+        if not self._mouse_move_timer.isActive():
+            self.flush_mouse_move()
+            self._mouse_move_timer.start(self.frame_interval())
+
+    def flush_mouse_move(self):
+        """Applies the mouse move waiting for the next frame, if any"""
+        event, self._pending_mouse_move = self._pending_mouse_move, None
+        if event is not None:
+            self._apply_mouse_move(event)
+
+    @Slot()
+    def _apply_frame_mouse_move(self):
+        if self._pending_mouse_move is None:
+            self._mouse_move_timer.stop()
+        else:
+            self.flush_mouse_move()
+
+    def _apply_mouse_move(self, event: QMouseEvent):
         if event.buttons() & self.drag_button:
-            delta = event.pos() - self._drag_start_pos
+            # Panning by whole pixels draws the tiles as they are
+            if self.tile_cache is None or self._snapshot is not None:
+                self.begin_interaction()
+            delta = event.position().toPoint() - self._drag_start_pos
             horizontal_scrollbar = self.horizontalScrollBar()
             vertical_scrollbar = self.verticalScrollBar()
             horizontal_scrollbar.setValue(
@@ -344,39 +980,90 @@ class VGEGraphicsView(QGraphicsView):
             vertical_scrollbar.setValue(
                 vertical_scrollbar.value() - delta.y()
             )
-            self._drag_start_pos = event.pos()
+            self._drag_start_pos = event.position().toPoint()
         else:
             super().mouseMoveEvent(event)
 
         if self.cursor_pos:
-            if self.draw_ruler or self.draw_grid:
-                self.cursor_pos = event.pos()
-                last_steps = self.GridStepRate.get_last_steps()
-                if self.draw_grid and self.fit_cursor_into_grid and last_steps:
-                    scene_cords = self.mapToScene(event.pos())
-                    _, small_step = last_steps
-                    self.cursor_pos = self.mapFromScene(
-                        (
-                                (scene_cords.x() + small_step/2)
-                                // small_step * small_step
-                        ),
-                        (
-                                (scene_cords.y() + small_step/2)
-                                // small_step * small_step
-                        )
-                    )
-                self.viewport().update()
+            last_cursor_pos = self.cursor_pos
+            last_snap_kind = self.cursor_snap_kind
+            self.cursor_pos = self._snap_cursor(
+                event.position().toPoint()
+            )
+            if (self.draw_ruler or self.draw_grid) and (
+                    self.cursor_pos != last_cursor_pos
+                    or self.cursor_snap_kind != last_snap_kind
+            ):
+                self.viewport().update(
+                    self._cursor_region(last_cursor_pos)
+                    + self._cursor_region(self.cursor_pos)
+                )
         else:
-            self.cursor_pos = event.pos()
+            self.cursor_pos = event.position().toPoint()
 
-        self.active_graphic_tool.mouseMoveEvent(event)
+        tool = self.active_graphic_tool
+        with self.profiler.span("mouseMoveEvent", "tool", tool):
+            tool.mouseMoveEvent(event)
 
     def mouseReleaseEvent(self, event: QMouseEvent) -> None:
-        self.active_graphic_tool.mouseReleaseEvent(event)
+        self.flush_mouse_move()
+        tool = self.active_graphic_tool
+        with self.profiler.span("mouseReleaseEvent", "tool", tool):
+            tool.mouseReleaseEvent(event)
 
     def wheelEvent(self, event):
-        if event.angleDelta().y() > 0:
-            self.scale(1.1, 1.1)
-        else:
-            self.scale(0.9, 0.9)
+        self.flush_mouse_move()
         event.accept()
+        steps = event.angleDelta().y() / 120
+        if not steps:
+            return
+        scale = self.transform().m11()
+        if self._zoom_target is None:
+            self._zoom_target = scale
+        self._zoom_target *= 1.1 ** steps if steps > 0 else 0.9 ** -steps
+        # Each tick animates from the current scale to the new target
+        self._zoom_from = scale
+        self._zoom_start = perf_counter()
+        self._zoom_anchor = event.position()
+        self.begin_interaction()
+        if not self._zoom_timer.isActive():
+            self._zoom_timer.start(self.frame_interval())
+
+    def finish_zoom(self):
+        """Applies the scale the wheel zoom animation heads to"""
+        if self._zoom_target is not None:
+            self._zoom_to(self._zoom_target)
+        self._zoom_timer.stop()
+        self._zoom_target = None
+
+    @Slot()
+    def _apply_frame_zoom(self):
+        progress = (
+            (perf_counter() - self._zoom_start) * 1000
+            / ZOOM_ANIMATION_DURATION
+        )
+        if progress >= 1 or self._zoom_target is None:
+            self.finish_zoom()
+            return
+        # Eases out, in steps of equal ratios of the scale
+        eased = 1 - (1 - progress) ** 2
+        self._zoom_to(
+            self._zoom_from * (self._zoom_target / self._zoom_from) ** eased
+        )
+        self.begin_interaction()
+
+    def _zoom_to(self, scale: float):
+        """Scales the view keeping the scene point at _zoom_anchor"""
+        anchor = self._zoom_anchor
+        scene_pos = self.viewportTransform().inverted()[0].map(anchor)
+        factor = scale / self.transform().m11()
+        self.scale(factor, factor)
+        delta = self.viewportTransform().map(scene_pos) - anchor
+        horizontal_scrollbar = self.horizontalScrollBar()
+        vertical_scrollbar = self.verticalScrollBar()
+        horizontal_scrollbar.setValue(
+            horizontal_scrollbar.value() + round(delta.x())
+        )
+        vertical_scrollbar.setValue(
+            vertical_scrollbar.value() + round(delta.y())
+        )
@@ -1,33 +1,221 @@
-from PySide6.QtCore import Qt, QPoint, QPointF
+from array import array
+from math import floor, log2
+
+import numpy as np
+from PySide6.QtCore import Qt, QPoint, QPointF, QRectF
+from PySide6.QtGui import QPainterPath, QPen, QPolygonF
 from PySide6.QtWidgets import (
+    QGraphicsItem,
     QGraphicsLineItem,
     QGraphicsRectItem,
     QGraphicsPolygonItem,
-    QGraphicsEllipseItem
+    QGraphicsEllipseItem,
+    QGraphicsPathItem,
+    QStyleOptionGraphicsItem,
 )
 
+from core.generics import VGEGraphicsScene
+from core.graphics.simplification import StrokeSimplifier, decimate_points
+from core.utils import points_to_polygon, polygon_to_points
+
+# Retained points of a freehand stroke added to its path at once
+RECENT_POINTS = 64
+
+# Items smaller than this on screen (pixels) are painted as a dot
+LOD_DOT_SIZE = 2.0
+# Items smaller than this on screen (pixels) are painted as their bounds
+LOD_BOX_SIZE = 6.0
+# Distance in pixels by which a simplified path may move, at most twice
+# as much within an LOD bucket
+LOD_TOLERANCE = 0.5
+# Items with fewer points are painted by Qt
+LOD_MIN_POINTS = 32
+# Part of the points a simplified path may keep to be used
+LOD_MAX_KEPT = 0.75
+
 
 class VGEGraphicsItemMixin:
-    def __init__(self, start_point: QPoint | QPointF, scene):
+    """
+    Keeps the points added while drawing as flat x, y coordinates in an
+    array('d') instead of a list of QPointF wrappers. The QPolygonF of
+    `points` is created from the array on first use and dropped when
+    the item is finished.
+
+    Shiboken types can't be mixed with a base declaring non-empty
+    __slots__, so item classes declare `item_slots` themselves. The
+    wrappers still take other attributes, but their dict is only
+    created then, which saves about 180 bytes per item.
+    """
+    __slots__ = ()
+    item_slots = ("_coordinates", "_points_polygon")
+    # Whether drawing follows the cursor snapped to objects or the grid
+    uses_snapped_cursor = True
+
+    def __init__(self, start_point: QPoint | QPointF, scene=None):
         super().__init__()
-        self.start_point = start_point
-        self.points: list = [start_point, ]
-        scene.addItem(self)
+        self._coordinates = array("d", (start_point.x(), start_point.y()))
+        self._points_polygon: QPolygonF | None = None
+        # The geometry is set first, so the scene indexes the item
+        # at its place
+        self.set_initial_geometry()
+        if scene is not None:
+            scene.addItem(self)
+
+    def set_initial_geometry(self):
+        pass
+
+    @property
+    def start_point(self) -> QPointF:
+        return QPointF(self._coordinates[0], self._coordinates[1])
+
+    @property
+    def points(self) -> QPolygonF:
+        if self._points_polygon is None:
+            self._points_polygon = points_to_polygon(
+                np.frombuffer(self._coordinates).reshape(-1, 2)
+            )
+        return self._points_polygon
 
     def add_point(self, point: QPoint | QPointF):
-        self.points.append(point)
+        self._coordinates.append(point.x())
+        self._coordinates.append(point.y())
+        self._points_polygon = None
+        scene = self.scene()
+        if isinstance(scene, VGEGraphicsScene):
+            scene.item_point_added(self, point)
+
+    def remove_last_point(self):
+        """Removes the point added last, other than the start point"""
+        if len(self._coordinates) > 2:
+            del self._coordinates[-2:]
+            self._points_polygon = None
+            scene = self.scene()
+            if isinstance(scene, VGEGraphicsScene):
+                scene.item_point_removed(self)
+            self.points_changed()
+
+    def points_changed(self):
+        """Shows points added or removed other than by drawing"""
+        pass
 
     def update_last_point(self, point: QPoint | QPointF):
         pass
 
+    def geometry_changed(self):
+        """Updates the bounds of the item in the scene's spatial index"""
+        scene = self.scene()
+        if isinstance(scene, VGEGraphicsScene):
+            scene.item_geometry_changed(self)
+
     def mouse_release_action(self, event, tool):
         if event.button() == Qt.LeftButton:
             tool.current_instance = None
 
 
+class LevelOfDetailPainter(QGraphicsItem):
+    """
+    Paints its parent, a LevelOfDetailMixin item flagged
+    ItemHasNoContents, by its size on screen, from the scale given
+    by QStyleOptionGraphicsItem.levelOfDetailFromTransform(): as
+    a dot below LOD_DOT_SIZE pixels, as its bounds below LOD_BOX_SIZE
+    pixels and above as its points decimated to LOD_TOLERANCE pixels.
+
+    The decimated paths are cached per LOD bucket, a power of two of
+    the scale, until the parent's geometry changes. Where decimating
+    keeps most of the points, the bucket paints the parent as it is.
+    """
+    def __init__(self, item: QGraphicsItem):
+        super().__init__(item)
+        self._paths: dict[int, QPainterPath | None] = {}
+        item.setFlag(QGraphicsItem.ItemHasNoContents)
+
+    def geometry_changed(self):
+        self._paths.clear()
+
+    def boundingRect(self) -> QRectF:
+        return self.parentItem().boundingRect()
+
+    def paint(self, painter, option, widget=None):
+        item = self.parentItem()
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(
+            painter.worldTransform()
+        )
+        rect = item.boundingRect()
+        size = max(rect.width(), rect.height()) * lod
+        if size < LOD_BOX_SIZE:
+            painter.setPen(QPen(item.pen().color(), 0))
+            if size < LOD_DOT_SIZE:
+                painter.drawPoint(rect.center())
+            else:
+                painter.setBrush(item.brush())
+                painter.drawRect(rect)
+            return
+        bucket = floor(log2(lod))
+        if bucket not in self._paths:
+            self._paths[bucket] = self._decimated_path(
+                item, LOD_TOLERANCE / 2 ** bucket
+            )
+        path = self._paths[bucket]
+        if path is None:
+            item.paint(painter, option, widget)
+            return
+        painter.setPen(item.pen())
+        painter.setBrush(item.brush())
+        painter.drawPath(path)
+
+    @staticmethod
+    def _decimated_path(item, tolerance: float) -> QPainterPath | None:
+        points = polygon_to_points(item.polygon())
+        decimated = decimate_points(points, tolerance)
+        if len(decimated) > len(points) * LOD_MAX_KEPT:
+            return None
+        path = QPainterPath()
+        path.addPolygon(points_to_polygon(decimated))
+        if item.closed_path:
+            path.closeSubpath()
+            path.setFillRule(item.fillRule())
+        return path
+
+
+class LevelOfDetailMixin:
+    """
+    Items with at least LOD_MIN_POINTS points are painted by
+    a LevelOfDetailPainter child, so zoomed out they cost a single
+    primitive whatever their vertex count. Qt paints the others, as
+    a paint() written in Python costs a few microseconds per item,
+    more than Qt takes to paint a small polygon.
+
+    The item classes call update_detail_painter() when their points
+    change and declare the `_detail_painter` slot.
+    """
+    __slots__ = ()
+    # Whether the last point is joined to the first one
+    closed_path = True
+
+    def __init__(self, *args):
+        self._detail_painter: LevelOfDetailPainter | None = None
+        super().__init__(*args)
+
+    def update_detail_painter(self, point_count: int):
+        detail_painter = self._detail_painter
+        if point_count >= LOD_MIN_POINTS:
+            if detail_painter is None:
+                self._detail_painter = LevelOfDetailPainter(self)
+            else:
+                detail_painter.geometry_changed()
+        elif detail_painter is not None:
+            self.setFlag(QGraphicsItem.ItemHasNoContents, False)
+            detail_painter.setParentItem(None)
+            if detail_painter.scene() is not None:
+                detail_painter.scene().removeItem(detail_painter)
+            self._detail_painter = None
+
+
 class VGEGraphicsLineItem(VGEGraphicsItemMixin, QGraphicsLineItem):
-    def __init__(self, start_point, scene):
-        super().__init__(start_point, scene)
+    __slots__ = VGEGraphicsItemMixin.item_slots
+
+    def set_initial_geometry(self):
+        start_point = self.start_point
         self.setLine(
             start_point.x(), start_point.y(),
             start_point.x(), start_point.y() - 1
@@ -38,11 +226,14 @@ class VGEGraphicsLineItem(VGEGraphicsItemMixin, QGraphicsLineItem):
         if point == start_point:
             point.setY(point.y() - 1)
         self.setLine(start_point.x(), start_point.y(), point.x(), point.y())
+        self.geometry_changed()
 
 
 class VGEGraphicsRectItem(VGEGraphicsItemMixin, QGraphicsRectItem):
-    def __init__(self, start_point, scene):
-        super().__init__(start_point, scene)
+    __slots__ = VGEGraphicsItemMixin.item_slots
+
+    def set_initial_geometry(self):
+        start_point = self.start_point
         self.setRect(start_point.x(), start_point.y(), 1, 1)
 
     def update_last_point(self, point: QPoint | QPointF):
@@ -52,33 +243,104 @@ class VGEGraphicsRectItem(VGEGraphicsItemMixin, QGraphicsRectItem):
         width = point.x() - start_point.x()
         height = point.y() - start_point.y()
         self.setRect(start_point.x(), start_point.y(), width, height)
+        self.geometry_changed()
 
 
-class VGEGraphicsPolygonItem(VGEGraphicsItemMixin, QGraphicsPolygonItem):
-    def __init__(self, start_point, scene):
-        super().__init__(start_point, scene)
-        self.setPolygon([
-            *self.points,
+class VGEGraphicsPolygonItem(
+    LevelOfDetailMixin, VGEGraphicsItemMixin, QGraphicsPolygonItem
+):
+    """
+    While drawing, the item's polygon holds the points added so far and
+    is set again on the first move after a point is added. The edges
+    from the last point to the pointer and back to the start point are
+    drawn by a child path, so a move costs the same whatever the count
+    of points, and the polygon is cached as a pixmap until it changes.
+    The points are also kept in a set while drawing, to tell whether
+    the pointer is on one of them without a scan.
+    """
+    __slots__ = VGEGraphicsItemMixin.item_slots + (
+        "_detail_painter", "_preview", "_point_set", "_shown_count"
+    )
+
+    def set_initial_geometry(self):
+        start_point = self.start_point
+        self._preview: QGraphicsPathItem | None = None
+        self._point_set: set[tuple[float, float]] | None = None
+        # Points of the drawing in the item's polygon
+        self._shown_count = 1
+        self.setPolygon(QPolygonF([
+            QPointF(start_point),
             QPointF(start_point.x(), start_point.y() - 1),
-        ])
+        ]))
+
+    def setPolygon(self, polygon: QPolygonF):
+        super().setPolygon(polygon)
+        self.update_detail_painter(len(polygon))
+
+    def add_point(self, point: QPoint | QPointF):
+        super().add_point(point)
+        if self._point_set is not None:
+            self._point_set.add((point.x(), point.y()))
 
     def update_last_point(self, point: QPoint | QPointF):
-        if point in self.points:
+        coordinates = self._coordinates
+        if self._point_set is None:
+            self._point_set = set(zip(coordinates[::2], coordinates[1::2]))
+        if (point.x(), point.y()) in self._point_set:
             point.setY(point.y() - 1)
-        self.setPolygon([
-            *self.points,
-            QPointF(point.x(), point.y()),
-        ])
+        if len(coordinates) // 2 != self._shown_count:
+            self._show_points()
+        if self._preview is None:
+            self._preview = QGraphicsPathItem(self)
+            self._preview.setPen(self.pen())
+            self._set_cache_mode(QGraphicsItem.DeviceCoordinateCache)
+        path = QPainterPath(QPointF(coordinates[-2], coordinates[-1]))
+        path.lineTo(point.x(), point.y())
+        path.lineTo(coordinates[0], coordinates[1])
+        self._preview.setPath(path)
+
+    def _show_points(self):
+        self._shown_count = len(self._coordinates) // 2
+        if self._shown_count > 1:
+            self.setPolygon(self.points)
+            self.geometry_changed()
+            if self._preview is not None:
+                self._set_cache_mode(QGraphicsItem.DeviceCoordinateCache)
+
+    def _set_cache_mode(self, mode: QGraphicsItem.CacheMode):
+        """Sets the cache mode of the item or its LevelOfDetailPainter"""
+        for item in (self, self._detail_painter):
+            if item is not None:
+                item.setCacheMode(mode)
+
+    def points_changed(self):
+        coordinates = self._coordinates
+        self._point_set = None
+        if self._preview is not None:
+            self._preview.setPath(QPainterPath())
+        self.setPolygon(self.points)
+        self._shown_count = len(coordinates) // 2
+        self._points_polygon = None
+        self.geometry_changed()
 
     def mouse_release_action(self, event, tool):
         if event.button() == Qt.MiddleButton:
-            self.setPolygon(self.points)
+            preview = self._preview
+            if preview is not None:
+                preview.setParentItem(None)
+                if preview.scene() is not None:
+                    preview.scene().removeItem(preview)
+                self._preview = None
+                self._set_cache_mode(QGraphicsItem.NoCache)
+            self.points_changed()
             tool.current_instance = None
 
 
 class VGEGraphicsEllipseItem(VGEGraphicsItemMixin, QGraphicsEllipseItem):
-    def __init__(self, start_point, scene):
-        super().__init__(start_point, scene)
+    __slots__ = VGEGraphicsItemMixin.item_slots
+
+    def set_initial_geometry(self):
+        start_point = self.start_point
         self.setRect(start_point.x(), start_point.y(), 1, 1)
 
     def update_last_point(self, point: QPoint | QPointF):
@@ -88,3 +350,114 @@ class VGEGraphicsEllipseItem(VGEGraphicsItemMixin, QGraphicsEllipseItem):
         width = point.x() - start_point.x()
         height = point.y() - start_point.y()
         self.setRect(start_point.x(), start_point.y(), width, height)
+        self.geometry_changed()
+
+
+class VGEGraphicsFreehandItem(
+    LevelOfDetailMixin, VGEGraphicsItemMixin, QGraphicsPathItem
+):
+    """
+    An open stroke following the pointer. The samples are simplified
+    by a StrokeSimplifier while drawing, so only the retained points
+    are added to the coordinates.
+
+    While drawing, the points retained since the path was last built
+    are drawn by a child path and the last retained point is joined
+    to the latest sample by a child line. A move only changes that
+    line, a retained point rebuilds the child path of up to
+    RECENT_POINTS points, and the item's path, which grows with the
+    stroke, is rebuilt once per RECENT_POINTS retained points.
+
+    polygon() and setPolygon() give the points, like the ones of
+    a polygon item.
+    """
+    __slots__ = VGEGraphicsItemMixin.item_slots + (
+        "_detail_painter", "_simplifier", "_recent", "_tail", "_path_count"
+    )
+    uses_snapped_cursor = False
+    closed_path = False
+
+    def set_initial_geometry(self):
+        self._simplifier: StrokeSimplifier | None = None
+        self._recent: QGraphicsPathItem | None = None
+        self._tail: QGraphicsLineItem | None = None
+        # Points of the stroke in the item's path
+        self._path_count = 1
+        self.setPath(QPainterPath(self.start_point))
+
+    def polygon(self) -> QPolygonF:
+        return points_to_polygon(
+            np.frombuffer(self._coordinates).reshape(-1, 2)
+        )
+
+    def setPolygon(self, polygon: QPolygonF):
+        self._coordinates = array("d", polygon_to_points(polygon).tobytes())
+        self._points_polygon = None
+        self._build_path()
+
+    def start_stroke(self, tolerance: float):
+        """Starts simplifying samples, `tolerance` in scene units"""
+        start_point = self.start_point
+        self._simplifier = StrokeSimplifier(
+            start_point.x(), start_point.y(), tolerance
+        )
+        self._recent = QGraphicsPathItem(self)
+        self._tail = QGraphicsLineItem(self)
+        self._recent.setPen(self.pen())
+        self._tail.setPen(self.pen())
+
+    def update_last_point(self, point: QPoint | QPointF):
+        simplifier = self._simplifier
+        if simplifier is None:
+            return
+        retained = simplifier.add(point.x(), point.y())
+        if retained is not None:
+            self._add_retained_point(*retained)
+        self._tail.setLine(
+            self._coordinates[-2], self._coordinates[-1],
+            point.x(), point.y()
+        )
+
+    def _add_retained_point(self, x: float, y: float):
+        self.add_point(QPointF(x, y))
+        recent_count = len(self._coordinates) // 2 - self._path_count
+        if recent_count >= RECENT_POINTS:
+            self._build_path()
+            self._recent.setPath(QPainterPath())
+        else:
+            path = QPainterPath()
+            path.addPolygon(points_to_polygon(
+                np.frombuffer(self._coordinates).reshape(-1, 2)[
+                    self._path_count - 1:
+                ]
+            ))
+            self._recent.setPath(path)
+
+    def _build_path(self):
+        path = QPainterPath()
+        path.addPolygon(self.polygon())
+        self._path_count = len(self._coordinates) // 2
+        self.setPath(path)
+        self.update_detail_painter(self._path_count)
+        self.geometry_changed()
+
+    def points_changed(self):
+        self._build_path()
+
+    def mouse_release_action(self, event, tool):
+        if event.button() != Qt.LeftButton:
+            return
+        simplifier = self._simplifier
+        if simplifier is not None:
+            retained = simplifier.finish()
+            if retained is not None:
+                self.add_point(QPointF(*retained))
+            for child in (self._recent, self._tail):
+                child.setParentItem(None)
+                if child.scene() is not None:
+                    child.scene().removeItem(child)
+            self._simplifier = self._recent = self._tail = None
+            self._points_polygon = None
+            self._build_path()
+            tool.stroke_finished(simplifier)
+        tool.current_instance = None
@@ -1,17 +1,144 @@
-from PySide6.QtCore import Qt
+from typing import Callable
+
+from PySide6.QtCore import Qt, QRect
 from PySide6.QtGui import QPen
+from PySide6.QtWidgets import QRubberBand
 
-from core.generics import VGEGraphicsTool
+from core.generics import VGEGraphicsTool, VGEGraphicsScene
+from core.settings import config, DefaultSettings
 from core.graphics.graphics_items import (
     VGEGraphicsLineItem,
     VGEGraphicsRectItem,
     VGEGraphicsPolygonItem,
-    VGEGraphicsEllipseItem
+    VGEGraphicsEllipseItem,
+    VGEGraphicsFreehandItem,
+)
+from core.graphics.simplification import StrokeSimplifier
+from core.graphics.undo import (
+    AddItemsCommand,
+    AddPointCommand,
+    MoveElementsCommand,
+    MoveItemsCommand,
 )
 
 
 class SelectionTool(VGEGraphicsTool):
-    pass
+    """
+    A click selects the topmost item under the cursor and a drag from
+    an empty spot selects the items whose bounds touch the rubber band.
+    Shift or Ctrl add items to the selection (a click toggles one).
+    Dragging a selected item moves the selection, which is recorded
+    as one command.
+
+    The elements of shape layers are picked, selected and dragged the
+    same way, each layer moving its own selected elements.
+
+    Works on VGEGraphicsScene, whose spatial index answers the queries.
+    """
+    # Distance in pixels at which a click still hits an item
+    pick_tolerance = 3
+
+    def __init__(self):
+        super().__init__()
+        self.rubber_band: QRubberBand | None = None
+        self._press_pos = None
+        self._last_scene_pos = None
+        self._moved = False
+        # The shape layer whose elements are dragged, or -1 for items
+        self._layer_id = -1
+
+    def setParentView(self, view):
+        if self.rubber_band is not None:
+            self.rubber_band.hide()
+            self.rubber_band.deleteLater()
+            self.rubber_band = None
+        self._press_pos = self._last_scene_pos = None
+        super().setParentView(view)
+
+    def get_scene(self) -> VGEGraphicsScene | None:
+        scene = self.view.scene()
+        return scene if isinstance(scene, VGEGraphicsScene) else None
+
+    def mousePressEvent(self, event):
+        scene = self.get_scene()
+        if event.button() != Qt.LeftButton or scene is None:
+            return
+        pos = event.position().toPoint()
+        point = self.view.mapToScene(pos)
+        add = bool(
+            event.modifiers() & (Qt.ShiftModifier | Qt.ControlModifier)
+        )
+        tolerance = self.pick_tolerance / self.view.transform().m11()
+        id_ = scene.item_id_at(point, tolerance)
+        self._layer_id = -1
+        if id_ >= 0 and scene.is_layer(id_):
+            element = scene.element_at(id_, point, tolerance)
+            if add:
+                scene.toggle_element_selection(id_, [element])
+            elif element not in scene.selected_elements(id_):
+                scene.clear_selection()
+                scene.set_element_selection(id_, [element])
+            if element in scene.selected_elements(id_):
+                self._layer_id = id_
+                self._last_scene_pos = point
+                self._moved = False
+            return
+        if id_ >= 0:
+            if add:
+                scene.toggle_selection([id_])
+            elif not scene.is_selected(id_):
+                scene.set_selection([id_])
+            if scene.is_selected(id_):
+                self._last_scene_pos = point
+                self._moved = False
+            return
+
+        if not add:
+            scene.clear_selection()
+        self._press_pos = pos
+        if self.rubber_band is None:
+            self.rubber_band = QRubberBand(
+                QRubberBand.Rectangle, self.view.viewport()
+            )
+        self.rubber_band.setGeometry(QRect(pos, pos))
+        self.rubber_band.show()
+
+    def mouseMoveEvent(self, event):
+        pos = event.position().toPoint()
+        if self._last_scene_pos is not None:
+            point = self.view.mapToScene(pos)
+            delta = point - self._last_scene_pos
+            scene = self.get_scene()
+            if self._layer_id >= 0:
+                indices = scene.selected_elements(self._layer_id)
+                scene.move_elements(
+                    self._layer_id, indices, delta.x(), delta.y()
+                )
+                command = MoveElementsCommand(
+                    self._layer_id, indices, delta.x(), delta.y()
+                )
+            else:
+                ids = scene.selected_ids()
+                scene.move_items(ids, delta.x(), delta.y())
+                command = MoveItemsCommand(ids, delta.x(), delta.y())
+            scene.undo_stack.push(command, merge=self._moved)
+            self._moved = True
+            self._last_scene_pos = point
+        elif self._press_pos is not None:
+            self.rubber_band.setGeometry(
+                QRect(self._press_pos, pos).normalized()
+            )
+
+    def mouseReleaseEvent(self, event):
+        if event.button() != Qt.LeftButton:
+            return
+        if self._press_pos is not None:
+            scene = self.get_scene()
+            band = QRect(self._press_pos, event.position().toPoint())
+            rect = self.view.mapToScene(band.normalized()).boundingRect()
+            scene.select_in_rect(rect)
+            self.rubber_band.hide()
+        self._press_pos = self._last_scene_pos = None
 
 
 class GeometryTool(VGEGraphicsTool):
@@ -20,6 +147,7 @@ class GeometryTool(VGEGraphicsTool):
         "rectangle": VGEGraphicsRectItem,
         "polygon": VGEGraphicsPolygonItem,
         "ellipse": VGEGraphicsEllipseItem,
+        "freehand": VGEGraphicsFreehandItem,
     }
 
     def __init__(self):
@@ -30,31 +158,98 @@ class GeometryTool(VGEGraphicsTool):
         self.current_instance = None
         self.start_point = None
 
+        # Distance in pixels a freehand stroke may be simplified by
+        self.freehand_tolerance: float = config.value(
+            "freehand_tolerance", DefaultSettings.FREEHAND_TOLERANCE,
+            type=float
+        )
+        # Called with the retained and the raw point counts of
+        # a finished freehand stroke
+        self.on_stroke_finished: Callable[[int, int], None] | None = None
+
     def set_geometry_type(self, type_: str):
         """
-        type_ in ["line", "rectangle", "polygon", "ellipse"]
+        type_ in ["line", "rectangle", "polygon", "ellipse", "freehand"]
         """
         self.geometry_type = self.graphics_items_classes.get(
             type_.lower(), VGEGraphicsLineItem
         )
 
+    def get_scene(self) -> VGEGraphicsScene | None:
+        scene = self.view.scene()
+        return scene if isinstance(scene, VGEGraphicsScene) else None
+
+    def release_removed_instance(self):
+        """Lets go of the item being drawn if it left the scene"""
+        if (
+                self.current_instance is not None
+                and self.current_instance.scene() is None
+        ):
+            self.current_instance = None
+
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
-            point = self.view.mapToScene(self.view.cursor_pos)
+            point = self.view.cursor_scene_pos()
+            scene = self.get_scene()
             if not self.current_instance:
                 self.current_instance = self.geometry_type(
                     point, self.view.scene()
                 )
                 pen = QPen(Qt.black, 2)
                 self.current_instance.setPen(pen)
+                if isinstance(self.current_instance, VGEGraphicsFreehandItem):
+                    self.current_instance.start_stroke(
+                        self.freehand_tolerance / self.view.transform().m11()
+                    )
+                if scene is not None:
+                    scene.undo_stack.push(
+                        AddItemsCommand(scene, [self.current_instance])
+                    )
+                    if scene.journal is not None:
+                        scene.journal.record_created(self.current_instance)
+                    # The points of the item being drawn are followed as
+                    # they are added, instead of walking its geometry
+                    scene.snap_engine.begin_item(
+                        scene.spatial_index.id(self.current_instance), point
+                    )
             else:
                 self.current_instance.add_point(point)
+                if scene is not None:
+                    id_ = scene.spatial_index.id(self.current_instance)
+                    scene.undo_stack.push(AddPointCommand(id_, point))
+                    scene.snap_engine.add_vertex(id_, point)
 
     def mouseMoveEvent(self, event):
         if self.current_instance:
-            end_point = self.view.mapToScene(self.view.cursor_pos)
+            if self.current_instance.uses_snapped_cursor:
+                end_point = self.view.cursor_scene_pos()
+            else:
+                end_point = self.view.mapToScene(event.position().toPoint())
             self.current_instance.update_last_point(end_point)
 
+    def snaps_cursor(self) -> bool:
+        # A freehand stroke follows the pointer itself
+        return (
+            self.current_instance is None
+            or self.current_instance.uses_snapped_cursor
+        )
+
+    def coalesces_moves(self) -> bool:
+        # A freehand stroke keeps every sample
+        return self.snaps_cursor()
+
+    def stroke_finished(self, simplifier: StrokeSimplifier):
+        if self.on_stroke_finished is not None:
+            self.on_stroke_finished(
+                simplifier.retained_count, simplifier.raw_count
+            )
+
     def mouseReleaseEvent(self, event):
         if self.current_instance:
-            self.current_instance.mouse_release_action(event, self)
+            instance = self.current_instance
+            instance.mouse_release_action(event, self)
+            scene = self.get_scene()
+            if self.current_instance is None and scene is not None:
+                scene.snap_engine.end_item(scene.spatial_index.id(instance))
+                if scene.journal is not None:
+                    scene.journal.record_finished(instance)
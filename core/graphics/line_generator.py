@@ -0,0 +1,97 @@
+from math import ceil, copysign, floor
+
+import numpy as np
+from PySide6.QtCore import QLineF
+from PySide6.QtGui import QPolygonF
+
+from core.utils import points_to_polygon
+
+
+def get_indices(
+        origin: float,
+        start: float,
+        stop: float,
+        scale: float,
+        step: int,
+        padding: float = 0.0,
+) -> np.ndarray:
+    """
+    Returns n of every n * `step` scene coordinate whose device
+    position falls into [start - padding, stop + padding],
+    where `origin` is the device position of the scene origin
+    """
+    first = ceil((start - origin - padding) / scale / step)
+    last = floor((stop - origin + padding) / scale / step)
+    return np.arange(first, last + 1, dtype=np.int64)
+
+
+def get_positions(
+        origin: float,
+        start: float,
+        stop: float,
+        scale: float,
+        step: int,
+        padding: float = 0.0,
+) -> np.ndarray:
+    """Returns device positions of the `get_indices` multiples"""
+    indices = get_indices(origin, start, stop, scale, step, padding)
+    return origin + indices * (step * scale)
+
+
+def get_comb(
+        positions: np.ndarray,
+        start: float,
+        stop: float,
+        vertical: bool = True,
+) -> QPolygonF:
+    """
+    Returns a polyline of lines at `positions` (x for vertical lines,
+    y for horizontal ones) spanning from `start` to `stop`.
+
+    The lines are chained with segments running along `start` and
+    `stop`, so both must be outside of the painted area. Unlike
+    drawLines, QPainter.drawPolyline takes the polygon as is, without
+    converting every point into a Python object.
+    """
+    points = np.empty((len(positions), 2, 2))
+    points[:, :, 0 if vertical else 1] = positions[:, np.newaxis]
+    across = points[:, :, 1 if vertical else 0]
+    across[0::2] = start, stop
+    across[1::2] = stop, start
+    return points_to_polygon(points.reshape(-1, 2))
+
+
+def get_ticks(
+        positions: np.ndarray,
+        base: float,
+        tip: float,
+        vertical: bool = True,
+) -> QPolygonF:
+    """
+    Returns a polyline of ticks at `positions` going from `base`
+    to `tip` and back. `base` must be outside of the painted area.
+    """
+    # A polyline leaves out the last pixel of each segment, while
+    # drawLines with the default square cap covers the tip pixel too
+    tip += copysign(0.5, tip - base)
+    points = np.empty((len(positions), 3, 2))
+    points[:, :, 0 if vertical else 1] = positions[:, np.newaxis]
+    points[:, :, 1 if vertical else 0] = base, tip, base
+    return points_to_polygon(points.reshape(-1, 2))
+
+
+def get_lines(
+        positions: np.ndarray,
+        start: float,
+        stop: float,
+        vertical: bool = True,
+) -> list[QLineF]:
+    """
+    Returns separate lines at `positions` spanning from `start` to
+    `stop`. Used for wide pens, which are slow to stroke along a long
+    polyline (or to fill as a polygon with many edges), so it is meant
+    for the sparse levels only.
+    """
+    if vertical:
+        return [QLineF(pos, start, pos, stop) for pos in positions.tolist()]
+    return [QLineF(start, pos, stop, pos) for pos in positions.tolist()]
@@ -0,0 +1,399 @@
+from math import ceil, floor
+
+from PySide6.QtCore import Qt, QPointF, QRectF
+from PySide6.QtGui import (
+    QColor,
+    QFont,
+    QFontMetricsF,
+    QPainter,
+    QPen,
+    QPixmap,
+    QStaticText,
+    QTransform,
+)
+
+from core.graphics.line_generator import (
+    get_comb,
+    get_indices,
+    get_lines,
+    get_positions,
+    get_ticks,
+)
+from core.utils import LRUCache
+
+
+class GridRenderCache:
+    """
+    Pre-rendered, opaque grid tiles blitted in drawBackground.
+
+    Tiles form a device-space lattice anchored to the scene origin, so
+    panning by whole pixels reuses every tile as is. Tiles are laid out
+    and rendered in device pixels, so HiDPI screens get lines as thin
+    as the ones drawn directly. A tile is keyed by (zoom, step rate,
+    device pixel ratio, big step, small step, sub-pixel phase,
+    tile index). Any zoom, step rate or device pixel ratio change drops
+    the whole cache, keeping the dropped pixmaps for reuse; the first
+    frame at a new zoom is drawn directly, so continuous zooming does
+    not pay for tiles it never reuses.
+
+    Line levels (small or big steps) packed closer than
+    `min_line_spacing` pixels are not drawn.
+    """
+    TILE_SIZE = 256
+    PHASE_PRECISION = 64
+
+    def __init__(
+            self,
+            color: QColor,
+            background: QColor,
+            min_line_spacing: float = 0.0,
+            max_tiles: int = 192,
+    ):
+        self.color = QColor(color)
+        self.background = QColor(background)
+        self.min_line_spacing = min_line_spacing
+        self.tiles = LRUCache(max_tiles)
+        self._pool: list[QPixmap] = []
+        self._zoom = None
+        self._rate = None
+        self._device_pixel_ratio = None
+
+    def invalidate(self):
+        self._pool.extend(self.tiles.values())
+        self.tiles.clear()
+        self._zoom = self._rate = self._device_pixel_ratio = None
+
+    @staticmethod
+    def get_big_line_width(scale: float) -> float:
+        return (
+            1 if scale > 3
+            else 2 if scale > 1
+            else 3 // scale
+        )
+
+    def draw(
+            self,
+            painter: QPainter,
+            transform: QTransform,
+            target_rect: QRectF,
+            rate,
+            big_step: int,
+            small_step: int,
+    ):
+        """
+        Fills `target_rect` (in viewport coordinates) with the grid
+        """
+        zoom = transform.m11()
+        device_pixel_ratio = painter.device().devicePixelRatioF()
+        origin = transform.map(QPointF(0, 0)) * device_pixel_ratio
+        device_rect = QRectF(
+            target_rect.topLeft() * device_pixel_ratio,
+            target_rect.size() * device_pixel_ratio
+        )
+
+        painter.save()
+        painter.resetTransform()
+        painter.setClipRect(target_rect)
+
+        if (zoom, rate, device_pixel_ratio) != (
+                self._zoom, self._rate, self._device_pixel_ratio
+        ):
+            self.invalidate()
+            self._zoom, self._rate = zoom, rate
+            self._device_pixel_ratio = device_pixel_ratio
+            painter.fillRect(target_rect, self.background)
+            painter.scale(1 / device_pixel_ratio, 1 / device_pixel_ratio)
+            self._draw_lines(
+                painter, origin, device_rect, zoom, device_pixel_ratio,
+                big_step, small_step
+            )
+            painter.restore()
+            return
+
+        anchor_x, anchor_y = floor(origin.x()), floor(origin.y())
+        phase = (
+            round((origin.x() - anchor_x) * self.PHASE_PRECISION),
+            round((origin.y() - anchor_y) * self.PHASE_PRECISION),
+        )
+        size = self.TILE_SIZE
+        columns = range(
+            floor((device_rect.left() - anchor_x) / size),
+            floor((device_rect.right() - anchor_x) / size) + 1
+        )
+        rows = range(
+            floor((device_rect.top() - anchor_y) / size),
+            floor((device_rect.bottom() - anchor_y) / size) + 1
+        )
+        self.tiles.max_size = max(
+            self.tiles.max_size, 2 * len(columns) * len(rows)
+        )
+
+        key_prefix = (
+            zoom, rate, device_pixel_ratio, big_step, small_step, phase
+        )
+        for j in rows:
+            for i in columns:
+                key = (*key_prefix, i, j)
+                pixmap = self.tiles.get(key)
+                if pixmap is None:
+                    pixmap = self._render_tile(
+                        QPointF(
+                            phase[0] / self.PHASE_PRECISION - i * size,
+                            phase[1] / self.PHASE_PRECISION - j * size
+                        ),
+                        zoom, device_pixel_ratio, big_step, small_step
+                    )
+                    self.tiles.put(key, pixmap)
+                painter.drawPixmap(QPointF(
+                    (anchor_x + i * size) / device_pixel_ratio,
+                    (anchor_y + j * size) / device_pixel_ratio
+                ), pixmap)
+        painter.restore()
+
+    def _render_tile(
+            self, origin, zoom, device_pixel_ratio, big_step, small_step
+    ) -> QPixmap:
+        size = self.TILE_SIZE
+        pixmap = self._pool.pop() if self._pool else QPixmap(size, size)
+        pixmap.setDevicePixelRatio(device_pixel_ratio)
+        pixmap.fill(self.background)
+        painter = QPainter(pixmap)
+        painter.scale(1 / device_pixel_ratio, 1 / device_pixel_ratio)
+        self._draw_lines(
+            painter, origin, QRectF(0, 0, size, size),
+            zoom, device_pixel_ratio, big_step, small_step
+        )
+        painter.end()
+        return pixmap
+
+    def _draw_lines(
+            self, painter, origin, rect, zoom, device_pixel_ratio,
+            big_step, small_step
+    ):
+        """
+        Draws grid lines over `rect`, where `origin` is the position
+        of the scene origin in the same (device) coordinates
+        """
+        scale = zoom * device_pixel_ratio
+        min_line_spacing = self.min_line_spacing * device_pixel_ratio
+        big_line_width = self.get_big_line_width(zoom) * scale
+        padding = big_line_width / 2 + 1
+
+        margin = padding + 1
+        left, top = rect.left() - margin, rect.top() - margin
+        right, bottom = rect.right() + margin, rect.bottom() + margin
+
+        def positions(step):
+            return (
+                get_positions(
+                    origin.x(), rect.left(), rect.right(),
+                    scale, step, padding
+                ),
+                get_positions(
+                    origin.y(), rect.top(), rect.bottom(),
+                    scale, step, padding
+                ),
+            )
+
+        if small_step * scale >= min_line_spacing:
+            pen = QPen(self.color)
+            pen.setWidth(0)
+            painter.setPen(pen)
+            vertical, horizontal = positions(small_step)
+            painter.drawPolyline(get_comb(vertical, top, bottom))
+            painter.drawPolyline(
+                get_comb(horizontal, left, right, vertical=False)
+            )
+
+        if zoom <= 6 and big_step * scale >= min_line_spacing:
+            pen = QPen(self.color)
+            pen.setWidthF(big_line_width)
+            painter.setPen(pen)
+            vertical, horizontal = positions(big_step)
+            painter.drawLines(
+                get_lines(vertical, rect.top(), rect.bottom())
+                + get_lines(
+                    horizontal, rect.left(), rect.right(), vertical=False
+                )
+            )
+
+
+class RulerRenderCache:
+    """
+    Pre-rendered ruler strips blitted in drawForeground.
+
+    Each ruler is split into TILE_SIZE device pixels long pieces laid
+    out on the same scene-origin anchored lattice as GridRenderCache,
+    keyed by (zoom, device pixel ratio, big step, small step,
+    orientation, sub-pixel phase, index). Pieces are rendered at the
+    viewport's device pixel ratio, so ticks and labels stay sharp
+    on HiDPI screens.
+    Label strings are kept as prepared QStaticText objects, so
+    re-rendering a strip after a pan does not lay the text out again.
+    Tick levels packed closer than `min_line_spacing` pixels
+    are dropped along with their labels.
+    """
+    TILE_SIZE = 256
+    PHASE_PRECISION = 64
+
+    def __init__(
+            self,
+            color: QColor,
+            width: int,
+            min_line_spacing: float = 0.0,
+            max_tiles: int = 64,
+    ):
+        self.color = QColor(color)
+        self.width = width
+        self.min_line_spacing = min_line_spacing
+        self.font = QFont("Arial", width // 2)
+        self.font_ascent = QFontMetricsF(self.font).ascent()
+        self.tiles = LRUCache(max_tiles)
+        self.labels = LRUCache(1024)
+        self._pool: dict[Qt.Orientation, list[QPixmap]] = {
+            Qt.Horizontal: [], Qt.Vertical: []
+        }
+        self._zoom = None
+        self._device_pixel_ratio = None
+
+    def invalidate(self):
+        for key, pixmap in self.tiles.items():
+            self._pool[key[4]].append(pixmap)
+        self.tiles.clear()
+        self._zoom = None
+
+    def get_label(self, text: str) -> QStaticText:
+        label = self.labels.get(text)
+        if label is None:
+            label = QStaticText(text)
+            label.setPerformanceHint(QStaticText.AggressiveCaching)
+            label.prepare(QTransform(), self.font)
+            self.labels.put(text, label)
+        return label
+
+    def draw(
+            self,
+            painter: QPainter,
+            transform: QTransform,
+            viewport_rect: QRectF,
+            big_step: int,
+            small_step: int,
+    ):
+        """
+        Draws both rulers along the top and the left viewport edges
+        """
+        scale = transform.m11()
+        device_pixel_ratio = painter.device().devicePixelRatioF()
+        if device_pixel_ratio != self._device_pixel_ratio:
+            # Pooled pixmaps are as thick as the ruler in device pixels
+            self.invalidate()
+            for pool in self._pool.values():
+                pool.clear()
+            self._device_pixel_ratio = device_pixel_ratio
+        if scale != self._zoom:
+            self.invalidate()
+            self._zoom = scale
+
+        # Pieces are laid out in device pixels
+        origin = transform.map(QPointF(0, 0)) * device_pixel_ratio
+        size = self.TILE_SIZE
+        self.tiles.max_size = max(
+            self.tiles.max_size,
+            2 * (ceil(viewport_rect.width() * device_pixel_ratio / size)
+                 + ceil(viewport_rect.height() * device_pixel_ratio / size)
+                 + 2)
+        )
+        for orientation, origin_pos, start, stop in (
+                (Qt.Horizontal, origin.x(),
+                 viewport_rect.left(), viewport_rect.right()),
+                (Qt.Vertical, origin.y(),
+                 viewport_rect.top(), viewport_rect.bottom()),
+        ):
+            anchor = floor(origin_pos)
+            phase = round((origin_pos - anchor) * self.PHASE_PRECISION)
+            for i in range(
+                    floor((start * device_pixel_ratio - anchor) / size),
+                    floor((stop * device_pixel_ratio - anchor) / size) + 1
+            ):
+                key = (
+                    scale, device_pixel_ratio, big_step, small_step,
+                    orientation, phase, i
+                )
+                pixmap = self.tiles.get(key)
+                if pixmap is None:
+                    pixmap = self._render_tile(
+                        orientation,
+                        phase / self.PHASE_PRECISION - i * size,
+                        scale, device_pixel_ratio, big_step, small_step
+                    )
+                    self.tiles.put(key, pixmap)
+                position = (anchor + i * size) / device_pixel_ratio
+                if orientation == Qt.Horizontal:
+                    painter.drawPixmap(QPointF(position, 0), pixmap)
+                else:
+                    painter.drawPixmap(QPointF(0, position), pixmap)
+
+    def _render_tile(
+            self, orientation, offset, scale, device_pixel_ratio,
+            big_step, small_step
+    ):
+        """
+        Renders a piece whose `offset` is the device position of the
+        scene origin relative to it. The piece is painted in logical
+        pixels, so ticks and labels keep their size at any ratio.
+        """
+        width = self.width
+        horizontal = orientation == Qt.Horizontal
+
+        pool = self._pool[orientation]
+        if pool:
+            pixmap = pool.pop()
+        else:
+            thickness = ceil((width + 1) * device_pixel_ratio)
+            pixmap = (
+                QPixmap(self.TILE_SIZE, thickness) if horizontal
+                else QPixmap(thickness, self.TILE_SIZE)
+            )
+            pixmap.setDevicePixelRatio(device_pixel_ratio)
+        size = self.TILE_SIZE / device_pixel_ratio
+        offset /= device_pixel_ratio
+        pixmap.fill(Qt.black)
+        painter = QPainter(pixmap)
+        if horizontal:
+            painter.fillRect(QRectF(0, 0, size, width), self.color)
+        else:
+            painter.fillRect(QRectF(0, 0, width, size), self.color)
+
+        def draw_ticks(step, length):
+            painter.drawPolyline(get_ticks(
+                get_positions(offset, 0, size, scale, step, 1),
+                width + 2, width - length, vertical=horizontal
+            ))
+
+        pen = QPen(Qt.black)
+        pen.setWidth(0)
+        painter.setPen(pen)
+        if small_step * scale >= self.min_line_spacing:
+            draw_ticks(small_step, width / 4)
+        if big_step * scale < self.min_line_spacing:
+            painter.end()
+            return pixmap
+        draw_ticks(big_step, width * 3 / 4)
+
+        painter.setFont(self.font)
+        text_top = width * 0.65 - self.font_ascent
+        if not horizontal:
+            painter.rotate(-90)
+        indices = get_indices(offset, 0, size, scale, big_step, size)
+        for n, pos in zip(
+                indices.tolist(),
+                (offset + indices * (big_step * scale)).tolist()
+        ):
+            painter.drawStaticText(
+                QPointF(pos + 2, text_top) if horizontal
+                else QPointF(-pos + 2, text_top),
+                self.get_label(str(n * big_step))
+            )
+
+        painter.end()
+        return pixmap
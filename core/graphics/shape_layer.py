@@ -0,0 +1,375 @@
+from operator import itemgetter
+
+import numpy as np
+from PySide6.QtCore import Qt, QLineF, QPointF, QRectF
+from PySide6.QtGui import QBrush, QPainter, QPen
+from PySide6.QtWidgets import QGraphicsItem, QStyleOptionGraphicsItem
+
+from core.generics import SHAPE_LAYER_TYPE, VGEGraphicsScene
+from core.graphics.spatial_index import BoundsGrid
+
+# Elements are painted only if the exposed area is smaller than this
+# part of the layer, otherwise finding them costs more than clipping
+CULLING_AREA_RATIO = 0.25
+
+
+class VGEGraphicsShapeLayer(QGraphicsItem):
+    """
+    Holds many lines, rectangles or ellipses in columnar arrays and
+    paints all of them in one paint() call, with one drawLines or
+    drawRects call per run of elements sharing a style.
+
+    Elements are addressed by index. Like list indices, an index stays
+    the same until elements before it are removed. Geometry rows are
+    (x1, y1, x2, y2) for lines and (x, y, width, height) otherwise.
+    Elements are stacked in index order, and their bounds are kept in
+    a BoundsGrid under their indices, which answers the picks and finds
+    the elements to paint. The whole layer is one item in the scene's
+    index; a VGEGraphicsScene picks and selects its elements one by one.
+    """
+    Line = 1
+    Rect = 2
+    Ellipse = 3
+
+    SelectionPen = QPen(Qt.black, 0, Qt.DashLine)
+
+    def __init__(self, kind: int, parent: QGraphicsItem | None = None):
+        super().__init__(parent)
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+        self.kind = kind
+        self.pens_and_brushes: list[tuple[QPen, QBrush]] = []
+        self._margins = np.empty(0)
+        self._filled_and_stroked: list[bool] = []
+
+        self._count = 0
+        self._geometry = np.empty((0, 4))
+        self._styles = np.empty(0, dtype=np.int32)
+        self._index = BoundsGrid()
+        self._selected = np.empty(0, dtype=np.intp)
+        self._bounding_rect = QRectF()
+
+        # Geometry objects of each run of same style elements, created
+        # when the layer is first painted
+        self._run_starts: np.ndarray | None = None
+        self._runs: list[tuple[int, list]] = []
+
+    def __len__(self) -> int:
+        return self._count
+
+    def type(self) -> int:
+        return SHAPE_LAYER_TYPE
+
+    def add_style(self, pen: QPen, brush: QBrush = QBrush()) -> int:
+        """Returns the style index of the pen and brush pair"""
+        self.pens_and_brushes.append((QPen(pen), QBrush(brush)))
+        # Square caps and miter joins reach further than half of the pen
+        self._margins = np.append(self._margins, max(pen.widthF(), 1))
+        self._filled_and_stroked.append(
+            pen.style() != Qt.NoPen and brush.style() != Qt.NoBrush
+        )
+        return len(self.pens_and_brushes) - 1
+
+    def add_elements(
+            self, geometry: np.ndarray, style: int | np.ndarray = 0
+    ) -> np.ndarray:
+        """Appends geometry rows, returns the indices of new elements"""
+        geometry = np.asarray(geometry, dtype=np.float64).reshape(-1, 4)
+        start, end = self._count, self._count + len(geometry)
+        if end > len(self._geometry):
+            capacity = max(end, 2 * len(self._geometry), 64)
+            self._geometry = np.resize(self._geometry, (capacity, 4))
+            self._styles = np.resize(self._styles, capacity)
+        self._geometry[start:end] = geometry
+        self._styles[start:end] = style
+        self._index.extend(self._compute_bounds(start, end))
+        self._count = end
+
+        if self._run_starts is not None:
+            self._append_runs(start, end)
+        self._set_bounding_rect(self._bounding_rect.united(
+            self._get_united_bounds(np.arange(start, end))
+        ))
+        self.update()
+        return np.arange(start, end)
+
+    def element(self, index: int) -> tuple[QLineF | QRectF, int]:
+        """Returns the geometry and the style of an element"""
+        self._check_index(index)
+        return (
+            self._create_geometry(self._geometry[index].tolist()),
+            int(self._styles[index])
+        )
+
+    def set_element(
+            self,
+            index: int,
+            geometry: QLineF | QRectF | None = None,
+            style: int | None = None,
+    ):
+        self._check_index(index)
+        old_bounds = self._get_united_bounds(np.array([index]))
+        if geometry is not None:
+            row = (
+                geometry.toTuple() if isinstance(geometry, QLineF)
+                else geometry.getRect()
+            )
+            self._geometry[index] = row
+            self._update_runs(np.array([index]))
+        if style is not None and style != self._styles[index]:
+            self._styles[index] = style
+            self._run_starts = None
+        left, top, right, bottom = self._compute_bounds(index, index + 1)[0]
+        self._index.set_bounds(
+            index, QRectF(left, top, right - left, bottom - top)
+        )
+
+        new_bounds = self._get_united_bounds(np.array([index]))
+        if not self._bounding_rect.contains(new_bounds):
+            self._set_bounding_rect(self._bounding_rect.united(new_bounds))
+        self.update(old_bounds.united(new_bounds))
+
+    def move_elements(self, indices, dx: float, dy: float):
+        indices = np.unique(np.asarray(indices, dtype=np.intp))
+        if not len(indices):
+            return
+        old_bounds = self._get_united_bounds(indices)
+        self._geometry[indices] += (
+            (dx, dy, dx, dy) if self.kind == self.Line else (dx, dy, 0, 0)
+        )
+        self._index.translate(indices, dx, dy)
+        self._update_runs(indices)
+
+        new_bounds = old_bounds.translated(dx, dy)
+        if not self._bounding_rect.contains(new_bounds):
+            self._set_bounding_rect(self._bounding_rect.united(new_bounds))
+        self.update(old_bounds.united(new_bounds))
+
+    def remove_elements(self, indices):
+        """Removes elements, shifting the indices of the ones after them"""
+        keep = np.ones(self._count, dtype=bool)
+        keep[indices] = False
+        bounds = self._index.bounds(np.flatnonzero(keep))
+        self._count = len(bounds)
+        self._geometry = self._geometry[:len(keep)][keep]
+        self._styles = self._styles[:len(keep)][keep]
+        self._index.clear()
+        self._index.extend(bounds)
+        new_indices = np.cumsum(keep) - 1
+        self._selected = new_indices[self._selected[keep[self._selected]]]
+        self._run_starts = None
+
+        self.update()
+        self._set_bounding_rect(self._get_united_bounds())
+
+    def element_bounds(self, indices=None) -> np.ndarray:
+        """
+        Returns the (left, top, right, bottom) rows of the elements,
+        including the pen, in item coordinates
+        """
+        if indices is None:
+            return self._index.bounds(slice(0, self._count)).copy()
+        return self._index.bounds(indices)
+
+    def elements_in_rect(self, rect: QRectF) -> np.ndarray:
+        """
+        Returns the ascending indices of elements whose bounds intersect
+        `rect`
+        """
+        return self._index.ids_in_rect(rect)
+
+    def element_at(self, point: QPointF, tolerance: float = 0.0) -> int:
+        """
+        Returns the index of the topmost element within `tolerance` of
+        `point` or -1. Points inside rectangles and ellipses hit them
+        whatever their brush is.
+        """
+        candidates = self.elements_in_rect(QRectF(
+            point.x() - tolerance, point.y() - tolerance,
+            2 * tolerance, 2 * tolerance
+        ))
+        if not len(candidates):
+            return -1
+        geometry = self._geometry[candidates]
+        reach = tolerance + self._margins[self._styles[candidates]] / 2
+        x, y = point.x(), point.y()
+        if self.kind == self.Line:
+            start = geometry[:, :2]
+            direction = geometry[:, 2:] - start
+            offset = np.array([x, y]) - start
+            length = np.einsum("ij,ij->i", direction, direction)
+            position = np.clip(
+                np.einsum("ij,ij->i", offset, direction)
+                / np.where(length, length, 1), 0, 1
+            )
+            distance = np.hypot(*(offset - direction * position[:, None]).T)
+            hits = distance <= reach
+        else:
+            half_size = np.abs(geometry[:, 2:]) / 2 + reach[:, None]
+            center = geometry[:, :2] + geometry[:, 2:] / 2
+            offset = np.abs(np.array([x, y]) - center) / half_size
+            hits = (
+                (offset <= 1).all(axis=1) if self.kind == self.Rect
+                else (offset ** 2).sum(axis=1) <= 1
+            )
+        hits = candidates[hits]
+        return int(hits[-1]) if len(hits) else -1
+
+    @property
+    def selected_elements(self) -> np.ndarray:
+        return self._selected
+
+    def set_selected_elements(self, indices):
+        indices = np.unique(np.asarray(indices, dtype=np.intp))
+        if np.array_equal(indices, self._selected):
+            return
+        changed = np.setxor1d(indices, self._selected)
+        self._selected = indices
+        self.update(self._get_united_bounds(changed))
+
+    def boundingRect(self) -> QRectF:
+        return self._bounding_rect
+
+    def paint(
+            self,
+            painter: QPainter,
+            option: QStyleOptionGraphicsItem,
+            widget=None
+    ):
+        if self._run_starts is None:
+            self._build_runs()
+        exposed_rect = option.exposedRect
+        # QGraphicsScene.render() exposes the whole layer, but clips
+        # the painter to the target
+        if painter.hasClipping():
+            exposed_rect = exposed_rect.intersected(
+                painter.clipBoundingRect()
+            )
+        visible = None
+        if (
+                exposed_rect.width() * exposed_rect.height()
+                < CULLING_AREA_RATIO * self._bounding_rect.width()
+                * self._bounding_rect.height()
+        ):
+            visible = self.elements_in_rect(exposed_rect)
+            run_bounds = np.searchsorted(
+                visible, np.append(self._run_starts, self._count)
+            )
+
+        for run, (style, geometry) in enumerate(self._runs):
+            if visible is not None:
+                indices = (
+                    visible[run_bounds[run]:run_bounds[run + 1]]
+                    - self._run_starts[run]
+                ).tolist()
+                if not indices:
+                    continue
+                geometry = (
+                    [geometry[indices[0]]] if len(indices) == 1
+                    else itemgetter(*indices)(geometry)
+                )
+            pen, brush = self.pens_and_brushes[style]
+            painter.setPen(pen)
+            painter.setBrush(brush)
+            self._draw(painter, geometry, self._filled_and_stroked[style])
+
+        if len(self._selected):
+            painter.setPen(self.SelectionPen)
+            painter.setBrush(Qt.NoBrush)
+            self._draw(painter, [
+                self._create_geometry(row)
+                for row in self._geometry[self._selected].tolist()
+            ])
+
+    def _draw(self, painter: QPainter, geometry, filled_and_stroked=False):
+        if self.kind == self.Line:
+            painter.drawLines(geometry)
+        elif self.kind == self.Rect and not filled_and_stroked:
+            painter.drawRects(geometry)
+        elif self.kind == self.Rect:
+            # drawRects() fills every rectangle before stroking them,
+            # which would hide outlines under the next rectangles
+            for rect in geometry:
+                painter.drawRect(rect)
+        else:
+            for rect in geometry:
+                painter.drawEllipse(rect)
+
+    def _create_geometry(self, row) -> QLineF | QRectF:
+        return QLineF(*row) if self.kind == self.Line else QRectF(*row)
+
+    def _build_runs(self):
+        self._run_starts = np.empty(0, dtype=np.intp)
+        self._runs = []
+        self._append_runs(0, self._count)
+
+    def _append_runs(self, start: int, end: int):
+        styles = self._styles[start:end]
+        starts = start + np.flatnonzero(np.diff(styles, prepend=-1))
+        if (
+                len(self._runs) and len(starts)
+                and self._runs[-1][0] == styles[0]
+        ):
+            starts = starts[1:]
+            self._runs[-1][1].extend(map(
+                self._create_geometry,
+                self._geometry[start:starts[0] if len(starts) else end]
+                .tolist()
+            ))
+        for run_start, run_end in zip(
+                starts.tolist(), [*starts[1:].tolist(), end]
+        ):
+            self._runs.append((int(self._styles[run_start]), list(map(
+                self._create_geometry,
+                self._geometry[run_start:run_end].tolist()
+            ))))
+        self._run_starts = np.append(self._run_starts, starts)
+
+    def _update_runs(self, indices: np.ndarray):
+        """Creates the geometry objects of changed elements again"""
+        if self._run_starts is None:
+            return
+        runs = np.searchsorted(self._run_starts, indices, "right") - 1
+        for index, run, row in zip(
+                indices.tolist(), runs.tolist(),
+                self._geometry[indices].tolist()
+        ):
+            self._runs[run][1][index - int(self._run_starts[run])] = (
+                self._create_geometry(row)
+            )
+
+    def _set_bounding_rect(self, rect: QRectF):
+        if rect == self._bounding_rect:
+            return
+        self.prepareGeometryChange()
+        self._bounding_rect = rect
+        scene = self.scene()
+        if isinstance(scene, VGEGraphicsScene):
+            scene.item_geometry_changed(self)
+
+    def _compute_bounds(self, start: int, end: int) -> np.ndarray:
+        """Returns the bounds rows of elements from `start` to `end`"""
+        geometry = self._geometry[start:end]
+        if self.kind == self.Line:
+            near_corners, far_corners = geometry[:, :2], geometry[:, 2:]
+        else:
+            near_corners = geometry[:, :2]
+            far_corners = near_corners + geometry[:, 2:]
+        margins = self._margins[self._styles[start:end]][:, None]
+        return np.hstack((
+            np.minimum(near_corners, far_corners) - margins,
+            np.maximum(near_corners, far_corners) + margins,
+        ))
+
+    def _get_united_bounds(self, indices=None) -> QRectF:
+        bounds = self._index.bounds(
+            slice(0, self._count) if indices is None else indices
+        )
+        if not len(bounds):
+            return QRectF()
+        left, top = bounds[:, :2].min(axis=0)
+        right, bottom = bounds[:, 2:].max(axis=0)
+        return QRectF(left, top, right - left, bottom - top)
+
+    def _check_index(self, index: int):
+        if not 0 <= index < self._count:
+            raise IndexError("shape layer element index out of range")
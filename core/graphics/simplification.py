@@ -0,0 +1,90 @@
+from array import array
+from math import sqrt
+
+import numpy as np
+
+# Samples kept since the last retained point at most, a point is
+# retained when the window is full
+MAX_WINDOW = 128
+
+
+class StrokeSimplifier:
+    """
+    Simplifies a stroke while it is drawn, with the online (sliding
+    window) form of the Ramer-Douglas-Peucker algorithm.
+
+    The samples since the last retained point, the anchor, are kept in
+    a window. A new sample is tested as the end of a segment from the
+    anchor; once a sample of the window lies farther than `tolerance`
+    from that segment, the previous sample is retained and becomes
+    the anchor. So every sample stays within `tolerance` of the
+    retained polyline, and a sample costs O(MAX_WINDOW) at most.
+    """
+    def __init__(self, x: float, y: float, tolerance: float):
+        self.tolerance = tolerance
+        self.raw_count = 1
+        self.retained_count = 1
+        self._anchor = (x, y)
+        self._window = array("d")
+
+    @property
+    def ratio(self) -> float:
+        """Part of the samples retained"""
+        return self.retained_count / self.raw_count
+
+    def add(self, x: float, y: float) -> tuple[float, float] | None:
+        """Adds a sample, returns the point retained by it, if any"""
+        self.raw_count += 1
+        window = self._window
+        retained = None
+        if len(window) >= 2 * MAX_WINDOW or (
+                window and self._deviates(x, y)
+        ):
+            retained = self._retain()
+        window.append(x)
+        window.append(y)
+        return retained
+
+    def finish(self) -> tuple[float, float] | None:
+        """Returns the last sample, which ends the stroke, if not retained"""
+        return self._retain() if self._window else None
+
+    def _retain(self) -> tuple[float, float]:
+        window = self._window
+        self._anchor = (window[-2], window[-1])
+        del window[:]
+        self.retained_count += 1
+        return self._anchor
+
+    def _deviates(self, x: float, y: float) -> bool:
+        ax, ay = self._anchor
+        offsets = np.frombuffer(self._window).reshape(-1, 2) - (ax, ay)
+        dx, dy = x - ax, y - ay
+        length_squared = dx * dx + dy * dy
+        if length_squared:
+            positions = np.clip(
+                (offsets[:, 0] * dx + offsets[:, 1] * dy) / length_squared,
+                0, 1
+            )
+            offsets = offsets - positions[:, np.newaxis] * (dx, dy)
+        return bool(
+            (np.einsum("ij,ij->i", offsets, offsets)).max()
+            > self.tolerance * self.tolerance
+        )
+
+
+def decimate_points(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Drops the points of an (N, 2) polyline lying in the same cell of
+    a grid as the point before them, the first and the last points
+    are kept. The diagonal of a cell is `tolerance`, so the polyline
+    moves by less than `tolerance`; that takes one NumPy pass, unlike
+    RDP, and keeps a point per cell the polyline crosses at most.
+    """
+    if len(points) <= 2:
+        return points
+    cells = np.floor(points * (sqrt(2) / tolerance))
+    keep = np.empty(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    keep[1:-1] = (cells[1:-1] != cells[:-2]).any(axis=1)
+    return points[keep]
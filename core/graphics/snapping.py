@@ -0,0 +1,364 @@
+from math import floor
+
+import numpy as np
+from PySide6.QtCore import QPointF, QRectF
+from PySide6.QtWidgets import (
+    QGraphicsItem,
+    QGraphicsLineItem,
+    QGraphicsRectItem,
+    QGraphicsPolygonItem,
+    QGraphicsEllipseItem,
+    QGraphicsPathItem,
+)
+
+from core.graphics.spatial_index import SpatialIndex
+from core.utils import polygon_to_points
+
+# Above this count of grid cells around the cursor every snap point
+# is tested at once instead
+MAX_LOOKUP_CELLS = 256
+# Segments tested for intersections near the cursor at most
+MAX_INTERSECTION_SEGMENTS = 512
+# Items around the cursor looked at by one lookup at most, the nearest
+# ones by their bounds, and items added to the grid by one lookup
+# at most, so a zoomed out view spreads the work over several moves
+MAX_LOOKUP_ITEMS = 4096
+MAX_NEW_ITEMS = 256
+
+
+class SnapKind:
+    Vertex = 1
+    Midpoint = 2
+    Center = 3
+    Intersection = 4
+
+
+def get_snap_geometry(
+        item: QGraphicsItem
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the snap points (N, 2), their kinds (N, ) and the segments
+    (M, 4) of an item, in scene coordinates
+    """
+    if isinstance(item, QGraphicsLineItem):
+        vertices = np.array(item.line().toTuple()).reshape(2, 2)
+        closed = False
+        centers = np.empty((0, 2))
+    elif isinstance(item, QGraphicsPolygonItem):
+        vertices = polygon_to_points(item.polygon())
+        closed = len(vertices) > 2
+        centers = (
+            np.array([item.polygon().boundingRect().center().toTuple()])
+            if closed else np.empty((0, 2))
+        )
+    elif isinstance(item, (QGraphicsRectItem, QGraphicsEllipseItem)):
+        rect = item.rect().normalized()
+        left, top, right, bottom = rect.getCoords()
+        centers = np.array([rect.center().toTuple()])
+        if isinstance(item, QGraphicsEllipseItem):
+            # Quadrant points, an ellipse has no segments
+            x, y = centers[0]
+            vertices = np.array([
+                (x, top), (right, y), (x, bottom), (left, y)
+            ])
+            closed = None
+        else:
+            vertices = np.array([
+                (left, top), (right, top), (right, bottom), (left, bottom)
+            ])
+            closed = True
+    elif isinstance(item, QGraphicsPathItem) and item.path().elementCount():
+        # Paths, as freehand strokes, snap at their ends only
+        path = item.path()
+        first = path.elementAt(0)
+        last = path.elementAt(path.elementCount() - 1)
+        vertices = np.array([(first.x, first.y), (last.x, last.y)])
+        closed = None
+        centers = np.empty((0, 2))
+    else:
+        empty = np.empty((0, 2))
+        return empty, np.empty(0, dtype=np.int8), np.empty((0, 4))
+
+    if closed is None:
+        segments = np.empty((0, 4))
+    else:
+        ends = np.roll(vertices, -1, axis=0) if closed else vertices[1:]
+        segments = np.concatenate([vertices[:len(ends)], ends], axis=1)
+    midpoints = (segments[:, :2] + segments[:, 2:]) / 2
+    points = np.concatenate([vertices, midpoints, centers])
+    kinds = np.repeat(
+        np.array(
+            [SnapKind.Vertex, SnapKind.Midpoint, SnapKind.Center],
+            dtype=np.int8
+        ),
+        [len(vertices), len(midpoints), len(centers)]
+    )
+
+    transform = item.sceneTransform()
+    if not transform.isIdentity():
+        matrix = np.array([
+            [transform.m11(), transform.m12()],
+            [transform.m21(), transform.m22()],
+        ])
+        offset = np.array([transform.dx(), transform.dy()])
+        points = points @ matrix + offset
+        segments = (segments.reshape(-1, 2) @ matrix + offset).reshape(-1, 4)
+    return points, kinds, segments
+
+
+def get_intersections(segments: np.ndarray) -> np.ndarray:
+    """Returns the points where pairs of the (M, 4) segments cross"""
+    if len(segments) < 2:
+        return np.empty((0, 2))
+    starts = segments[:, :2]
+    directions = segments[:, 2:] - starts
+    first, second = np.triu_indices(len(segments), 1)
+    cross = (
+        directions[first, 0] * directions[second, 1]
+        - directions[first, 1] * directions[second, 0]
+    )
+    offsets = starts[second] - starts[first]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        position = (
+            offsets[:, 0] * directions[second, 1]
+            - offsets[:, 1] * directions[second, 0]
+        ) / cross
+        other_position = (
+            offsets[:, 0] * directions[first, 1]
+            - offsets[:, 1] * directions[first, 0]
+        ) / cross
+    crossing = (
+        (cross != 0)
+        & (position >= 0) & (position <= 1)
+        & (other_position >= 0) & (other_position <= 1)
+    )
+    return (
+        starts[first[crossing]]
+        + directions[first[crossing]] * position[crossing, None]
+    )
+
+
+class SnapEngine:
+    """
+    Finds the vertex, midpoint, center or intersection of items nearest
+    to the cursor.
+
+    Snap points are kept in a grid hash, a dict from cells to the ids
+    of their points. Items are looked up with the scene's SpatialIndex
+    and their points are added the first time the cursor comes near
+    them, so opening a big document costs nothing. Items changing
+    their geometry are invalidated and added again when needed.
+
+    The item being drawn is followed incrementally instead. GeometryTool
+    calls begin_item(), add_vertex() for every committed point and
+    end_item(), so drawing a polygon with many vertices never walks
+    the whole polygon. Intersections are computed for the segments
+    near the cursor on each lookup.
+    """
+    def __init__(self, spatial_index: SpatialIndex, cell_size: float = 16.0):
+        self.spatial_index = spatial_index
+        self.cell_size = cell_size
+        self.clear()
+
+    def clear(self):
+        self._count = 0
+        self._points = np.empty((0, 2))
+        self._kinds = np.empty(0, dtype=np.int8)
+        self._live = np.empty(0, dtype=bool)
+        self._dead_count = 0
+        self._cells: dict[tuple[int, int], list[int]] = {}
+        # Spatial index id -> point ids and segments of the item
+        self._item_points: dict[int, list[int]] = {}
+        self._item_segments: dict[int, np.ndarray] = {}
+        # Spatial index id -> last vertex of items being drawn
+        self._tracked: dict[int, tuple[float, float]] = {}
+
+    def invalidate(self, id_: int):
+        """Drops the points of an item whose geometry has changed"""
+        if id_ in self._tracked:
+            return
+        point_ids = self._item_points.pop(id_, None)
+        self._item_segments.pop(id_, None)
+        if point_ids:
+            self._live[point_ids] = False
+            self._dead_count += len(point_ids)
+            if self._dead_count > max(self._count - self._dead_count, 4096):
+                self._compact()
+
+    def invalidate_items(self, ids: list[int]):
+        item_points = self._item_points
+        if len(ids) > len(item_points):
+            ids = item_points.keys() & set(ids)
+        for id_ in ids:
+            self.invalidate(id_)
+
+    def begin_item(self, id_: int, start_point: QPointF):
+        self.invalidate(id_)
+        self._tracked[id_] = start_point.toTuple()
+        self._item_points[id_] = self._add_points(
+            np.array([start_point.toTuple()]),
+            np.array([SnapKind.Vertex], dtype=np.int8)
+        )
+        self._item_segments[id_] = np.empty((0, 4))
+
+    def add_vertex(self, id_: int, point: QPointF):
+        last_vertex = self._tracked.get(id_)
+        if last_vertex is None:
+            return
+        vertex = point.toTuple()
+        self._tracked[id_] = vertex
+        self._item_points[id_].extend(self._add_points(
+            np.array([
+                vertex,
+                ((vertex[0] + last_vertex[0]) / 2,
+                 (vertex[1] + last_vertex[1]) / 2),
+            ]),
+            np.array([SnapKind.Vertex, SnapKind.Midpoint], dtype=np.int8)
+        ))
+
+    def end_item(self, id_: int) -> bool:
+        """
+        Lets the finished item be added again from its geometry.
+        Returns whether the item was followed.
+        """
+        if self._tracked.pop(id_, None) is None:
+            return False
+        self.invalidate(id_)
+        return True
+
+    def snap(
+            self, point: QPointF, radius: float
+    ) -> tuple[QPointF, int] | None:
+        """
+        Returns the snap point nearest to `point` within `radius`
+        and its kind, or None
+        """
+        x, y = point.x(), point.y()
+        rect = QRectF(x - radius, y - radius, 2 * radius, 2 * radius)
+        ids = self._nearest(self.spatial_index.ids_in_rect(rect), x, y)
+        new_ids = [id_ for id_ in ids if id_ not in self._item_points]
+        if len(new_ids) > MAX_NEW_ITEMS:
+            new_ids = self._nearest(np.array(new_ids), x, y, MAX_NEW_ITEMS)
+        for id_ in new_ids:
+            self._add_item(id_)
+        segments = [
+            self._item_segments[id_] for id_ in ids
+            if id_ in self._item_segments and len(self._item_segments[id_])
+        ]
+
+        candidates = self._lookup(x, y, radius)
+        points = self._points[candidates]
+        kinds = self._kinds[candidates]
+        if segments:
+            points, kinds = self._add_intersections(
+                points, kinds, np.concatenate(segments), rect
+            )
+        if not len(points):
+            return None
+        distances = np.hypot(points[:, 0] - x, points[:, 1] - y)
+        nearest = int(np.argmin(distances))
+        if distances[nearest] > radius:
+            return None
+        return QPointF(*points[nearest]), int(kinds[nearest])
+
+    def _nearest(
+            self, ids: np.ndarray, x: float, y: float,
+            count: int = MAX_LOOKUP_ITEMS
+    ) -> list[int]:
+        """Returns up to `count` ids whose bounds are nearest to x, y"""
+        if len(ids) > count:
+            bounds = self.spatial_index.bounds(ids)
+            distances = np.hypot(
+                np.maximum(np.maximum(bounds[:, 0] - x, x - bounds[:, 2]), 0),
+                np.maximum(np.maximum(bounds[:, 1] - y, y - bounds[:, 3]), 0),
+            )
+            ids = ids[np.argpartition(distances, count)[:count]]
+        return ids.tolist()
+
+    def _lookup(self, x: float, y: float, radius: float) -> np.ndarray:
+        """Returns the ids of live points in the cells around x, y"""
+        cell_size = self.cell_size
+        first_column = floor((x - radius) / cell_size)
+        last_column = floor((x + radius) / cell_size)
+        first_row = floor((y - radius) / cell_size)
+        last_row = floor((y + radius) / cell_size)
+        cells_count = (
+            (last_column - first_column + 1) * (last_row - first_row + 1)
+        )
+        if cells_count > min(MAX_LOOKUP_CELLS, len(self._cells)):
+            candidates = np.flatnonzero(self._live[:self._count])
+        else:
+            cells = self._cells
+            candidates = [
+                point_id
+                for column in range(first_column, last_column + 1)
+                for row in range(first_row, last_row + 1)
+                for point_id in cells.get((column, row), ())
+            ]
+            candidates = np.array(candidates, dtype=np.intp)
+            candidates = candidates[self._live[candidates]]
+        return candidates
+
+    def _add_intersections(
+            self,
+            points: np.ndarray,
+            kinds: np.ndarray,
+            segments: np.ndarray,
+            rect: QRectF,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        left, top, right, bottom = rect.getCoords()
+        segments = segments[
+            (np.minimum(segments[:, 0], segments[:, 2]) <= right)
+            & (np.maximum(segments[:, 0], segments[:, 2]) >= left)
+            & (np.minimum(segments[:, 1], segments[:, 3]) <= bottom)
+            & (np.maximum(segments[:, 1], segments[:, 3]) >= top)
+        ][:MAX_INTERSECTION_SEGMENTS]
+        intersections = get_intersections(segments)
+        if not len(intersections):
+            return points, kinds
+        return (
+            np.concatenate([points, intersections]),
+            np.concatenate([kinds, np.full(
+                len(intersections), SnapKind.Intersection, dtype=np.int8
+            )]),
+        )
+
+    def _add_item(self, id_: int):
+        points, kinds, segments = get_snap_geometry(
+            self.spatial_index.object(id_)
+        )
+        self._item_points[id_] = self._add_points(points, kinds)
+        self._item_segments[id_] = segments
+
+    def _add_points(self, points: np.ndarray, kinds: np.ndarray) -> list[int]:
+        start, end = self._count, self._count + len(points)
+        if end > len(self._points):
+            capacity = max(end, 2 * len(self._points), 1024)
+            self._points = np.resize(self._points, (capacity, 2))
+            self._kinds = np.resize(self._kinds, capacity)
+            self._live = np.resize(self._live, capacity)
+        self._points[start:end] = points
+        self._kinds[start:end] = kinds
+        self._live[start:end] = True
+        self._count = end
+
+        cells = self._cells
+        point_ids = list(range(start, end))
+        for cell, point_id in zip(
+                map(tuple, (points // self.cell_size).astype(int).tolist()),
+                point_ids
+        ):
+            cells.setdefault(cell, []).append(point_id)
+        return point_ids
+
+    def _compact(self):
+        """Drops dead points, once they outnumber the live ones"""
+        items = [
+            (id_, self._points[point_ids], self._kinds[point_ids])
+            for id_, point_ids in self._item_points.items()
+        ]
+        segments, tracked = self._item_segments, self._tracked
+        self.clear()
+        for id_, points, kinds in items:
+            self._item_points[id_] = self._add_points(points, kinds)
+        self._item_segments, self._tracked = segments, tracked
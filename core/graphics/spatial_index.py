@@ -0,0 +1,268 @@
+from math import floor, sqrt
+
+import numpy as np
+from PySide6.QtCore import QRectF
+
+# Objects per grid cell the cell size is chosen for
+CELL_OCCUPANCY = 8
+# The grid is rebuilt on the next query once this many objects, or
+# this part of all objects, were inserted or changed since the last
+# build, as they are tested one by one until then
+MIN_REBUILD_PENDING = 1024
+REBUILD_PENDING_RATIO = 0.125
+
+
+class BoundsGrid:
+    """
+    Bounds (left, top, right, bottom) of objects known by their ids,
+    kept in NumPy arrays and bucketed by a uniform grid, answering
+    which objects intersect a rectangle.
+
+    Every object is registered in the one cell holding its top-left
+    corner, and objects larger than a cell are kept apart and always
+    tested, so queries only look at the cells around the rectangle.
+    Inserted and changed objects are tested one by one until the grid
+    is rebuilt, which is done on a query once enough of them gather,
+    so both cost O(1) and a build is amortized over many changes.
+
+    Objects get increasing ids in insertion order, which stay the same
+    until clear() is called.
+    """
+    def __init__(self):
+        self._live_count = 0
+        # Bounds of inserted objects are copied into the arrays in bulk
+        self._count = 0
+        self._new_bounds: list[tuple] = []
+        self._bounds = np.empty((0, 4))
+        self._live = np.empty(0, dtype=bool)
+        self._pending_flags = np.empty(0, dtype=bool)
+        self._pending: list[int] = []
+
+        self._cell_size = 0.0
+        self._origin = (0.0, 0.0)
+        self._columns = self._rows = 0
+        self._cell_starts = np.zeros(1, dtype=np.intp)
+        self._cell_ids = np.empty(0, dtype=np.intp)
+        self._large_ids = np.empty(0, dtype=np.intp)
+
+    def __len__(self) -> int:
+        return self._live_count
+
+    @property
+    def id_count(self) -> int:
+        """Count of ids given so far, including the removed objects"""
+        return self._count + len(self._new_bounds)
+
+    def bounds(self, ids) -> np.ndarray:
+        self._flush()
+        return self._bounds[ids]
+
+    def insert_bounds(self, rect: QRectF) -> int:
+        """Returns the id of the new object"""
+        id_ = self.id_count
+        self._new_bounds.append(rect.getCoords())
+        self._live_count += 1
+        return id_
+
+    def extend(self, bounds: np.ndarray) -> np.ndarray:
+        """Inserts an object per row of `bounds`, returns their ids"""
+        self._flush()
+        start, end = self._count, self._count + len(bounds)
+        self._reserve(end)
+        self._bounds[start:end] = bounds
+        self._add_pending(start, end)
+        self._live_count += end - start
+        return np.arange(start, end)
+
+    def set_bounds(self, id_: int, rect: QRectF):
+        self._flush()
+        self._bounds[id_] = rect.getCoords()
+        self._set_pending(id_)
+
+    def translate(self, ids, dx: float, dy: float):
+        self._flush()
+        ids = np.asarray(ids, dtype=np.intp)
+        self._bounds[ids] += (dx, dy, dx, dy)
+        for id_ in ids[~self._pending_flags[ids]].tolist():
+            self._set_pending(id_)
+
+    def restore_id(self, id_: int, rect: QRectF):
+        """Inserts a removed object again, under its former id"""
+        self._flush()
+        self._bounds[id_] = rect.getCoords()
+        self._live[id_] = True
+        self._live_count += 1
+        self._set_pending(id_)
+
+    def remove_id(self, id_: int):
+        self._flush()
+        self._live[id_] = False
+        self._live_count -= 1
+
+    def clear(self):
+        self.__init__()
+
+    def ids_in_rect(self, rect: QRectF) -> np.ndarray:
+        """Returns the ascending ids of objects whose bounds intersect"""
+        self._flush()
+        if len(self._pending) > max(
+                MIN_REBUILD_PENDING, REBUILD_PENDING_RATIO * len(self)
+        ):
+            self._build()
+        left, top, right, bottom = (
+            rect.left(), rect.top(), rect.right(), rect.bottom()
+        )
+
+        cell_size = self._cell_size
+        first_column = first_row = 0
+        last_column, last_row = self._columns - 1, self._rows - 1
+        if cell_size:
+            x, y = self._origin
+            first_column = max(floor((left - x) / cell_size) - 1, 0)
+            first_row = max(floor((top - y) / cell_size) - 1, 0)
+            last_column = min(floor((right - x) / cell_size), last_column)
+            last_row = min(floor((bottom - y) / cell_size), last_row)
+        columns = last_column - first_column + 1
+        rows = last_row - first_row + 1
+        if columns <= 0 or rows <= 0:
+            parts = []
+        elif 4 * columns * rows > self._columns * self._rows:
+            parts = [self._cell_ids]
+        else:
+            starts = self._cell_starts
+            parts = [
+                self._cell_ids[
+                    starts[row * self._columns + first_column]
+                    :starts[row * self._columns + last_column + 1]
+                ]
+                for row in range(first_row, last_row + 1)
+            ]
+        parts.append(self._large_ids)
+        candidates = np.concatenate(parts)
+        # Changed objects are tested with the pending ones
+        candidates = candidates[~self._pending_flags[candidates]]
+        candidates = np.concatenate([
+            candidates, np.array(self._pending, dtype=np.intp)
+        ])
+
+        bounds = self._bounds[candidates]
+        ids = candidates[
+            self._live[candidates]
+            & (bounds[:, 0] <= right) & (bounds[:, 2] >= left)
+            & (bounds[:, 1] <= bottom) & (bounds[:, 3] >= top)
+        ]
+        ids.sort()
+        return ids
+
+    def _flush(self):
+        if not self._new_bounds:
+            return
+        start, end = self._count, self.id_count
+        self._reserve(end)
+        self._bounds[start:end] = self._new_bounds
+        self._new_bounds = []
+        self._add_pending(start, end)
+
+    def _reserve(self, count: int):
+        if count > len(self._bounds):
+            capacity = max(count, 2 * len(self._bounds), 1024)
+            self._bounds = np.resize(self._bounds, (capacity, 4))
+            self._live = np.resize(self._live, capacity)
+            self._pending_flags = np.resize(self._pending_flags, capacity)
+
+    def _add_pending(self, start: int, end: int):
+        """Counts in the objects from `start` to `end` with their bounds"""
+        self._live[start:end] = True
+        self._pending_flags[start:end] = True
+        self._pending.extend(range(start, end))
+        self._count = end
+
+    def _set_pending(self, id_: int):
+        if not self._pending_flags[id_]:
+            self._pending_flags[id_] = True
+            self._pending.append(id_)
+
+    def _build(self):
+        ids = np.flatnonzero(self._live[:self._count])
+        self._pending_flags[:self._count] = False
+        self._pending = []
+        if not len(ids):
+            self._cell_size = 0.0
+            self._columns = self._rows = 0
+            self._cell_starts = np.zeros(1, dtype=np.intp)
+            self._cell_ids = self._large_ids = np.empty(0, dtype=np.intp)
+            return
+
+        bounds = self._bounds[ids]
+        extents = np.maximum(
+            bounds[:, 2] - bounds[:, 0], bounds[:, 3] - bounds[:, 1]
+        )
+        x, y = bounds[:, 0].min(), bounds[:, 1].min()
+        width = bounds[:, 0].max() - x
+        height = bounds[:, 1].max() - y
+        cell_size = max(
+            sqrt(width * height * CELL_OCCUPANCY / len(ids)),
+            float(np.quantile(extents, 0.9)),
+            # Keeps the cell count of a thin strip below the object count
+            max(width, height) / len(ids),
+            1e-9,
+        )
+        columns = int(width // cell_size) + 1
+        rows = int(height // cell_size) + 1
+
+        large = extents > cell_size
+        self._large_ids = ids[large]
+        ids, bounds = ids[~large], bounds[~large]
+        cells = (
+            ((bounds[:, 1] - y) // cell_size).astype(np.intp) * columns
+            + ((bounds[:, 0] - x) // cell_size).astype(np.intp)
+        )
+        order = np.argsort(cells, kind="stable")
+        self._cell_ids = ids[order]
+        self._cell_starts = np.searchsorted(
+            cells[order], np.arange(columns * rows + 1)
+        )
+        self._cell_size = cell_size
+        self._origin = (x, y)
+        self._columns, self._rows = columns, rows
+
+
+class SpatialIndex(BoundsGrid):
+    """A BoundsGrid of objects, which are looked up by their ids"""
+    def __init__(self):
+        super().__init__()
+        self._objects: list = []
+        self._ids: dict = {}
+
+    def __contains__(self, obj) -> bool:
+        return obj in self._ids
+
+    def id(self, obj) -> int:
+        return self._ids[obj]
+
+    def object(self, id_: int):
+        return self._objects[id_]
+
+    def objects(self, ids) -> list:
+        return [self._objects[id_] for id_ in np.asarray(ids).tolist()]
+
+    def insert(self, obj, rect: QRectF) -> int:
+        id_ = self.insert_bounds(rect)
+        self._objects.append(obj)
+        self._ids[obj] = id_
+        return id_
+
+    def update(self, obj, rect: QRectF):
+        self.set_bounds(self._ids[obj], rect)
+
+    def restore(self, obj, id_: int, rect: QRectF):
+        """Inserts a removed object again, under its former id"""
+        self._objects[id_] = obj
+        self._ids[obj] = id_
+        self.restore_id(id_, rect)
+
+    def remove(self, obj) -> int:
+        id_ = self._ids.pop(obj)
+        self._objects[id_] = None
+        self.remove_id(id_)
+        return id_
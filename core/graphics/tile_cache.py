@@ -0,0 +1,306 @@
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from math import ceil, floor
+
+from PySide6.QtCore import (
+    Qt,
+    QObject,
+    QPointF,
+    QRect,
+    QRectF,
+    QTimer,
+    Signal,
+    Slot,
+)
+from PySide6.QtGui import QImage, QPainter, QRegion, QTransform
+from PySide6.QtWidgets import QGraphicsItem, QGraphicsScene
+
+from core.file_formats.native import get_item_kind
+from core.file_formats.raster import get_draw_operation, paint_operations
+from core.graphics.graphics_items import LevelOfDetailPainter
+from core.utils import LRUCache
+
+TILE_SIZE = 256
+PHASE_PRECISION = 64
+# Milliseconds without changes of the scene before missing tiles are
+# rendered, so the tiles of an item being drawn wait for it to settle
+RENDER_DELAY = 30
+# Milliseconds between checks of the tiles being rendered
+RENDER_POLL_INTERVAL = 4
+# Seconds the items of missing tiles are copied for at a time on the
+# event loop
+COPY_BATCH_TIME = 0.008
+# Tiles rendered or waiting for a worker at once
+MAX_RENDERING_TILES = 16
+# Changed rects above this count are invalidated as their bounds
+MAX_CHANGED_RECTS = 16
+
+
+def render_tile(
+        operations: list[tuple], transform: QTransform, ratio: float
+) -> QImage:
+    """Paints a tile in a worker thread"""
+    image = QImage(TILE_SIZE, TILE_SIZE, QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.transparent)
+    painter = QPainter(image)
+    painter.setTransform(transform)
+    paint_operations(painter, operations)
+    painter.end()
+    image.setDevicePixelRatio(ratio)
+    return image
+
+
+class SceneTileCache(QObject):
+    """
+    The scene's items rendered into tiles of TILE_SIZE device pixels,
+    drawn by the view instead of painting the items.
+
+    Tiles form a lattice anchored to the scene origin per level, a
+    (device scale, sub-pixel phase of the origin, device pixel ratio),
+    so panning by whole pixels reuses every tile as is, like
+    GridRenderCache does. They are kept in an LRU of `memory_budget`
+    bytes across levels.
+
+    draw() returns the region of the tiles missing, which the view
+    paints itself. They are rendered once the scene hasn't changed for
+    RENDER_DELAY: the items of a tile are copied on the event loop,
+    with raster.get_draw_operation, and painted into a QImage by
+    worker threads. `rendered` is emitted with the viewport region of
+    the tiles done. Changes of the scene, from its changed() signal,
+    drop the tiles overlapping the changed rects along with their
+    renders in flight. Tiles holding items that can't be copied, such
+    as the previews of an item being drawn, are left to the view until
+    they change.
+    """
+    rendered = Signal(QRegion)
+
+    def __init__(
+            self,
+            scene: QGraphicsScene,
+            memory_budget: int,
+            workers: int | None = None,
+            parent: QObject | None = None,
+    ):
+        super().__init__(parent)
+        self.scene = scene
+        self.tiles = LRUCache(
+            max(1, memory_budget // (TILE_SIZE * TILE_SIZE * 4))
+        )
+        self._level: tuple | None = None
+        self._anchor = (0, 0)
+        # Missing tiles of the current level, in the order drawn
+        self._requested: dict[tuple, None] = {}
+        self._rendering: dict[tuple, Future] = {}
+        self._uncacheable: set[tuple] = set()
+        self._executor = ThreadPoolExecutor(
+            workers or min(4, os.cpu_count() or 1)
+        )
+        self._render_timer = QTimer(self)
+        self._render_timer.setSingleShot(True)
+        self._render_timer.timeout.connect(self._render_requested)
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(RENDER_POLL_INTERVAL)
+        self._poll_timer.timeout.connect(self._collect_rendered)
+        scene.changed.connect(self.invalidate)
+
+    def memory_usage(self) -> int:
+        return len(self.tiles) * TILE_SIZE * TILE_SIZE * 4
+
+    def draw(self, painter: QPainter, transform: QTransform,
+             rect: QRectF) -> QRegion:
+        """
+        Draws the cached tiles within `rect`, in viewport coordinates of
+        the view's `transform`, and returns the region of the missing
+        ones
+        """
+        ratio = painter.device().devicePixelRatioF()
+        device_scale = transform.m11() * ratio
+        origin = transform.map(QPointF(0, 0)) * ratio
+        anchor_x, anchor_y = floor(origin.x()), floor(origin.y())
+        level = (
+            device_scale,
+            round((origin.x() - anchor_x) * PHASE_PRECISION),
+            round((origin.y() - anchor_y) * PHASE_PRECISION),
+            ratio,
+        )
+        if level != self._level:
+            self._level = level
+            self._requested.clear()
+            self._uncacheable.clear()
+        self._anchor = (anchor_x, anchor_y)
+
+        size = TILE_SIZE
+        columns = range(
+            floor((rect.left() * ratio - anchor_x) / size),
+            ceil((rect.right() * ratio - anchor_x) / size)
+        )
+        rows = range(
+            floor((rect.top() * ratio - anchor_y) / size),
+            ceil((rect.bottom() * ratio - anchor_y) / size)
+        )
+        missing = QRegion()
+        painter.save()
+        painter.resetTransform()
+        for row in rows:
+            for column in columns:
+                key = (*level, column, row)
+                image = self.tiles.get(key)
+                tile_rect = self._viewport_rect(column, row, ratio)
+                if image is not None:
+                    painter.drawImage(tile_rect.topLeft(), image)
+                    continue
+                missing += tile_rect
+                if key not in self._uncacheable and (
+                        key not in self._rendering
+                ):
+                    self._requested[key] = None
+        painter.restore()
+        if self._requested and not self._render_timer.isActive():
+            self._render_timer.start(RENDER_DELAY)
+        return missing
+
+    def _viewport_rect(self, column: int, row: int, ratio: float) -> QRect:
+        anchor_x, anchor_y = self._anchor
+        return QRectF(
+            (anchor_x + column * TILE_SIZE) / ratio,
+            (anchor_y + row * TILE_SIZE) / ratio,
+            TILE_SIZE / ratio, TILE_SIZE / ratio
+        ).toAlignedRect()
+
+    @staticmethod
+    def _scene_rect(key: tuple) -> QRectF:
+        """Scene rect of a tile, with a device pixel around it"""
+        device_scale, phase_x, phase_y, _, column, row = key
+        return QRectF(
+            (column * TILE_SIZE - phase_x / PHASE_PRECISION - 1)
+            / device_scale,
+            (row * TILE_SIZE - phase_y / PHASE_PRECISION - 1)
+            / device_scale,
+            (TILE_SIZE + 2) / device_scale,
+            (TILE_SIZE + 2) / device_scale,
+        )
+
+    def _get_operations(self, rect: QRectF) -> list[tuple] | None:
+        """
+        Returns value copies of the items in `rect`, or None if one of
+        them can't be copied
+        """
+        operations = []
+        for item in self.scene.items(
+                rect, Qt.IntersectsItemBoundingRect, Qt.AscendingOrder
+        ):
+            # A LevelOfDetailPainter paints its parent, copied as it is
+            if not item.isVisible() or isinstance(item, LevelOfDetailPainter):
+                continue
+            kind = get_item_kind(item)
+            if kind is None:
+                if item.flags() & QGraphicsItem.ItemHasNoContents:
+                    continue
+                return None
+            operations.append(get_draw_operation(item, kind))
+        return operations
+
+    @Slot()
+    def _render_requested(self):
+        deadline = time.perf_counter() + COPY_BATCH_TIME
+        while (
+                self._requested
+                and len(self._rendering) < MAX_RENDERING_TILES
+                and time.perf_counter() < deadline
+        ):
+            key = next(iter(self._requested))
+            del self._requested[key]
+            operations = self._get_operations(self._scene_rect(key))
+            if operations is None:
+                self._uncacheable.add(key)
+                continue
+            device_scale, phase_x, phase_y, ratio, column, row = key
+            transform = QTransform()
+            transform.translate(
+                phase_x / PHASE_PRECISION - column * TILE_SIZE,
+                phase_y / PHASE_PRECISION - row * TILE_SIZE
+            )
+            transform.scale(device_scale, device_scale)
+            self._rendering[key] = self._executor.submit(
+                render_tile, operations, transform, ratio
+            )
+        if self._rendering and not self._poll_timer.isActive():
+            self._poll_timer.start()
+        if self._requested and len(self._rendering) < MAX_RENDERING_TILES:
+            self._render_timer.start(0)
+
+    @Slot()
+    def _collect_rendered(self):
+        region = QRegion()
+        for key, future in list(self._rendering.items()):
+            if not future.done():
+                continue
+            del self._rendering[key]
+            self.tiles.put(key, future.result())
+            if key[:4] == self._level:
+                region += self._viewport_rect(key[4], key[5], key[3])
+        if not self._rendering:
+            self._poll_timer.stop()
+        if self._requested and not self._render_timer.isActive():
+            self._render_timer.start(0)
+        if not region.isEmpty():
+            self.rendered.emit(region)
+
+    @Slot(list)
+    def invalidate(self, rects: list[QRectF]):
+        """Drops the tiles overlapping `rects`, in scene coordinates"""
+        if not rects:
+            return
+        if len(rects) > MAX_CHANGED_RECTS:
+            bounds = QRectF(rects[0])
+            for rect in rects[1:]:
+                bounds = bounds.united(rect)
+            rects = [bounds]
+        keys = [*self.tiles, *self._rendering, *self._uncacheable]
+        levels = {key[:4] for key in keys}
+        for device_scale, phase_x, phase_y, ratio in levels:
+            level = (device_scale, phase_x, phase_y, ratio)
+            for rect in rects:
+                left = rect.left() * device_scale + phase_x / PHASE_PRECISION
+                top = rect.top() * device_scale + phase_y / PHASE_PRECISION
+                columns = range(
+                    floor((left - 1) / TILE_SIZE),
+                    floor((left + rect.width() * device_scale + 1)
+                          / TILE_SIZE) + 1
+                )
+                rows = range(
+                    floor((top - 1) / TILE_SIZE),
+                    floor((top + rect.height() * device_scale + 1)
+                          / TILE_SIZE) + 1
+                )
+                if len(columns) * len(rows) > len(keys):
+                    dropped = [
+                        key for key in keys if key[:4] == level
+                        and key[4] in columns and key[5] in rows
+                    ]
+                else:
+                    dropped = [
+                        (*level, column, row)
+                        for row in rows for column in columns
+                    ]
+                for key in dropped:
+                    self._drop(key)
+        # The scene is changing, the missing tiles wait for it to settle
+        if self._requested or self._render_timer.isActive():
+            self._render_timer.start(RENDER_DELAY)
+
+    def _drop(self, key: tuple):
+        self.tiles.pop(key, None)
+        self._uncacheable.discard(key)
+        future = self._rendering.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def clear(self):
+        self.tiles.clear()
+        self._requested.clear()
+        self._uncacheable.clear()
+        for future in self._rendering.values():
+            future.cancel()
+        self._rendering.clear()
@@ -0,0 +1,272 @@
+import time
+from collections import deque
+from typing import Iterator
+
+import numpy as np
+from PySide6.QtCore import QObject, QPointF, QTimer, Signal, Slot
+from PySide6.QtWidgets import QGraphicsItem
+
+# Items handled by a command between checks of the time spent
+APPLY_BATCH_SIZE = 256
+# Time spent applying a command per event loop iteration, in seconds
+APPLY_BATCH_TIME = 0.005
+# Estimated bytes held by a command besides its arrays
+COMMAND_SIZE = 256
+
+
+class Command:
+    """
+    A change of the scene that can be undone, recorded as the ids
+    of the changed items in the scene's SpatialIndex and the change.
+
+    undo() and redo() are generators yielding after each batch of
+    items, so UndoStack can spread big commands over several frames.
+    """
+    def size(self) -> int:
+        """Estimated count of bytes the command keeps"""
+        return COMMAND_SIZE
+
+    def undo(self, scene) -> Iterator[None]:
+        yield
+
+    def redo(self, scene) -> Iterator[None]:
+        yield
+
+    def merge(self, command: "Command") -> bool:
+        """Takes in the following `command` if possible"""
+        return False
+
+
+class AddItemsCommand(Command):
+    """
+    Items added to the scene, which are kept while undone. Only the
+    references to them count in its size, as an undone item takes
+    the memory it took in the scene. Their `ids` in the scene's spatial
+    index are looked up unless given.
+    """
+    def __init__(
+            self, scene, items: list[QGraphicsItem],
+            ids: list[int] | None = None
+    ):
+        self.items = items
+        self.ids = np.array(
+            [scene.spatial_index.id(item) for item in items]
+            if ids is None else ids, dtype=np.intp
+        )
+
+    def size(self) -> int:
+        return COMMAND_SIZE + len(self.items) * 8 + self.ids.nbytes
+
+    def undo(self, scene) -> Iterator[None]:
+        for start in range(0, len(self.items), APPLY_BATCH_SIZE):
+            for item in self.items[start:start + APPLY_BATCH_SIZE]:
+                scene.removeItem(item)
+            yield
+
+    def redo(self, scene) -> Iterator[None]:
+        ids = self.ids.tolist()
+        for start in range(0, len(self.items), APPLY_BATCH_SIZE):
+            for item, id_ in zip(
+                    self.items[start:start + APPLY_BATCH_SIZE],
+                    ids[start:start + APPLY_BATCH_SIZE]
+            ):
+                scene.restore_item(item, id_)
+            yield
+
+
+class AddPointCommand(Command):
+    """A point added to the item being drawn"""
+    def __init__(self, id_: int, point: QPointF):
+        self.id = id_
+        self.x, self.y = point.x(), point.y()
+
+    def undo(self, scene) -> Iterator[None]:
+        item = scene.spatial_index.object(self.id)
+        item.remove_last_point()
+        self._update_snap_engine(scene, item)
+        yield
+
+    def redo(self, scene) -> Iterator[None]:
+        item = scene.spatial_index.object(self.id)
+        item.add_point(QPointF(self.x, self.y))
+        item.points_changed()
+        self._update_snap_engine(scene, item)
+        yield
+
+    def _update_snap_engine(self, scene, item):
+        # The points of an item being drawn are followed one by one
+        snap_engine = scene.snap_engine
+        if snap_engine.end_item(self.id):
+            points = item.points
+            snap_engine.begin_item(self.id, points[0])
+            for point in list(points)[1:]:
+                snap_engine.add_vertex(self.id, point)
+
+
+class MoveItemsCommand(Command):
+    """
+    Items moved by dx, dy. The moves of one drag are merged, as they
+    move the same items.
+    """
+    def __init__(self, ids: np.ndarray, dx: float, dy: float):
+        self.ids = np.asarray(ids, dtype=np.intp)
+        self.dx, self.dy = dx, dy
+
+    def size(self) -> int:
+        return COMMAND_SIZE + self.ids.nbytes
+
+    def undo(self, scene) -> Iterator[None]:
+        return self._move(scene, -self.dx, -self.dy)
+
+    def redo(self, scene) -> Iterator[None]:
+        return self._move(scene, self.dx, self.dy)
+
+    def merge(self, command: Command) -> bool:
+        if not isinstance(command, MoveItemsCommand) or not (
+                command.ids is self.ids
+                or np.array_equal(command.ids, self.ids)
+        ):
+            return False
+        self.dx += command.dx
+        self.dy += command.dy
+        return True
+
+    def _move(self, scene, dx: float, dy: float) -> Iterator[None]:
+        for start in range(0, len(self.ids), APPLY_BATCH_SIZE):
+            scene.move_items(
+                self.ids[start:start + APPLY_BATCH_SIZE], dx, dy
+            )
+            yield
+
+
+class MoveElementsCommand(Command):
+    """
+    Elements of the shape layer of `id_` moved by dx, dy, at once as
+    the layer moves them as arrays. The moves of one drag are merged.
+    """
+    def __init__(self, id_: int, indices: np.ndarray, dx: float, dy: float):
+        self.id = id_
+        self.indices = np.asarray(indices, dtype=np.intp)
+        self.dx, self.dy = dx, dy
+
+    def size(self) -> int:
+        return COMMAND_SIZE + self.indices.nbytes
+
+    def undo(self, scene) -> Iterator[None]:
+        scene.move_elements(self.id, self.indices, -self.dx, -self.dy)
+        yield
+
+    def redo(self, scene) -> Iterator[None]:
+        scene.move_elements(self.id, self.indices, self.dx, self.dy)
+        yield
+
+    def merge(self, command: Command) -> bool:
+        if not isinstance(command, MoveElementsCommand) or (
+                command.id != self.id
+                or not np.array_equal(command.indices, self.indices)
+        ):
+            return False
+        self.dx += command.dx
+        self.dy += command.dy
+        return True
+
+
+class UndoStack(QObject):
+    """
+    Commands recorded after their change was made to the scene.
+
+    The commands kept are bounded by `memory_budget` bytes, by their
+    estimated sizes, and the oldest ones are dropped first, though
+    the last one is always kept. Undoing or redoing a command changes
+    its items in batches for up to APPLY_BATCH_TIME per event loop
+    iteration, so a command changing 100k items doesn't freeze the
+    view; the rest is applied at once before the next command.
+    """
+    changed = Signal()
+
+    def __init__(self, scene, memory_budget: int):
+        super().__init__()
+        self.scene = scene
+        self.memory_budget = memory_budget
+        self.memory_size = 0
+        self._undo_commands: deque[Command] = deque()
+        self._redo_commands: list[Command] = []
+        self._steps: Iterator[None] | None = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._apply_batch)
+
+    def can_undo(self) -> bool:
+        return bool(self._undo_commands)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo_commands)
+
+    def is_applying(self) -> bool:
+        return self._steps is not None
+
+    def push(self, command: Command, merge: bool = False):
+        """
+        Records a change already made, merged into the last command
+        if `merge` and it takes it in
+        """
+        self.flush()
+        for redo_command in self._redo_commands:
+            self.memory_size -= redo_command.size()
+        self._redo_commands.clear()
+        commands = self._undo_commands
+        if merge and commands:
+            size = commands[-1].size()
+            if commands[-1].merge(command):
+                self.memory_size += commands[-1].size() - size
+                self.changed.emit()
+                return
+        commands.append(command)
+        self.memory_size += command.size()
+        while self.memory_size > self.memory_budget and len(commands) > 1:
+            self.memory_size -= commands.popleft().size()
+        self.changed.emit()
+
+    def undo(self):
+        self.flush()
+        if self._undo_commands:
+            command = self._undo_commands.pop()
+            self._redo_commands.append(command)
+            self._apply(command.undo(self.scene))
+
+    def redo(self):
+        self.flush()
+        if self._redo_commands:
+            command = self._redo_commands.pop()
+            self._undo_commands.append(command)
+            self._apply(command.redo(self.scene))
+
+    def flush(self):
+        """Finishes applying the command being undone or redone"""
+        if self._steps is not None:
+            self._timer.stop()
+            steps, self._steps = self._steps, None
+            for _ in steps:
+                pass
+
+    def clear(self):
+        self._timer.stop()
+        self._steps = None
+        self._undo_commands.clear()
+        self._redo_commands.clear()
+        self.memory_size = 0
+        self.changed.emit()
+
+    def _apply(self, steps: Iterator[None]):
+        self._steps = steps
+        self._apply_batch()
+        self.changed.emit()
+
+    @Slot()
+    def _apply_batch(self):
+        deadline = time.perf_counter() + APPLY_BATCH_TIME
+        for _ in self._steps:
+            if time.perf_counter() >= deadline:
+                self._timer.start(0)
+                return
+        self._steps = None
@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+from collections import deque
+from contextlib import nullcontext
+from time import perf_counter_ns
+
+import numpy as np
+
+TRACE_FILE_FILTER = "Chrome trace (*.json)"
+TRACE_FILE_EXTENSION = ".json"
+
+# Spans kept for the trace, the oldest are dropped first
+MAX_EVENTS = 200_000
+# Frame times kept for the percentiles
+MAX_FRAMES = 600
+
+_DISABLED_SPAN = nullcontext()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "category", "owner", "start")
+
+    def __init__(self, profiler, name: str, category: str, owner):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+        self.owner = owner
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+
+    def __exit__(self, *exc_info):
+        name = self.name
+        if self.owner is not None:
+            name = f"{type(self.owner).__name__}.{name}"
+        self.profiler.record(
+            name, self.category, self.start, perf_counter_ns()
+        )
+
+
+class FrameProfiler:
+    """
+    Times the spans of a frame, as nested with-blocks:
+
+        with profiler.span("drawBackground"):
+            ...
+
+    While disabled, span() returns a shared no-op context manager, so
+    the instrumented code costs a method call per span. Enabled, every
+    span is kept as a Chrome trace event (up to MAX_EVENTS, for
+    chrome_trace()), and frames, spans named FRAME, as frame times
+    (up to MAX_FRAMES, for frame_percentiles()).
+    """
+    FRAME = "frame"
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        # (name, category, start, duration) in nanoseconds
+        self._events: deque[tuple[str, str, int, int]] = deque(
+            maxlen=MAX_EVENTS
+        )
+        self._frame_times: deque[float] = deque(maxlen=MAX_FRAMES)
+        self._last_frame: dict[str, float] = {}
+        self._frame_spans: dict[str, float] = {}
+        self._thread_id = threading.get_native_id()
+
+    def span(self, name: str, category: str = "paint", owner=None):
+        """
+        Returns a context manager timing a span, whose name is prefixed
+        by the class of `owner` if given
+        """
+        if not self.enabled:
+            return _DISABLED_SPAN
+        return _Span(self, name, category, owner)
+
+    def record(self, name: str, category: str, start: int, end: int):
+        """Records a span from `start` to `end` perf_counter_ns() times"""
+        self._events.append((name, category, start, end - start))
+        duration = (end - start) / 1e6
+        if name == self.FRAME:
+            self._frame_times.append(duration)
+            self._last_frame = self._frame_spans
+            self._frame_spans = {}
+        else:
+            self._frame_spans[name] = (
+                self._frame_spans.get(name, 0.0) + duration
+            )
+
+    def discard_frame(self):
+        """Drops the spans of the current frame from last_frame()"""
+        self._frame_spans = {}
+
+    def clear(self):
+        self._events.clear()
+        self._frame_times.clear()
+        self._last_frame = {}
+        self._frame_spans = {}
+
+    def frame_count(self) -> int:
+        return len(self._frame_times)
+
+    def frame_percentiles(self, percentiles=(50, 95, 99)) -> list[float]:
+        """Percentiles of the kept frame times, in milliseconds"""
+        if not self._frame_times:
+            return [0.0] * len(percentiles)
+        return np.percentile(
+            np.fromiter(self._frame_times, dtype=float), percentiles
+        ).tolist()
+
+    def last_frame(self) -> dict[str, float]:
+        """Milliseconds spent per span name in the last frame"""
+        return self._last_frame
+
+    def chrome_trace(self) -> dict:
+        """
+        The kept spans as complete events of the Chrome trace event
+        format, read by about://tracing and Perfetto
+        """
+        pid = os.getpid()
+        events = [{
+            "name": "thread_name", "ph": "M", "pid": pid,
+            "tid": self._thread_id, "args": {"name": "GUI thread"},
+        }]
+        events.extend(
+            {
+                "name": name, "cat": category, "ph": "X",
+                "ts": start / 1000, "dur": duration / 1000,
+                "pid": pid, "tid": self._thread_id,
+            }
+            for name, category, start, duration in self._events
+        )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_trace(self, path: str | os.PathLike):
+        with open(path, "w") as file:
+            json.dump(self.chrome_trace(), file)
+
+
+class StartupProfiler:
+    """
+    Times the phases of startup, from `start`, a perf_counter_ns()
+    time, each phase ending at its phase_done() call
+    """
+    def __init__(self, start: int):
+        self.phases: list[tuple[str, float]] = []
+        self._phase_start = start
+
+    def phase_done(self, name: str):
+        end = perf_counter_ns()
+        self.phases.append((name, (end - self._phase_start) / 1e6))
+        self._phase_start = end
+
+    def report(self) -> str:
+        """The phases and their total, a line each, in milliseconds"""
+        total = sum(duration for _, duration in self.phases)
+        width = max(len(name) for name, _ in [*self.phases, ("total", 0)])
+        return "\n".join(
+            f"{name:<{width}} {duration:>8.1f} ms"
+            for name, duration in [*self.phases, ("total", total)]
+        )
@@ -15,9 +15,25 @@ class DefaultSettings:
     DRAW_GRID = True
     GRID_STEP_RATE = "Decimal"
     FIT_CURSOR_INTO_GRID = True
+    SNAP_TO_OBJECTS = True
+    SNAP_RADIUS = 8.0
+    GRID_MIN_LINE_SPACING = 4.0
 
     DRAW_RULER = True
 
+    INTERACTION_SNAPSHOT = True
+    TILE_CACHE = True
+    TILE_CACHE_MEMORY_BUDGET = 64 * 2**20
+
+    FREEHAND_TOLERANCE = 1.0
+
+    UNDO_MEMORY_BUDGET = 64 * 2**20
+
+    EDIT_JOURNAL = True
+
+    PROFILE_FRAMES = False
+    SHOW_PROFILER_HUD = True
+
 
 ASSETS_DIR = BASE_DIR / "assets"
 
@@ -28,4 +44,5 @@ class Assets:
     GEOMETRY_TOOL_RECTANGLE_ICON = str(ASSETS_DIR / "rectangle.png")
     GEOMETRY_TOOL_POLYGON_ICON = str(ASSETS_DIR / "polygon.png")
     GEOMETRY_TOOL_ELLIPSE_ICON = str(ASSETS_DIR / "ellipse.png")
+    GEOMETRY_TOOL_FREEHAND_ICON = str(ASSETS_DIR / "freehand.png")
 
@@ -1,5 +1,5 @@
 from PySide6.QtCore import Qt
-from PySide6.QtGui import QAction, QIcon, QActionGroup
+from PySide6.QtGui import QAction, QIcon, QActionGroup, QKeySequence
 from PySide6.QtWidgets import (
     QMainWindow,
     QToolBar,
@@ -10,15 +10,15 @@ from PySide6.QtWidgets import (
     QWidget,
     QHBoxLayout,
     QSizePolicy,
-    QGraphicsScene,
     QToolButton,
     QButtonGroup,
     QMenu,
 )
 
 from core import generics
-from core.generics import VGEGraphicsView
+from core.generics import VGEGraphicsView, VGEGraphicsScene
 from core.graphics.graphics_tools import SelectionTool, GeometryTool
+from core.graphics.tile_cache import SceneTileCache
 from core.settings import config, DefaultSettings, Assets
 
 
@@ -32,11 +32,26 @@ class RootWindow(generics.WindowUI):
 
         self.menubar__file_menu__open_action = QAction("Open", self.window)
         self.menubar__file_menu.addAction(self.menubar__file_menu__open_action)
+        self.menubar__file_menu__import_action = QAction("Import", self.window)
+        self.menubar__file_menu.addAction(
+            self.menubar__file_menu__import_action
+        )
         self.menubar__file_menu__save_action = QAction("Save", self.window)
         self.menubar__file_menu.addAction(self.menubar__file_menu__save_action)
         self.menubar__file_menu__export_action = QAction("Export", self.window)
         self.menubar__file_menu.addAction(self.menubar__file_menu__export_action)
 
+        self.menubar__edit_menu = self.menubar.addMenu("Edit")
+
+        self.menubar__edit_menu__undo_action = QAction("Undo", self.window)
+        self.menubar__edit_menu__undo_action.setShortcut(QKeySequence.Undo)
+        self.menubar__edit_menu__undo_action.setEnabled(False)
+        self.menubar__edit_menu.addAction(self.menubar__edit_menu__undo_action)
+        self.menubar__edit_menu__redo_action = QAction("Redo", self.window)
+        self.menubar__edit_menu__redo_action.setShortcut(QKeySequence.Redo)
+        self.menubar__edit_menu__redo_action.setEnabled(False)
+        self.menubar__edit_menu.addAction(self.menubar__edit_menu__redo_action)
+
         self.menubar__view_menu = self.menubar.addMenu("View")
 
         self.menubar__view_menu__grid_action = QAction("Grid", self.window)
@@ -51,6 +66,33 @@ class RootWindow(generics.WindowUI):
         self.menubar__view_menu__ruler_action.setChecked(
             config.value("draw_ruler", DefaultSettings.DRAW_RULER)
         )
+        self.menubar__view_menu.addSeparator()
+        self.menubar__view_menu__profiler_action = QAction(
+            "Profile frames", self.window
+        )
+        self.menubar__view_menu.addAction(
+            self.menubar__view_menu__profiler_action
+        )
+        self.menubar__view_menu__profiler_action.setCheckable(True)
+        self.menubar__view_menu__profiler_action.setChecked(config.value(
+            "profile_frames", DefaultSettings.PROFILE_FRAMES, type=bool
+        ))
+        self.menubar__view_menu__profiler_hud_action = QAction(
+            "Frame times", self.window
+        )
+        self.menubar__view_menu.addAction(
+            self.menubar__view_menu__profiler_hud_action
+        )
+        self.menubar__view_menu__profiler_hud_action.setCheckable(True)
+        self.menubar__view_menu__profiler_hud_action.setChecked(config.value(
+            "show_profiler_hud", DefaultSettings.SHOW_PROFILER_HUD, type=bool
+        ))
+        self.menubar__view_menu__save_trace_action = QAction(
+            "Save frame trace", self.window
+        )
+        self.menubar__view_menu.addAction(
+            self.menubar__view_menu__save_trace_action
+        )
 
         # Instruments Panel
         self.toolbar = QToolBar()
@@ -70,8 +112,9 @@ class RootWindow(generics.WindowUI):
         )
 
         self.toolbar__geometry_tool_button = QToolButton()
+        line_icon = QIcon(Assets.GEOMETRY_TOOL_LINE_ICON)
         self.toolbar__geometry_tool_button_action = QAction(
-            QIcon(Assets.GEOMETRY_TOOL_LINE_ICON), "Geometry tool", self.window
+            line_icon, "Geometry tool", self.window
         )
         self.toolbar__geometry_tool_button_action.setCheckable(True)
 
@@ -81,29 +124,40 @@ class RootWindow(generics.WindowUI):
 
         self.toolbar__geometry_tool_menu = QMenu()
 
+        # The icons of the menu are decoded when it is first shown, see
+        # load_geometry_tool_icons()
         self.toolbar__geometry_tool_menu__line_action = QAction(
-            QIcon(Assets.GEOMETRY_TOOL_LINE_ICON), "Line", self.window
+            line_icon, "Line", self.window
         )
         self.toolbar__geometry_tool_menu__line_action.setCheckable(True)
         self.toolbar__geometry_tool_menu__line_action.setChecked(True)
         self.toolbar__geometry_tool_menu__rectangle_action = QAction(
-            QIcon(Assets.GEOMETRY_TOOL_RECTANGLE_ICON), "Rectangle", self.window
+            "Rectangle", self.window
         )
         self.toolbar__geometry_tool_menu__rectangle_action.setCheckable(True)
         self.toolbar__geometry_tool_menu__polygon_action = QAction(
-            QIcon(Assets.GEOMETRY_TOOL_POLYGON_ICON), "Polygon", self.window
+            "Polygon", self.window
         )
         self.toolbar__geometry_tool_menu__polygon_action.setCheckable(True)
         self.toolbar__geometry_tool_menu__ellipse_action = QAction(
-            QIcon(Assets.GEOMETRY_TOOL_ELLIPSE_ICON), "Ellipse", self.window
+            "Ellipse", self.window
         )
         self.toolbar__geometry_tool_menu__ellipse_action.setCheckable(True)
+        self.toolbar__geometry_tool_menu__freehand_action = QAction(
+            "Freehand", self.window
+        )
+        self.toolbar__geometry_tool_menu__freehand_action.setCheckable(True)
+        self.geometry_tool_icons_loaded = False
+        self.toolbar__geometry_tool_menu.aboutToShow.connect(
+            self.load_geometry_tool_icons
+        )
 
         self.toolbar__geometry_tool_menu.addActions([
             self.toolbar__geometry_tool_menu__line_action,
             self.toolbar__geometry_tool_menu__rectangle_action,
             self.toolbar__geometry_tool_menu__polygon_action,
             self.toolbar__geometry_tool_menu__ellipse_action,
+            self.toolbar__geometry_tool_menu__freehand_action,
         ])
 
         self.toolbar__geometry_tool__action_group = QActionGroup(self.window)
@@ -120,6 +174,9 @@ class RootWindow(generics.WindowUI):
         self.toolbar__geometry_tool__action_group.addAction(
             self.toolbar__geometry_tool_menu__ellipse_action
         )
+        self.toolbar__geometry_tool__action_group.addAction(
+            self.toolbar__geometry_tool_menu__freehand_action
+        )
 
         self.toolbar__geometry_tool_button.setMenu(
             self.toolbar__geometry_tool_menu
@@ -145,9 +202,20 @@ class RootWindow(generics.WindowUI):
 
         # Work area
         self.work_area = VGEGraphicsView(self.window)
-        self.graphics_scene = QGraphicsScene(self.work_area)
+        self.graphics_scene = VGEGraphicsScene(self.work_area)
         self.work_area.setScene(self.graphics_scene)
         self.work_area.setDragMode(VGEGraphicsView.RubberBandDrag)
+        if config.value(
+                "tile_cache", DefaultSettings.TILE_CACHE, type=bool
+        ):
+            self.work_area.set_tile_cache(SceneTileCache(
+                self.graphics_scene,
+                config.value(
+                    "tile_cache_memory_budget",
+                    DefaultSettings.TILE_CACHE_MEMORY_BUDGET, type=int
+                ),
+                parent=self.work_area
+            ))
 
         self.graphics_scene.setSceneRect(0, 0, 1000, 1000)
 
@@ -262,16 +330,51 @@ class RootWindow(generics.WindowUI):
         self.menubar__file_menu.setTitle(self.tr("File"))
 
         self.menubar__file_menu__open_action.setText(self.tr("Open"))
+        self.menubar__file_menu__import_action.setText(self.tr("Import"))
         self.menubar__file_menu__save_action.setText(self.tr("Save"))
         self.menubar__file_menu__export_action.setText(self.tr("Export"))
 
+        self.menubar__edit_menu.setTitle(self.tr("Edit"))
+
+        self.menubar__edit_menu__undo_action.setText(self.tr("Undo"))
+        self.menubar__edit_menu__redo_action.setText(self.tr("Redo"))
+
         self.menubar__view_menu.setTitle(self.tr("View"))
 
         self.menubar__view_menu__grid_action.setText(self.tr("Grid"))
         self.menubar__view_menu__ruler_action.setText(self.tr("Ruler"))
+        self.menubar__view_menu__profiler_action.setText(
+            self.tr("Profile frames")
+        )
+        self.menubar__view_menu__profiler_hud_action.setText(
+            self.tr("Frame times")
+        )
+        self.menubar__view_menu__save_trace_action.setText(
+            self.tr("Save frame trace")
+        )
 
     def setup_images(self):
         pass
 
+    def load_geometry_tool_icons(self):
+        """
+        Sets the icons of the geometry tool menu. Decoding an icon takes
+        milliseconds, so they are left out of startup.
+        """
+        if self.geometry_tool_icons_loaded:
+            return
+        self.geometry_tool_icons_loaded = True
+        for action, path in (
+                (self.toolbar__geometry_tool_menu__rectangle_action,
+                 Assets.GEOMETRY_TOOL_RECTANGLE_ICON),
+                (self.toolbar__geometry_tool_menu__polygon_action,
+                 Assets.GEOMETRY_TOOL_POLYGON_ICON),
+                (self.toolbar__geometry_tool_menu__ellipse_action,
+                 Assets.GEOMETRY_TOOL_ELLIPSE_ICON),
+                (self.toolbar__geometry_tool_menu__freehand_action,
+                 Assets.GEOMETRY_TOOL_FREEHAND_ICON),
+        ):
+            action.setIcon(QIcon(path))
+
     def setup_tooltips(self):
         pass
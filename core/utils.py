@@ -1,5 +1,11 @@
-from PySide6.QtCore import QTranslator
+from collections import OrderedDict
+from math import ceil
+
+import numpy as np
+from PySide6.QtCore import QTranslator, QRectF
+from PySide6.QtGui import QPolygonF
 from PySide6.QtWidgets import QApplication
+from shiboken6 import VoidPtr
 
 from core.settings import (
     config,
@@ -7,6 +13,9 @@ from core.settings import (
     DefaultSettings
 )
 
+# Segments of a full turn of an ellipse drawn as a polygon
+ELLIPSE_SEGMENTS = 64
+
 
 def set_language(translator: QTranslator, language: str):
     localization_path = LOCALIZATION_DIR / f"{language}.qm"
@@ -19,7 +28,84 @@ def load_language(translator: QTranslator):
     set_language(translator, language)
 
 
-def frange(start: float, stop: float, step: float = 0.1):
-    while start < stop:
-        yield start
-        start += step
+def subtract_rect(rect: QRectF, hole: QRectF) -> list[QRectF]:
+    """Splits the part of `rect` outside of `hole` into bands"""
+    hole = rect.intersected(hole)
+    if hole.isEmpty():
+        return [rect]
+    return [
+        band for band in (
+            QRectF(rect.left(), rect.top(), rect.width(),
+                   hole.top() - rect.top()),
+            QRectF(rect.left(), hole.bottom(), rect.width(),
+                   rect.bottom() - hole.bottom()),
+            QRectF(rect.left(), hole.top(),
+                   hole.left() - rect.left(), hole.height()),
+            QRectF(hole.right(), hole.top(),
+                   rect.right() - hole.right(), hole.height()),
+        ) if not band.isEmpty()
+    ]
+
+
+def points_to_polygon(points: np.ndarray) -> QPolygonF:
+    """
+    Copies an (N, 2) array of coordinates into a QPolygonF
+    without creating a QPointF per point
+    """
+    polygon = QPolygonF()
+    if not len(points):
+        return polygon
+    polygon.resize(len(points))
+    buffer = VoidPtr(polygon.data(), len(points) * 16, True)
+    np.frombuffer(buffer, dtype=np.float64).reshape(-1, 2)[:] = points
+    return polygon
+
+
+def ellipse_points(
+        center_x: float,
+        center_y: float,
+        major_x: float,
+        major_y: float,
+        ratio: float,
+        start: float = 0.0,
+        end: float = 2 * np.pi,
+) -> np.ndarray:
+    """
+    Returns an (N, 2) array of points along the arc of an ellipse from
+    parameter `start` to `end`, in radians, given the vector of its
+    major axis and the ratio of the minor one to it. A full turn takes
+    ELLIPSE_SEGMENTS segments.
+    """
+    segments = max(2, ceil(ELLIPSE_SEGMENTS * abs(end - start) / (2 * np.pi)))
+    angles = np.linspace(start, end, segments + 1)
+    cos, sin = np.cos(angles), np.sin(angles) * ratio
+    return np.column_stack((
+        center_x + cos * major_x - sin * major_y,
+        center_y + cos * major_y + sin * major_x,
+    ))
+
+
+def polygon_to_points(polygon: QPolygonF) -> np.ndarray:
+    """Copies the points of `polygon` into an (N, 2) array"""
+    if polygon.isEmpty():
+        return np.empty((0, 2))
+    buffer = VoidPtr(polygon.data(), polygon.size() * 16, False)
+    return np.frombuffer(buffer, dtype=np.float64).reshape(-1, 2).copy()
+
+
+class LRUCache(OrderedDict):
+    def __init__(self, max_size: int = 128):
+        super().__init__()
+        self.max_size = max_size
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    def put(self, key, value):
+        self[key] = value
+        self.move_to_end(key)
+        while len(self) > self.max_size:
+            self.popitem(last=False)
@@ -1,26 +1,95 @@
+import os
 import sys
+from time import perf_counter_ns
 
-from PySide6.QtCore import QTranslator, Slot
-from PySide6.QtWidgets import QApplication, QMainWindow
+# Taken before the other imports, the first phase of --profile-startup
+START_TIME = perf_counter_ns()
 
-from core import ui, utils
+from PySide6.QtCore import (
+    QEvent,
+    QObject,
+    QStandardPaths,
+    Qt,
+    QTimer,
+    QTranslator,
+    Slot,
+)
+from PySide6.QtWidgets import (
+    QApplication,
+    QFileDialog,
+    QMainWindow,
+    QMessageBox,
+    QProgressDialog,
+)
+
+from core import profiling, ui, utils
+from core.file_formats import importer, journal, native, raster, svg
+from core.settings import config, DefaultSettings
+
+
+class FirstPaintWatcher(QObject):
+    """Calls `callback` once `widget` has been painted for the first time"""
+    def __init__(self, widget, callback):
+        super().__init__(widget)
+        self.callback = callback
+        widget.installEventFilter(self)
+
+    def eventFilter(self, watched, event) -> bool:
+        if event.type() == QEvent.Paint:
+            watched.removeEventFilter(self)
+            # Called after the paint event is handled
+            QTimer.singleShot(0, self.callback)
+        return False
 
 
 class RootWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.UI = ui.RootWindow(self)
+        self.document_path: str | None = None
+        self.document_loader: native.DocumentLoader | None = None
+        self.document_importer: importer.DocumentImporter | None = None
+        self.import_progress_dialog: QProgressDialog | None = None
+        self.edit_journal: journal.EditJournal | None = None
         self.setup_connections()
 
         self.UI.toolbar__selection_tool_button_action.trigger()
 
     def setup_connections(self):
+        self.UI.menubar__file_menu__open_action.triggered.connect(
+            self.open_document
+        )
+        self.UI.menubar__file_menu__import_action.triggered.connect(
+            self.import_document
+        )
+        self.UI.menubar__file_menu__save_action.triggered.connect(
+            self.save_document
+        )
+        self.UI.menubar__file_menu__export_action.triggered.connect(
+            self.export_document
+        )
+
+        self.UI.menubar__edit_menu__undo_action.triggered.connect(self.undo)
+        self.UI.menubar__edit_menu__redo_action.triggered.connect(self.redo)
+        self.UI.graphics_scene.undo_stack.changed.connect(
+            self.update_undo_actions
+        )
+
         self.UI.menubar__view_menu__grid_action.changed.connect(
             self.toggle_grid_display
         )
         self.UI.menubar__view_menu__ruler_action.changed.connect(
             self.toggle_ruler_display
         )
+        self.UI.menubar__view_menu__profiler_action.changed.connect(
+            self.toggle_profiler
+        )
+        self.UI.menubar__view_menu__profiler_hud_action.changed.connect(
+            self.toggle_profiler_hud
+        )
+        self.UI.menubar__view_menu__save_trace_action.triggered.connect(
+            self.save_frame_trace
+        )
 
         self.UI.toolbar__selection_tool_button_action.changed.connect(
             self.tool_chosen
@@ -42,6 +111,279 @@ class RootWindow(QMainWindow):
         self.UI.toolbar__geometry_tool_menu__ellipse_action.changed.connect(
             self.geometry_tool_change_geometry
         )
+        self.UI.toolbar__geometry_tool_menu__freehand_action.changed.connect(
+            self.geometry_tool_change_geometry
+        )
+        geometry_tool = self.UI.toolbar__tool_instances["Geometry tool"]
+        geometry_tool.on_stroke_finished = self.show_stroke_statistics
+
+    @Slot()
+    def open_document(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, self.tr("Open"), "", self.tr(native.FILE_FILTER)
+        )
+        if not path:
+            return
+        try:
+            contents = native.read_document(path)
+        except (OSError, ValueError) as error:
+            QMessageBox.warning(self, self.tr("Open"), str(error))
+            return
+        self.cancel_import()
+        if self.document_loader is not None:
+            self.document_loader.cancel()
+            self.document_loader.deleteLater()
+        # The scene is cleared, so an unfinished item must be let go
+        self.UI.toolbar__tool_instances["Geometry tool"].current_instance = None
+        self.document_loader = native.DocumentLoader(
+            self.UI.graphics_scene, self.UI.work_area, contents, self
+        )
+        self.document_loader.progress.connect(self.show_loading_progress)
+        self.document_loader.finished.connect(self.document_loaded)
+        self.document_loader.start()
+        self.document_path = path
+
+    def finish_loading(self):
+        """
+        Adds the rest of a document being loaded or imported to the
+        scene and finishes applying a command being undone or redone
+        """
+        if self.document_loader is not None:
+            self.document_loader.finish()
+        if self.document_importer is not None:
+            self.document_importer.finish()
+        self.UI.graphics_scene.undo_stack.flush()
+
+    @Slot(int, int)
+    def show_loading_progress(self, loaded: int, total: int):
+        self.UI.statusbar.showMessage(
+            self.tr("Loading... {}%").format(loaded * 100 // max(total, 1))
+        )
+
+    @Slot()
+    def document_loaded(self):
+        loader = self.document_loader
+        self.UI.statusbar.showMessage(self.tr(
+            "Loaded {} items in {:.0f} ms, first shown after {:.0f} ms"
+        ).format(
+            loader.total_count,
+            loader.load_time * 1000,
+            loader.first_paint_time * 1000,
+        ))
+
+    @Slot()
+    def import_document(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, self.tr("Import"), "", self.tr(importer.FILE_FILTER)
+        )
+        if not path:
+            return
+        self.finish_loading()
+        try:
+            document_importer = importer.DocumentImporter(
+                self.UI.graphics_scene, path, self
+            )
+        except (OSError, ValueError) as error:
+            QMessageBox.warning(self, self.tr("Import"), str(error))
+            return
+        self.document_importer = document_importer
+        self.import_progress_dialog = QProgressDialog(
+            self.tr("Importing..."), self.tr("Cancel"), 0, 0, self
+        )
+        self.import_progress_dialog.setMinimumDuration(500)
+        self.import_progress_dialog.canceled.connect(self.cancel_import)
+        document_importer.progress.connect(self.show_import_progress)
+        document_importer.finished.connect(self.document_imported)
+        document_importer.failed.connect(self.import_failed)
+        document_importer.start()
+
+    @Slot(int, int)
+    def show_import_progress(self, read_size: int, file_size: int):
+        # Sizes are shown in KiB, so the range fits in an int
+        self.import_progress_dialog.setMaximum(max(file_size >> 10, 1))
+        self.import_progress_dialog.setValue(read_size >> 10)
+
+    def close_import(self) -> importer.DocumentImporter:
+        document_importer = self.document_importer
+        self.document_importer = None
+        self.import_progress_dialog.close()
+        self.import_progress_dialog.deleteLater()
+        self.import_progress_dialog = None
+        document_importer.deleteLater()
+        return document_importer
+
+    @Slot()
+    def cancel_import(self):
+        if self.document_importer is None:
+            return
+        self.document_importer.cancel()
+        document_importer = self.close_import()
+        self.UI.statusbar.showMessage(self.tr(
+            "Import cancelled, {} items kept"
+        ).format(len(document_importer.items)))
+
+    @Slot()
+    def document_imported(self):
+        document_importer = self.close_import()
+        message = self.tr("Imported {} items in {:.0f} ms").format(
+            len(document_importer.items), document_importer.load_time * 1000
+        )
+        if document_importer.skipped:
+            message += self.tr(", skipped: {}").format(", ".join(
+                f"{count} {name}"
+                for name, count in document_importer.skipped.most_common()
+            ))
+        self.UI.statusbar.showMessage(message)
+
+    @Slot(str)
+    def import_failed(self, message: str):
+        self.close_import()
+        QMessageBox.warning(self, self.tr("Import"), message)
+
+    @Slot()
+    def save_document(self):
+        self.finish_loading()
+        path = self.document_path
+        if path is None:
+            path, _ = QFileDialog.getSaveFileName(
+                self, self.tr("Save"), "", self.tr(native.FILE_FILTER)
+            )
+            if not path:
+                return
+            if not path.endswith(native.FILE_EXTENSION):
+                path += native.FILE_EXTENSION
+        try:
+            native.save_scene(self.UI.graphics_scene, path)
+        except OSError as error:
+            QMessageBox.warning(self, self.tr("Save"), str(error))
+            return
+        self.document_path = path
+
+    @Slot()
+    def export_document(self):
+        self.finish_loading()
+        export_formats = {
+            self.tr(svg.FILE_FILTER): (
+                (svg.FILE_EXTENSION, ), svg.export_svg
+            ),
+            self.tr(raster.PNG_FILE_FILTER): (
+                (raster.PNG_FILE_EXTENSION, ), raster.export_raster
+            ),
+            self.tr(raster.TIFF_FILE_FILTER): (
+                (raster.TIFF_FILE_EXTENSION, ".tiff"), raster.export_raster
+            ),
+        }
+        path, file_filter = QFileDialog.getSaveFileName(
+            self, self.tr("Export"), "", ";;".join(export_formats)
+        )
+        if not path:
+            return
+        for extensions, export_function in export_formats.values():
+            if path.lower().endswith(extensions):
+                break
+        else:
+            extensions, export_function = export_formats.get(
+                file_filter, next(iter(export_formats.values()))
+            )
+            path += extensions[0]
+
+        progress_dialog = QProgressDialog(
+            self.tr("Exporting..."), self.tr("Cancel"), 0, 0, self
+        )
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(500)
+        export = export_function(self.UI.graphics_scene, path)
+        try:
+            for written, total in export:
+                progress_dialog.setMaximum(total)
+                progress_dialog.setValue(written)
+                if progress_dialog.wasCanceled():
+                    break
+        except OSError as error:
+            QMessageBox.warning(self, self.tr("Export"), str(error))
+        finally:
+            export.close()
+            progress_dialog.close()
+
+    def start_journal(self):
+        """
+        Starts recording the edits into the edit journal, once the
+        drawing left by a session that crashed is recovered if the user
+        wants it
+        """
+        if not config.value(
+                "edit_journal", DefaultSettings.EDIT_JOURNAL, type=bool
+        ):
+            return
+        directory = config.value("journal_directory", os.path.join(
+            QStandardPaths.writableLocation(
+                QStandardPaths.AppLocalDataLocation
+            ), "journal"
+        ))
+        try:
+            edit_journal = journal.EditJournal(
+                self.UI.graphics_scene, directory, self
+            )
+        except OSError as error:
+            self.UI.statusbar.showMessage(str(error))
+            return
+        if edit_journal.has_recovery() and QMessageBox.question(
+                self, self.tr("Recover"), self.tr(
+                    "The editor was not closed properly. "
+                    "Recover the unsaved drawing?"
+                )
+        ) == QMessageBox.Yes:
+            try:
+                contents = edit_journal.read_recovery()
+            except (OSError, ValueError) as error:
+                QMessageBox.warning(self, self.tr("Recover"), str(error))
+            else:
+                # Loaded at once, as the files of the crashed session
+                # are only replaced once the recovered items are recorded
+                native.set_scene_contents(self.UI.graphics_scene, contents)
+        edit_journal.failed.connect(self.journal_failed)
+        edit_journal.start()
+        self.edit_journal = edit_journal
+
+    @Slot(str)
+    def journal_failed(self, message: str):
+        self.edit_journal = None
+        QMessageBox.warning(self, self.tr("Edit journal"), message)
+
+    def closeEvent(self, event):
+        self.cancel_import()
+        if self.document_loader is not None:
+            self.document_loader.cancel()
+        if self.edit_journal is not None:
+            self.edit_journal.close()
+        super().closeEvent(event)
+
+    @Slot()
+    def undo(self):
+        self.UI.graphics_scene.undo_stack.undo()
+        # Undoing the creation of the item being drawn removes it
+        self.UI.toolbar__tool_instances[
+            "Geometry tool"
+        ].release_removed_instance()
+
+    @Slot()
+    def redo(self):
+        self.UI.graphics_scene.undo_stack.redo()
+
+    @Slot()
+    def update_undo_actions(self):
+        undo_stack = self.UI.graphics_scene.undo_stack
+        self.UI.menubar__edit_menu__undo_action.setEnabled(
+            undo_stack.can_undo()
+        )
+        self.UI.menubar__edit_menu__redo_action.setEnabled(
+            undo_stack.can_redo()
+        )
+
+    def show_stroke_statistics(self, retained_count: int, raw_count: int):
+        self.UI.statusbar.showMessage(self.tr(
+            "Stroke: {} of {} points kept ({:.1%})"
+        ).format(retained_count, raw_count, retained_count / raw_count))
 
     @Slot()
     def toggle_grid_display(self):
@@ -55,6 +397,37 @@ class RootWindow(QMainWindow):
             self.UI.menubar__view_menu__ruler_action.isChecked()
         )
 
+    @Slot()
+    def toggle_profiler(self):
+        self.UI.work_area.profiler.enabled = (
+            self.UI.menubar__view_menu__profiler_action.isChecked()
+        )
+        self.UI.work_area.viewport().update()
+
+    @Slot()
+    def toggle_profiler_hud(self):
+        self.UI.work_area.show_profiler_hud = (
+            self.UI.menubar__view_menu__profiler_hud_action.isChecked()
+        )
+        self.UI.work_area.viewport().update()
+
+    @Slot()
+    def save_frame_trace(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, self.tr("Save frame trace"), "",
+            self.tr(profiling.TRACE_FILE_FILTER)
+        )
+        if not path:
+            return
+        if not path.endswith(profiling.TRACE_FILE_EXTENSION):
+            path += profiling.TRACE_FILE_EXTENSION
+        try:
+            self.UI.work_area.profiler.save_trace(path)
+        except OSError as error:
+            QMessageBox.warning(
+                self, self.tr("Save frame trace"), str(error)
+            )
+
     @Slot()
     def tool_chosen(self):
         tool_action = self.sender()
@@ -74,13 +447,43 @@ class RootWindow(QMainWindow):
         self.UI.toolbar__tool_instances["Geometry tool"].set_geometry_type(
             action.text()
         )
+        self.UI.load_geometry_tool_icons()
         self.UI.toolbar__geometry_tool_button_action.setIcon(action.icon())
 
 
-if __name__ == "__main__":
+def main() -> int:
+    """
+    Runs the editor. With --profile-startup, the time taken by each
+    phase up to the first paint of the work area is printed, and the
+    editor quits.
+    """
+    startup_profiler = profiling.StartupProfiler(START_TIME)
+    startup_profiler.phase_done("imports")
     app = QApplication(sys.argv)
+    # Names the directory of the edit journal
+    app.setApplicationName("Simple VGE")
+    startup_profiler.phase_done("application")
     translator = QTranslator()
     utils.load_language(translator)
+    startup_profiler.phase_done("translator")
     window = RootWindow()
+    startup_profiler.phase_done("UI construction")
     window.show()
-    sys.exit(app.exec())
+    startup_profiler.phase_done("show")
+    window.start_journal()
+    startup_profiler.phase_done("edit journal")
+
+    if "--profile-startup" in sys.argv[1:]:
+        def first_paint_done():
+            startup_profiler.phase_done("first paint")
+            print(startup_profiler.report(), flush=True)
+            app.quit()
+
+        FirstPaintWatcher(
+            window.UI.work_area.viewport(), first_paint_done
+        )
+    return app.exec()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
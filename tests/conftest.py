@@ -0,0 +1,112 @@
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import Qt, QEvent, QPointF
+from PySide6.QtGui import QMouseEvent
+from PySide6.QtWidgets import (
+    QApplication,
+    QGraphicsRectItem,
+    QGraphicsScene,
+)
+
+from core.generics import VGEGraphicsScene, VGEGraphicsTool, VGEGraphicsView
+from core.graphics.graphics_tools import SelectionTool
+
+
+class CountingRectItem(QGraphicsRectItem):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.paint_count = 0
+
+    def paint(self, painter, option, widget=None):
+        self.paint_count += 1
+        super().paint(painter, option, widget)
+
+
+def mouse_event(
+        event_type: QEvent.Type,
+        pos: QPointF,
+        button=Qt.LeftButton,
+        modifiers=Qt.NoModifier,
+) -> QMouseEvent:
+    buttons = (
+        Qt.NoButton if event_type == QEvent.MouseButtonRelease else button
+    )
+    return QMouseEvent(event_type, pos, pos, button, buttons, modifiers)
+
+
+def view_pos(view, x: float, y: float) -> QPointF:
+    return QPointF(view.mapFromScene(QPointF(x, y)))
+
+
+def click(view, pos: QPointF, modifiers=Qt.NoModifier):
+    for event_type in (QEvent.MouseButtonPress, QEvent.MouseButtonRelease):
+        event = mouse_event(event_type, pos, modifiers=modifiers)
+        if event_type == QEvent.MouseButtonPress:
+            view.active_graphic_tool.mousePressEvent(event)
+        else:
+            view.active_graphic_tool.mouseReleaseEvent(event)
+
+
+def drag(view, start: QPointF, end: QPointF, modifiers=Qt.NoModifier):
+    tool = view.active_graphic_tool
+    tool.mousePressEvent(
+        mouse_event(QEvent.MouseButtonPress, start, modifiers=modifiers)
+    )
+    tool.mouseMoveEvent(
+        mouse_event(QEvent.MouseMove, end, modifiers=modifiers)
+    )
+    tool.mouseReleaseEvent(
+        mouse_event(QEvent.MouseButtonRelease, end, modifiers=modifiers)
+    )
+
+
+@pytest.fixture(scope="session")
+def application() -> QApplication:
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def scene(application) -> QGraphicsScene:
+    return QGraphicsScene(0, 0, 640, 480)
+
+
+@pytest.fixture
+def create_view(application):
+    """
+    Returns a factory of views of a new VGEGraphicsScene, with the other
+    keyword arguments set as attributes of the view
+    """
+    views = []
+
+    def create(
+            scene_rect=(0, 0, 640, 480),
+            size=(640, 480),
+            tool: VGEGraphicsTool | None = None,
+            show: bool = False,
+            **attributes,
+    ) -> VGEGraphicsView:
+        view = VGEGraphicsView()
+        view.setScene(VGEGraphicsScene(*scene_rect))
+        view.resize(*size)
+        for name, value in attributes.items():
+            setattr(view, name, value)
+        if tool is not None:
+            view.setActiveGraphicTool(tool)
+        if show:
+            view.show()
+            application.processEvents()
+        views.append(view)
+        return view
+
+    yield create
+    for view in views:
+        view.deleteLater()
+
+
+@pytest.fixture
+def view(create_view) -> VGEGraphicsView:
+    return create_view(tool=SelectionTool())
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from PySide6.QtCore import Qt, QEvent, QPointF
+
+from core.graphics.graphics_items import VGEGraphicsFreehandItem
+from core.graphics.graphics_tools import GeometryTool
+from core.graphics.simplification import StrokeSimplifier
+from tests.conftest import mouse_event
+
+
+def distance_to_polyline(point: np.ndarray, polyline: np.ndarray) -> float:
+    starts, ends = polyline[:-1], polyline[1:]
+    directions = ends - starts
+    lengths = np.maximum((directions ** 2).sum(axis=1), 1e-12)
+    positions = np.clip(
+        ((point - starts) * directions).sum(axis=1) / lengths, 0, 1
+    )
+    nearest = starts + positions[:, np.newaxis] * directions
+    return float(np.hypot(*(point - nearest).T).min())
+
+
+@pytest.mark.parametrize("tolerance", [0.5, 2.0])
+def test_samples_stay_within_tolerance(tolerance):
+    random = np.random.default_rng(0)
+    angles = np.linspace(0, 6 * np.pi, 2000)
+    samples = np.column_stack((
+        angles * np.cos(angles), angles * np.sin(angles)
+    )) * 20 + random.normal(0, 0.3, (2000, 2))
+
+    simplifier = StrokeSimplifier(*samples[0], tolerance)
+    retained = [tuple(samples[0])]
+    for x, y in samples[1:].tolist():
+        point = simplifier.add(x, y)
+        if point is not None:
+            retained.append(point)
+    retained.append(simplifier.finish())
+    polyline = np.array(retained)
+
+    assert simplifier.raw_count == len(samples)
+    assert simplifier.retained_count == len(polyline)
+    assert simplifier.ratio < 0.5
+    assert tuple(polyline[-1]) == tuple(samples[-1])
+    assert max(
+        distance_to_polyline(sample, polyline) for sample in samples
+    ) <= tolerance + 1e-9
+
+
+def test_straight_stroke_keeps_its_ends():
+    simplifier = StrokeSimplifier(0, 0, 0.1)
+    for x in range(1, 100):
+        assert simplifier.add(x, x / 2) is None
+    assert simplifier.finish() == (99, 49.5)
+    assert simplifier.retained_count == 2
+
+
+def test_drawing_a_stroke(create_view):
+    tool = GeometryTool()
+    tool.set_geometry_type("freehand")
+    view = create_view(
+        tool=tool, fit_cursor_into_grid=False, snap_to_objects=False
+    )
+    scene = view.scene()
+    statistics = []
+    tool.on_stroke_finished = lambda *counts: statistics.append(counts)
+
+    def send(event_type, x, y, buttons=Qt.LeftButton):
+        pos = QPointF(view.mapFromScene(QPointF(x, y)))
+        event = mouse_event(event_type, pos, buttons)
+        if event_type == QEvent.MouseButtonPress:
+            view.mousePressEvent(event)
+        elif event_type == QEvent.MouseMove:
+            view.mouseMoveEvent(event)
+        else:
+            view.mouseReleaseEvent(event)
+
+    send(QEvent.MouseMove, 100, 100, Qt.NoButton)
+    send(QEvent.MouseButtonPress, 100, 100)
+    stroke = tool.current_instance
+    # Along a straight line, then a corner
+    for x in range(101, 200):
+        send(QEvent.MouseMove, x, 100)
+    for y in range(101, 200):
+        send(QEvent.MouseMove, 199, y)
+    send(QEvent.MouseButtonRelease, 199, 199)
+
+    assert isinstance(stroke, VGEGraphicsFreehandItem)
+    assert tool.current_instance is None
+    assert stroke.childItems() == []
+    # The corner is kept within the tolerance of 1 px
+    start, corner, end = stroke.polygon()
+    assert (start, end) == (QPointF(100, 100), QPointF(199, 199))
+    assert (corner - QPointF(199, 100)).manhattanLength() <= 1
+    assert statistics == [(3, 199)]
+    assert scene.item_id_at(QPointF(150, 100), 1) == (
+        scene.spatial_index.id(stroke)
+    )
+
+    scene.undo_stack.undo()
+    assert stroke.scene() is None
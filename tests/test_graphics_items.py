@@ -0,0 +1,117 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from PySide6.QtCore import Qt, QEvent, QPointF, QRectF
+from PySide6.QtGui import QColor, QImage, QMouseEvent, QPainter, QPen
+from PySide6.QtWidgets import QGraphicsItem
+
+from core.graphics.graphics_items import (
+    LOD_MIN_POINTS,
+    VGEGraphicsLineItem,
+    VGEGraphicsRectItem,
+    VGEGraphicsPolygonItem,
+    VGEGraphicsEllipseItem
+)
+from core.graphics.simplification import decimate_points
+from core.utils import points_to_polygon
+
+
+def release(button: Qt.MouseButton) -> QMouseEvent:
+    return QMouseEvent(
+        QEvent.MouseButtonRelease, QPointF(), QPointF(),
+        button, Qt.NoButton, Qt.NoModifier
+    )
+
+
+@pytest.mark.parametrize("item_class", [
+    VGEGraphicsLineItem,
+    VGEGraphicsRectItem,
+    VGEGraphicsPolygonItem,
+    VGEGraphicsEllipseItem,
+])
+def test_points_are_stored_in_slots(scene, item_class):
+    item = item_class(QPointF(1, 2), scene)
+    assert item.start_point == QPointF(1, 2)
+    assert not vars(item)
+
+
+def test_polygon_drawing(scene):
+    item = VGEGraphicsPolygonItem(QPointF(1, 2), scene)
+    item.add_point(QPointF(3, 4))
+    item.update_last_point(QPointF(5, 6))
+    # The edges to the pointer are drawn by a child path
+    assert list(item.polygon()) == [QPointF(1, 2), QPointF(3, 4)]
+    preview, = item.childItems()
+    assert list(preview.path().toFillPolygon())[:3] == [
+        QPointF(3, 4), QPointF(5, 6), QPointF(1, 2)
+    ]
+    # A pointer on a point is moved off it
+    item.update_last_point(QPointF(3, 4))
+    assert QPointF(preview.path().elementAt(1)) == QPointF(3, 3)
+
+    item.add_point(QPointF(5, 6))
+    tool = SimpleNamespace(current_instance=item)
+    item.mouse_release_action(release(Qt.MiddleButton), tool)
+    assert tool.current_instance is None
+    assert not item.childItems()
+    assert list(item.polygon()) == list(item.points) == [
+        QPointF(1, 2), QPointF(3, 4), QPointF(5, 6)
+    ]
+    assert item.start_point == QPointF(1, 2)
+
+
+def test_decimated_points_stay_within_tolerance():
+    random = np.random.default_rng(0)
+    points = np.cumsum(random.normal(0, 0.2, (5000, 2)), axis=0)
+    decimated = decimate_points(points, 1.0)
+    assert len(decimated) < len(points) / 2
+    assert (decimated[[0, -1]] == points[[0, -1]]).all()
+    # Every dropped point lies near the kept point before it
+    kept = np.isin(points, decimated).all(axis=1)
+    nearest = decimated[np.cumsum(kept) - 1]
+    assert np.hypot(*(points - nearest).T).max() < 1.0
+
+
+def render(scene, scale: float) -> QImage:
+    rect = scene.sceneRect()
+    image = QImage(
+        int(rect.width() * scale), int(rect.height() * scale),
+        QImage.Format_ARGB32
+    )
+    image.fill(Qt.white)
+    painter = QPainter(image)
+    scene.render(painter, QRectF(image.rect()), rect)
+    painter.end()
+    return image
+
+
+def test_level_of_detail(scene):
+    angles = np.linspace(0, 2 * np.pi, 1000, endpoint=False)
+    circle = points_to_polygon(
+        np.column_stack((np.cos(angles), np.sin(angles))) * 100 + 200
+    )
+    item = VGEGraphicsPolygonItem(circle.value(0), scene)
+    item.setPen(QPen(Qt.black, 2))
+    assert item._detail_painter is None
+    item.setPolygon(circle)
+    assert item.flags() & QGraphicsItem.ItemHasNoContents
+    detail_painter = item._detail_painter
+
+    for scale in (1.0, 1 / 8):
+        image = render(scene, scale)
+        x, y = int(100 * scale), int(200 * scale)
+        assert image.pixelColor(x, y) != QColor(Qt.white)
+    # Painted as it is at 1:1 and decimated at 1/8
+    assert detail_painter._paths[0] is None
+    assert detail_painter._paths[-3].elementCount() < 500
+
+    # And as a dot at 1/128
+    image = render(scene, 1 / 128)
+    assert image.pixelColor(1, 1) != QColor(Qt.white)
+    assert len(detail_painter._paths) == 2
+
+    item.setPolygon(circle.mid(0, LOD_MIN_POINTS - 1))
+    assert item._detail_painter is None
+    assert detail_painter.parentItem() is None
+    assert not item.flags() & QGraphicsItem.ItemHasNoContents
@@ -0,0 +1,202 @@
+import gc
+from itertools import count
+from types import SimpleNamespace
+
+import pytest
+from PySide6.QtCore import Qt, QLineF, QPointF, QRectF
+from PySide6.QtGui import QColor
+
+from core.file_formats import importer
+from core.generics import VGEGraphicsScene
+from core.graphics.graphics_items import (
+    VGEGraphicsLineItem,
+    VGEGraphicsRectItem,
+    VGEGraphicsPolygonItem,
+    VGEGraphicsEllipseItem,
+    VGEGraphicsFreehandItem,
+)
+
+SVG = """<?xml version="1.0"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="200" height="100">
+  <g transform="translate(10 20)" stroke="#ff0000" fill="none">
+    <rect x="1" y="2" width="30" height="40" stroke-width="3"/>
+    <circle cx="50" cy="50" r="5" fill="blue"/>
+  </g>
+  <line x1="0" y1="0" x2="10" y2="5" stroke="black"/>
+  <polyline points="0,0 10,0 10,10" stroke="black" fill="none"/>
+  <path d="M 0 0 L 4 0 L 4 4 Z" fill="green"/>
+  <path d="M 0 0 C 1 1 2 2 3 3"/>
+  <text x="0" y="0">Skipped</text>
+</svg>
+"""
+
+DXF = """0
+SECTION
+2
+ENTITIES
+0
+LINE
+8
+0
+62
+1
+10
+0.0
+20
+0.0
+11
+10.0
+21
+5.0
+0
+CIRCLE
+8
+0
+10
+5.0
+20
+5.0
+40
+2.0
+0
+LWPOLYLINE
+8
+0
+70
+1
+10
+0.0
+20
+0.0
+10
+4.0
+20
+0.0
+10
+4.0
+20
+4.0
+0
+TEXT
+8
+0
+0
+ENDSEC
+0
+EOF
+"""
+
+
+@pytest.fixture
+def import_scene(application):
+    return VGEGraphicsScene(0, 0, 100, 100)
+
+
+def import_file(scene, path) -> importer.DocumentImporter:
+    document_importer = importer.DocumentImporter(scene, path)
+    document_importer.start()
+    document_importer.finish()
+    assert not document_importer.is_importing()
+    assert gc.isenabled()
+    return document_importer
+
+
+def test_import_svg(import_scene, tmp_path):
+    path = tmp_path / "drawing.svg"
+    path.write_text(SVG)
+
+    document_importer = import_file(import_scene, path)
+    rect, ellipse, line, polyline, polygon = (
+        import_scene.items(order=Qt.AscendingOrder)
+    )
+    assert type(rect) is VGEGraphicsRectItem
+    assert rect.rect() == QRectF(11, 22, 30, 40)
+    assert rect.pen().color() == QColor(255, 0, 0)
+    assert rect.pen().widthF() == 3
+    assert rect.brush().style() == Qt.NoBrush
+    assert type(ellipse) is VGEGraphicsEllipseItem
+    assert ellipse.rect() == QRectF(55, 65, 10, 10)
+    assert ellipse.brush().color() == QColor(0, 0, 255)
+    assert type(line) is VGEGraphicsLineItem
+    assert line.line() == QLineF(0, 0, 10, 5)
+    assert type(polyline) is VGEGraphicsFreehandItem
+    assert type(polygon) is VGEGraphicsPolygonItem
+    assert list(polygon.polygon())[:3] == [
+        QPointF(0, 0), QPointF(4, 0), QPointF(4, 4)
+    ]
+    assert document_importer.skipped == {"path": 1, "text": 1}
+    assert import_scene.sceneRect().contains(rect.sceneBoundingRect())
+
+    # The whole import is undone at once
+    import_scene.undo_stack.undo()
+    import_scene.undo_stack.flush()
+    assert import_scene.items() == []
+
+
+def test_import_dxf(import_scene, tmp_path):
+    path = tmp_path / "drawing.dxf"
+    path.write_text(DXF)
+
+    document_importer = import_file(import_scene, path)
+    line, circle, polygon = import_scene.items(
+        order=Qt.AscendingOrder
+    )
+    # The y axis of DXF points up
+    assert line.line() == QLineF(0, 0, 10, -5)
+    assert line.pen().color() == QColor(255, 0, 0)
+    assert circle.rect() == QRectF(3, -7, 4, 4)
+    assert circle.pen().color() == QColor(0, 0, 0)
+    assert list(polygon.polygon())[:3] == [
+        QPointF(0, 0), QPointF(4, 0), QPointF(4, -4)
+    ]
+    assert document_importer.skipped == {"TEXT": 1}
+
+
+def test_cancel_keeps_imported_items(import_scene, tmp_path, monkeypatch):
+    monkeypatch.setattr(importer, "READ_BATCH_SIZE", 2)
+    monkeypatch.setattr(importer, "CREATE_BATCH_SIZE", 1)
+    # A clock running out after one batch of items per slice
+    clock = count(step=importer.IMPORT_BATCH_TIME * 0.6)
+    monkeypatch.setattr(
+        importer, "time", SimpleNamespace(perf_counter=clock.__next__)
+    )
+    path = tmp_path / "drawing.svg"
+    path.write_text(SVG)
+
+    document_importer = importer.DocumentImporter(import_scene, path)
+    document_importer.start()
+    while len(document_importer.items) < 2:
+        document_importer._import_batch()
+    assert not gc.isenabled()
+    document_importer.cancel()
+    assert not document_importer.is_importing()
+    assert gc.isenabled()
+    assert document_importer.file.closed
+    assert len(import_scene.items()) == 2
+
+    import_scene.undo_stack.undo()
+    import_scene.undo_stack.flush()
+    assert import_scene.items() == []
+
+
+@pytest.mark.parametrize("name, contents", [
+    ("drawing.svg", "<svg><rect"),
+    ("drawing.dxf", "0\nSECTION\n2\nENTITIES\n0\nLINE\n10\nx\n0\nENDSEC\n"),
+])
+def test_invalid_file_fails(import_scene, tmp_path, name, contents):
+    path = tmp_path / name
+    path.write_text(contents)
+    messages = []
+
+    document_importer = importer.DocumentImporter(import_scene, path)
+    document_importer.failed.connect(messages.append)
+    document_importer.start()
+    document_importer.finish()
+    assert len(messages) == 1
+    assert not document_importer.is_importing()
+    assert import_scene.items() == []
+
+
+def test_unsupported_file_type(import_scene, tmp_path):
+    with pytest.raises(ValueError):
+        importer.DocumentImporter(import_scene, tmp_path / "drawing.png")
@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+import pytest
+from PySide6.QtCore import Qt, QEvent, QPointF
+from PySide6.QtTest import QTest
+
+from core.generics import VGEGraphicsTool
+from tests.conftest import mouse_event
+
+
+class RecordingTool(VGEGraphicsTool):
+    def __init__(self, coalesces: bool = True):
+        super().__init__()
+        self.coalesces = coalesces
+        self.events = []
+
+    def coalesces_moves(self) -> bool:
+        return self.coalesces
+
+    def mousePressEvent(self, event):
+        self.events.append(("press", event.position()))
+
+    def mouseMoveEvent(self, event):
+        self.events.append(("move", event.position()))
+
+
+@pytest.fixture
+def create_view(create_view):
+    return lambda tool: create_view(tool=tool, fit_cursor_into_grid=False)
+
+
+def move(view, x, y):
+    view.mouseMoveEvent(
+        mouse_event(QEvent.MouseMove, QPointF(x, y), Qt.NoButton)
+    )
+
+
+def test_moves_are_applied_once_per_frame(create_view):
+    tool = RecordingTool()
+    view = create_view(tool)
+    for x in range(100):
+        move(view, x, 10)
+    # The first move at once, the latest one on the next frame
+    assert tool.events == [("move", QPointF(0, 10))]
+    QTest.qWait(100)
+    assert tool.events == [
+        ("move", QPointF(0, 10)), ("move", QPointF(99, 10))
+    ]
+    assert view.cursor_pos == QPointF(99, 10).toPoint()
+
+    # A press gets the move before it first
+    move(view, 200, 10)
+    move(view, 210, 10)
+    view.mousePressEvent(
+        mouse_event(QEvent.MouseButtonPress, QPointF(210, 10))
+    )
+    assert tool.events[-2:] == [
+        ("move", QPointF(210, 10)), ("press", QPointF(210, 10))
+    ]
+
+
+def test_tool_can_get_every_move(create_view):
+    tool = RecordingTool(coalesces=False)
+    view = create_view(tool)
+    for x in range(100):
+        move(view, x, 10)
+    assert len(tool.events) == 100
+
+
+def test_frame_interval_without_refresh_rate(create_view, monkeypatch):
+    view = create_view(RecordingTool())
+    monkeypatch.setattr(view, "screen", lambda: None)
+    assert view.frame_interval() == 17
+    monkeypatch.setattr(
+        view, "screen", lambda: SimpleNamespace(refreshRate=lambda: 0)
+    )
+    assert view.frame_interval() == 17
+    move(view, 10, 10)
+    move(view, 20, 10)
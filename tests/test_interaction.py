@@ -0,0 +1,63 @@
+import pytest
+from PySide6.QtCore import Qt, QPoint, QPointF, QRectF
+from PySide6.QtGui import QWheelEvent
+from PySide6.QtTest import QTest
+
+from core.graphics.graphics_tools import SelectionTool
+from tests.conftest import CountingRectItem
+
+
+@pytest.fixture
+def view(create_view):
+    return create_view(
+        (0, 0, 4000, 4000), (400, 300), SelectionTool(), show=True,
+        interaction_snapshot=True,
+    )
+
+
+def wheel_event(pos: QPointF, delta: int) -> QWheelEvent:
+    return QWheelEvent(
+        pos, pos, QPoint(), QPoint(0, delta), Qt.NoButton, Qt.NoModifier,
+        Qt.NoScrollPhase, False
+    )
+
+
+def test_wheel_zoom_is_anchored_under_the_cursor(view):
+    view.centerOn(2000, 2000)
+    anchor = QPointF(120, 90)
+    scene_pos = view.mapToScene(anchor.toPoint())
+    scale = view.transform().m11()
+    for _ in range(3):
+        view.wheelEvent(wheel_event(anchor, 120))
+    # The ticks are applied by the animation
+    assert view.transform().m11() == scale
+    QTest.qWait(300)
+    assert abs(view.transform().m11() - scale * 1.1 ** 3) < 1e-9
+    assert (view.mapFromScene(scene_pos) - anchor.toPoint()).manhattanLength(
+    ) <= 2
+
+    view.wheelEvent(wheel_event(anchor, -120))
+    view.finish_zoom()
+    assert abs(view.transform().m11() - scale * 1.1 ** 3 * 0.9) < 1e-9
+
+
+def test_interaction_paints_a_snapshot(view, application):
+    item = CountingRectItem(QRectF(1900, 1900, 200, 200))
+    view.scene().addItem(item)
+    view.centerOn(2000, 2000)
+    application.processEvents()
+    view.viewport().repaint()
+    paint_count = item.paint_count
+    assert paint_count
+
+    view.wheelEvent(wheel_event(QPointF(200, 150), 120))
+    view.finish_zoom()
+    # The snapshot is rendered once, then painted scaled
+    for _ in range(3):
+        view.viewport().repaint()
+    assert item.paint_count == paint_count + 1
+
+    # Once idle, a full quality frame is painted
+    QTest.qWait(300)
+    view.viewport().repaint()
+    assert item.paint_count > paint_count + 1
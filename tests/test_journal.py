@@ -0,0 +1,221 @@
+import os
+
+import pytest
+from PySide6.QtCore import Qt, QEvent, QRectF
+from PySide6.QtGui import QBrush, QPen
+
+from core.file_formats import journal, native
+from core.file_formats.native import POINT_KINDS, get_item_kind, get_record
+from core.generics import VGEGraphicsScene
+from core.graphics.graphics_tools import GeometryTool
+from core.graphics.undo import AddItemsCommand
+from core.utils import polygon_to_points
+from tests.conftest import mouse_event, view_pos
+
+PENS_AND_BRUSHES = [(QPen(Qt.red, 3), QBrush(Qt.blue))]
+
+
+@pytest.fixture
+def view(create_view):
+    return create_view(
+        tool=GeometryTool(), fit_cursor_into_grid=False, snap_to_objects=False
+    )
+
+
+def stroke(view, points, button=Qt.LeftButton):
+    """Presses at the first point, moves through the rest and releases"""
+    positions = [view_pos(view, x, y) for x, y in points]
+    view.mouseMoveEvent(
+        mouse_event(QEvent.MouseMove, positions[0], Qt.NoButton)
+    )
+    view.mousePressEvent(
+        mouse_event(QEvent.MouseButtonPress, positions[0], button)
+    )
+    for pos in positions[1:]:
+        view.mouseMoveEvent(mouse_event(QEvent.MouseMove, pos, button))
+    view.mouseReleaseEvent(
+        mouse_event(QEvent.MouseButtonRelease, positions[-1], button)
+    )
+
+
+def describe(scene) -> list[tuple]:
+    """Kind, record, points and pen width of the items, bottom to top"""
+    items = []
+    for item in scene.items(order=Qt.AscendingOrder):
+        kind = get_item_kind(item)
+        if kind is None:
+            continue
+        points = (
+            polygon_to_points(item.polygon()).tolist()
+            if kind in POINT_KINDS else None
+        )
+        items.append(
+            (kind, get_record(kind, 0, item)[1:], points, item.pen().widthF())
+        )
+    return items
+
+
+def recover(path) -> VGEGraphicsScene:
+    scene = VGEGraphicsScene()
+    native.set_scene_contents(scene, journal.read_journal(path))
+    return scene
+
+
+def add_rects(scene, count: int):
+    return native.create_items(native.ItemKind.Rect, [
+        (QRectF(index * 10, 0, 5, 5), 0, 0, 0) for index in range(count)
+    ], PENS_AND_BRUSHES, scene)
+
+
+def test_recover_drawing(view, tmp_path):
+    scene = view.scene()
+    tool = view.active_graphic_tool
+    edit_journal = journal.EditJournal(scene, tmp_path)
+    edit_journal.start()
+
+    tool.set_geometry_type("rectangle")
+    stroke(view, [(100, 100), (150, 120), (200, 150)])
+    tool.set_geometry_type("freehand")
+    stroke(view, [(10, 10), (20, 30), (40, 20), (60, 60), (80, 10)])
+    tool.set_geometry_type("polygon")
+    for point in ((300, 300), (400, 300), (400, 400)):
+        stroke(view, [point])
+    stroke(view, [(400, 400)], Qt.MiddleButton)
+    tool.set_geometry_type("line")
+    stroke(view, [(0, 0), (50, 50)])
+    # The line is undone and the rect moved
+    scene.undo_stack.undo()
+    scene.move_items([0], 5, 5)
+    scene.move_items([0], 5, 5)
+    edit_journal.sync()
+    # A polygon left unfinished by the crash
+    tool.set_geometry_type("polygon")
+    for point in ((500, 100), (550, 100), (550, 150)):
+        stroke(view, [point])
+    unfinished = list(tool.current_instance.points)
+    drawn = describe(scene)[:3]
+    edit_journal.close(discard=False)
+
+    recovered = recover(tmp_path)
+    assert len(describe(recovered)) == 4
+    assert describe(recovered)[:3] == drawn
+    assert drawn[0][1] == (10, 10, 100, 100, 100, 50)
+    assert list(recovered.items()[0].polygon()) == unfinished
+
+    # A new session starts with the recovered drawing
+    edit_journal = journal.EditJournal(recovered, tmp_path)
+    assert edit_journal.has_recovery()
+    native.set_scene_contents(recovered, edit_journal.read_recovery())
+    edit_journal.start()
+    edit_journal.close(discard=False)
+    assert describe(recover(tmp_path)) == describe(recovered)
+
+
+def test_undo_and_redo_are_recorded(view, tmp_path):
+    scene = view.scene()
+    tool = view.active_graphic_tool
+    edit_journal = journal.EditJournal(scene, tmp_path)
+    edit_journal.start()
+    tool.set_geometry_type("polygon")
+    for point in ((100, 100), (200, 100), (200, 200), (100, 200)):
+        stroke(view, [point])
+    undo_stack = scene.undo_stack
+    undo_stack.undo()
+    undo_stack.undo()
+    undo_stack.redo()
+    stroke(view, [(100, 200)], Qt.MiddleButton)
+    rects = add_rects(scene, 3)
+    undo_stack.push(AddItemsCommand(scene, rects[:1]))
+    # Redoing the creation of an item adds it on top of the others
+    undo_stack.undo()
+    undo_stack.redo()
+    assert scene.items()[0] is rects[0]
+    edit_journal.close(discard=False)
+
+    assert describe(recover(tmp_path)) == describe(scene)
+
+
+def test_compaction(application, tmp_path):
+    scene = VGEGraphicsScene(0, 0, 100, 100)
+    edit_journal = journal.EditJournal(scene, tmp_path)
+    edit_journal.start()
+    add_rects(scene, 3)
+    edit_journal.sync()
+    journal_path = tmp_path / journal.JOURNAL_NAME
+    former_journal = journal_path.read_bytes()
+    added = describe(scene)
+
+    edit_journal.compact()
+    assert journal_path.stat().st_size == journal.HEADER.size
+    assert (tmp_path / journal.SNAPSHOT_NAME).exists()
+    scene.move_items([0, 2], 10, 0)
+    edit_journal.close(discard=False)
+    assert describe(recover(tmp_path)) == describe(scene)
+
+    # A crash between writing the snapshot and starting the journal
+    # leaves the former journal, whose records are in the snapshot
+    journal_path.write_bytes(former_journal)
+    assert describe(recover(tmp_path)) == added
+
+
+def test_compaction_keeps_removed_items(application, tmp_path):
+    scene = VGEGraphicsScene(0, 0, 100, 100)
+    edit_journal = journal.EditJournal(scene, tmp_path)
+    edit_journal.start()
+    scene.undo_stack.push(AddItemsCommand(scene, add_rects(scene, 2)))
+    scene.undo_stack.undo()
+    edit_journal.compact()
+    assert describe(recover(tmp_path)) == []
+    scene.undo_stack.redo()
+    edit_journal.close(discard=False)
+    assert len(describe(recover(tmp_path))) == 2
+
+
+@pytest.mark.parametrize("damage", [
+    lambda data: data[:-3],
+    lambda data: data[:-1] + bytes([data[-1] ^ 1]),
+])
+def test_torn_frame_is_dropped(application, tmp_path, damage):
+    scene = VGEGraphicsScene(0, 0, 100, 100)
+    edit_journal = journal.EditJournal(scene, tmp_path)
+    edit_journal.start()
+    add_rects(scene, 1)
+    edit_journal.sync()
+    written = describe(scene)
+    add_rects(scene, 1)
+    edit_journal.close(discard=False)
+    journal_path = tmp_path / journal.JOURNAL_NAME
+    journal_path.write_bytes(damage(journal_path.read_bytes()))
+
+    assert describe(recover(tmp_path)) == written
+
+
+def test_close_removes_files(application, tmp_path):
+    scene = VGEGraphicsScene(0, 0, 100, 100)
+    edit_journal = journal.EditJournal(scene, tmp_path)
+    assert not edit_journal.has_recovery()
+    with pytest.raises(OSError):
+        journal.EditJournal(VGEGraphicsScene(), tmp_path)
+    edit_journal.start()
+    add_rects(scene, 1)
+    edit_journal.close()
+    assert scene.journal is None
+    assert os.listdir(tmp_path) == []
+    assert journal.read_journal(tmp_path) is None
+
+
+def test_write_failure_stops_recording(application, tmp_path, monkeypatch):
+    def fsync(descriptor):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(journal.os, "fsync", fsync)
+    scene = VGEGraphicsScene(0, 0, 100, 100)
+    messages = []
+    edit_journal = journal.EditJournal(scene, tmp_path)
+    edit_journal.failed.connect(messages.append)
+    edit_journal.start()
+    add_rects(scene, 1)
+    edit_journal.sync()
+    assert messages == ["No space left on device"]
+    assert scene.journal is None
+    add_rects(scene, 1)
@@ -0,0 +1,206 @@
+import numpy as np
+import pytest
+from PySide6.QtCore import Qt, QLineF, QPointF, QRectF
+from PySide6.QtGui import QBrush, QColor, QPen, QPolygonF
+from PySide6.QtWidgets import QGraphicsScene, QGraphicsView
+
+from core.file_formats import native
+from core.graphics.graphics_items import (
+    VGEGraphicsLineItem,
+    VGEGraphicsRectItem,
+    VGEGraphicsPolygonItem,
+    VGEGraphicsEllipseItem,
+    VGEGraphicsFreehandItem,
+)
+
+PEN = QPen(
+    QColor(10, 20, 30, 40), 2.5, Qt.DashDotLine, Qt.RoundCap, Qt.MiterJoin
+)
+BRUSH = QBrush(QColor(200, 100, 50, 128), Qt.Dense4Pattern)
+POS = QPointF(3.5, -7.25)
+
+
+def add_item(scene, item, pen=PEN, brush=BRUSH, pos=POS):
+    item.setPen(pen)
+    if not isinstance(item, VGEGraphicsLineItem):
+        item.setBrush(brush)
+    item.setPos(pos)
+    scene.addItem(item)
+    return item
+
+
+def save_and_load(scene: QGraphicsScene, tmp_path) -> QGraphicsScene:
+    path = tmp_path / ("drawing" + native.FILE_EXTENSION)
+    native.save_scene(scene, path)
+    loaded_scene = QGraphicsScene()
+    native.load_scene(loaded_scene, path)
+    assert loaded_scene.sceneRect() == scene.sceneRect()
+    return loaded_scene
+
+
+def assert_same_style(loaded, item):
+    assert type(loaded) is type(item)
+    assert loaded.pen() == item.pen()
+    assert loaded.pos() == item.pos()
+    if not isinstance(item, VGEGraphicsLineItem):
+        assert loaded.brush() == item.brush()
+
+
+def test_line_round_trip(scene, tmp_path):
+    item = add_item(scene, VGEGraphicsLineItem(QPointF()))
+    item.setLine(QLineF(1.5, 2, -3, 4.125))
+
+    loaded_scene = save_and_load(scene, tmp_path)
+    [loaded] = loaded_scene.items()
+    assert_same_style(loaded, item)
+    assert loaded.line() == item.line()
+
+
+@pytest.mark.parametrize(
+    "item_class", [VGEGraphicsRectItem, VGEGraphicsEllipseItem]
+)
+def test_rect_round_trip(scene, tmp_path, item_class):
+    item = add_item(scene, item_class(QPointF()))
+    # Rects are stored as set, without normalizing
+    item.setRect(QRectF(10, 20.5, -5, 7))
+
+    loaded_scene = save_and_load(scene, tmp_path)
+    [loaded] = loaded_scene.items()
+    assert_same_style(loaded, item)
+    assert loaded.rect() == item.rect()
+
+
+@pytest.mark.parametrize("points", [
+    [QPointF(0, 0), QPointF(10.25, 0), QPointF(5, -8.5), QPointF(1, 1)],
+    [],
+], ids=["points", "empty"])
+def test_polygon_round_trip(scene, tmp_path, points):
+    item = add_item(scene, VGEGraphicsPolygonItem(QPointF()))
+    item.setPolygon(QPolygonF(points))
+
+    loaded_scene = save_and_load(scene, tmp_path)
+    [loaded] = loaded_scene.items()
+    assert_same_style(loaded, item)
+    assert list(loaded.polygon()) == list(item.polygon())
+
+
+def test_freehand_round_trip(scene, tmp_path):
+    item = add_item(scene, VGEGraphicsFreehandItem(QPointF()))
+    item.setPolygon(QPolygonF([QPointF(0, 0), QPointF(4, 1), QPointF(9, -2)]))
+
+    loaded_scene = save_and_load(scene, tmp_path)
+    [loaded] = loaded_scene.items()
+    assert_same_style(loaded, item)
+    assert list(loaded.polygon()) == list(item.polygon())
+    assert loaded.path() == item.path()
+
+
+def test_stacking_order_and_styles(scene, tmp_path, monkeypatch):
+    # Small chunks, so runs of one kind are split too
+    monkeypatch.setattr(native, "MAX_CHUNK_RECORDS", 2)
+    pens = [QPen(Qt.black, 1), QPen(QColor(255, 0, 0), 0, Qt.DotLine)]
+    brushes = [QBrush(), QBrush(Qt.green)]
+    item_classes = [
+        VGEGraphicsRectItem, VGEGraphicsRectItem, VGEGraphicsRectItem,
+        VGEGraphicsPolygonItem, VGEGraphicsLineItem, VGEGraphicsEllipseItem,
+        VGEGraphicsLineItem, VGEGraphicsPolygonItem,
+    ]
+    items = []
+    for n, item_class in enumerate(item_classes):
+        point = QPointF(n * 10, n * 5)
+        item = item_class(point)
+        if item_class is VGEGraphicsPolygonItem:
+            item.add_point(point + QPointF(4, 2))
+            item.setPolygon(item.points)
+        else:
+            item.update_last_point(point + QPointF(6, 3))
+        items.append(add_item(
+            scene, item, pens[n % 2], brushes[n // 2 % 2], QPointF(n, 0)
+        ))
+
+    _, styles, chunks = native.encode_scene(scene)
+    assert [chunk.kind for chunk in chunks] == [
+        native.ItemKind.Rect, native.ItemKind.Rect, native.ItemKind.Polygon,
+        native.ItemKind.Line, native.ItemKind.Ellipse, native.ItemKind.Line,
+        native.ItemKind.Polygon,
+    ]
+    # Lines do not have a brush, so their pens share the no-brush styles
+    assert len(styles) == 4
+
+    loaded_scene = save_and_load(scene, tmp_path)
+    loaded_items = loaded_scene.items(Qt.AscendingOrder)
+    assert len(loaded_items) == len(items)
+    for loaded, item in zip(loaded_items, items):
+        assert_same_style(loaded, item)
+        assert loaded.boundingRect() == item.boundingRect()
+
+
+def test_invalid_file_keeps_scene(scene, tmp_path):
+    item = add_item(scene, VGEGraphicsRectItem(QPointF(1, 2)))
+    path = tmp_path / ("drawing" + native.FILE_EXTENSION)
+    native.save_scene(scene, path)
+    data = path.read_bytes()
+
+    for corrupted in (b"", b"not a drawing", data[:-8]):
+        path.write_bytes(corrupted)
+        with pytest.raises(native.NativeFormatError):
+            native.load_scene(scene, path)
+        assert scene.items() == [item]
+
+
+def test_failed_write_removes_temporary_file(scene, tmp_path):
+    path = tmp_path / ("drawing" + native.FILE_EXTENSION)
+    scene_rect, _, chunks = native.encode_scene(scene)
+
+    with pytest.raises(ValueError):
+        native.write_document(path, scene_rect, np.array(["x"]), chunks)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_document_loader_inserts_viewport_items_first(scene, tmp_path):
+    loaded_scene = QGraphicsScene(scene.sceneRect())
+    view = QGraphicsView(loaded_scene)
+    view.resize(200, 150)
+    visible_rect = view.mapToScene(view.viewport().rect()).boundingRect()
+    right, top = visible_rect.right(), visible_rect.top()
+    pen = QPen(Qt.black, 1)
+    rects = [
+        # Outside of the viewport, but below the next one, which it
+        # overlaps, so it has to be inserted before the first paint too
+        QRectF(right + 5, top + 5, 30, 30),
+        # Crossing the viewport edge
+        QRectF(right - 20, top + 10, 40, 20),
+        # Overlapping the previous one from above
+        QRectF(right + 10, top + 20, 40, 20),
+        QRectF(right + 200, top + 200, 10, 10),
+    ]
+    items = [
+        add_item(scene, VGEGraphicsRectItem(rect.topLeft()), pen, BRUSH,
+                 QPointF())
+        for rect in rects
+    ]
+    for item, rect in zip(items, rects):
+        item.setRect(rect)
+    path = tmp_path / ("drawing" + native.FILE_EXTENSION)
+    native.save_scene(scene, path)
+
+    loader = native.DocumentLoader(
+        loaded_scene, view, native.read_document(path)
+    )
+    loader.start()
+    assert loader.loaded_count == 2
+    assert sorted(
+        item.rect().getRect() for item in loaded_scene.items()
+    ) == sorted(rect.getRect() for rect in rects[:2])
+    assert loaded_scene.itemIndexMethod() == QGraphicsScene.NoIndex
+
+    loader.finish()
+    assert not loader.is_loading()
+    assert loader.loaded_count == loader.total_count == len(rects)
+    assert loaded_scene.itemIndexMethod() == QGraphicsScene.BspTreeIndex
+    rank = {
+        item.rect().getRect(): n
+        for n, item in enumerate(loaded_scene.items(Qt.AscendingOrder))
+    }
+    assert rank[rects[0].getRect()] < rank[rects[1].getRect()]
+    assert rank[rects[1].getRect()] < rank[rects[2].getRect()]
@@ -0,0 +1,72 @@
+import json
+from time import perf_counter_ns
+
+import pytest
+from PySide6.QtCore import Qt, QEvent, QPointF
+
+from core.graphics.graphics_tools import SelectionTool
+from core.profiling import FrameProfiler, StartupProfiler
+from tests.conftest import mouse_event
+
+
+@pytest.fixture
+def view(create_view):
+    return create_view(size=(400, 300), tool=SelectionTool(), show=True)
+
+
+def test_disabled_profiler_records_nothing(view):
+    view.profiler.enabled = False
+    view.viewport().repaint()
+    assert view.profiler.frame_count() == 0
+    assert len(view.profiler.chrome_trace()["traceEvents"]) == 1
+
+
+def test_frame_spans(view, tmp_path):
+    view.draw_grid = view.draw_ruler = True
+    profiler = view.profiler
+    profiler.enabled = True
+    for _ in range(3):
+        view.viewport().repaint()
+    view.mouseMoveEvent(
+        mouse_event(QEvent.MouseMove, QPointF(50, 50), Qt.NoButton)
+    )
+    view.viewport().repaint()
+
+    assert profiler.frame_count() == 4
+    p50, p95, p99 = profiler.frame_percentiles()
+    assert 0 < p50 <= p95 <= p99
+    assert {
+        "drawBackground", "_draw_grid", "drawItems", "drawForeground",
+        "_draw_ruler", "SelectionTool.mouseMoveEvent",
+    } <= set(profiler.last_frame())
+
+    path = tmp_path / "trace.json"
+    profiler.save_trace(path)
+    with open(path) as file:
+        events = json.load(file)["traceEvents"]
+    spans = [event for event in events if event["ph"] == "X"]
+    frames = [span for span in spans if span["name"] == FrameProfiler.FRAME]
+    assert len(frames) == 4
+    last_frame = frames[-1]
+    for span in spans[spans.index(last_frame) - 5:spans.index(last_frame)]:
+        assert last_frame["ts"] <= span["ts"]
+        assert (
+            span["ts"] + span["dur"]
+            <= last_frame["ts"] + last_frame["dur"] + 1e-3
+        )
+
+
+def test_startup_phases():
+    profiler = StartupProfiler(perf_counter_ns())
+    profiler.phase_done("imports")
+    profiler.phase_done("UI construction")
+    assert [name for name, _ in profiler.phases] == [
+        "imports", "UI construction"
+    ]
+    lines = profiler.report().splitlines()
+    assert [line.rsplit(maxsplit=2)[0] for line in lines] == [
+        "imports", "UI construction", "total"
+    ]
+    assert float(lines[-1].split()[-2]) == pytest.approx(
+        sum(duration for _, duration in profiler.phases), abs=0.1
+    )
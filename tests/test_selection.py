@@ -0,0 +1,58 @@
+from PySide6.QtCore import Qt, QPointF
+
+from core.graphics.graphics_items import (
+    VGEGraphicsLineItem,
+    VGEGraphicsRectItem,
+)
+from tests.conftest import click, drag, view_pos
+
+
+def test_click_and_rubber_band_selection(view):
+    scene = view.scene()
+    line = VGEGraphicsLineItem(QPointF(100, 100), scene)
+    line.update_last_point(QPointF(200, 100))
+    rect = VGEGraphicsRectItem(QPointF(300, 300), scene)
+    rect.update_last_point(QPointF(350, 340))
+    line_id, rect_id = map(scene.spatial_index.id, (line, rect))
+
+    click(view, view_pos(view, 150, 101))
+    assert scene.selected_items() == [line]
+    click(view, view_pos(view, 320, 320), Qt.ShiftModifier)
+    assert list(scene.selected_ids()) == [line_id, rect_id]
+    click(view, view_pos(view, 150, 100), Qt.ControlModifier)
+    assert list(scene.selected_ids()) == [rect_id]
+
+    # Clicking an empty spot clears the selection
+    click(view, view_pos(view, 500, 50))
+    assert not scene.has_selection()
+
+    drag(view, view_pos(view, 90, 90), view_pos(view, 310, 310))
+    assert list(scene.selected_ids()) == [line_id, rect_id]
+    drag(view, view_pos(view, 90, 90), view_pos(view, 210, 110))
+    assert list(scene.selected_ids()) == [line_id]
+
+
+def test_dragging_moves_the_selection(view):
+    scene = view.scene()
+    rect = VGEGraphicsRectItem(QPointF(100, 100), scene)
+    rect.update_last_point(QPointF(150, 150))
+    other = VGEGraphicsRectItem(QPointF(400, 400), scene)
+
+    drag(view, view_pos(view, 120, 120), view_pos(view, 220, 170))
+    assert scene.selected_items() == [rect]
+    assert rect.pos() == QPointF(100, 50)
+    assert other.pos() == QPointF()
+    # The spatial index follows the item
+    assert scene.item_id_at(QPointF(240, 190)) == scene.spatial_index.id(rect)
+    assert scene.item_id_at(QPointF(120, 120)) == -1
+
+    scene.removeItem(rect)
+    assert not scene.has_selection()
+
+
+def test_new_items_are_indexed_at_their_start_point(view):
+    scene = view.scene()
+    line = VGEGraphicsLineItem(QPointF(300, 200), scene)
+    assert scene.item_id_at(QPointF(300, 200), 1) == (
+        scene.spatial_index.id(line)
+    )
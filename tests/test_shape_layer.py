@@ -0,0 +1,142 @@
+import numpy as np
+import pytest
+from PySide6.QtCore import Qt, QLineF, QPointF, QRectF
+from PySide6.QtGui import QBrush, QColor, QImage, QPainter, QPen
+from PySide6.QtWidgets import (
+    QGraphicsEllipseItem,
+    QGraphicsLineItem,
+    QGraphicsRectItem,
+    QGraphicsScene,
+)
+
+from core.graphics.graphics_items import VGEGraphicsRectItem
+from core.graphics.shape_layer import VGEGraphicsShapeLayer
+from tests.conftest import click, drag, view_pos
+
+STYLES = [
+    (QPen(Qt.black, 2), QBrush()),
+    (QPen(QColor(200, 0, 0), 1), QBrush(QColor(0, 0, 200, 100))),
+]
+GEOMETRY = np.array([
+    (10, 10, 60, 40),
+    (30, 50, 90, -20),
+    (80, 70, 20, 30),
+    (5, 90, 100, 10),
+], dtype=float)
+ITEM_CLASSES = {
+    VGEGraphicsShapeLayer.Line: QGraphicsLineItem,
+    VGEGraphicsShapeLayer.Rect: QGraphicsRectItem,
+    VGEGraphicsShapeLayer.Ellipse: QGraphicsEllipseItem,
+}
+
+
+def create_layer(kind: int) -> VGEGraphicsShapeLayer:
+    layer = VGEGraphicsShapeLayer(kind)
+    for pen, brush in STYLES:
+        layer.add_style(pen, brush)
+    layer.add_elements(GEOMETRY[:3], [0, 1, 1])
+    layer.add_elements(GEOMETRY[3:], 0)
+    return layer
+
+
+def render(scene: QGraphicsScene, rect: QRectF) -> QImage:
+    image = QImage(rect.size().toSize(), QImage.Format_ARGB32)
+    image.fill(Qt.white)
+    painter = QPainter(image)
+    scene.render(painter, QRectF(image.rect()), rect)
+    painter.end()
+    return image
+
+
+def create_item_scene(layer: VGEGraphicsShapeLayer) -> QGraphicsScene:
+    """Returns a scene with an item per element of the layer"""
+    scene = QGraphicsScene()
+    for index in range(len(layer)):
+        geometry, style = layer.element(index)
+        item = ITEM_CLASSES[layer.kind](geometry)
+        pen, brush = STYLES[style]
+        item.setPen(pen)
+        if layer.kind != VGEGraphicsShapeLayer.Line:
+            item.setBrush(brush)
+        scene.addItem(item)
+    return scene
+
+
+@pytest.mark.parametrize("kind", list(ITEM_CLASSES))
+@pytest.mark.parametrize("rect", [QRectF(0, 0, 128, 128),
+                                  QRectF(20, 20, 32, 32)])
+def test_layer_paints_like_items(application, kind, rect):
+    layer = create_layer(kind)
+    scene = QGraphicsScene()
+    scene.addItem(layer)
+    assert render(scene, rect) == render(create_item_scene(layer), rect)
+
+    layer.set_element(2, QRectF(20, 30, 40, 10) if kind != layer.Line
+                      else QLineF(20, 30, 40, 10))
+    layer.add_elements(GEOMETRY[:2], 1)
+    assert render(scene, rect) == render(create_item_scene(layer), rect)
+
+
+def test_element_addressing(application):
+    layer = create_layer(VGEGraphicsShapeLayer.Line)
+    assert len(layer) == 4
+    assert layer.element(1) == (QLineF(30, 50, 90, -20), 1)
+    assert layer.element_at(QPointF(35, 25)) == 0
+    assert layer.element_at(QPointF(35, 35), 1) == -1
+    assert list(layer.elements_in_rect(QRectF(0, 85, 10, 10))) == [3]
+
+    layer.set_element(0, QLineF(0, 0, 200, 0), style=1)
+    assert layer.element(0) == (QLineF(0, 0, 200, 0), 1)
+    assert layer.boundingRect().right() >= 200
+
+    layer.set_selected_elements([2, 3])
+    layer.remove_elements([0, 2])
+    assert len(layer) == 2
+    assert layer.element(0)[0] == QLineF(30, 50, 90, -20)
+    assert list(layer.selected_elements) == [1]
+    with pytest.raises(IndexError):
+        layer.element(2)
+
+
+def test_rect_and_ellipse_picking(application):
+    rects = create_layer(VGEGraphicsShapeLayer.Rect)
+    ellipses = create_layer(VGEGraphicsShapeLayer.Ellipse)
+    # Inside the bounds of the fourth element only
+    assert rects.element_at(QPointF(6, 91)) == 3
+    assert ellipses.element_at(QPointF(6, 91)) == -1
+    # The second rectangle has a negative height
+    assert rects.element_at(QPointF(100, 40)) == 1
+
+
+def test_selection_tool_picks_elements(view):
+    scene = view.scene()
+    layer = create_layer(VGEGraphicsShapeLayer.Rect)
+    scene.addItem(layer)
+    rect = VGEGraphicsRectItem(QPointF(300, 300), scene)
+    rect.update_last_point(QPointF(350, 340))
+    layer_id, rect_id = map(scene.spatial_index.id, (layer, rect))
+
+    click(view, view_pos(view, 85, 75))
+    assert list(scene.selected_elements(layer_id)) == [2]
+    assert not scene.has_selection()
+    click(view, view_pos(view, 6, 91), Qt.ShiftModifier)
+    assert list(scene.selected_elements(layer_id)) == [2, 3]
+    # Inside the bounds of the layer, but off its elements
+    assert scene.item_id_at(QPointF(110, 80), 1) == -1
+    click(view, view_pos(view, 320, 320))
+    assert list(scene.selected_elements(layer_id)) == []
+    assert list(scene.selected_ids()) == [rect_id]
+
+    drag(view, view_pos(view, 110, 0), view_pos(view, 400, 400))
+    assert list(scene.selected_elements(layer_id)) == [1]
+    assert list(scene.selected_ids()) == [rect_id]
+
+    # Dragging a selected element moves the selected elements
+    click(view, view_pos(view, 85, 75))
+    drag(view, view_pos(view, 85, 75), view_pos(view, 185, 80))
+    assert layer.element(2)[0] == QRectF(180, 75, 20, 30)
+    assert scene.item_id_at(QPointF(190, 80)) == layer_id
+    assert scene.element_at(layer_id, QPointF(190, 80)) == 2
+    scene.undo_stack.undo()
+    assert layer.element(2)[0] == QRectF(80, 70, 20, 30)
+    assert scene.item_id_at(QPointF(190, 80)) == -1
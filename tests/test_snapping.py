@@ -0,0 +1,102 @@
+import numpy as np
+from PySide6.QtCore import Qt, QEvent, QPointF
+
+from core.generics import VGEGraphicsScene
+from core.graphics.graphics_items import (
+    VGEGraphicsLineItem,
+    VGEGraphicsPolygonItem,
+    VGEGraphicsRectItem,
+)
+from core.graphics.graphics_tools import GeometryTool
+from core.graphics.snapping import SnapKind, get_intersections
+from tests.conftest import mouse_event
+
+
+def create_rect(scene, left, top, right, bottom):
+    rect = VGEGraphicsRectItem(QPointF(left, top), scene)
+    rect.update_last_point(QPointF(right, bottom))
+    return rect
+
+
+def test_snap_kinds(application):
+    scene = VGEGraphicsScene(0, 0, 640, 480)
+    create_rect(scene, 100, 100, 200, 160)
+    line = VGEGraphicsLineItem(QPointF(130, 50), scene)
+    line.update_last_point(QPointF(130, 250))
+    engine = scene.snap_engine
+
+    assert engine.snap(QPointF(103, 98), 5) == (
+        QPointF(100, 100), SnapKind.Vertex
+    )
+    assert engine.snap(QPointF(198, 131), 5) == (
+        QPointF(200, 130), SnapKind.Midpoint
+    )
+    # The line crosses the top and bottom edges of the rect
+    assert engine.snap(QPointF(132, 162), 5) == (
+        QPointF(130, 160), SnapKind.Intersection
+    )
+    assert engine.snap(QPointF(170, 130), 5) is None
+
+    # Moved items snap at their new place
+    scene.set_selection([scene.spatial_index.id(line)])
+    scene.move_selection(100, 0)
+    assert engine.snap(QPointF(229, 49), 5) == (
+        QPointF(230, 50), SnapKind.Vertex
+    )
+    scene.removeItem(line)
+    assert engine.snap(QPointF(229, 49), 5) is None
+
+
+def test_intersections_match_brute_force():
+    random = np.random.default_rng(0)
+    segments = random.uniform(0, 100, (30, 4))
+    expected = []
+    for i in range(len(segments)):
+        for j in range(i + 1, len(segments)):
+            (x1, y1, x2, y2), (x3, y3, x4, y4) = segments[i], segments[j]
+            denominator = (x2 - x1) * (y4 - y3) - (y2 - y1) * (x4 - x3)
+            t = ((x3 - x1) * (y4 - y3) - (y3 - y1) * (x4 - x3)) / denominator
+            u = ((x3 - x1) * (y2 - y1) - (y3 - y1) * (x2 - x1)) / denominator
+            if 0 <= t <= 1 and 0 <= u <= 1:
+                expected.append((x1 + t * (x2 - x1), y1 + t * (y2 - y1)))
+    assert np.allclose(get_intersections(segments), expected)
+
+
+def test_cursor_snaps_while_drawing_a_polygon(create_view):
+    tool = GeometryTool()
+    tool.set_geometry_type("polygon")
+    view = create_view(tool=tool, fit_cursor_into_grid=False)
+    scene = view.scene()
+
+    def move_and_click(x, y, button=Qt.LeftButton):
+        pos = QPointF(view.mapFromScene(QPointF(x, y)))
+        view.mouseMoveEvent(mouse_event(QEvent.MouseMove, pos, Qt.NoButton))
+        view.mousePressEvent(
+            mouse_event(QEvent.MouseButtonPress, pos, button)
+        )
+        view.mouseReleaseEvent(
+            mouse_event(QEvent.MouseButtonRelease, pos, button)
+        )
+
+    create_rect(scene, 300, 300, 400, 400)
+    move_and_click(100, 100)
+    move_and_click(100, 100)
+    move_and_click(200, 100)
+    polygon = tool.current_instance
+    # Snaps to the midpoint of the edge drawn so far
+    move_and_click(151, 102)
+    assert view.cursor_snap_kind == SnapKind.Midpoint
+    # And to the corner of the rect, at its exact position
+    move_and_click(303.4, 298.2)
+    assert view.cursor_snap_kind == SnapKind.Vertex
+    move_and_click(303.4, 298.2, Qt.MiddleButton)
+
+    assert isinstance(polygon, VGEGraphicsPolygonItem)
+    assert tool.current_instance is None
+    assert list(polygon.polygon())[-2:] == [
+        QPointF(150, 100), QPointF(300, 300)
+    ]
+    # The finished polygon snaps from its final geometry
+    assert scene.snap_engine.snap(QPointF(199, 99), 3) == (
+        QPointF(200, 100), SnapKind.Vertex
+    )
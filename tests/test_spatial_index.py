@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from PySide6.QtCore import QPointF, QRectF
+
+from core.graphics import spatial_index
+from core.graphics.spatial_index import BoundsGrid, SpatialIndex
+
+
+def random_rect(random, max_size: float) -> QRectF:
+    x, y = random.uniform(-500, 500, 2)
+    width, height = random.uniform(0, max_size, 2)
+    return QRectF(x, y, width, height)
+
+
+def brute_force(rects: dict, query: QRectF) -> list:
+    return sorted(
+        id_ for id_, rect in rects.items()
+        if rect.left() <= query.right() and rect.right() >= query.left()
+        and rect.top() <= query.bottom() and rect.bottom() >= query.top()
+    )
+
+
+@pytest.mark.parametrize("min_pending", [0, 10**9])
+def test_queries_match_brute_force(monkeypatch, min_pending):
+    monkeypatch.setattr(spatial_index, "MIN_REBUILD_PENDING", min_pending)
+    random = np.random.default_rng(1)
+    index = SpatialIndex()
+    rects = {}
+    objects = {}
+    for step in range(3000):
+        action = random.uniform()
+        if action < 0.6 or not rects:
+            # Mostly small objects and a few spanning many cells
+            rect = random_rect(random, 300 if action < 0.02 else 20)
+            obj = object()
+            id_ = index.insert(obj, rect)
+            rects[id_], objects[id_] = rect, obj
+        elif action < 0.75:
+            id_ = int(random.choice(list(rects)))
+            rects[id_] = random_rect(random, 20)
+            index.update(objects[id_], rects[id_])
+        elif action < 0.8:
+            ids = random.choice(list(rects), min(len(rects), 5), False)
+            dx, dy = random.uniform(-50, 50, 2)
+            index.translate(ids, dx, dy)
+            for id_ in ids.tolist():
+                rects[id_] = rects[id_].translated(dx, dy)
+        elif action < 0.85:
+            id_ = int(random.choice(list(rects)))
+            assert index.remove(objects.pop(id_)) == id_
+            del rects[id_]
+        else:
+            query = random_rect(random, 400 if action > 0.98 else 40)
+            assert index.ids_in_rect(query).tolist() == brute_force(
+                rects, query
+            )
+    assert len(index) == len(rects)
+    assert index.objects([min(rects)]) == [objects[min(rects)]]
+
+
+def test_bounds_added_in_bulk():
+    random = np.random.default_rng(2)
+    corners = random.uniform(-500, 500, (5000, 2))
+    bounds = np.hstack((corners, corners + random.uniform(0, 20, (5000, 2))))
+    grid = BoundsGrid()
+    assert grid.extend(bounds[:3000]).tolist() == list(range(3000))
+    # Built, then extended
+    grid.ids_in_rect(QRectF(0, 0, 1, 1))
+    grid.extend(bounds[3000:])
+    grid.remove_id(10)
+    rects = {
+        id_: QRectF(QPointF(*row[:2]), QPointF(*row[2:]))
+        for id_, row in enumerate(bounds.tolist()) if id_ != 10
+    }
+
+    assert len(grid) == len(rects)
+    for _ in range(20):
+        query = random_rect(random, 100)
+        assert grid.ids_in_rect(query).tolist() == brute_force(rects, query)
+
+
+def test_clear():
+    index = SpatialIndex()
+    index.insert("a", QRectF(0, 0, 1, 1))
+    index.clear()
+    assert len(index) == 0
+    assert index.id_count == 0
+    assert index.ids_in_rect(QRectF(-1, -1, 3, 3)).tolist() == []
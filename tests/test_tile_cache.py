@@ -0,0 +1,83 @@
+import pytest
+from PySide6.QtCore import Qt, QPointF, QRectF
+from PySide6.QtTest import QTest
+
+from core.graphics.graphics_items import VGEGraphicsRectItem
+from core.graphics.graphics_tools import SelectionTool
+from core.graphics.tile_cache import SceneTileCache
+from tests.conftest import CountingRectItem
+
+
+@pytest.fixture
+def view(create_view, application):
+    view = create_view(
+        (0, 0, 4000, 4000), (400, 300), SelectionTool(),
+        draw_grid=False, draw_ruler=False,
+    )
+    view.set_tile_cache(SceneTileCache(view.scene(), 2**24, 1, parent=view))
+    view.show()
+    view.centerOn(200, 150)
+    application.processEvents()
+    return view
+
+
+def add_rect(scene, rect: QRectF) -> VGEGraphicsRectItem:
+    item = VGEGraphicsRectItem(rect.topLeft(), scene)
+    item.setRect(rect)
+    item.setBrush(Qt.red)
+    return item
+
+
+def test_tiles_are_drawn_once_rendered(view, application):
+    add_rect(view.scene(), QRectF(100, 100, 50, 50))
+    application.processEvents()
+    direct = view.viewport().grab().toImage()
+    assert not view.tile_cache.tiles
+
+    QTest.qWait(300)
+    assert view.tile_cache.tiles
+    cached = view.viewport().grab().toImage()
+    center = view.mapFromScene(125, 125)
+    assert cached.pixelColor(center) == direct.pixelColor(center)
+    assert cached.pixelColor(center) == Qt.red
+
+
+def test_changes_drop_the_overlapping_tiles(view, application):
+    item = add_rect(view.scene(), QRectF(10, 10, 20, 20))
+    application.processEvents()
+    QTest.qWait(300)
+    keys = set(view.tile_cache.tiles)
+    assert len(keys) > 1
+
+    item.setRect(QRectF(10, 10, 30, 30))
+    application.processEvents()
+    changed = item.sceneBoundingRect()
+    dropped = keys - set(view.tile_cache.tiles)
+    assert dropped
+    for key in keys:
+        overlaps = view.tile_cache._scene_rect(key).intersects(changed)
+        assert (key in dropped) == overlaps
+
+    # The view paints the dropped tiles until they are rendered again
+    view.viewport().repaint()
+    assert keys - set(view.tile_cache.tiles)
+    QTest.qWait(300)
+    assert keys <= set(view.tile_cache.tiles)
+
+
+def test_items_that_cannot_be_copied_are_painted_by_the_view(
+        view, application
+):
+    item = CountingRectItem(QRectF(100, 100, 50, 50))
+    view.scene().addItem(item)
+    application.processEvents()
+    QTest.qWait(300)
+    tile_pos = view.mapFromScene(QPointF(125, 125))
+    assert view.tile_cache.tiles
+    for key in view.tile_cache.tiles:
+        rect = view.tile_cache._viewport_rect(key[4], key[5], key[3])
+        assert not rect.contains(tile_pos)
+
+    paint_count = item.paint_count
+    view.viewport().repaint()
+    assert item.paint_count == paint_count + 1
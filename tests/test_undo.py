@@ -0,0 +1,113 @@
+import pytest
+from PySide6.QtCore import Qt, QEvent, QPointF
+
+from core.graphics import undo
+from core.graphics.graphics_items import VGEGraphicsRectItem
+from core.graphics.graphics_tools import GeometryTool, SelectionTool
+from core.graphics.undo import MoveItemsCommand, UndoStack
+from tests.conftest import drag, mouse_event, view_pos
+
+
+@pytest.fixture
+def view(create_view):
+    return create_view(fit_cursor_into_grid=False, snap_to_objects=False)
+
+
+def click(view, x, y, button=Qt.LeftButton):
+    pos = view_pos(view, x, y)
+    view.mouseMoveEvent(mouse_event(QEvent.MouseMove, pos, Qt.NoButton))
+    view.mousePressEvent(mouse_event(QEvent.MouseButtonPress, pos, button))
+    view.mouseReleaseEvent(
+        mouse_event(QEvent.MouseButtonRelease, pos, button)
+    )
+
+
+def test_undo_drawing_a_polygon(view):
+    scene = view.scene()
+    tool = GeometryTool()
+    tool.set_geometry_type("polygon")
+    view.setActiveGraphicTool(tool)
+    for x, y in ((100, 100), (200, 100), (200, 200)):
+        click(view, x, y)
+    polygon = tool.current_instance
+    undo_stack = scene.undo_stack
+
+    undo_stack.undo()
+    assert list(polygon.points) == [QPointF(100, 100), QPointF(200, 100)]
+    click(view, 150, 300)
+    click(view, 150, 300, Qt.MiddleButton)
+    assert list(polygon.polygon())[-1] == QPointF(150, 300)
+    # Adding a point dropped the undone one
+    assert not undo_stack.can_redo()
+
+    undo_stack.undo()
+    assert list(polygon.polygon()) == [QPointF(100, 100), QPointF(200, 100)]
+    undo_stack.undo()
+    undo_stack.undo()
+    assert polygon.scene() is None
+    assert not undo_stack.can_undo()
+
+    undo_stack.redo()
+    undo_stack.redo()
+    assert polygon.scene() is scene
+    assert scene.item_id_at(QPointF(150, 100), 1) == (
+        scene.spatial_index.id(polygon)
+    )
+    assert list(polygon.polygon()) == [QPointF(100, 100), QPointF(200, 100)]
+
+
+def test_drags_are_merged(view):
+    scene = view.scene()
+    view.setActiveGraphicTool(SelectionTool())
+    rect = VGEGraphicsRectItem(QPointF(100, 100), scene)
+    rect.update_last_point(QPointF(150, 150))
+
+    tool = view.active_graphic_tool
+    tool.mousePressEvent(mouse_event(
+        QEvent.MouseButtonPress, view_pos(view, 120, 120)
+    ))
+    for x in (130, 140, 150):
+        tool.mouseMoveEvent(mouse_event(
+            QEvent.MouseMove, view_pos(view, x, 120)
+        ))
+    tool.mouseReleaseEvent(mouse_event(
+        QEvent.MouseButtonRelease, view_pos(view, 150, 120)
+    ))
+    drag(view, view_pos(view, 160, 120), view_pos(view, 160, 140))
+    assert rect.pos() == QPointF(30, 20)
+
+    scene.undo_stack.undo()
+    assert rect.pos() == QPointF(30, 0)
+    scene.undo_stack.undo()
+    assert rect.pos() == QPointF(0, 0)
+    assert scene.item_id_at(QPointF(110, 110)) == scene.spatial_index.id(rect)
+
+
+def test_big_commands_are_applied_in_batches(view, monkeypatch):
+    monkeypatch.setattr(undo, "APPLY_BATCH_SIZE", 10)
+    monkeypatch.setattr(undo, "APPLY_BATCH_TIME", 0)
+    scene = view.scene()
+    rects = [VGEGraphicsRectItem(QPointF(i, i), scene) for i in range(100)]
+    ids = [scene.spatial_index.id(rect) for rect in rects]
+    scene.move_items(ids, 5, 0)
+    scene.undo_stack.push(MoveItemsCommand(ids, 5, 0))
+
+    scene.undo_stack.undo()
+    assert scene.undo_stack.is_applying()
+    assert rects[0].pos() == QPointF(0, 0)
+    assert rects[-1].pos() == QPointF(5, 0)
+    scene.undo_stack.flush()
+    assert [rect.pos() for rect in rects] == [QPointF(0, 0)] * 100
+
+
+def test_memory_budget_drops_oldest_commands(application):
+    undo_stack = UndoStack(None, 3 * MoveItemsCommand([0] * 10, 0, 0).size())
+    commands = [MoveItemsCommand([i] * 10, 1, 1) for i in range(5)]
+    for command in commands:
+        undo_stack.push(command)
+    assert list(undo_stack._undo_commands) == commands[2:]
+    assert undo_stack.memory_size <= undo_stack.memory_budget
+    # Moves of the same items merge without growing
+    undo_stack.push(MoveItemsCommand([4] * 10, 1, 1), merge=True)
+    assert len(undo_stack._undo_commands) == 3
+    assert commands[-1].dx == 2